@@ -1,16 +1,35 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, Set
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set
+
+from .. import job_store
+
+# Seconds between checks for job updates and recorder events written by other processes
+# (e.g. a separate Celery worker) while anyone is subscribed; 0 relies on in-process updates only.
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", "1"))
+# Updates a slow subscriber may fall behind by before the oldest are dropped.
+JOB_EVENTS_QUEUE_SIZE = 256
 
 
 class RecorderEventBroker:
-    """Manages recorder event subscribers for WebSocket/SSE streaming."""
+    """Manages recorder event subscribers for WebSocket/SSE streaming.
 
-    def __init__(self) -> None:
+    A process that never had a subscriber (e.g. a separate Celery worker) has no
+    loop to hand events to, so it writes them to :mod:`app.job_store` instead.
+    While anyone is subscribed, the API polls those rows and delivers them here.
+    """
+
+    def __init__(self, poll_interval: float = JOB_EVENTS_POLL_INTERVAL) -> None:
+        self.poll_interval = poll_interval
         self._listeners: Dict[str, Set[asyncio.Queue]] = {}
         self._lock = asyncio.Lock()
         self._loop: asyncio.AbstractEventLoop | None = None
+        self._cursor: Optional[int] = None
+        self._poller: Optional[asyncio.Task] = None
 
     async def connect(self, session_id: str) -> asyncio.Queue:
         queue: asyncio.Queue = asyncio.Queue()
@@ -18,6 +37,9 @@ class RecorderEventBroker:
             listeners = self._listeners.setdefault(session_id, set())
             listeners.add(queue)
             self._loop = asyncio.get_running_loop()
+            if self.poll_interval > 0 and (self._poller is None or self._poller.done()):
+                self._cursor = None
+                self._poller = asyncio.create_task(self._poll())
         return queue
 
     async def disconnect(self, session_id: str, queue: asyncio.Queue) -> None:
@@ -36,13 +58,124 @@ class RecorderEventBroker:
             await queue.put(message)
 
     def publish_from_thread(self, session_id: str, message: Dict[str, Any]) -> None:
-        """Allow synchronous contexts to enqueue events by scheduling on the captured loop."""
+        """Allow synchronous contexts to enqueue events by scheduling on the captured loop.
+
+        Without one, the event is persisted for the API process to pick up.
+        """
 
         loop = self._loop
-        if not loop or loop.is_closed():
+        if loop and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.publish(session_id, message), loop)
             return
-        asyncio.run_coroutine_threadsafe(self.publish(session_id, message), loop)
+        try:
+            job_store.add_recorder_event(session_id, message)
+        except Exception:  # noqa: BLE001 - events are best-effort and must never fail the recorder
+            pass
+
+    async def _poll(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._listeners:
+            try:
+                if self._cursor is None:
+                    # Only events raised after the first subscriber connected are streamed
+                    self._cursor = await loop.run_in_executor(None, job_store.last_recorder_event_id)
+                    continue
+                rows = await loop.run_in_executor(None, job_store.recorder_events_since, self._cursor)
+            except Exception:  # noqa: BLE001 - e.g. database locked; retry next tick
+                rows = []
+            for row in rows:
+                self._cursor = row["id"]
+                await self.publish(row["sessionId"], row["event"])
+            await asyncio.sleep(self.poll_interval)
 
 
 recorder_events = RecorderEventBroker()
 
+
+
+class JobEventBroker:
+    """Fans job updates out to SSE subscribers of one job or of all jobs.
+
+    Updates made in this process arrive through a :mod:`app.job_store` listener.
+    Updates written by other processes are picked up by a single shared poll of
+    the indexed ``updated_at`` column, which only runs while someone is subscribed,
+    so the database sees one query per interval however many clients watch.
+    Each job's events are delivered in ``updatedAt`` order without duplicates.
+    """
+
+    ALL = "*"
+    _SEEN_LIMIT = 4096
+    # Rows committed slightly after their updated_at timestamp are still picked up.
+    _POLL_OVERLAP = timedelta(seconds=2)
+
+    def __init__(self, poll_interval: float = JOB_EVENTS_POLL_INTERVAL, queue_size: int = JOB_EVENTS_QUEUE_SIZE) -> None:
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._seen: "OrderedDict[str, str]" = OrderedDict()
+        self._watermark: Optional[str] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    async def connect(self, job_id: Optional[str] = None) -> asyncio.Queue:
+        """Subscribe to one job's events, or to every job's when ``job_id`` is None."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._loop = asyncio.get_running_loop()
+        self._listeners.setdefault(job_id or self.ALL, set()).add(queue)
+        if self.poll_interval > 0 and (self._poller is None or self._poller.done()):
+            self._watermark = datetime.now(timezone.utc).isoformat()
+            self._poller = asyncio.create_task(self._poll())
+        return queue
+
+    async def disconnect(self, job_id: Optional[str], queue: asyncio.Queue) -> None:
+        key = job_id or self.ALL
+        listeners = self._listeners.get(key)
+        if not listeners:
+            return
+        listeners.discard(queue)
+        if not listeners:
+            self._listeners.pop(key, None)
+
+    def publish_from_thread(self, event: Dict[str, Any]) -> None:
+        """Job store listener: hand ``event`` to the event loop from any thread."""
+        loop = self._loop
+        if not self._listeners or not loop or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, event)
+        except RuntimeError:  # loop closed between the check and the call
+            pass
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        job_id, updated_at = event["jobId"], event["updatedAt"]
+        last = self._seen.get(job_id)
+        if last is not None and last >= updated_at:
+            return
+        self._seen[job_id] = updated_at
+        self._seen.move_to_end(job_id)
+        while len(self._seen) > self._SEEN_LIMIT:
+            self._seen.popitem(last=False)
+        queues = self._listeners.get(job_id, set()) | self._listeners.get(self.ALL, set())
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _poll(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._listeners:
+            await asyncio.sleep(self.poll_interval)
+            since = self._watermark or datetime.now(timezone.utc).isoformat()
+            since = (datetime.fromisoformat(since) - self._POLL_OVERLAP).isoformat()
+            try:
+                events = await loop.run_in_executor(None, job_store.job_events_since, since)
+            except Exception:  # noqa: BLE001 - e.g. database locked; retry next tick
+                continue
+            for event in events:
+                self._dispatch(event)
+                if self._watermark is None or event["updatedAt"] > self._watermark:
+                    self._watermark = event["updatedAt"]
+
+
+job_events = JobEventBroker()
+job_store.add_job_listener(job_events.publish_from_thread)
@@ -3,7 +3,6 @@ from __future__ import annotations
 import base64
 import logging
 import os
-import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -19,6 +18,7 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
 # Custom log filter to suppress noisy status polling
 class StatusPollFilter(logging.Filter):
@@ -35,12 +35,13 @@ try:
 except Exception:
     load_dotenv = None  # type: ignore
 
-from .. import job_store
-from ..services.refined_flow_service import RecorderSessionResult, finalize_recorder_session
+from .. import job_store, recorder_registry
+from ..services.refined_flow_service import RecorderSessionResult, finalize_recorder_session, submit_finalize_job
+from ..services.export_service import XLSX_MEDIA_TYPE, export_dataframe, get_export
+from ..template_utils import load_excel_template
 from ..services.test_case_service import (
     TestCaseGenerationError,
     TestCaseService,
-    dataframe_to_excel_bytes,
 )
 from ..tasks import (
     enqueue_ingest_documents,
@@ -92,15 +93,19 @@ class RecorderEventPayload(BaseModel):
 class TestCaseRequest(BaseModel):
     story: str = Field(..., description="Jira story / scenario description.")
     llmOnly: bool = Field(False, description="Skip deterministic injection when true.")
-    asExcel: bool = Field(False, description="Return results as XLSX bytes if true.")
+    asExcel: bool = Field(False, description="Export results as XLSX (download via excelUrl) if true.")
+    inlineExcel: bool = Field(False, description="Also embed the XLSX as base64 in the response (legacy clients).")
 
 
 class TestCaseResponse(BaseModel):
     records: List[Dict[str, Any]]
     excel: Optional[str] = Field(
         None,
-        description="Base64 encoded XLSX payload when requested via asExcel=true.",
+        description="Base64 encoded XLSX payload, only when inlineExcel=true.",
     )
+    exportId: Optional[str] = Field(None, description="Handle of the XLSX export.")
+    excelUrl: Optional[str] = Field(None, description="Streaming download URL of the XLSX export.")
+    excelBytes: Optional[int] = Field(None, description="Size of the XLSX export in bytes.")
 
 
 class RecorderSessionCreateRequest(BaseModel):
@@ -118,17 +123,6 @@ class JobEnqueueResponse(BaseModel):
     jobId: str
 
 
-class JobDetailResponse(BaseModel):
-    jobId: str
-    type: str
-    status: str
-    payload: Dict[str, Any] | None = None
-    result: Dict[str, Any] | None = None
-    error: Optional[str] = None
-    createdAt: str
-    updatedAt: str
-
-
 class IngestJiraRequest(BaseModel):
     jql: str
 
@@ -139,6 +133,7 @@ class IngestWebsiteRequest(BaseModel):
 
 
 job_store.init_job_store()
+recorder_registry.init_recorder_registry()
 
 def _load_env_files() -> None:
     """Load environment variables from .env files.
@@ -188,27 +183,18 @@ def _session_identifier(session_dir: Path) -> str:
     return session_dir.name
 
 
-def _job_dict_to_response(job: Dict[str, Any]) -> JobDetailResponse:
-    return JobDetailResponse(
-        jobId=job["id"],
-        type=job["type"],
-        status=job["status"],
-        payload=job.get("payload"),
-        result=job.get("result"),
-        error=job.get("error"),
-        createdAt=job["created_at"],
-        updatedAt=job["updated_at"],
-    )
-
-
 @app.post("/api/refined-flows/finalize", response_model=RecorderSessionResponse)
 async def finalize_recorder(req: FinalizeRecorderRequest) -> RecorderSessionResponse:
     session_dir = Path(req.sessionDir).expanduser().resolve()
     if not session_dir.exists():
         raise HTTPException(status_code=404, detail=f"Session directory not found: {session_dir}")
 
-    result = finalize_recorder_session(session_dir)
     session_id = _session_identifier(session_dir)
+    result = await run_in_threadpool(
+        finalize_recorder_session,
+        session_dir,
+        on_event=lambda event: recorder_events.publish_from_thread(session_id, event),
+    )
     await recorder_events.publish(
         session_id,
         {
@@ -231,23 +217,17 @@ async def finalize_recorder_by_session(req: dict) -> dict:
     if not session_dir.exists():
         raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
     
-    # Run finalization in background daemon thread - will auto-terminate on server restart
-    def background_finalize():
-        try:
-            result = finalize_recorder_session(session_dir)
-            print(f"[Finalize] Session {session_id} finalized successfully")
-            print(f"[Finalize] Auto-ingest status: {result.auto_ingest_status}")
-        except Exception as e:
-            print(f"[Finalize] Error finalizing session {session_id}: {e}")
-    
-    thread = threading.Thread(target=background_finalize, daemon=True)
-    thread.start()
-    
-    # Return immediately - daemon thread will complete or die on restart
+    # Runs on the bounded finalize pool; stage progress is visible via /api/jobs/{jobId}
+    job_id = submit_finalize_job(
+        session_dir,
+        on_event=lambda event: recorder_events.publish_from_thread(session_id, event),
+        payload={"sessionId": session_id},
+    )
     return {
         "status": "processing",
         "sessionId": session_id,
-        "message": "Finalization started in background (will complete or auto-cancel on restart)"
+        "jobId": job_id,
+        "message": "Finalization started in background",
     }
 
 
@@ -292,6 +272,22 @@ async def recorder_event_stream(websocket: WebSocket, session_id: str) -> None:
         await recorder_events.disconnect(session_id, queue)
 
 
+async def _test_case_response_with_export(
+    records: List[Dict[str, Any]], df: Any, *, inline: bool
+) -> TestCaseResponse:
+    handle = await run_in_threadpool(export_dataframe, df)
+    excel_b64: Optional[str] = None
+    if inline:
+        excel_b64 = base64.b64encode(handle.path.read_bytes()).decode("utf-8")
+    return TestCaseResponse(
+        records=records,
+        excel=excel_b64,
+        exportId=handle.export_id,
+        excelUrl=f"/api/exports/{handle.export_id}",
+        excelBytes=handle.size,
+    )
+
+
 @app.post("/api/test-cases/generate", response_model=TestCaseResponse)
 async def generate_test_cases(req: TestCaseRequest) -> TestCaseResponse:
     try:
@@ -299,14 +295,9 @@ async def generate_test_cases(req: TestCaseRequest) -> TestCaseResponse:
     except TestCaseGenerationError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     records = service_result["records"]
-    df = service_result["dataframe"]
-
-    excel_b64: Optional[str] = None
-    if req.asExcel:
-        excel_bytes = dataframe_to_excel_bytes(df)
-        excel_b64 = base64.b64encode(excel_bytes).decode("utf-8")
-
-    return TestCaseResponse(records=records, excel=excel_b64)
+    if not req.asExcel:
+        return TestCaseResponse(records=records)
+    return await _test_case_response_with_export(records, service_result["dataframe"], inline=req.inlineExcel)
 
 
 @app.post("/api/test-cases/generate-upload", response_model=TestCaseResponse)
@@ -314,6 +305,7 @@ async def generate_test_cases_with_upload(
     story: str = Form(...),
     llmOnly: bool = Form(False),
     template: UploadFile | None = File(None),
+    inlineExcel: bool = Form(False),
 ) -> TestCaseResponse:
     """Generate test cases with optional Excel template upload.
 
@@ -321,6 +313,7 @@ async def generate_test_cases_with_upload(
     - story: text content to generate test cases from
     - llmOnly: whether to skip deterministic injection
     - template: optional Excel file (.xlsx or .xls) used to map fields
+    - inlineExcel: also embed the XLSX as base64 (legacy clients); otherwise download it from excelUrl
     """
     template_df = None
     if template is not None and template.filename:
@@ -328,10 +321,8 @@ async def generate_test_cases_with_upload(
         try:
             if name.endswith(".xlsx") or name.endswith(".xls"):
                 content = await template.read()
-                import pandas as _pd  # local import to avoid global import for this path
-                from io import BytesIO as _BytesIO
-
-                template_df = _pd.read_excel(_BytesIO(content))
+                # sanitized + parsed once per distinct template, then served from the cache
+                template_df = await run_in_threadpool(load_excel_template, content)
             else:
                 # Non-Excel templates are ignored (parity with Streamlit UI)
                 template_df = None
@@ -343,11 +334,18 @@ async def generate_test_cases_with_upload(
     except TestCaseGenerationError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    records = service_result["records"]
-    df = service_result["dataframe"]
-    excel_bytes = dataframe_to_excel_bytes(df)
-    excel_b64 = base64.b64encode(excel_bytes).decode("utf-8")
-    return TestCaseResponse(records=records, excel=excel_b64)
+    return await _test_case_response_with_export(
+        service_result["records"], service_result["dataframe"], inline=inlineExcel
+    )
+
+
+@app.get("/api/exports/{export_id}")
+async def download_export(export_id: str) -> FileResponse:
+    """Stream a generated XLSX export from disk."""
+    handle = get_export(export_id)
+    if handle is None:
+        raise HTTPException(status_code=404, detail="Export not found or expired")
+    return FileResponse(handle.path, media_type=XLSX_MEDIA_TYPE, filename=handle.filename)
 
 
 @app.post("/api/ingest/jira", response_model=JobEnqueueResponse, status_code=202)
@@ -410,14 +408,6 @@ async def delete_vector_by_source_sync(source: str) -> dict:
     return {"deletedSource": source, "status": "success"}
 
 
-@app.get("/api/jobs/{job_id}", response_model=JobDetailResponse)
-async def get_job_detail(job_id: str) -> JobDetailResponse:
-    job = job_store.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found.")
-    return _job_dict_to_response(job)
-
-
 class GitPushRequest(BaseModel):
     repoUrl: str
     branch: str = "main"
@@ -470,6 +460,7 @@ from .routers import trial as r_trial
 from .routers import files as r_files
 from .routers import config as r_config
 from .routers import vector as r_vector
+from .routers import jobs as r_jobs
 
 app.include_router(r_health.router)
 app.include_router(r_manual.router)
@@ -481,6 +472,15 @@ app.include_router(r_trial.router)
 app.include_router(r_files.router)
 app.include_router(r_config.router)
 app.include_router(r_vector.router)
+app.include_router(r_jobs.router)
+
+
+@app.on_event("startup")
+def _start_maintenance_threads() -> None:
+    # Clean up recorders orphaned by a previous API process, then keep checking
+    recorder_registry.start_reaper()
+    # Archive finished jobs past JOB_RETENTION_DAYS so the jobs table stays small
+    job_store.start_compactor()
 
 
 if __name__ == "__main__":
@@ -8,11 +8,13 @@ from ..auth import jwt_required
 from ..framework_resolver import resolve_framework_root
 from pathlib import Path
 from ..sse import _format_sse
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import StreamingResponse
 from typing import AsyncGenerator
 import re
 from ...trial_spec_adapter import trial_env_overrides
 from ...services.config_service import find_test_manager_path as _find_tm
+from ...services.testmanager_service import get_test_manager, scenario_references
 try:
     from openpyxl import load_workbook  # type: ignore
 except Exception:  # pragma: no cover
@@ -312,7 +314,8 @@ async def trial_run(req: TrialRunRequest) -> TrialRunResponse:
             if req.updateTestManager and (req.scenario or "").strip():
                 try:
                     from ...services.config_service import update_test_manager_entry as _upd
-                    upd = _upd(
+                    upd = await run_in_threadpool(
+                        _upd,
                         root,
                         scenario=(req.scenario or "").strip(),
                         execute_value="Yes",
@@ -384,7 +387,10 @@ async def trial_run(req: TrialRunRequest) -> TrialRunResponse:
                     shutil.rmtree(results_dir, ignore_errors=True)
             except Exception:
                 pass
-            success, logs = run_trial_in_framework(content, root, headed=req.headed, env_overrides=env_overrides)
+            # Run off the event loop: the executor may wait in the trial scheduler queue
+            success, logs = await run_in_threadpool(
+                run_trial_in_framework, content, root, headed=req.headed, env_overrides=env_overrides, spec_name=(req.scenario or None)
+            )
             logger.info(banner.strip())
             logs = banner + logs
             if replaced:
@@ -408,7 +414,9 @@ async def trial_run(req: TrialRunRequest) -> TrialRunResponse:
         pw = env_overrides.get("PASSWORD") or env_overrides.get("TRIAL_PASSWORD") or ""
         base = env_overrides.get("BASE_URL") or env_overrides.get("URL") or env_overrides.get("TRIAL_BASE_URL") or env_overrides.get("TRIAL_URL") or ""
         banner = "[trial-creds] username=" + (user or "<empty>") + ", password=" + _mask_pw(pw) + (", base_url=" + base if base else "") + "\n"
-        success, logs = run_trial(content, headed=req.headed, env_overrides=env_overrides)
+        success, logs = await run_in_threadpool(
+            run_trial, content, headed=req.headed, env_overrides=env_overrides, spec_name=(req.scenario or None)
+        )
         logger.info(banner.strip())
         logs = banner + logs
         if replaced:
@@ -455,7 +463,8 @@ async def trial_run_existing(req: TrialRunExistingRequest) -> TrialRunResponse:
         logger.info(f"[TrialRunExisting] Updating testmanager.xlsx for scenario: '{req.scenario}'")
         try:
             from ...services.config_service import update_test_manager_entry as _upd
-            upd_info = _upd(
+            upd_info = await run_in_threadpool(
+                _upd,
                 root,
                 scenario=(req.scenario or "").strip(),
                 execute_value="Yes",
@@ -538,36 +547,13 @@ async def trial_run_existing(req: TrialRunExistingRequest) -> TrialRunResponse:
     # Helper: read ReferenceID/IDName from testmanager.xlsx for the provided scenario
     def _read_refs_from_excel(root_path, scenario: str) -> tuple[str | None, str | None]:
         try:
-            if not scenario:
-                return None, None
             tm = _find_tm(root_path)
-            if not tm or not load_workbook:
-                return None, None
-            wb = load_workbook(tm)
-            ws = wb.active
-            header = [str(c.value or "").strip() for c in ws[1]] if ws.max_row >= 1 else []
-            def _idx(name: str) -> int | None:
-                lname = name.lower()
-                for i, h in enumerate(header):
-                    if lname == h.lower() or lname in h.lower():
-                        return i
-                return None
-            id_i = _idx("TestCaseID")
-            ref_i = _idx("ReferenceID")
-            name_i = _idx("IDName")
-            if id_i is None:
-                return None, None
-            for r in ws.iter_rows(min_row=2, values_only=True):
-                case_id = str((r[id_i] if id_i is not None and id_i < len(r) else "") or "").strip()
-                if not case_id:
-                    continue
-                if case_id.lower() == scenario.strip().lower():
-                    ref_val = str((r[ref_i] if ref_i is not None and ref_i < len(r) else "") or "").strip() if ref_i is not None else ""
-                    id_name_val = str((r[name_i] if name_i is not None and name_i < len(r) else "") or "").strip() if name_i is not None else ""
-                    return (ref_val or None), (id_name_val or None)
+            refs = scenario_references(tm, scenario) if tm and load_workbook else None
         except Exception:
             return None, None
-        return None, None
+        if not refs:
+            return None, None
+        return (",".join(refs.reference_ids) or None), refs.id_name
 
     # Determine ReferenceIDs to run
     ref_ids: list[str] = []
@@ -583,7 +569,7 @@ async def trial_run_existing(req: TrialRunExistingRequest) -> TrialRunResponse:
     excel_idname: str | None = None
     effective_id_name = req.idName
     if not ref_ids and (req.scenario or "").strip():
-        excel_ref_val, excel_idname = _read_refs_from_excel(root, (req.scenario or "").strip())
+        excel_ref_val, excel_idname = await run_in_threadpool(_read_refs_from_excel, root, (req.scenario or "").strip())
         if excel_ref_val:
             # Support comma, semicolon, whitespace, and newline-separated values
             import re as _re
@@ -609,13 +595,25 @@ async def trial_run_existing(req: TrialRunExistingRequest) -> TrialRunResponse:
                     "ID_NAME": effective_id_name,
                     "DATA_ID_NAME": effective_id_name,
                 })
-        success, logs = run_trial_in_framework(content, root, headed=req.headed, env_overrides=env)
+        success, logs = await run_in_threadpool(
+            run_trial_in_framework, content, root, headed=req.headed, env_overrides=env, spec_name=req.testFilePath
+        )
         logs = (f"[trial-note] Unskipped tests for this run.\n" if replaced else "") + banner + logs
         return TrialRunResponse(success=bool(success), logs=logs, updateInfo=upd_info)
 
-    # Parallel path
+    # Parallel path: bin-pack ReferenceIDs onto workers using recorded durations
+    from ...parallel_data_resolver import plan_reference_shards
+    from ...trial_history import estimate_durations
+
     max_workers = min(3, len(ref_ids))
-    logger.info(f"[TrialRunExisting] Running parallel executions for {len(ref_ids)} ReferenceIDs (max_workers={max_workers})")
+    history_spec = req.testFilePath.replace("\\", "/")
+    try:
+        estimates = estimate_durations(ref_ids, spec=history_spec)
+    except Exception as hist_exc:
+        logger.warning(f"[TrialRunExisting] Duration history unavailable: {hist_exc}")
+        estimates = {}
+    shards = [shard for shard in plan_reference_shards(ref_ids, max_workers, estimates) if shard]
+    logger.info(f"[TrialRunExisting] Running parallel executions for {len(ref_ids)} ReferenceIDs (max_workers={max_workers}, shards={shards})")
 
     def _run_for_ref(ref: str) -> tuple[str, bool, str]:
         env = os.environ.copy()
@@ -630,23 +628,34 @@ async def trial_run_existing(req: TrialRunExistingRequest) -> TrialRunResponse:
                 "DATA_ID_NAME": effective_id_name,
             })
         try:
-            ok, logs = run_trial_in_framework(content, root, headed=req.headed, env_overrides=env)
+            # Duration is measured inside the scheduler slot so queue wait does not skew sharding
+            ok, logs = run_trial_in_framework(
+                content, root, headed=req.headed, env_overrides=env, spec_name=history_spec, record_duration=True
+            )
             combined = f"[reference:{ref}]\n" + ((f"[trial-note] Unskipped tests for this run.\n" if replaced else "") + banner + logs)
             return ref, bool(ok), combined
         except Exception as exec_exc:
             logger.error(f"[TrialRunExisting] Parallel execution failed for {ref}: {exec_exc}", exc_info=True)
             return ref, False, f"[reference:{ref}]\n" + banner + f"Execution error: {exec_exc}"
 
-    results: list[tuple[str, bool, str]] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        futures = {pool.submit(_run_for_ref, ref): ref for ref in ref_ids}
-        for fut in as_completed(futures):
-            try:
-                results.append(fut.result())
-            except Exception as e:  # pragma: no cover
-                r = futures[fut]
-                logger.error(f"[TrialRunExisting] Worker crashed for {r}: {e}")
-                results.append((r, False, f"[reference:{r}]\n" + banner + f"Execution error: {e}"))
+    def _run_shard(shard: list[str]) -> list[tuple[str, bool, str]]:
+        return [_run_for_ref(ref) for ref in shard]
+
+    def _run_all() -> list[tuple[str, bool, str]]:
+        collected: list[tuple[str, bool, str]] = []
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            futures = {pool.submit(_run_shard, shard): shard for shard in shards}
+            for fut in as_completed(futures):
+                try:
+                    collected.extend(fut.result())
+                except Exception as e:  # pragma: no cover
+                    for r in futures[fut]:
+                        logger.error(f"[TrialRunExisting] Worker crashed for {r}: {e}")
+                        collected.append((r, False, f"[reference:{r}]\n" + banner + f"Execution error: {e}"))
+        return collected
+
+    # Workers block in the trial scheduler queue; keep that wait off the event loop
+    results = await run_in_threadpool(_run_all)
 
     # Summarize
     results.sort(key=lambda t: ref_ids.index(t[0]))
@@ -671,6 +680,13 @@ class ExistingAsset(BaseModel):
     relevance: int | None = None
 
 
+class TestManagerMatch(BaseModel):
+    testCaseId: str
+    description: str
+    row: int
+    score: float
+
+
 class RefinedRecorderFlow(BaseModel):
     sourceSession: str | None = None
     steps: list[dict] = []
@@ -689,6 +705,7 @@ class KeywordInspectResponse(BaseModel):
     vectorContext: VectorContext
     status: str
     messages: list[str]
+    testManagerMatches: list[TestManagerMatch] = []
 
 
 @router.post("/keyword-inspect", response_model=KeywordInspectResponse)
@@ -888,6 +905,22 @@ async def keyword_inspect(req: KeywordInspectRequest) -> KeywordInspectResponse:
             messages.append(msg)
             logger.warning(f"[KeywordInspect] {msg}")
 
+        # Step 2b: Rank testmanager.xlsx rows against the keyword (indexed, cached per workbook)
+        test_manager_matches: list[TestManagerMatch] = []
+        try:
+            tm_path = _find_tm(framework_root)
+            if tm_path and load_workbook:
+                candidates = await run_in_threadpool(
+                    lambda: get_test_manager(tm_path).search(keyword, limit=req.maxAssets)
+                )
+                test_manager_matches = [
+                    TestManagerMatch(testCaseId=c.test_case_id, description=c.description, row=c.row, score=c.score)
+                    for c in candidates
+                ]
+                messages.append(f"Found {len(test_manager_matches)} matching testmanager rows")
+        except Exception as e:
+            messages.append(f"Error searching testmanager.xlsx: {str(e)}")
+
         # Step 3: Search for refined recorder flows in vector DB
         vector_context = VectorContext(flowAvailable=False, vectorStepsCount=0)
         refined_flow = None
@@ -938,7 +971,8 @@ async def keyword_inspect(req: KeywordInspectRequest) -> KeywordInspectResponse:
             refinedRecorderFlow=refined_flow,
             vectorContext=vector_context,
             status="success",
-            messages=messages
+            messages=messages,
+            testManagerMatches=test_manager_matches,
         )
     except HTTPException:
         # Preserve intended HTTP status for validation/git errors
@@ -959,14 +993,18 @@ async def trial_run_stream(req: TrialRunRequest) -> StreamingResponse:
     """Stream real-time execution logs of a temporary Playwright test via SSE.
 
     Phases: start -> running -> chunk (repeated) -> done OR error
-    Each chunk frame contains {"phase": "chunk", "data": "..."}
+    Each chunk frame contains {"phase": "chunk", "data": "..."}; consecutive lines of a
+    run are batched into one frame (newline-joined, with a "lines" count).
     Final frame includes {"phase": "done", "success": bool}
     """
     try:
-        import asyncio
-        import tempfile, os, subprocess
+        import tempfile, os
+        from contextlib import aclosing
         from pathlib import Path as _P
         from ...executor import _resolve_playwright_command, _detect_test_dir
+        from ...trial_history import estimate_durations, record_trial_duration
+        from ...trial_results import with_json_report
+        from ...trial_stream import TrialRunSpec, stream_trial_runs
         from ..framework_resolver import resolve_framework_root as _resolve_root
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=500, detail=f"Import failure: {exc}") from exc
@@ -978,48 +1016,20 @@ async def trial_run_stream(req: TrialRunRequest) -> StreamingResponse:
             tmp_path = None
             cwd = None
             cmd = None
+            # Per-ReferenceID durations feed trial_history for duration-aware sharding
+            history_spec = (req.scenario or "").strip()
+            recorded_refs: set[str] = set()
             # If a frameworkRoot is specified, write inside its detected testDir so Playwright config applies.
             # Helper: Excel fallback for ReferenceIDs if not provided
             def _excel_refs(root_path, scenario: str) -> tuple[list[str], str | None]:
-                refs: list[str] = []
-                id_name: str | None = None
-                if not scenario or not load_workbook:
-                    return refs, id_name
                 try:
                     tm = _find_tm(root_path)
-                    if not tm:
-                        return refs, id_name
-                    wb = load_workbook(tm)
-                    ws = wb.active
-                    header = [str(c.value or "").strip() for c in ws[1]] if ws.max_row >= 1 else []
-                    def _idx(name: str) -> int | None:
-                        lname = name.lower()
-                        for i, h in enumerate(header):
-                            if lname == h.lower() or lname in h.lower():
-                                return i
-                        return None
-                    id_i = _idx("TestCaseID")
-                    ref_i = _idx("ReferenceID")
-                    name_i = _idx("IDName")
-                    if id_i is None:
-                        return refs, id_name
-                    for r in ws.iter_rows(min_row=2, values_only=True):
-                        case_id = str((r[id_i] if id_i is not None and id_i < len(r) else "") or "").strip()
-                        if not case_id:
-                            continue
-                        if case_id.lower() == scenario.strip().lower():
-                            raw_ref = str((r[ref_i] if ref_i is not None and ref_i < len(r) else "") or "").strip()
-                            raw_name = str((r[name_i] if name_i is not None and name_i < len(r) else "") or "").strip()
-                            if raw_ref:
-                                import re as _re
-                                parts = [p.strip() for p in _re.split(r"[,;\s]+", raw_ref) if p.strip()]
-                                refs = parts
-                            if raw_name:
-                                id_name = raw_name
-                            break
+                    refs = scenario_references(tm, scenario) if tm and load_workbook else None
                 except Exception:
-                    return refs, id_name
-                return refs, id_name
+                    return [], None
+                if not refs:
+                    return [], None
+                return list(refs.reference_ids), refs.id_name
 
             if req.frameworkRoot:
                 logger.info(f"[TrialRunStream] Using frameworkRoot: {req.frameworkRoot}")
@@ -1036,7 +1046,8 @@ async def trial_run_stream(req: TrialRunRequest) -> StreamingResponse:
                     logger.info(f"[TrialRunStream] Updating testmanager for scenario: {req.scenario}")
                     try:
                         from ...services.config_service import update_test_manager_entry as _upd
-                        upd = _upd(
+                        upd = await run_in_threadpool(
+                            _upd,
                             root,
                             scenario=(req.scenario or "").strip(),
                             execute_value="Yes",
@@ -1088,7 +1099,7 @@ async def trial_run_stream(req: TrialRunRequest) -> StreamingResponse:
                 elif req.referenceId:
                     ref_ids = [req.referenceId.strip()]
                 elif req.scenario:
-                    excel_refs, excel_idname = _excel_refs(root, req.scenario)
+                    excel_refs, excel_idname = await run_in_threadpool(_excel_refs, root, req.scenario)
                     if excel_refs:
                         ref_ids = excel_refs
                     if not req.idName and excel_idname:
@@ -1101,19 +1112,21 @@ async def trial_run_stream(req: TrialRunRequest) -> StreamingResponse:
                     ref_ids = ref_ids[:3]
                 if not ref_ids:
                     ref_ids = [""]  # single run with no REFERENCE_ID
+                recorded_refs = {r for r in ref_ids if r}
+                if history_spec and len(recorded_refs) > 1:
+                    # Launch the slowest rows first so they are not left queued behind quick ones
+                    try:
+                        estimates = estimate_durations(ref_ids, spec=history_spec)
+                        ref_ids.sort(key=lambda r: -estimates.get(r, 0.0))
+                    except Exception as hist_exc:
+                        logger.warning(f"[TrialRunStream] Duration history unavailable: {hist_exc}")
 
                 # Launch separate browser process for each Reference ID
-                import threading, queue as _queue
                 base_env_overrides = trial_env_overrides(root)
-                cmd_cwd = _resolve_playwright_command(rel, req.headed, project_root=root)
-                base_cmd, base_cwd = cmd_cwd
+                base_cmd, base_cwd = _resolve_playwright_command(rel, req.headed, project_root=root)
                 yield _format_sse({"phase": "prepared-parallel", "runs": len(ref_ids), "cmd": ' '.join(base_cmd), "cwd": base_cwd, "unskipped": replaced})
 
-                events_q: _queue.Queue = _queue.Queue()
-                success_map: dict[str, bool] = {}
-                procs: list[tuple[str, subprocess.Popen]] = []
-
-                # Start separate process for each Reference ID
+                runs: list[TrialRunSpec] = []
                 for idx, ref in enumerate(ref_ids):
                     run_label = (ref or f"run-{idx+1}")
                     trial_env = os.environ.copy()
@@ -1129,63 +1142,13 @@ async def trial_run_stream(req: TrialRunRequest) -> StreamingResponse:
                             "ID_NAME": req.idName,
                             "DATA_ID_NAME": req.idName,
                         })
-                    cmd, cwd = _resolve_playwright_command(rel, req.headed, project_root=root)
-                    logger.info(f"[TrialRunStream] Launching browser for {run_label}: {' '.join(cmd)}")
-                    proc = subprocess.Popen(
-                        cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                        encoding="utf-8",
-                        errors="replace",
-                        cwd=str(root),
-                        env=trial_env,
-                    )
-                    procs.append((run_label, proc))
-                    events_q.put({"phase": "running", "referenceId": run_label})
-
-                # Reader threads
-                def _reader(label: str, p: subprocess.Popen):
-                    try:
-                        if p.stdout is None:
-                            return
-                        for line in iter(p.stdout.readline, ''):
-                            if not line:
-                                break
-                            events_q.put({"phase": "chunk", "data": line.rstrip(), "referenceId": label})
-                    except Exception as _e:
-                        events_q.put({"phase": "chunk", "data": f"[reader-error] {label}: {_e}", "referenceId": label})
-                    finally:
-                        try:
-                            rc = p.wait()
-                            ok = (rc == 0)
-                        except Exception:
-                            ok = False
-                        success_map[label] = ok
-                        events_q.put({"phase": "done-single", "success": ok, "referenceId": label})
-
-                threads: list[threading.Thread] = []
-                for label, p in procs:
-                    t = threading.Thread(target=_reader, args=(label, p), daemon=True)
-                    t.start()
-                    threads.append(t)
-
-                # Pump queue to client until all done
-                done_needed = len(procs)
-                done_seen = 0
-                while done_seen < done_needed or not events_q.empty():
-                    try:
-                        evt = await asyncio.get_event_loop().run_in_executor(None, events_q.get, )
-                        if isinstance(evt, dict) and evt.get("phase"):
-                            if evt.get("phase") == "done-single":
-                                done_seen += 1
-                            yield _format_sse(evt)
-                    except Exception:
-                        await asyncio.sleep(0.05)
-
-                # Final summary
-                overall_success = all(success_map.get(lbl, False) for (lbl, _) in procs) if procs else False
-                yield _format_sse({"phase": "done", "success": overall_success, "runs": len(procs)})
+                    logger.info(f"[TrialRunStream] Launching browser for {run_label}: {' '.join(base_cmd)}")
+                    run_cmd, trial_env, report_path = with_json_report(list(base_cmd), trial_env)
+                    runs.append(TrialRunSpec(
+                        label=run_label, cmd=run_cmd, cwd=str(root), env=trial_env,
+                        report_path=report_path, spec_name=history_spec,
+                        warm_root=str(root), headed=req.headed,
+                    ))
             else:
                 logger.info("[TrialRunStream] No frameworkRoot - using system temp")
                 
@@ -1207,32 +1170,25 @@ async def trial_run_stream(req: TrialRunRequest) -> StreamingResponse:
                 cmd, cwd = _resolve_playwright_command(tmp_path, req.headed)
                 logger.info(f"[TrialRunStream] Command: {' '.join(cmd)}, CWD: {cwd}, Headed: {req.headed}")
                 yield _format_sse({"phase": "prepared", "headed": req.headed, "cmd": ' '.join(cmd), "cwd": cwd, "unskipped": replaced})
-                logger.info(f"[TrialRunStream] Starting subprocess with headed={req.headed}")
-                proc = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    encoding="utf-8",
-                    errors="replace",
-                    cwd=cwd,
-                    env=trial_env,  # Pass environment with trial credentials
-                )
-                logger.info(f"[TrialRunStream] Subprocess PID: {proc.pid}")
-
-            # Single-run path for non-frameworkRoot
-            yield _format_sse({"phase": "running"})
-            logger.info("[TrialRunStream] Reading subprocess output...")
-            assert proc.stdout is not None
-            while True:
-                line = await asyncio.get_event_loop().run_in_executor(None, proc.stdout.readline)
-                if not line:
-                    break
-                yield _format_sse({"phase": "chunk", "data": line.rstrip()})
-            ret = proc.wait()
-            success = ret == 0
-            logger.info(f"[TrialRunStream] Process finished with return code: {ret}, success: {success}")
-            yield _format_sse({"phase": "done", "success": success})
+                cmd, trial_env, report_path = with_json_report(cmd, trial_env)
+                runs = [TrialRunSpec(
+                    label="", cmd=cmd, cwd=cwd, env=trial_env,
+                    report_path=report_path, spec_name=history_spec,
+                    warm_root=cwd, headed=req.headed,
+                )]
+
+            # Children are multiplexed by the asyncio engine; leaving this generator
+            # (client disconnect) terminates any run still in flight.
+            async with aclosing(stream_trial_runs(runs)) as events:
+                async for evt in events:
+                    if evt.get("phase") == "done-single" and history_spec and evt.get("referenceId") in recorded_refs:
+                        try:
+                            record_trial_duration(history_spec, evt["referenceId"], evt.get("duration") or 0.0, bool(evt.get("success")))
+                        except Exception as hist_exc:
+                            logger.warning(f"[TrialRunStream] Failed to record trial duration: {hist_exc}")
+                    if evt.get("phase") == "done":
+                        logger.info(f"[TrialRunStream] Finished {evt.get('runs')} run(s), success: {evt.get('success')}")
+                    yield _format_sse(evt)
         except Exception as exc:
             logger.error(f"[TrialRunStream] Error: {exc}", exc_info=True)
             yield _format_sse({"phase": "error", "error": str(exc)})
@@ -7,8 +7,10 @@ from pydantic import BaseModel, Field
 
 from ..auth import jwt_required
 from ..framework_resolver import resolve_framework_root
+from starlette.concurrency import run_in_threadpool
 from ...services.config_service import update_test_manager_entry
-from openpyxl import load_workbook
+from ...services.framework_catalog import get_framework_catalog
+from ...services.testmanager_service import get_test_manager
 
 
 router = APIRouter(prefix="/config", tags=["config"], dependencies=[Depends(jwt_required)])
@@ -41,7 +43,8 @@ async def update_test_manager(req: UpdateTestManagerRequest) -> dict:
     else:
         repo_root = resolve_framework_root()
     try:
-        result = update_test_manager_entry(
+        result = await run_in_threadpool(
+            update_test_manager_entry,
             repo_root,
             scenario=req.scenario,
             execute_value=req.execute or "Yes",
@@ -81,35 +84,9 @@ async def list_test_manager(frameworkRoot: str | None = None) -> dict:
     if not tm:
         return {"rows": []}
     try:
-        wb = load_workbook(tm)
+        rows = await run_in_threadpool(lambda: get_test_manager(tm).rows())
     except Exception:
         return {"rows": []}
-    ws = wb.active
-    # Map headers
-    header = [str(c.value or "").strip() for c in ws[1]] if ws.max_row >= 1 else []
-    def _idx(name: str) -> int | None:
-        lname = name.lower()
-        for i, h in enumerate(header):
-            if lname == h.lower() or lname in h.lower():
-                return i
-        return None
-    id_i = _idx("TestCaseID")
-    desc_i = _idx("TestCaseDescription") or _idx("Description")
-    exec_i = _idx("Execute")
-    data_i = _idx("DatasheetName")
-    ref_i = _idx("ReferenceID")
-    name_i = _idx("IDName")
-
-    rows = []
-    for r in ws.iter_rows(min_row=2, values_only=True):
-        rows.append({
-            "TestCaseID": str((r[id_i] if id_i is not None and id_i < len(r) else "") or ""),
-            "TestCaseDescription": str((r[desc_i] if desc_i is not None and desc_i < len(r) else "") or ""),
-            "Execute": str((r[exec_i] if exec_i is not None and exec_i < len(r) else "") or ""),
-            "DatasheetName": str((r[data_i] if data_i is not None and data_i < len(r) else "") or ""),
-            "ReferenceID": str((r[ref_i] if ref_i is not None and ref_i < len(r) else "") or ""),
-            "IDName": str((r[name_i] if name_i is not None and name_i < len(r) else "") or ""),
-        })
     return {"rows": rows}
 
 
@@ -141,45 +118,22 @@ async def rename_test_case_id(req: RenameTestCaseIdRequest) -> dict:
         raise HTTPException(status_code=404, detail="testmanager.xlsx not found")
     
     try:
-        wb = load_workbook(tm_path)
-        ws = wb.active
-        
-        # Find TestCaseID column
-        header = [str(c.value or "").strip() for c in ws[1]] if ws.max_row >= 1 else []
-        id_col_idx = None
-        for i, h in enumerate(header):
-            if h.lower() in ["testcaseid", "test case id", "testcase id"]:
-                id_col_idx = i
-                break
-        
-        if id_col_idx is None:
-            raise HTTPException(status_code=400, detail="TestCaseID column not found in testmanager.xlsx")
-        
-        # Find and update the row
-        found = False
-        for row_idx in range(2, ws.max_row + 1):
-            cell = ws.cell(row=row_idx, column=id_col_idx + 1)
-            if str(cell.value or "").strip() == req.oldTestCaseId:
-                cell.value = req.newTestCaseId
-                found = True
-                break
-        
-        if not found:
-            raise HTTPException(status_code=404, detail=f"TestCaseID '{req.oldTestCaseId}' not found in testmanager.xlsx")
-        
-        # Save the workbook
-        wb.save(tm_path)
-        
-        return {
-            "success": True,
-            "message": f"Successfully renamed '{req.oldTestCaseId}' to '{req.newTestCaseId}'",
-            "oldTestCaseId": req.oldTestCaseId,
-            "newTestCaseId": req.newTestCaseId
-        }
-    except HTTPException:
-        raise
+        renamed_row = await run_in_threadpool(
+            lambda: get_test_manager(tm_path).rename(req.oldTestCaseId, req.newTestCaseId)
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to rename TestCaseID: {exc}") from exc
+    if renamed_row is None:
+        raise HTTPException(status_code=404, detail=f"TestCaseID '{req.oldTestCaseId}' not found in testmanager.xlsx")
+
+    return {
+        "success": True,
+        "message": f"Successfully renamed '{req.oldTestCaseId}' to '{req.newTestCaseId}'",
+        "oldTestCaseId": req.oldTestCaseId,
+        "newTestCaseId": req.newTestCaseId
+    }
 
 
 @router.post("/upload_datasheet")
@@ -230,6 +184,7 @@ async def upload_datasheet(
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=f"Failed to save datasheet: {exc}") from exc
 
+    get_framework_catalog(repo_root).mark_stale()
     rel = target_path.relative_to(repo_root).as_posix()
     return {"saved": rel, "filename": target_path.name, "scenario": scenario}
 
@@ -253,15 +208,8 @@ async def list_datasheets(frameworkRoot: str | None = None) -> dict:
     else:
         repo_root = resolve_framework_root()
 
-    data_dir = repo_root / "data"
-    if not data_dir.exists() or not data_dir.is_dir():
-        return {"files": []}
     try:
-        files = [
-            p.relative_to(repo_root).as_posix()
-            for p in sorted(data_dir.glob("**/*"))
-            if p.is_file() and p.suffix.lower() in {".xlsx", ".xls", ".csv"}
-        ]
+        files = await run_in_threadpool(get_framework_catalog(repo_root).datasheets)
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=500, detail=f"Failed to enumerate datasheets: {exc}") from exc
     return {"files": files}
@@ -8,6 +8,7 @@ from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 
 from ..auth import jwt_required
 from ..framework_resolver import resolve_framework_root
+from ...services.framework_catalog import get_framework_catalog
 
 
 router = APIRouter(prefix="/files", tags=["files"], dependencies=[Depends(jwt_required)])
@@ -46,5 +47,6 @@ async def upload(
     if os.path.commonpath([str(repo_root.resolve()), str(dest)]) != str(repo_root.resolve()):
         raise HTTPException(status_code=400, detail="Invalid framework path")
     dest.write_bytes(bytes(data))
+    get_framework_catalog(repo_root).mark_stale()
     rel = str(dest.relative_to(repo_root)).replace("\\", "/")
     return {"path": rel}
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+from ..auth import jwt_required
+from ..events import job_events
+from ..sse import _format_sse
+from ... import job_store
+
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Comment frames sent on idle streams so proxies do not time them out.
+KEEPALIVE_SECONDS = 15.0
+
+
+class JobDetailResponse(BaseModel):
+    jobId: str
+    type: str
+    status: str
+    payload: Dict[str, Any] | None = None
+    result: Dict[str, Any] | None = None
+    error: Optional[str] = None
+    progress: Dict[str, Any] | None = None
+    createdAt: str
+    updatedAt: str
+
+
+class JobListResponse(BaseModel):
+    jobs: List[JobDetailResponse]
+    nextCursor: Optional[str] = Field(None, description="Pass as ?cursor= to fetch the next page.")
+
+
+class JobSummaryResponse(BaseModel):
+    counts: Dict[str, int] = Field(default_factory=dict, description="Number of jobs per status.")
+
+
+class JobCompactRequest(BaseModel):
+    olderThanDays: Optional[float] = Field(None, ge=0, description="Defaults to JOB_RETENTION_DAYS.")
+    archive: Optional[bool] = Field(None, description="Archive instead of delete; defaults to JOB_RETENTION_ARCHIVE.")
+
+
+class JobCompactResponse(BaseModel):
+    archived: int
+    deleted: int
+
+
+def job_dict_to_response(job: Dict[str, Any]) -> JobDetailResponse:
+    return JobDetailResponse(
+        jobId=job["id"],
+        type=job["type"],
+        status=job["status"],
+        payload=job.get("payload"),
+        result=job.get("result"),
+        error=job.get("error"),
+        progress=job.get("progress"),
+        createdAt=job["created_at"],
+        updatedAt=job["updated_at"],
+    )
+
+
+@router.get("", response_model=JobListResponse)
+async def list_jobs(
+    status: List[str] = Query(default_factory=list),
+    type: List[str] = Query(default_factory=list),
+    limit: int = Query(50, ge=1, le=job_store.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> JobListResponse:
+    """Jobs newest first, filtered by any of the given statuses and types."""
+    try:
+        jobs, next_cursor = await run_in_threadpool(
+            job_store.list_jobs, status=status or None, job_type=type or None, limit=limit, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return JobListResponse(jobs=[job_dict_to_response(job) for job in jobs], nextCursor=next_cursor)
+
+
+@router.get("/summary", response_model=JobSummaryResponse)
+async def job_summary(type: List[str] = Query(default_factory=list)) -> JobSummaryResponse:
+    counts = await run_in_threadpool(job_store.count_jobs, job_type=type or None)
+    return JobSummaryResponse(counts=counts)
+
+
+@router.post("/compact", response_model=JobCompactResponse, dependencies=[Depends(jwt_required)])
+async def compact_jobs(req: JobCompactRequest) -> JobCompactResponse:
+    """Archive or delete finished jobs past the retention window."""
+    summary = await run_in_threadpool(job_store.compact_jobs, req.olderThanDays, archive=req.archive)
+    return JobCompactResponse(**summary)
+
+
+async def _next_event(queue: asyncio.Queue) -> Optional[Dict[str, Any]]:
+    try:
+        return await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+
+
+@router.get("/events")
+async def stream_jobs(type: List[str] = Query(default_factory=list)) -> StreamingResponse:
+    """Server-sent events for every job update (optionally only some job types)."""
+    types = set(type)
+
+    async def gen() -> AsyncGenerator[bytes, None]:
+        queue = await job_events.connect()
+        try:
+            while True:
+                event = await _next_event(queue)
+                if event is None:
+                    yield b": keepalive\n\n"
+                elif not types or event["type"] in types:
+                    yield _format_sse(event)
+        finally:
+            await job_events.disconnect(None, queue)
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+@router.get("/{job_id}/events")
+async def stream_job(job_id: str) -> StreamingResponse:
+    """Server-sent events for one job: its current state, then each update until it finishes.
+
+    Events carry status, ``stage``, ``percent`` and the full progress snapshot; fetch
+    ``/api/jobs/{job_id}`` once after the final event for the result.
+    """
+    if await run_in_threadpool(job_store.get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def gen() -> AsyncGenerator[bytes, None]:
+        # Subscribe before reading the snapshot so no update can fall in between
+        queue = await job_events.connect(job_id)
+        try:
+            job = await run_in_threadpool(job_store.get_job, job_id)
+            if job is None:
+                return
+            current = job_store.job_event(job)
+            yield _format_sse(current)
+            last_seen = current["updatedAt"]
+            status = current["status"]
+            while status not in job_store.FINISHED_STATUSES:
+                event = await _next_event(queue)
+                if event is None:
+                    yield b": keepalive\n\n"
+                    continue
+                if event["updatedAt"] <= last_seen:
+                    continue
+                last_seen, status = event["updatedAt"], event["status"]
+                yield _format_sse(event)
+        finally:
+            await job_events.disconnect(job_id, queue)
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+@router.get("/{job_id}", response_model=JobDetailResponse)
+async def get_job_detail(job_id: str) -> JobDetailResponse:
+    job = job_store.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job_dict_to_response(job)
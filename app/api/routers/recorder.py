@@ -2,11 +2,15 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 from ..auth import jwt_required
+from ..events import recorder_events
+from ...recorder_control import send_control_command
+from ...recorder_supervisor import RecorderCapacityError, recording_supervisor
 from ...tasks import enqueue_recorder_launch, enqueue_recorder_stop
 from ...services.refined_flow_service import (
     load_recorder_metadata,
@@ -27,6 +31,8 @@ class RecorderStartRequest(BaseModel):
 class RecorderStartResponse(BaseModel):
     sessionId: str
     status: str
+    # Configured resource ceilings this host cannot enforce (see recorder_supervisor)
+    warnings: List[str] = []
 
 
 @router.post("/start", response_model=RecorderStartResponse)
@@ -36,11 +42,15 @@ async def start(req: RecorderStartRequest) -> RecorderStartResponse:
         "sessionName": req.sessionName,
         "options": req.options or {},
     }
+    try:
+        recording_supervisor.check_capacity()
+    except RecorderCapacityError as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
     try:
         job_id, session_id = enqueue_recorder_launch(payload)
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    return RecorderStartResponse(sessionId=session_id, status="started")
+    return RecorderStartResponse(sessionId=session_id, status="started", warnings=recording_supervisor.limit_warnings())
 
 
 class RecorderStopRequest(BaseModel):
@@ -63,7 +73,7 @@ async def status(session_id: str) -> Dict[str, Any]:
     if not str(session_dir).startswith(str(base_dir)):
         raise HTTPException(status_code=400, detail="Invalid session id/path")
     listing = scan_session_directory(session_dir)
-    metadata = load_recorder_metadata(session_dir, attempts=2, delay=0.1)
+    metadata = load_recorder_metadata(session_dir)
     artifacts = dict(((metadata or {}).get("artifacts") or {}))
     files = listing.get("top_level") or []
     # Heuristic status: 'stopped' if metadata present, else 'running' if dir exists
@@ -111,7 +121,33 @@ async def finalize(req: RecorderFinalizeRequest) -> Dict[str, Any]:
     if not session_dir.exists():
         raise HTTPException(status_code=404, detail="Session directory not found")
     try:
-        result = finalize_recorder_session(session_dir)
+        result = await run_in_threadpool(
+            finalize_recorder_session,
+            session_dir,
+            on_event=lambda event: recorder_events.publish_from_thread(req.sessionId, event),
+        )
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     return result.to_dict()
+
+
+class RecorderControlRequest(BaseModel):
+    sessionId: str
+    command: str
+    wait: float = Field(default=5.0, ge=0, le=60)
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+@router.post("/control")
+async def control(req: RecorderControlRequest) -> Dict[str, Any]:
+    """Send pause/resume/snapshot/stop to a running recorder; acks also arrive as recorder events."""
+    base_dir = Path(os.getenv("RECORDER_OUTPUT_DIR", "recordings")).resolve()
+    session_dir = (base_dir / req.sessionId).resolve()
+    if not str(session_dir).startswith(str(base_dir)):
+        raise HTTPException(status_code=400, detail="Invalid session id/path")
+    if not session_dir.exists():
+        raise HTTPException(status_code=404, detail="Session directory not found")
+    try:
+        return await run_in_threadpool(send_control_command, session_dir, req.command, wait=req.wait, **req.params)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
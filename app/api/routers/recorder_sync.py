@@ -7,27 +7,45 @@ import subprocess
 import sys
 import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
 # from ..auth import jwt_required
+from ... import recorder_registry
+from ..events import recorder_events
+from ...recorder_control import send_control_command, stop_recorder_process
+from ...recorder_supervisor import RecorderCapacityError, recording_supervisor
 from ...services.refined_flow_service import (
     load_recorder_metadata,
     scan_session_directory,
+    submit_finalize_job,
 )
 
 router = APIRouter(prefix="/recorder-sync", tags=["recorder-sync"])  # No JWT for local dev
 
 RECORDINGS_DIR = Path(os.getenv("RECORDER_OUTPUT_DIR", "recordings")).resolve()
+GRACEFUL_STOP_TIMEOUT = float(os.getenv("RECORDER_GRACEFUL_STOP_TIMEOUT", "30"))
 
-# In-memory process tracking
+# Popen handles for recorders started by this API process; the shared registry
+# covers sessions started by Celery workers or before a restart.
 _RECORDER_LOCK = threading.RLock()
 _RECORDER_PROCESSES: Dict[str, subprocess.Popen] = {}
 
 
+def _lookup_process(session_id: str) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+    """Running process handle for ``session_id`` (local ``Popen`` or registry handle) and its registry row."""
+    with _RECORDER_LOCK:
+        process = _RECORDER_PROCESSES.get(session_id)
+    record = recorder_registry.get_process(session_id)
+    if process is None and recorder_registry.is_running(record):
+        process = recorder_registry.process_handle(record)
+    return process, record
+
+
 class RecorderStartRequest(BaseModel):
     url: str
     sessionName: Optional[str] = None
@@ -37,6 +55,8 @@ class RecorderStartRequest(BaseModel):
 class RecorderStartResponse(BaseModel):
     sessionId: str
     status: str
+    # Configured resource ceilings this host cannot enforce (see recorder_supervisor)
+    warnings: List[str] = []
 
 
 def _build_recorder_command(session_id: str, url: str, flow_name: str, options: Dict[str, Any], session_dir: Path) -> list:
@@ -84,6 +104,12 @@ def _build_recorder_command(session_id: str, url: str, flow_name: str, options:
 async def start_sync(req: RecorderStartRequest) -> RecorderStartResponse:
     """Start a recorder session synchronously without Celery."""
     
+    # Fail fast before creating the session directory; launch() re-checks atomically
+    try:
+        recording_supervisor.check_capacity()
+    except RecorderCapacityError as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+    
     # Generate session ID
     session_id = req.sessionName or f"session_{uuid4().hex[:8]}"
     
@@ -118,8 +144,12 @@ async def start_sync(req: RecorderStartRequest) -> RecorderStartResponse:
         # Start process in background with detached stdout/stderr
         # Use DEVNULL to prevent blocking on pipe buffers
         # Don't use CREATE_NO_WINDOW - we want the browser window to be visible
-        process = subprocess.Popen(
+        # The supervisor enforces the concurrent-session limit and per-session ceilings
+        process = recording_supervisor.launch(
+            session_id,
             cmd,
+            launcher="recorder-sync",
+            session_dir=session_dir,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             cwd=str(Path(__file__).parent.parent.parent.parent),  # Project root
@@ -131,8 +161,11 @@ async def start_sync(req: RecorderStartRequest) -> RecorderStartResponse:
         with _RECORDER_LOCK:
             _RECORDER_PROCESSES[session_id] = process
         
-        return RecorderStartResponse(sessionId=session_id, status="started")
+        return RecorderStartResponse(sessionId=session_id, status="started", warnings=recording_supervisor.limit_warnings())
     
+    except RecorderCapacityError as exc:
+        print(f"[Recorder] Rejected session {session_id}: {exc}")
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
     except Exception as exc:
         print(f"[Recorder] Error starting process: {exc}")
         raise HTTPException(status_code=500, detail=f"Failed to start recorder: {str(exc)}") from exc
@@ -143,53 +176,76 @@ class RecorderStopRequest(BaseModel):
 
 
 @router.post("/stop")
-async def stop_sync(req: RecorderStopRequest) -> Dict[str, str]:
+async def stop_sync(req: RecorderStopRequest) -> Dict[str, Any]:
     """Stop a recorder session."""
-    import threading
-    from app.services.refined_flow_service import finalize_recorder_session
-    from pathlib import Path
-    
-    with _RECORDER_LOCK:
-        process = _RECORDER_PROCESSES.get(req.sessionId)
-        
-        if not process:
-            raise HTTPException(status_code=404, detail="Session not found or already stopped")
-        
-        try:
-            # Send Ctrl+C signal (SIGINT on Windows)
-            process.terminate()
-            
-            # Wait for process to finish (timeout 5 seconds)
-            try:
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                # Force kill if it doesn't stop gracefully
-                process.kill()
-                process.wait()
-            
-            # Remove from tracking
-            del _RECORDER_PROCESSES[req.sessionId]
-            
-            # Auto-finalize in background after stopping
-            session_dir = RECORDINGS_DIR / req.sessionId
-            if session_dir.exists():
-                def background_finalize():
-                    try:
-                        print(f"[Stop] Auto-finalizing session {req.sessionId}...")
-                        result = finalize_recorder_session(session_dir)
-                        print(f"[Stop] Finalization complete - Status: {result.auto_ingest_status}")
-                        if result.auto_ingest_error:
-                            print(f"[Stop] Finalization error: {result.auto_ingest_error}")
-                    except Exception as e:
-                        print(f"[Stop] Finalization failed: {e}")
-                
-                thread = threading.Thread(target=background_finalize, daemon=True)
-                thread.start()
-            
-            return {"status": "stopped", "autoFinalize": "processing"}
+    process, record = _lookup_process(req.sessionId)
+
+    if not process:
+        raise HTTPException(status_code=404, detail="Session not found or already stopped")
+
+    session_dir = Path(record["session_dir"]) if record and record.get("session_dir") else RECORDINGS_DIR / req.sessionId
+    recorder_registry.mark_stop_requested(req.sessionId)
+
+    try:
+        # Ask the recorder to drain and finalize itself first; signals are the fallback
+        graceful = await run_in_threadpool(
+            stop_recorder_process,
+            session_dir,
+            process,
+            exit_timeout=GRACEFUL_STOP_TIMEOUT,
+            terminate_timeout=5,
+        )
+
+        # Remove from tracking
+        with _RECORDER_LOCK:
+            _RECORDER_PROCESSES.pop(req.sessionId, None)
+        recorder_registry.mark_exited(req.sessionId, process.poll())
         
-        except Exception as exc:
-            raise HTTPException(status_code=500, detail=f"Failed to stop recorder: {str(exc)}") from exc
+        # Auto-finalize on the bounded finalize pool after stopping
+        finalize_job_id = None
+        if session_dir.exists():
+            finalize_job_id = submit_finalize_job(
+                session_dir,
+                on_event=lambda event: recorder_events.publish_from_thread(req.sessionId, event),
+                payload={"sessionId": req.sessionId},
+            )
+
+        return {
+            "status": "stopped",
+            "graceful": graceful,
+            "autoFinalize": "processing" if finalize_job_id else "skipped",
+            "finalizeJobId": finalize_job_id,
+        }
+    
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Failed to stop recorder: {str(exc)}") from exc
+
+class RecorderControlRequest(BaseModel):
+    sessionId: str
+    command: str
+    wait: float = Field(default=5.0, ge=0, le=60)
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+@router.post("/control")
+async def control_sync(req: RecorderControlRequest) -> Dict[str, Any]:
+    """Send pause/resume/snapshot/stop to a running recorder through its control channel."""
+    session_dir = (RECORDINGS_DIR / req.sessionId).resolve()
+    if not str(session_dir).startswith(str(RECORDINGS_DIR)):
+        raise HTTPException(status_code=400, detail="Invalid session id/path")
+    if not session_dir.exists():
+        raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        return await run_in_threadpool(send_control_command, session_dir, req.command, wait=req.wait, **req.params)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/capacity")
+async def capacity_sync() -> Dict[str, Any]:
+    """Concurrent-session budget, per-session limits and live resource usage."""
+    return await run_in_threadpool(recording_supervisor.capacity)
+
 
 @router.get("/status/{session_id}")
 async def status_sync(session_id: str) -> Dict[str, Any]:
@@ -206,7 +262,9 @@ async def status_sync(session_id: str) -> Dict[str, Any]:
     process_error = None
     with _RECORDER_LOCK:
         process = _RECORDER_PROCESSES.get(session_id)
-        if process:
+        if process is None:
+            is_running = recorder_registry.is_running(recorder_registry.get_process(session_id))
+        else:
             poll_result = process.poll()
             is_running = poll_result is None  # None means still running
             
@@ -222,7 +280,7 @@ async def status_sync(session_id: str) -> Dict[str, Any]:
     
     # Scan directory
     listing = scan_session_directory(session_dir)
-    metadata = load_recorder_metadata(session_dir, attempts=2, delay=0.1)
+    metadata = load_recorder_metadata(session_dir)
     artifacts = dict(((metadata or {}).get("artifacts") or {}))
     files = listing.get("top_level") or []
     
@@ -285,19 +343,24 @@ async def list_sessions() -> Dict[str, Any]:
         return {"sessions": []}
     
     sessions = []
+    registered = {
+        record["session_id"]: record
+        for record in recorder_registry.list_processes(recorder_registry.ACTIVE_STATUSES)
+    }
     for session_dir in RECORDINGS_DIR.iterdir():
         if session_dir.is_dir():
             session_id = session_dir.name
             
             # Check if running
-            is_running = False
             with _RECORDER_LOCK:
                 process = _RECORDER_PROCESSES.get(session_id)
-                if process:
-                    is_running = process.poll() is None
+            if process is not None:
+                is_running = process.poll() is None
+            else:
+                is_running = recorder_registry.is_running(registered.get(session_id))
             
             # Try to load metadata for flow name and timestamp
-            metadata = load_recorder_metadata(session_dir, attempts=1, delay=0.05)
+            metadata = load_recorder_metadata(session_dir)
             flow_name = session_id
             timestamp = None
             
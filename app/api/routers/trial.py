@@ -2,20 +2,27 @@ from __future__ import annotations
 
 import asyncio
 import os
+from contextlib import aclosing
 from pathlib import Path
 from typing import Any, AsyncGenerator, Dict, Optional
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import StreamingResponse
 
 from ..auth import jwt_required
 from ..framework_resolver import resolve_framework_root
 from ..sse import _format_sse
+from ...trial_results import ResultCollector, query_results, store_results, with_json_report
+from ...trial_scheduler import trial_scheduler
 from ...trial_spec_adapter import (
+    acquire_warm_runner_env,
     prepare_trial_spec_path,
     trial_env_overrides,
 )
+from ...warm_browser import warm_browser_pool
+from ...trial_stream import TrialRunSpec, stream_trial_runs
 
 
 router = APIRouter(prefix="/trial", tags=["trial"], dependencies=[Depends(jwt_required)])
@@ -65,18 +72,37 @@ async def run(req: TrialRunRequest) -> Dict[str, Any]:
         cmd = ["npx", "playwright", "test", str(spec_path), "--reporter=line"]
         if req.headed:
             cmd.append("--headed")
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            cwd=str(repo_root),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-            env=env,
-        )
-        stdout_bytes = await proc.stdout.read() if proc.stdout else b""
-        returncode = await proc.wait()
+        cmd, env, report_path = with_json_report(cmd, env)
+        async with trial_scheduler.lease(spec_path.name, source="trial.run") as ticket:
+            warm_env, release_warm = await run_in_threadpool(acquire_warm_runner_env, repo_root, req.headed)
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    cwd=str(repo_root),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    env={**env, **warm_env},
+                )
+                ticket.attach_pid(proc.pid)
+                stdout_bytes = await proc.stdout.read() if proc.stdout else b""
+                returncode = await proc.wait()
+                ticket.record.returncode = returncode
+            finally:
+                if release_warm:
+                    release_warm()
         logs = stdout_bytes.decode("utf-8", errors="replace")
-        status = "PASS" if returncode == 0 else "FAIL"
-        return {"status": status, "logs": logs}
+        collector = ResultCollector()
+        if collector.load_json_report(report_path):
+            store_results(ticket.record.run_id, collector.records, spec=(req.specPath or spec_path.name))
+        else:
+            collector.feed_text(logs)
+        status = "PASS" if collector.success(returncode) else "FAIL"
+        return {
+            "status": status,
+            "logs": logs,
+            "runId": ticket.record.run_id,
+            "results": [r.to_dict() for r in collector.records],
+        }
     finally:
         if cleanup_cb:
             try:
@@ -90,6 +116,23 @@ async def run(req: TrialRunRequest) -> Dict[str, Any]:
                 pass
 
 
+@router.get("/scheduler")
+async def scheduler_status() -> Dict[str, Any]:
+    """Browser budget, queued and active trial runs, recent per-run accounting and warm servers."""
+    return {**trial_scheduler.snapshot(), "warmBrowsers": warm_browser_pool.status()}
+
+
+@router.get("/results")
+async def results(
+    runId: Optional[str] = None,
+    spec: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """Per-test results recorded from trial runs (newest first)."""
+    return {"results": query_results(run_id=runId, spec=spec, status=status, limit=min(max(limit, 1), 1000))}
+
+
 @router.get("/stream")
 async def stream(spec: str, headed: bool = True, frameworkRoot: Optional[str] = None, scenario: Optional[str] = None) -> StreamingResponse:
     repo_root = Path(frameworkRoot).resolve() if frameworkRoot else resolve_framework_root()
@@ -108,26 +151,28 @@ async def stream(spec: str, headed: bool = True, frameworkRoot: Optional[str] =
             cmd = ["npx", "playwright", "test", str(spec_path), "--reporter=line"]
             if headed:
                 cmd.append("--headed")
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=str(repo_root),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT,
-                env=env,
-            )
-            if proc.stdout:
-                while True:
-                    line = await proc.stdout.readline()
-                    if not line:
-                        break
-                    try:
-                        text = line.decode("utf-8", errors="replace").rstrip("\n")
-                    except Exception:
-                        text = str(line)
-                    yield _format_sse({"message": text, "level": "info"})
-            returncode = await proc.wait()
-            status = "PASS" if returncode == 0 else "FAIL"
-            yield _format_sse({"message": f"[status] {status}", "level": "info"})
+            cmd, env, report_path = with_json_report(cmd, env)
+            runs = [TrialRunSpec(
+                label="", cmd=cmd, cwd=str(repo_root), env=env,
+                report_path=report_path, spec_name=spec,
+                warm_root=str(repo_root), headed=headed,
+            )]
+            async with aclosing(stream_trial_runs(runs, source="trial.stream")) as events:
+                async for evt in events:
+                    phase = evt.get("phase")
+                    if phase == "queued":
+                        yield _format_sse({
+                            "message": f"[queue] waiting for a browser slot (position {evt['position']})",
+                            "level": "info",
+                            "position": evt["position"],
+                        })
+                    elif phase == "chunk":
+                        yield _format_sse({"message": evt["data"], "level": "info"})
+                    elif phase == "done-single":
+                        yield _format_sse({"message": "[results]", "level": "info", "runId": evt.get("runId"), "results": evt.get("results")})
+                    elif phase == "done":
+                        status = "PASS" if evt.get("success") else "FAIL"
+                        yield _format_sse({"message": f"[status] {status}", "level": "info"})
         except Exception as exc:
             yield _format_sse({"message": f"[error] {exc}", "level": "error"})
         finally:
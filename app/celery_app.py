@@ -1,4 +1,12 @@
-"""Celery application configuration."""
+"""Celery application configuration.
+
+By default tasks run eagerly inside the API process on the in-memory broker.
+Setting ``CELERY_BROKER_URL=sqlite://`` selects the durable local mode: tasks
+are queued in a SQLite file (``CELERY_BROKER_DB``) and executed by a separate
+``celery -A app.celery_app worker`` process. Messages are acknowledged only
+after the task finishes, and a worker that dies mid-task has its messages
+redelivered once ``CELERY_VISIBILITY_TIMEOUT`` lapses. See :mod:`app.sqlite_broker`.
+"""
 
 from __future__ import annotations
 
@@ -8,10 +16,16 @@ from celery import Celery
 
 broker_url = os.getenv("CELERY_BROKER_URL", "memory://")
 backend_url = os.getenv("CELERY_RESULT_BACKEND", "cache+memory://")
+LOCAL_DURABLE_BROKER = broker_url.split("://", 1)[0].lower() == "sqlite"
+
+if LOCAL_DURABLE_BROKER:
+    from . import sqlite_broker  # registers the sqlite:// transport
 
-celery_app = Celery("test_automation", broker=broker_url, backend=backend_url)
+celery_app = Celery("test_automation", broker=broker_url, backend=backend_url, include=["app.tasks"])
 
-celery_app.conf.task_always_eager = os.getenv("CELERY_TASK_ALWAYS_EAGER", "1").lower() in {
+celery_app.conf.task_always_eager = os.getenv(
+    "CELERY_TASK_ALWAYS_EAGER", "0" if LOCAL_DURABLE_BROKER else "1"
+).lower() in {
     "1",
     "true",
     "yes",
@@ -29,3 +43,18 @@ celery_app.conf.worker_max_tasks_per_child = int(os.getenv("CELERY_MAX_TASKS_PER
 # Graceful shutdown
 celery_app.conf.worker_shutdown_timeout = int(os.getenv("CELERY_SHUTDOWN_TIMEOUT", "10"))  # 10 seconds
 
+if LOCAL_DURABLE_BROKER:
+    celery_app.conf.broker_transport_options = {
+        "database": os.getenv("CELERY_BROKER_DB", sqlite_broker.DEFAULT_DATABASE),
+        "visibility_timeout": float(os.getenv("CELERY_VISIBILITY_TIMEOUT", str(sqlite_broker.DEFAULT_VISIBILITY_TIMEOUT))),
+        "polling_interval": float(os.getenv("CELERY_BROKER_POLL_INTERVAL", "0.5")),
+    }
+    # Ack after the task body ran; requeue if the worker child is killed mid-task.
+    # A redelivered recorder launch follows the recorder still running for its session.
+    celery_app.conf.task_acks_late = True
+    celery_app.conf.task_reject_on_worker_lost = True
+    celery_app.conf.worker_prefetch_multiplier = 1
+    # Job state and results are kept in app.job_store; remote control needs fanout, which the transport lacks
+    celery_app.conf.task_ignore_result = True
+    celery_app.conf.worker_enable_remote_control = False
+    celery_app.conf.worker_send_task_events = False
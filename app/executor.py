@@ -5,9 +5,21 @@ import os
 import sys
 import shutil
 import re
+import time
 from pathlib import Path
 from typing import Tuple, List, Optional, Dict
 
+try:
+    from .trial_results import ResultCollector, store_results, with_json_report
+    from .trial_scheduler import trial_scheduler
+    from .trial_spec_adapter import warm_runner_env
+    from .trial_history import record_trial_duration
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from trial_results import ResultCollector, store_results, with_json_report  # type: ignore
+    from trial_scheduler import trial_scheduler  # type: ignore
+    from trial_spec_adapter import warm_runner_env  # type: ignore
+    from trial_history import record_trial_duration  # type: ignore
+
 def _resolve_playwright_command(tmp_path: str, headed: bool, project_root: Optional[Path] = None) -> Tuple[List[str], str]:
     """Resolve a runnable Playwright CLI invocation across Windows/Linux.
 
@@ -52,12 +64,50 @@ def _resolve_playwright_command(tmp_path: str, headed: bool, project_root: Optio
     )
 
 
-def run_trial(script_content: str, headed: bool = True, env_overrides: Optional[Dict[str, str]] = None) -> Tuple[bool, str]:
+def _collect_results(
+    report_path: str,
+    stdout: str,
+    returncode: int,
+    run_id: str,
+    spec_name: Optional[str],
+    env: Dict[str, str],
+) -> Tuple[bool, ResultCollector]:
+    """Build the run outcome from Playwright's JSON report, falling back to the line summary.
+
+    Per-test records are stored under ``run_id`` for later queries (see trial_results).
+    """
+    collector = ResultCollector()
+    if not collector.load_json_report(report_path):
+        collector.feed_text(stdout)
+    try:
+        store_results(
+            run_id,
+            collector.records,
+            spec=spec_name or "",
+            reference_id=env.get("DATA_REFERENCE_ID") or env.get("REFERENCE_ID") or "",
+        )
+    except Exception as e:  # pragma: no cover - result storage must not fail the run
+        print(f"[Executor] Failed to store trial results: {e}")
+    return collector.success(returncode), collector
+
+
+def _results_note(run_id: str, collector: ResultCollector) -> str:
+    counts = ", ".join(f"{k}={v}" for k, v in sorted(collector.counts.items())) or "no tests reported"
+    return f"\n[results] run_id={run_id} {counts}\n"
+
+
+def run_trial(
+    script_content: str,
+    headed: bool = True,
+    env_overrides: Optional[Dict[str, str]] = None,
+    spec_name: Optional[str] = None,
+) -> Tuple[bool, str]:
     """Write script to a temp file and execute it via Playwright.
 
     Parameters:
       script_content: Combined TypeScript test content.
       headed: When True, pass --headed to Playwright for visible browser execution.
+      spec_name: Optional stable name (spec path or scenario) to file per-test results under.
 
     Returns:
       (success, logs) where success is True if return code == 0.
@@ -73,37 +123,32 @@ def run_trial(script_content: str, headed: bool = True, env_overrides: Optional[
         env = os.environ.copy()
         if env_overrides:
             env.update(env_overrides)
+        # Also emit a JSON report so outcomes come from structured results, not stdout scraping
+        cmd, env, report_path = with_json_report(cmd, env)
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",  # avoid Windows codepage decode failures
-            cwd=cwd,
-            env=env,
-        )
+        # Wait for a browser slot so concurrent trials cannot oversubscribe the host
+        with trial_scheduler.slot(Path(tmp_path).name, source="executor") as ticket, \
+                warm_runner_env(Path(cwd), headed) as warm_env:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",  # avoid Windows codepage decode failures
+                cwd=cwd,
+                env={**env, **warm_env},
+            )
+            ticket.record.returncode = result.returncode
 
         stdout = result.stdout or ""
         stderr = result.stderr or ""
-        # Determine if run was effectively skipped (no executed tests)
-        only_skipped = False
-        try:
-            # Heuristic: summary contains "N skipped" and does not contain any "passed", "failed", or "flaky"
-            has_skipped = bool(re.search(r"\b(\d+)\s+skipped\b", stdout))
-            has_passed = bool(re.search(r"\b(\d+)\s+passed\b", stdout))
-            has_failed = bool(re.search(r"\b(\d+)\s+failed\b", stdout))
-            has_flaky = bool(re.search(r"\b(\d+)\s+flaky\b", stdout))
-            only_skipped = has_skipped and not (has_passed or has_failed or has_flaky)
-        except Exception:
-            only_skipped = False
-
-        success = (result.returncode == 0) and not only_skipped
+        run_id = ticket.record.run_id
+        success, collector = _collect_results(report_path, stdout, result.returncode, run_id, spec_name, env)
         # Prepend the resolved command/cwd so callers can verify flags like --headed
         cmd_str = " ".join(cmd)
         header = f"$ {cmd_str}\n(cwd={cwd})\n"
-        note = ("\n[notice] All tests were skipped; marking run as not executed.\n" if only_skipped else "")
-        logs = header + stdout + "\n" + stderr + note
+        note = ("\n[notice] All tests were skipped; marking run as not executed.\n" if collector.only_skipped else "")
+        logs = header + stdout + "\n" + stderr + note + _results_note(run_id, collector)
         try:
             os.unlink(tmp_path)  # cleanup temp file
         except OSError:
@@ -136,10 +181,20 @@ def _detect_test_dir(framework_root: Path) -> Path:
     return framework_root / 'tests'
 
 
-def run_trial_in_framework(script_content: str, framework_root: Path, headed: bool = True, env_overrides: Optional[Dict[str, str]] = None) -> Tuple[bool, str]:
+def run_trial_in_framework(
+    script_content: str,
+    framework_root: Path,
+    headed: bool = True,
+    env_overrides: Optional[Dict[str, str]] = None,
+    spec_name: Optional[str] = None,
+    record_duration: bool = False,
+) -> Tuple[bool, str]:
     """Persist a temporary spec INSIDE the framework repo (under detected testDir) so Playwright config matches.
 
     This avoids 'No tests found' when testDir excludes system temp locations.
+    ``spec_name`` is the stable name per-test results are stored under. With
+    ``record_duration``, the Playwright process runtime (excluding the wait for a
+    scheduler slot) is added to the trial duration history for the run's ReferenceID.
     """
     try:
         # Apply trial adapter transformations
@@ -203,32 +258,36 @@ def run_trial_in_framework(script_content: str, framework_root: Path, headed: bo
         env = os.environ.copy()
         if env_overrides:
             env.update(env_overrides)
+        cmd, env, report_path = with_json_report(cmd, env)
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            cwd=str(framework_root),
-            env=env,
-        )
+        with trial_scheduler.slot(Path(tmp_path).name, source="executor") as ticket, \
+                warm_runner_env(framework_root, headed) as warm_env:
+            started = time.monotonic()
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                cwd=str(framework_root),
+                env={**env, **warm_env},
+            )
+            run_seconds = time.monotonic() - started
+            ticket.record.returncode = result.returncode
         stdout = result.stdout or ''
         stderr = result.stderr or ''
-        only_skipped = False
-        try:
-            has_skipped = bool(re.search(r"\b(\d+)\s+skipped\b", stdout))
-            has_passed = bool(re.search(r"\b(\d+)\s+passed\b", stdout))
-            has_failed = bool(re.search(r"\b(\d+)\s+failed\b", stdout))
-            has_flaky = bool(re.search(r"\b(\d+)\s+flaky\b", stdout))
-            only_skipped = has_skipped and not (has_passed or has_failed or has_flaky)
-        except Exception:
-            only_skipped = False
-        success = (result.returncode == 0) and not only_skipped
+        run_id = ticket.record.run_id
+        success, collector = _collect_results(report_path, stdout, result.returncode, run_id, spec_name, env)
+        reference_id = env.get("DATA_REFERENCE_ID") or env.get("REFERENCE_ID")
+        if record_duration and spec_name and reference_id:
+            try:
+                record_trial_duration(spec_name, reference_id, run_seconds, success)
+            except Exception as e:  # pragma: no cover - history must not fail the run
+                print(f"[Executor] Failed to record trial duration: {e}")
         cmd_str = ' '.join(cmd)
         header = f"$ {cmd_str}\n(cwd={framework_root})\n"
-        note = ("\n[notice] All tests were skipped; marking run as not executed.\n" if only_skipped else '')
-        logs = header + stdout + '\n' + stderr + note
+        note = ("\n[notice] All tests were skipped; marking run as not executed.\n" if collector.only_skipped else '')
+        logs = header + stdout + '\n' + stderr + note + _results_note(run_id, collector)
         try:
             os.unlink(tmp_path)
         except OSError:
@@ -1,19 +1,59 @@
-"""Simple job persistence layer backed by SQLite."""
+"""Simple job persistence layer backed by SQLite.
+
+Jobs are indexed by status, type and ``updated_at`` so :func:`list_jobs` can page
+through the backlog newest first (keyset pagination on ``updated_at, id``).
+:func:`compact_jobs` moves finished jobs older than ``JOB_RETENTION_DAYS`` into
+``jobs_archive``, or deletes them when ``JOB_RETENTION_ARCHIVE`` is off.
+:func:`start_compactor` runs it every ``JOB_COMPACT_INTERVAL`` seconds so the
+live table stays small.
+
+Every create/update in this process is also handed to the listeners registered
+with :func:`add_job_listener` as a compact job event (see :func:`job_event`);
+the API uses this to stream job progress without clients polling.
+
+Recorder events raised outside the API process (e.g. by a separate Celery worker)
+are appended to ``recorder_events`` with :func:`add_recorder_event`; the API reads
+them back with :func:`recorder_events_since`. Rows older than
+``RECORDER_EVENT_RETENTION_HOURS`` are pruned by the compactor.
+"""
 
 from __future__ import annotations
 
 import json
+import logging
 import os
 import sqlite3
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 from uuid import uuid4
 
+logger = logging.getLogger(__name__)
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "hashstore.db")
 
+# Finished jobs older than this many days are compacted (0 keeps them forever).
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "30"))
+# Move compacted jobs to jobs_archive (default) instead of deleting them.
+JOB_RETENTION_ARCHIVE = os.getenv("JOB_RETENTION_ARCHIVE", "1").strip().lower() in ("1", "true", "yes", "on")
+JOB_COMPACT_INTERVAL = float(os.getenv("JOB_COMPACT_INTERVAL", "3600"))
+# Cross-process recorder events are only needed while they are streamed; 0 keeps them forever.
+RECORDER_EVENT_RETENTION_HOURS = float(os.getenv("RECORDER_EVENT_RETENTION_HOURS", "24"))
+
+FINISHED_STATUSES = ("completed", "failed")
+MAX_PAGE_SIZE = 500
+
+_COLUMNS = "id, type, status, payload, result, error, progress, created_at, updated_at"
+_EVENT_COLUMNS = "id, type, status, error, progress, created_at, updated_at"
+
+JobListener = Callable[[Dict[str, Any]], None]
+_LISTENERS: List[JobListener] = []
+_LISTENERS_LOCK = threading.Lock()
+
 
 def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=10)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -35,6 +75,39 @@ def init_job_store() -> None:
             )
             """
         )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "progress" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (updated_at, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs (status, updated_at, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_type_updated ON jobs (type, updated_at, id)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs_archive (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT,
+                result TEXT,
+                error TEXT,
+                progress TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                archived_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recorder_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_recorder_events_created ON recorder_events (created_at)")
         conn.commit()
     finally:
         conn.close()
@@ -44,6 +117,54 @@ def _utc_iso() -> str:
     return datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
 
 
+def add_job_listener(listener: JobListener) -> None:
+    """Call ``listener(event)`` after every job create/update made by this process."""
+    with _LISTENERS_LOCK:
+        if listener not in _LISTENERS:
+            _LISTENERS.append(listener)
+
+
+def remove_job_listener(listener: JobListener) -> None:
+    with _LISTENERS_LOCK:
+        if listener in _LISTENERS:
+            _LISTENERS.remove(listener)
+
+
+def job_event(row: Union[sqlite3.Row, Dict[str, Any]]) -> Dict[str, Any]:
+    """Compact job state for live updates: status plus the progress stage and percentage."""
+    progress = row["progress"]
+    if isinstance(progress, str):
+        progress = json.loads(progress)
+    progress = progress or None
+    return {
+        "jobId": row["id"],
+        "type": row["type"],
+        "status": row["status"],
+        "stage": progress.get("stage") if progress else None,
+        "percent": progress.get("percent") if progress else None,
+        "progress": progress,
+        "error": row["error"],
+        "createdAt": row["created_at"],
+        "updatedAt": row["updated_at"],
+    }
+
+
+def _notify(conn: sqlite3.Connection, job_id: str) -> None:
+    with _LISTENERS_LOCK:
+        listeners = list(_LISTENERS)
+    if not listeners:
+        return
+    row = conn.execute(f"SELECT {_EVENT_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return
+    event = job_event(row)
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception as exc:  # noqa: BLE001 - a broken subscriber must not fail the job
+            logger.debug(f"[JobStore] Job listener failed: {exc}")
+
+
 def create_job(job_type: str, payload: Optional[Dict[str, Any]] = None) -> str:
     job_id = uuid4().hex
     now = _utc_iso()
@@ -66,6 +187,7 @@ def create_job(job_type: str, payload: Optional[Dict[str, Any]] = None) -> str:
             ),
         )
         conn.commit()
+        _notify(conn, job_id)
     finally:
         conn.close()
     return job_id
@@ -95,6 +217,21 @@ def update_job(
             ),
         )
         conn.commit()
+        _notify(conn, job_id)
+    finally:
+        conn.close()
+
+
+def update_job_progress(job_id: str, progress: Dict[str, Any]) -> None:
+    """Replace the job's progress snapshot without touching its status or result."""
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(progress), _utc_iso(), job_id),
+        )
+        conn.commit()
+        _notify(conn, job_id)
     finally:
         conn.close()
 
@@ -108,10 +245,213 @@ def get_job(job_id: str) -> Optional[Dict[str, Any]]:
         conn.close()
     if not row:
         return None
+    return _row_to_dict(row)
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
     result = dict(row)
     if result.get("payload"):
         result["payload"] = json.loads(result["payload"])
     if result.get("result"):
         result["result"] = json.loads(result["result"])
+    if result.get("progress"):
+        result["progress"] = json.loads(result["progress"])
     return result
 
+
+
+def _as_tuple(value: Union[None, str, Iterable[str]]) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
+
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    return f"{row['updated_at']}|{row['id']}"
+
+
+def list_jobs(
+    *,
+    status: Union[None, str, Iterable[str]] = None,
+    job_type: Union[None, str, Iterable[str]] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Jobs matching the filters, most recently updated first.
+
+    Returns ``(jobs, next_cursor)``; pass ``next_cursor`` back to get the next
+    page (it is None on the last page). Raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    clauses: List[str] = []
+    params: List[Any] = []
+    statuses, types = _as_tuple(status), _as_tuple(job_type)
+    if statuses:
+        clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if types:
+        clauses.append(f"type IN ({', '.join('?' for _ in types)})")
+        params.extend(types)
+    if cursor:
+        updated_at, sep, last_id = cursor.rpartition("|")
+        if not sep or not updated_at or not last_id:
+            raise ValueError("Invalid job cursor.")
+        clauses.append("(updated_at < ? OR (updated_at = ? AND id < ?))")
+        params.extend((updated_at, updated_at, last_id))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM jobs {where} ORDER BY updated_at DESC, id DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+    finally:
+        conn.close()
+    jobs = [_row_to_dict(row) for row in rows[:limit]]
+    next_cursor = _encode_cursor(jobs[-1]) if len(rows) > limit else None
+    return jobs, next_cursor
+
+
+def job_events_since(updated_after: str, *, limit: int = MAX_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Events for jobs updated after ``updated_after`` (any process), oldest first."""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            f"SELECT {_EVENT_COLUMNS} FROM jobs WHERE updated_at > ? ORDER BY updated_at, id LIMIT ?",
+            (updated_after, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [job_event(row) for row in rows]
+
+
+def add_recorder_event(session_id: str, event: Dict[str, Any]) -> None:
+    """Persist a recorder event for subscribers in another process."""
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT INTO recorder_events (session_id, event, created_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(event, default=str), _utc_iso()),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def last_recorder_event_id() -> int:
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) AS last_id FROM recorder_events").fetchone()
+    finally:
+        conn.close()
+    return row["last_id"]
+
+
+def recorder_events_since(after_id: int, *, limit: int = MAX_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Recorder events persisted after ``after_id`` (any session), oldest first."""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, session_id, event FROM recorder_events WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [{"id": row["id"], "sessionId": row["session_id"], "event": json.loads(row["event"])} for row in rows]
+
+
+def prune_recorder_events(older_than_hours: Optional[float] = None) -> int:
+    """Delete recorder events older than ``older_than_hours``; returns how many were removed."""
+    hours = RECORDER_EVENT_RETENTION_HOURS if older_than_hours is None else older_than_hours
+    if hours <= 0:
+        return 0
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    conn = _connect()
+    try:
+        with conn:
+            deleted = conn.execute("DELETE FROM recorder_events WHERE created_at < ?", (cutoff,)).rowcount
+    finally:
+        conn.close()
+    return deleted
+
+
+def count_jobs(*, job_type: Union[None, str, Iterable[str]] = None) -> Dict[str, int]:
+    """Number of jobs per status (optionally for some job types only)."""
+    types = _as_tuple(job_type)
+    where = f"WHERE type IN ({', '.join('?' for _ in types)})" if types else ""
+    conn = _connect()
+    try:
+        rows = conn.execute(f"SELECT status, COUNT(*) AS n FROM jobs {where} GROUP BY status", types).fetchall()
+    finally:
+        conn.close()
+    return {row["status"]: row["n"] for row in rows}
+
+
+def compact_jobs(
+    older_than_days: Optional[float] = None,
+    *,
+    archive: Optional[bool] = None,
+    batch_size: int = 500,
+) -> Dict[str, int]:
+    """Archive or delete finished jobs last updated more than ``older_than_days`` ago.
+
+    Queued and running jobs are never touched. Works in batches so a large backlog
+    does not hold the database write lock for long. Returns the counts moved.
+    """
+    days = JOB_RETENTION_DAYS if older_than_days is None else older_than_days
+    archive = JOB_RETENTION_ARCHIVE if archive is None else archive
+    summary = {"archived": 0, "deleted": 0}
+    if days <= 0:
+        return summary
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+    select_batch = (
+        f"SELECT id FROM jobs WHERE status IN ({placeholders}) AND updated_at < ? "
+        "ORDER BY updated_at LIMIT ?"
+    )
+    conn = _connect()
+    try:
+        while True:
+            ids = [row["id"] for row in conn.execute(select_batch, (*FINISHED_STATUSES, cutoff, batch_size))]
+            if not ids:
+                break
+            id_list = ", ".join("?" for _ in ids)
+            with conn:
+                if archive:
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO jobs_archive ({_COLUMNS}, archived_at) "
+                        f"SELECT {_COLUMNS}, ? FROM jobs WHERE id IN ({id_list})",
+                        (_utc_iso(), *ids),
+                    )
+                conn.execute(f"DELETE FROM jobs WHERE id IN ({id_list})", ids)
+            summary["archived" if archive else "deleted"] += len(ids)
+            if len(ids) < batch_size:
+                break
+    finally:
+        conn.close()
+    return summary
+
+
+def start_compactor(interval: float = JOB_COMPACT_INTERVAL) -> Optional[threading.Thread]:
+    """Run :func:`compact_jobs` and :func:`prune_recorder_events` now and then every ``interval`` seconds."""
+    if JOB_RETENTION_DAYS <= 0 and RECORDER_EVENT_RETENTION_HOURS <= 0:
+        return None
+
+    def _loop() -> None:
+        while True:
+            try:
+                summary = compact_jobs()
+                if summary["archived"] or summary["deleted"]:
+                    logger.info(f"[JobStore] Compacted jobs: {summary}")
+                pruned = prune_recorder_events()
+                if pruned:
+                    logger.info(f"[JobStore] Pruned {pruned} recorder event(s)")
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(f"[JobStore] Compaction pass failed: {exc}")
+            time.sleep(max(60.0, interval))
+
+    thread = threading.Thread(target=_loop, name="job-compactor", daemon=True)
+    thread.start()
+    return thread
@@ -90,7 +90,7 @@ class TestScriptOrchestrator:
                 selector = elem.get("cssPath") or elem.get("xpath") or "body"
                 entry = {"action": action, "selector": selector}
                 extra = act.get("extra") or {}
-                if action in ("input", "change"):
+                if action in ("input", "change", "fill"):
                     entry["action"] = "fill"
                     value = extra.get("valueMasked") or extra.get("value") or elem.get("valueMasked") or ""
                     entry["value"] = value
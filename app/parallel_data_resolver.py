@@ -1,7 +1,8 @@
+import heapq
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,54 @@ def resolve_parallel_reference_ids(
     return assigned_id
 
 
+def plan_reference_shards(
+    reference_ids: List[str],
+    total_workers: int,
+    estimates: Optional[Mapping[str, float]] = None,
+) -> List[List[str]]:
+    """
+    Distribute reference IDs across workers so the slowest worker finishes as early as possible.
+
+    Uses longest-processing-time-first bin packing on the estimated duration of each ID
+    (see ``trial_history.estimate_durations``). IDs without history are assumed to take
+    the mean of the known estimates. Falls back to round-robin when no estimates exist.
+
+    Args:
+        reference_ids: Reference IDs to distribute (order is kept within a shard for round-robin)
+        total_workers: Number of parallel workers
+        estimates: Optional mapping of reference ID -> estimated seconds
+
+    Returns:
+        One list of reference IDs per worker (empty lists for idle workers)
+    """
+    ids = [r for r in dict.fromkeys(str(i).strip() for i in reference_ids) if r]
+    workers = max(1, min(int(total_workers or 1), len(ids) or 1))
+    shards: List[List[str]] = [[] for _ in range(workers)]
+    known = {r: float(estimates[r]) for r in ids if estimates and estimates.get(r) is not None}
+
+    if not known:
+        for i, ref_id in enumerate(ids):
+            shards[i % workers].append(ref_id)
+        logger.info(f"[ParallelDataResolver] Round-robin shards (no history): {shards}")
+        return shards
+
+    default = sum(known.values()) / len(known)
+    order = {r: i for i, r in enumerate(ids)}
+    weighted = sorted(ids, key=lambda r: (-known.get(r, default), order[r]))
+    # Min-heap of (load, worker_index): always give the next-longest ID to the least-loaded worker
+    loads = [(0.0, w) for w in range(workers)]
+    for ref_id in weighted:
+        load, w = heapq.heappop(loads)
+        shards[w].append(ref_id)
+        heapq.heappush(loads, (load + known.get(ref_id, default), w))
+
+    logger.info(
+        "[ParallelDataResolver] Duration-aware shards: "
+        + ", ".join(f"w{w}={shard} (~{sum(known.get(r, default) for r in shard):.1f}s)" for w, shard in enumerate(shards))
+    )
+    return shards
+
+
 def create_parallel_config(reference_ids: List[str], output_path: Optional[Path] = None) -> Dict:
     """
     Create a parallel execution config mapping worker indices to reference IDs.
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
@@ -110,7 +111,7 @@ def _convert_action(action: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     mapped_action = None
     value = None
 
-    if action_type == "change":
+    if action_type in ("change", "fill"):
         mapped_action = "fill"
         value = extra.get("valueMasked") or extra.get("value") or ""
     elif action_type == "click":
@@ -266,6 +267,16 @@ def build_refined_flow_from_metadata(
     return refined_flow
 
 
+def recorder_steps_from_metadata(metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Raw recorder steps (the shape ``recorder_enricher`` consumes) for the metadata's actions."""
+    steps: List[Dict[str, Any]] = []
+    for action in metadata.get("actions") or []:
+        entry = _convert_action(action)
+        if entry:
+            steps.append(entry["raw"])
+    return steps
+
+
 def auto_refine_and_ingest(
     session_dir: str | Path,
     metadata: Dict[str, Any],
@@ -274,6 +285,7 @@ def auto_refine_and_ingest(
     ingest: bool = True,
 ) -> Dict[str, Any]:
     session_path = Path(session_dir)
+    started = time.perf_counter()
     refined_flow = build_refined_flow_from_metadata(metadata, flow_name=flow_name)
 
     resolved_flow_name = refined_flow["flow_name"]
@@ -284,6 +296,7 @@ def auto_refine_and_ingest(
 
     with output_path.open("w", encoding="utf-8") as fh:
         json.dump(refined_flow, fh, indent=2, ensure_ascii=False)
+    timings = {"refine": round(time.perf_counter() - started, 3)}
 
     ingest_stats: Optional[Dict[str, Any]] = None
     ingest_error: Optional[str] = None
@@ -293,11 +306,13 @@ def auto_refine_and_ingest(
         except ImportError:  # pragma: no cover - fallback for direct execution
             from ingest_refined_flow import ingest_refined_file  # type: ignore
         
+        ingest_started = time.perf_counter()
         try:
             ingest_stats = ingest_refined_file(str(output_path), resolved_flow_name)
         except Exception as e:
             ingest_error = f"Vector DB ingestion failed: {str(e)}"
             print(f"[WARNING] {ingest_error}")
+        timings["ingest"] = round(time.perf_counter() - ingest_started, 3)
 
     return {
         "refined_path": str(output_path),
@@ -305,4 +320,5 @@ def auto_refine_and_ingest(
         "ingested": bool(ingest_stats),
         "ingest_stats": ingest_stats,
         "ingest_error": ingest_error,
+        "timings": timings,
     }
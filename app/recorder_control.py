@@ -0,0 +1,175 @@
+"""File-based control channel for a running recorder session.
+
+Controllers (the API, Celery tasks, scripts) drop one JSON command file per
+request into ``<session_dir>/control/``; the recorder picks them up from its main
+loop, applies them and writes an acknowledgement next to them (and publishes it
+as a recorder event). Files are written with an atomic rename, so a reader never
+sees a half-written command. This works the same on Windows and Linux and across
+processes that only share the recordings directory.
+
+Commands: ``pause``, ``resume``, ``snapshot`` (capture DOM/screenshot now) and
+``stop`` (graceful shutdown through the normal drain and finalize path).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from .recorder_manifest import write_json_atomic
+
+CONTROL_DIRNAME = "control"
+ACK_DIRNAME = "acks"
+CONTROL_COMMANDS = ("pause", "resume", "snapshot", "stop")
+
+
+def control_dir(session_dir: Path) -> Path:
+    return Path(session_dir) / CONTROL_DIRNAME
+
+
+def send_control_command(
+    session_dir: Path,
+    command: str,
+    *,
+    wait: float = 0.0,
+    **params: Any,
+) -> Dict[str, Any]:
+    """Queue ``command`` for the recorder in ``session_dir``.
+
+    When ``wait`` is positive, block up to that many seconds for the recorder's
+    acknowledgement. The result has ``acknowledged`` and, if acknowledged, ``ack``.
+    """
+    command = (command or "").strip().lower()
+    if command not in CONTROL_COMMANDS:
+        raise ValueError(f"Unknown recorder command '{command}'. Choose from: {', '.join(CONTROL_COMMANDS)}")
+    directory = control_dir(session_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    command_id = f"{time.time_ns():020d}-{uuid4().hex[:8]}"
+    write_json_atomic(
+        directory / f"{command_id}.json",
+        {"id": command_id, "command": command, "params": params, "sentAt": time.time()},
+    )
+    result: Dict[str, Any] = {"commandId": command_id, "command": command, "acknowledged": False}
+    if wait > 0:
+        ack = wait_for_ack(session_dir, command_id, timeout=wait)
+        if ack is not None:
+            result.update(acknowledged=True, ack=ack)
+    return result
+
+
+def wait_for_ack(session_dir: Path, command_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+    ack_path = control_dir(session_dir) / ACK_DIRNAME / f"{command_id}.json"
+    deadline = time.monotonic() + max(0.0, timeout)
+    delay = 0.05
+    while True:
+        try:
+            return json.loads(ack_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+        delay = min(delay * 2, 0.5)
+
+
+class ControlChannel:
+    """Recorder-side reader of the control directory."""
+
+    def __init__(self, session_dir: Path) -> None:
+        self.directory = control_dir(session_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / ACK_DIRNAME).mkdir(exist_ok=True)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Return pending commands in the order they were sent, removing them from the queue."""
+        try:
+            names = sorted(
+                entry.name
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(".json") and not entry.name.startswith(".")
+            )
+        except OSError:
+            return []
+        commands: List[Dict[str, Any]] = []
+        for name in names:
+            path = self.directory / name
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = None
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            if isinstance(data, dict) and data.get("command"):
+                commands.append(data)
+        return commands
+
+    def ack(self, command: Dict[str, Any], status: str, **details: Any) -> Dict[str, Any]:
+        payload = {
+            "id": command.get("id"),
+            "command": command.get("command"),
+            "status": status,
+            "ackAt": time.time(),
+            **details,
+        }
+        if command.get("id"):
+            try:
+                write_json_atomic(self.directory / ACK_DIRNAME / f"{command['id']}.json", payload)
+            except OSError:
+                pass
+        return payload
+
+
+def request_graceful_stop(
+    session_dir: Path,
+    process: "subprocess.Popen[Any]",
+    *,
+    ack_timeout: float = 5.0,
+    exit_timeout: float = 30.0,
+) -> bool:
+    """Ask the recorder to stop through the control channel and wait for it to exit.
+
+    Returns False (so the caller can fall back to terminate/kill) when the recorder
+    is not listening, does not acknowledge in time, or does not exit in time.
+    """
+    if process.poll() is not None or not control_dir(session_dir).is_dir():
+        return False
+    result = send_control_command(session_dir, "stop", wait=ack_timeout)
+    if not result["acknowledged"]:
+        return False
+    try:
+        process.wait(timeout=exit_timeout)
+    except subprocess.TimeoutExpired:
+        return False
+    return True
+
+
+def stop_recorder_process(
+    session_dir: Optional[Path],
+    process: Any,
+    *,
+    exit_timeout: float = 30.0,
+    terminate_timeout: float = 10.0,
+) -> bool:
+    """Stop a recorder: graceful control-channel stop first, then terminate and kill.
+
+    ``process`` is a ``Popen`` or any object with ``poll``/``wait``/``terminate``/``kill``
+    (see ``recorder_registry.ProcessHandle``). Returns True if the graceful path worked.
+    """
+    if process is None or process.poll() is not None:
+        return False
+    graceful = bool(session_dir) and request_graceful_stop(session_dir, process, exit_timeout=exit_timeout)
+    if not graceful:
+        process.terminate()
+        try:
+            process.wait(timeout=terminate_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait(timeout=5)
+    return graceful
@@ -0,0 +1,181 @@
+"""Session manifest (completion marker) for recorder artefacts.
+
+The recorder writes ``manifest.json`` with ``status: "recording"`` when a session
+starts and rewrites it as ``"complete"`` (or ``"failed"``) once ``metadata.json``,
+the HAR and the trace have been flushed. Every file is published with an atomic
+rename, so readers never see a half-written JSON document.
+
+Consumers (finalize, auto-ingest) call :func:`wait_for_completion` instead of
+retry-parsing ``metadata.json``: it returns as soon as the manifest leaves the
+``recording`` state, the recorder process is gone, or the timeout lapses. With
+``watchfiles`` installed (it ships with ``uvicorn[standard]``) the wait wakes on
+file-system events; otherwise it polls with a short backoff.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from uuid import uuid4
+
+from .recorder_registry import pid_alive
+
+try:  # pragma: no cover - optional dependency
+    from watchfiles import watch as _watch
+except ImportError:  # pragma: no cover
+    _watch = None
+
+MANIFEST_FILENAME = "manifest.json"
+STATUS_RECORDING = "recording"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+# Upper bound on a single watch/poll slice so process liveness is re-checked regularly.
+_WAIT_SLICE = 1.0
+# On Windows os.replace fails with PermissionError while a reader (the API polling
+# metadata.json/manifest.json) has the target open; retry with backoff for up to ~1.5s.
+_REPLACE_ATTEMPTS = 8
+_REPLACE_BACKOFF = 0.02
+
+
+def _replace_with_retry(src: Path, dst: Path) -> None:
+    delay = _REPLACE_BACKOFF
+    for attempt in range(_REPLACE_ATTEMPTS):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == _REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+
+def write_json_atomic(path: Path, payload: Any, indent: Optional[int] = None) -> None:
+    """Write ``payload`` as JSON to ``path`` via a temp file and ``os.replace``.
+
+    A replace blocked by a concurrent reader (``PermissionError`` on Windows) is
+    retried briefly before the error is raised.
+    """
+    tmp = path.with_name(f".{path.name}.{uuid4().hex[:8]}.tmp")
+    try:
+        tmp.write_text(json.dumps(payload, indent=indent), encoding="utf-8")
+        _replace_with_retry(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def manifest_path(session_dir: Path) -> Path:
+    return Path(session_dir) / MANIFEST_FILENAME
+
+
+def read_manifest(session_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(manifest_path(session_dir).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _artefact_entry(session_dir: Path, relative: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not relative:
+        return None
+    path = Path(relative)
+    if not path.is_absolute():
+        path = session_dir / path
+    try:
+        return {"path": relative, "bytes": path.stat().st_size}
+    except OSError:
+        return None
+
+
+def _count_files(directory: Path) -> int:
+    try:
+        return sum(1 for entry in os.scandir(directory) if entry.is_file() and not entry.name.startswith("."))
+    except OSError:
+        return 0
+
+
+def write_manifest(
+    session_dir: Path,
+    status: str,
+    *,
+    artifacts: Optional[Dict[str, Optional[str]]] = None,
+    **details: Any,
+) -> Dict[str, Any]:
+    """Publish the session manifest. ``artifacts`` maps names to session-relative paths."""
+    session_dir = Path(session_dir)
+    now = time.time()
+    previous = {} if status == STATUS_RECORDING else read_manifest(session_dir) or {}
+    payload: Dict[str, Any] = {
+        "sessionId": session_dir.name,
+        "status": status,
+        "pid": previous.get("pid", os.getpid()),
+        "startedAt": previous.get("startedAt", now),
+        "updatedAt": now,
+    }
+    if status != STATUS_RECORDING:
+        files: Dict[str, Any] = {}
+        for name, relative in {"metadata": "metadata.json", **(artifacts or {})}.items():
+            entry = _artefact_entry(session_dir, relative)
+            if entry:
+                files[name] = entry
+        payload["artifacts"] = files
+        payload["domFiles"] = _count_files(session_dir / "dom")
+        payload["screenshotFiles"] = _count_files(session_dir / "screenshots")
+    payload.update(details)
+    write_json_atomic(manifest_path(session_dir), payload, indent=2)
+    return payload
+
+
+def _settled(session_dir: Path) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    manifest = read_manifest(session_dir)
+    if manifest is None or manifest.get("status") != STATUS_RECORDING:
+        return True, manifest
+    return not pid_alive(manifest.get("pid")), manifest
+
+
+def wait_for_completion(session_dir: Path, timeout: float) -> Optional[Dict[str, Any]]:
+    """Wait until the recorder in ``session_dir`` has finished publishing its artefacts.
+
+    Returns the last manifest seen (None for sessions without one, which are
+    treated as already complete). A manifest still in ``recording`` state means
+    the timeout lapsed or the recorder died without finalizing.
+    """
+    session_dir = Path(session_dir)
+    deadline = time.monotonic() + max(0.0, timeout)
+    done, manifest = _settled(session_dir)
+    if done or timeout <= 0:
+        return manifest
+
+    if _watch is not None:
+        try:
+            for _changes in _watch(
+                session_dir,
+                recursive=False,
+                debounce=50,
+                step=20,
+                rust_timeout=int(min(_WAIT_SLICE, timeout) * 1000) or 1,
+                yield_on_timeout=True,
+                raise_interrupt=False,
+            ):
+                done, manifest = _settled(session_dir)
+                if done or time.monotonic() >= deadline:
+                    return manifest
+        except Exception:
+            pass  # watcher unavailable for this path; fall back to polling
+
+    delay = 0.05
+    while True:
+        done, manifest = _settled(session_dir)
+        remaining = deadline - time.monotonic()
+        if done or remaining <= 0:
+            return manifest
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.5)
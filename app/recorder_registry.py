@@ -0,0 +1,392 @@
+"""Durable registry of recorder processes backed by SQLite.
+
+Both launch paths (the Celery tasks in :mod:`app.tasks` and the synchronous
+``/recorder-sync`` router) register every recorder they start here, so any API
+or worker process can see, stop and clean up sessions it did not launch itself,
+including after a restart.
+
+Each row tracks the recorder pid, the pid of the process that launched it (the
+"owner"), start time, heartbeat and status. The recorder updates its heartbeat
+from a background thread (:func:`start_heartbeat`). :func:`reap_recorders` marks
+rows whose process is gone (or a zombie) as ``lost`` and stops recorders that
+stopped heartbeating, so a deploy does not leave hung headed browsers behind.
+A live, heartbeating recorder survives the restart of the process that launched
+it and stays visible to its successor; set ``RECORDER_REAP_ORPHANS`` to also stop
+recorders whose owner has exited.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import sqlite3
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "hashstore.db")
+
+HEARTBEAT_INTERVAL = float(os.getenv("RECORDER_HEARTBEAT_INTERVAL", "5"))
+# A live recorder whose heartbeat is older than this is treated as hung and reaped.
+HEARTBEAT_TIMEOUT = float(os.getenv("RECORDER_HEARTBEAT_TIMEOUT", "120"))
+# Opt-in: an API restart (including ``uvicorn --reload``) changes the owner pid of every session.
+REAP_ORPHANS = os.getenv("RECORDER_REAP_ORPHANS", "0").strip().lower() in ("1", "true", "yes", "on")
+REAPER_INTERVAL = float(os.getenv("RECORDER_REAPER_INTERVAL", "60"))
+
+STATUS_RUNNING = "running"
+STATUS_STOPPING = "stopping"
+STATUS_EXITED = "exited"
+STATUS_LOST = "lost"
+STATUS_REAPED = "reaped"
+ACTIVE_STATUSES = (STATUS_RUNNING, STATUS_STOPPING)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_recorder_registry() -> None:
+    conn = _connect()
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recorder_processes (
+                session_id TEXT PRIMARY KEY,
+                pid INTEGER,
+                proc_start TEXT,
+                owner_pid INTEGER,
+                owner_start TEXT,
+                launcher TEXT NOT NULL,
+                job_id TEXT,
+                session_dir TEXT,
+                status TEXT NOT NULL,
+                stop_requested INTEGER NOT NULL DEFAULT 0,
+                returncode INTEGER,
+                started_at REAL NOT NULL,
+                heartbeat_at REAL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_recorder_processes_status ON recorder_processes (status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_recorder_processes_pid ON recorder_processes (pid)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _utc_iso() -> str:
+    return datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
+
+
+# ---- process helpers ------------------------------------------------------
+
+def _proc_stat(pid: int) -> Optional[List[str]]:
+    """Fields of ``/proc/<pid>/stat`` after the command name (Linux only)."""
+    try:
+        raw = Path(f"/proc/{pid}/stat").read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    return raw.rsplit(")", 1)[-1].split()
+
+
+def process_start_marker(pid: Optional[int]) -> Optional[str]:
+    """Kernel start time of ``pid``, used to detect pid reuse (None where unavailable)."""
+    if not pid:
+        return None
+    fields = _proc_stat(pid)
+    # fields[0] is the state, so starttime (field 22 of the full line) is index 19
+    return fields[19] if fields and len(fields) > 19 else None
+
+
+def pid_alive(pid: Any, start_marker: Optional[str] = None) -> bool:
+    """True if ``pid`` is running (not a zombie) and, when given, started at ``start_marker``."""
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists but owned by another user
+    fields = _proc_stat(pid)
+    if fields is None:
+        return True
+    if fields[0] in ("Z", "X"):
+        return False
+    return start_marker is None or process_start_marker(pid) == start_marker
+
+
+class ProcessHandle:
+    """Minimal ``Popen``-like handle for a recorder this process did not spawn."""
+
+    def __init__(self, pid: int, start_marker: Optional[str] = None) -> None:
+        self.pid = pid
+        self.start_marker = start_marker
+        self.returncode: Optional[int] = None
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is not None:
+            return self.returncode
+        try:
+            # Reap it if it happens to be our child (e.g. launched before a handle was lost)
+            reaped, status = os.waitpid(self.pid, os.WNOHANG)
+            if reaped:
+                self.returncode = os.waitstatus_to_exitcode(status)
+                return self.returncode
+        except (ChildProcessError, OSError, AttributeError):
+            pass
+        if not pid_alive(self.pid, self.start_marker):
+            self.returncode = 0  # exit status of a non-child is not observable
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.05
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(f"pid {self.pid}", timeout)
+            time.sleep(delay if deadline is None else min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, 0.5)
+        return self.returncode  # type: ignore[return-value]
+
+    def _signal(self, sig: int) -> None:
+        if self.poll() is not None:
+            return
+        try:
+            os.kill(self.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def terminate(self) -> None:
+        self._signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self._signal(getattr(signal, "SIGKILL", signal.SIGTERM))
+
+
+# ---- registry -------------------------------------------------------------
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    record["stop_requested"] = bool(record.get("stop_requested"))
+    return record
+
+
+def register_process(
+    session_id: str,
+    pid: Optional[int],
+    *,
+    launcher: str,
+    session_dir: Optional[Path] = None,
+    job_id: Optional[str] = None,
+) -> None:
+    """Record a freshly launched recorder (replacing any previous row for the session)."""
+    init_recorder_registry()
+    owner_pid = os.getpid()
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO recorder_processes (
+                session_id, pid, proc_start, owner_pid, owner_start, launcher, job_id, session_dir,
+                status, stop_requested, returncode, started_at, heartbeat_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, NULL, ?, ?, ?)
+            """,
+            (
+                session_id,
+                pid,
+                process_start_marker(pid),
+                owner_pid,
+                process_start_marker(owner_pid),
+                launcher,
+                job_id,
+                str(session_dir) if session_dir else None,
+                STATUS_RUNNING,
+                now,
+                now,
+                _utc_iso(),
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_process(session_id: str) -> Optional[Dict[str, Any]]:
+    init_recorder_registry()
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM recorder_processes WHERE session_id = ?", (session_id,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_dict(row) if row else None
+
+
+def list_processes(statuses: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    init_recorder_registry()
+    conn = _connect()
+    try:
+        if statuses:
+            placeholders = ", ".join("?" for _ in statuses)
+            rows = conn.execute(
+                f"SELECT * FROM recorder_processes WHERE status IN ({placeholders}) ORDER BY started_at DESC",
+                tuple(statuses),
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM recorder_processes ORDER BY started_at DESC").fetchall()
+    finally:
+        conn.close()
+    return [_row_to_dict(row) for row in rows]
+
+
+_ACTIVE_FILTER = f"status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})"
+
+
+def _update(session_id: str, assignments: str, params: tuple, *, only_active: bool = False) -> bool:
+    init_recorder_registry()
+    where = "session_id = ?"
+    where_params: tuple = (session_id,)
+    if only_active:
+        where += f" AND {_ACTIVE_FILTER}"
+        where_params += ACTIVE_STATUSES
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            f"UPDATE recorder_processes SET {assignments}, updated_at = ? WHERE {where}",
+            (*params, _utc_iso(), *where_params),
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+
+def mark_stop_requested(session_id: str) -> None:
+    _update(session_id, "stop_requested = 1, status = ?", (STATUS_STOPPING,), only_active=True)
+
+
+def consume_stop_request(session_id: str) -> bool:
+    record = get_process(session_id)
+    if not record or not record["stop_requested"]:
+        return False
+    _update(session_id, "stop_requested = 0", ())
+    return True
+
+
+def mark_exited(session_id: str, returncode: Optional[int] = None, status: str = STATUS_EXITED) -> None:
+    """Record that the session's recorder has ended (no-op for rows already closed)."""
+    _update(session_id, "status = ?, returncode = ?", (status, returncode), only_active=True)
+
+
+def heartbeat(pid: int) -> None:
+    """Refresh the heartbeat of the active row for recorder ``pid``."""
+    conn = _connect()
+    try:
+        conn.execute(
+            f"UPDATE recorder_processes SET heartbeat_at = ? WHERE pid = ? AND {_ACTIVE_FILTER}",
+            (time.time(), pid, *ACTIVE_STATUSES),
+        )
+        conn.commit()
+    except sqlite3.Error:
+        pass  # table not created yet or database busy; the next beat retries
+    finally:
+        conn.close()
+
+
+def start_heartbeat(stop_event: threading.Event, interval: float = HEARTBEAT_INTERVAL) -> threading.Thread:
+    """Beat for the current process (the recorder) until ``stop_event`` is set."""
+    pid = os.getpid()
+
+    def _loop() -> None:
+        while True:
+            heartbeat(pid)
+            if stop_event.wait(interval):
+                return
+
+    thread = threading.Thread(target=_loop, name="recorder-heartbeat", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_running(record: Optional[Dict[str, Any]]) -> bool:
+    """True if the registry row is active and its recorder process is still alive."""
+    return bool(record) and record["status"] in ACTIVE_STATUSES and pid_alive(record.get("pid"), record.get("proc_start"))
+
+
+def process_handle(record: Dict[str, Any]) -> Optional[ProcessHandle]:
+    if not record.get("pid"):
+        return None
+    return ProcessHandle(record["pid"], record.get("proc_start"))
+
+
+def reap_recorders(*, stop_timeout: float = 10.0, now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Close out dead rows and stop hung recorders (and orphaned ones when ``REAP_ORPHANS`` is on).
+
+    Returns one ``{"sessionId", "action", "reason"}`` entry per row changed.
+    """
+    from .recorder_control import stop_recorder_process
+
+    now = time.time() if now is None else now
+    actions: List[Dict[str, Any]] = []
+    for record in list_processes(ACTIVE_STATUSES):
+        session_id = record["session_id"]
+        if not pid_alive(record.get("pid"), record.get("proc_start")):
+            mark_exited(session_id, status=STATUS_LOST)
+            actions.append({"sessionId": session_id, "action": STATUS_LOST, "reason": "process not running"})
+            continue
+        reason = None
+        if REAP_ORPHANS and not pid_alive(record.get("owner_pid"), record.get("owner_start")):
+            reason = "owner process exited"
+        elif record.get("heartbeat_at") and now - record["heartbeat_at"] > HEARTBEAT_TIMEOUT:
+            reason = f"no heartbeat for {int(now - record['heartbeat_at'])}s"
+        if not reason:
+            continue
+        handle = process_handle(record)
+        session_dir = Path(record["session_dir"]) if record.get("session_dir") else None
+        try:
+            graceful = stop_recorder_process(session_dir, handle, exit_timeout=stop_timeout)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"[RecorderRegistry] Failed to reap {session_id} (pid={record.get('pid')}): {exc}")
+            continue
+        mark_exited(session_id, status=STATUS_REAPED)
+        logger.info(f"[RecorderRegistry] Reaped {session_id} (pid={record.get('pid')}): {reason}")
+        actions.append({"sessionId": session_id, "action": STATUS_REAPED, "reason": reason, "graceful": graceful})
+    return actions
+
+
+def start_reaper(interval: float = REAPER_INTERVAL) -> threading.Thread:
+    """Run :func:`reap_recorders` now and then every ``interval`` seconds in a daemon thread."""
+
+    def _loop() -> None:
+        while True:
+            try:
+                reap_recorders()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(f"[RecorderRegistry] Reaper pass failed: {exc}")
+            time.sleep(max(1.0, interval))
+
+    thread = threading.Thread(target=_loop, name="recorder-reaper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,198 @@
+"""Background screenshot encoding and writing for the recorder.
+
+The recorder's capture loop only asks Playwright for the screenshot bytes;
+:class:`ScreenshotWriter` re-encodes (for WebP), de-duplicates and writes them to
+disk on a worker thread. The queue is bounded: when the disk falls behind, new
+frames are dropped instead of blocking capture, so per-action latency stays
+bounded.
+
+WebP output and perceptual-hash dedup need Pillow. Without it, WebP falls back
+to PNG and dedup only skips byte-identical frames.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+
+try:  # pragma: no cover - optional dependency
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_FORMATS = ("png", "jpeg", "webp")
+# Number of recent frame hashes a new frame is compared against.
+DEDUP_HISTORY = 16
+
+
+@dataclass
+class ScreenshotResult:
+    """Outcome of one queued frame, keyed by the path handed out at submit time."""
+
+    planned: str
+    path: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _dhash(data: bytes) -> Optional[int]:
+    """64-bit difference hash of an encoded image, or None if Pillow cannot decode it."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            small = img.convert("L").resize((9, 8))
+            pixels = list(small.getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+class ScreenshotWriter:
+    """Bounded queue plus worker thread that encodes and writes recorder screenshots."""
+
+    def __init__(
+        self,
+        fmt: str = "png",
+        quality: Optional[int] = None,
+        *,
+        dedup: bool = False,
+        dedup_distance: int = 0,
+        max_queue: int = 32,
+        base_dir: Optional[Path] = None,
+    ) -> None:
+        fmt = (fmt or "png").lower()
+        if fmt == "jpg":
+            fmt = "jpeg"
+        if fmt not in SCREENSHOT_FORMATS:
+            raise ValueError(f"Unsupported screenshot format '{fmt}'. Choose from: {', '.join(SCREENSHOT_FORMATS)}")
+        if fmt == "webp" and Image is None:
+            logger.warning("[Screenshots] Pillow is not installed; writing PNG instead of WebP")
+            fmt = "png"
+        self.format = fmt
+        self.quality = None if fmt == "png" or quality is None else max(1, min(100, int(quality)))
+        self.dedup = dedup
+        self.dedup_distance = max(0, int(dedup_distance))
+        self.base_dir = base_dir
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, max_queue))
+        self._results: Deque[ScreenshotResult] = deque()
+        self._recent: Deque[tuple] = deque(maxlen=DEDUP_HISTORY)
+        self.stats: Dict[str, int] = {"written": 0, "duplicates": 0, "dropped": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="recorder-screenshots", daemon=True)
+        self._thread.start()
+
+    @property
+    def suffix(self) -> str:
+        return ".jpg" if self.format == "jpeg" else f".{self.format}"
+
+    def capture_kwargs(self) -> Dict[str, Any]:
+        """Arguments for ``page.screenshot`` so the browser does JPEG encoding itself."""
+        if self.format == "jpeg":
+            kwargs: Dict[str, Any] = {"type": "jpeg"}
+            if self.quality is not None:
+                kwargs["quality"] = self.quality
+            return kwargs
+        return {"type": "png"}
+
+    def _relative(self, path: Path) -> str:
+        if self.base_dir is not None:
+            try:
+                return str(path.relative_to(self.base_dir))
+            except ValueError:
+                pass
+        return str(path)
+
+    def submit(self, stem: Path, data: bytes) -> Optional[str]:
+        """Queue ``data`` for writing to ``stem`` + suffix; returns the planned (relative) path.
+
+        Returns None when the queue is full and the frame was dropped.
+        """
+        path = stem.with_suffix(self.suffix)
+        planned = self._relative(path)
+        try:
+            self._queue.put_nowait((planned, path, data))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return None
+        return planned
+
+    def results(self) -> List[ScreenshotResult]:
+        """Completed frames since the last call (non-blocking)."""
+        done: List[ScreenshotResult] = []
+        while self._results:
+            done.append(self._results.popleft())
+        return done
+
+    def close(self, timeout: float = 30.0) -> List[ScreenshotResult]:
+        """Finish queued frames, stop the worker and return any remaining results."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        return self.results()
+
+    # ---- worker -----------------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            planned, path, data = item
+            try:
+                self._results.append(self._process(planned, path, data))
+            except Exception as exc:  # noqa: BLE001
+                self.stats["failed"] += 1
+                self._results.append(ScreenshotResult(planned=planned, error=str(exc)))
+
+    def _fingerprint(self, data: bytes) -> Union[int, str]:
+        value = _dhash(data)
+        return value if value is not None else hashlib.sha1(data).hexdigest()
+
+    def _find_duplicate(self, fingerprint: Union[int, str]) -> Optional[str]:
+        for seen, seen_path in reversed(self._recent):
+            if isinstance(seen, int) and isinstance(fingerprint, int):
+                if bin(seen ^ fingerprint).count("1") <= self.dedup_distance:
+                    return seen_path
+            elif seen == fingerprint:
+                return seen_path
+        return None
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.format != "webp":
+            return data  # Playwright already produced PNG/JPEG bytes
+        with Image.open(io.BytesIO(data)) as img:
+            out = io.BytesIO()
+            img.save(out, format="WEBP", quality=self.quality if self.quality is not None else 80)
+            return out.getvalue()
+
+    def _process(self, planned: str, path: Path, data: bytes) -> ScreenshotResult:
+        fingerprint = None
+        if self.dedup:
+            fingerprint = self._fingerprint(data)
+            original = self._find_duplicate(fingerprint)
+            if original:
+                self.stats["duplicates"] += 1
+                return ScreenshotResult(planned=planned, path=original, duplicate_of=original)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self._encode(data))
+        self.stats["written"] += 1
+        if fingerprint is not None:
+            self._recent.append((fingerprint, planned))
+        return ScreenshotResult(planned=planned, path=planned)
@@ -0,0 +1,459 @@
+"""Admission control and per-session resource ceilings for recorder processes.
+
+Every recorder launch (Celery task or ``/recorder-sync``) goes through
+:data:`recording_supervisor`, which:
+
+* refuses new sessions once ``RECORDER_MAX_SESSIONS`` recorders are running on
+  this host (counted from the shared process registry, so both launch paths and
+  all API/worker processes share one budget);
+* puts each session in its own cgroup v2 group with ``memory.max`` and
+  ``cpu.max`` when ``RECORDER_CGROUP_ROOT`` points at a delegated, writable
+  cgroup directory. Children (the Playwright driver and the browser) inherit the
+  group, so the ceiling covers the whole session;
+* otherwise lowers the recorder's scheduling priority (``RECORDER_NICE``) and
+  enforces the memory ceiling itself: a session above it for several samples is
+  asked to stop gracefully. ``RLIMIT_AS`` is not used because Chromium reserves
+  far more address space than it ever touches;
+* samples CPU and memory per session (cgroup counters, or the /proc process tree
+  on Linux) and publishes ``resource-usage`` events on the recorder event stream.
+
+The cgroup and priority are applied from the parent right after spawn rather than
+in a ``preexec_fn``, which is unsafe to fork with in the threaded API process. The
+recorder starts the browser well after it starts itself, so the browser still
+inherits both. Where a ceiling cannot be honoured (no /proc on Windows or macOS,
+CPU ceilings without a cgroup), :meth:`RecordingSupervisor.limit_warnings` says so;
+``/recorder/start`` returns those warnings and usage events carry them.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import recorder_registry
+from .api.events import recorder_events
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = int(os.getenv("RECORDER_MAX_SESSIONS", "4"))
+USAGE_INTERVAL = float(os.getenv("RECORDER_USAGE_INTERVAL", "5"))
+CGROUP_ROOT = os.getenv("RECORDER_CGROUP_ROOT", "").strip()
+# Consecutive samples above the memory ceiling before a session without a cgroup is stopped.
+MEMORY_STRIKES = 3
+_CPU_PERIOD_USEC = 100_000
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class RecorderCapacityError(RuntimeError):
+    """Raised when the host already runs the maximum number of recorder sessions."""
+
+
+@dataclass
+class ResourceLimits:
+    """Per-session ceilings; zero means unlimited."""
+
+    memory_mb: int = 0
+    cpu_percent: int = 0  # of one core
+    nice: int = 0
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        return cls(
+            memory_mb=int(os.getenv("RECORDER_MEMORY_LIMIT_MB", "0")),
+            cpu_percent=int(os.getenv("RECORDER_CPU_LIMIT_PERCENT", "0")),
+            nice=int(os.getenv("RECORDER_NICE", "0")),
+        )
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"memoryMb": self.memory_mb, "cpuPercent": self.cpu_percent, "nice": self.nice}
+
+
+@dataclass
+class _Supervised:
+    session_id: str
+    process: Any
+    session_dir: Optional[Path]
+    limits: ResourceLimits
+    cgroup: Optional[Path] = None
+    started: float = field(default_factory=time.monotonic)
+    cpu_seconds: Optional[float] = None
+    sampled_at: Optional[float] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+    peak_memory_mb: float = 0.0
+    strikes: int = 0
+    stop_requested: bool = False
+    warnings: List[str] = field(default_factory=list)
+
+
+# ---- usage sampling -------------------------------------------------------
+
+def _proc_sampling_available() -> bool:
+    return os.path.isfile("/proc/self/stat")
+
+
+def _limit_warnings(limits: ResourceLimits, cgroup: bool) -> List[str]:
+    """Explain which configured ceilings (and usage reporting) this host cannot provide."""
+    if cgroup:
+        return []
+    warnings: List[str] = []
+    if not _proc_sampling_available():
+        warnings.append(
+            "Resource usage sampling is unsupported on this platform; usage events are not published"
+            + (" and the memory ceiling is not enforced." if limits.memory_mb else ".")
+        )
+    if limits.cpu_percent:
+        warnings.append("The CPU ceiling needs a delegated cgroup (RECORDER_CGROUP_ROOT); it is not enforced.")
+    return warnings
+
+
+def _proc_table() -> Dict[int, tuple]:
+    """pid -> (ppid, cpu ticks, rss pages) for every process in /proc (Linux only)."""
+    table: Dict[int, tuple] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return table
+    for name in entries:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as fh:
+                fields = fh.read().rsplit(b")", 1)[-1].split()
+        except OSError:
+            continue
+        # After the command name: state, ppid, ..., utime (idx 11), stime (12), ..., rss (21)
+        try:
+            table[int(name)] = (int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21]))
+        except (IndexError, ValueError):
+            continue
+    return table
+
+
+def _tree_usage(root_pid: int, table: Dict[int, tuple]) -> Optional[Dict[str, float]]:
+    if root_pid not in table:
+        return None
+    children: Dict[int, List[int]] = {}
+    for pid, (ppid, _ticks, _rss) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    ticks = rss = count = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        _ppid, pid_ticks, pid_rss = table[pid]
+        ticks += pid_ticks
+        rss += pid_rss
+        count += 1
+        stack.extend(children.get(pid, ()))
+    return {"cpuSeconds": ticks / _CLK_TCK, "memoryMb": rss * _PAGE_SIZE / 1_048_576, "processes": count}
+
+
+def _cgroup_usage(cgroup: Path) -> Optional[Dict[str, float]]:
+    try:
+        memory = int((cgroup / "memory.current").read_text().strip())
+        usage_usec = 0
+        for line in (cgroup / "cpu.stat").read_text().splitlines():
+            key, _, value = line.partition(" ")
+            if key == "usage_usec":
+                usage_usec = int(value)
+        processes = len((cgroup / "cgroup.procs").read_text().split())
+    except (OSError, ValueError):
+        return None
+    return {"cpuSeconds": usage_usec / 1_000_000, "memoryMb": memory / 1_048_576, "processes": processes}
+
+
+# ---- cgroups ---------------------------------------------------------------
+
+def _create_cgroup(root: str, session_id: str, limits: ResourceLimits) -> Optional[Path]:
+    base = Path(root)
+    if not (base / "cgroup.controllers").exists():
+        return None
+    try:
+        controllers = (base / "cgroup.subtree_control").read_text().split()
+        missing = [c for c in ("memory", "cpu") if c not in controllers]
+        if missing:
+            (base / "cgroup.subtree_control").write_text(" ".join(f"+{c}" for c in missing))
+        group = base / f"recorder-{session_id}"
+        group.mkdir(exist_ok=True)
+        if limits.memory_mb:
+            limit = limits.memory_mb * 1_048_576
+            (group / "memory.high").write_text(str(int(limit * 0.9)))
+            (group / "memory.max").write_text(str(limit))
+        if limits.cpu_percent:
+            quota = max(1000, limits.cpu_percent * _CPU_PERIOD_USEC // 100)
+            (group / "cpu.max").write_text(f"{quota} {_CPU_PERIOD_USEC}")
+        return group
+    except OSError as exc:
+        logger.warning(f"[RecorderSupervisor] cgroup setup failed under {root}: {exc}")
+        return None
+
+
+def _remove_cgroup(group: Optional[Path]) -> None:
+    if group is None:
+        return
+    try:
+        group.rmdir()  # only succeeds once every process has left
+    except OSError:
+        pass
+
+
+def _cgroups_available(root: str) -> bool:
+    return bool(root) and (Path(root) / "cgroup.controllers").exists()
+
+
+def _join_cgroup(pid: int, cgroup: Path) -> bool:
+    try:
+        (cgroup / "cgroup.procs").write_text(str(pid))
+        return True
+    except OSError as exc:
+        logger.warning(f"[RecorderSupervisor] Could not move pid {pid} into {cgroup}: {exc}")
+        return False
+
+
+def _lower_priority(pid: int, nice: int) -> None:
+    if not nice or not hasattr(os, "setpriority"):
+        return
+    try:
+        current = os.getpriority(os.PRIO_PROCESS, pid)
+        os.setpriority(os.PRIO_PROCESS, pid, min(19, current + nice))
+    except OSError as exc:
+        logger.warning(f"[RecorderSupervisor] Could not renice pid {pid}: {exc}")
+
+
+# ---- supervisor --------------------------------------------------------------
+
+class RecordingSupervisor:
+    """Launches recorders within the host's session budget and watches their resource use."""
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = MAX_SESSIONS,
+        limits: Optional[ResourceLimits] = None,
+        usage_interval: float = USAGE_INTERVAL,
+        cgroup_root: str = CGROUP_ROOT,
+        publish: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.limits = limits or ResourceLimits.from_env()
+        self.usage_interval = max(0.5, usage_interval)
+        self.cgroup_root = cgroup_root
+        self._publish = publish or recorder_events.publish_from_thread
+        self._sessions: Dict[str, _Supervised] = {}
+        self._lock = threading.Lock()
+        self._monitor: Optional[threading.Thread] = None
+
+    # -- admission --------------------------------------------------------
+    def _active_locked(self) -> List[str]:
+        local = {sid for sid, s in self._sessions.items() if s.process.poll() is None}
+        registered = {
+            record["session_id"]
+            for record in recorder_registry.list_processes(recorder_registry.ACTIVE_STATUSES)
+            if recorder_registry.is_running(record)
+        }
+        return sorted(local | registered)
+
+    def _check_capacity_locked(self) -> None:
+        active = self._active_locked()
+        if len(active) >= self.max_sessions:
+            raise RecorderCapacityError(
+                f"Recorder capacity reached ({len(active)}/{self.max_sessions} sessions running); "
+                "stop a session or try again later."
+            )
+
+    def active_sessions(self) -> List[str]:
+        """Sessions with a live recorder on this host, from any launcher."""
+        with self._lock:
+            return self._active_locked()
+
+    def check_capacity(self) -> None:
+        with self._lock:
+            self._check_capacity_locked()
+
+    def capacity(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self._active_locked()
+            usage = {sid: dict(s.usage) for sid, s in self._sessions.items()}
+        return {
+            "maxSessions": self.max_sessions,
+            "active": len(active),
+            "available": max(0, self.max_sessions - len(active)),
+            "limits": self.limits.to_dict(),
+            "cgroups": bool(self.cgroup_root),
+            "warnings": self.limit_warnings(),
+            "sessions": [{"sessionId": sid, **usage.get(sid, {})} for sid in active],
+        }
+
+    def limit_warnings(self) -> List[str]:
+        """Ceilings configured for new sessions that this host will not enforce."""
+        return _limit_warnings(self.limits, _cgroups_available(self.cgroup_root))
+
+    def launch(
+        self,
+        session_id: str,
+        cmd: List[str],
+        *,
+        launcher: str,
+        session_dir: Optional[Path] = None,
+        job_id: Optional[str] = None,
+        **popen_kwargs: Any,
+    ) -> subprocess.Popen:
+        """Start a recorder if there is capacity, apply its ceilings and register it.
+
+        Raises :class:`RecorderCapacityError` when the session budget is exhausted.
+        """
+        limits = self.limits
+        with self._lock:
+            # Hold the lock across check + register so concurrent launches cannot overshoot
+            self._check_capacity_locked()
+            cgroup = _create_cgroup(self.cgroup_root, session_id, limits) if self.cgroup_root else None
+            if os.name == "nt" and limits.nice > 0:
+                popen_kwargs.setdefault("creationflags", getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0))
+            try:
+                process = subprocess.Popen(cmd, **popen_kwargs)
+            except Exception:
+                _remove_cgroup(cgroup)
+                raise
+            if cgroup is not None and not _join_cgroup(process.pid, cgroup):
+                _remove_cgroup(cgroup)
+                cgroup = None
+            if os.name != "nt":
+                _lower_priority(process.pid, limits.nice)
+            recorder_registry.register_process(
+                session_id, process.pid, launcher=launcher, session_dir=session_dir, job_id=job_id
+            )
+            warnings = _limit_warnings(limits, cgroup is not None)
+            self._sessions[session_id] = _Supervised(session_id, process, session_dir, limits, cgroup, warnings=warnings)
+            self._ensure_monitor()
+        if warnings:
+            self._publish(
+                session_id,
+                {
+                    "type": "resource-limit",
+                    "level": "warning",
+                    "message": " ".join(warnings),
+                    "warnings": warnings,
+                    "limits": limits.to_dict(),
+                },
+            )
+        logger.info(
+            f"[RecorderSupervisor] Started {session_id} (pid={process.pid}, cgroup={'yes' if cgroup else 'no'}, "
+            f"limits={limits.to_dict()})"
+        )
+        return process
+
+    # -- monitoring ---------------------------------------------------------
+    def sample(self) -> None:
+        """Take one usage sample for every supervised session and publish it."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        if not sessions:
+            return
+        table = _proc_table() if any(s.cgroup is None for s in sessions) else {}
+        now = time.monotonic()
+        for session in sessions:
+            if session.process.poll() is not None:
+                self._finish(session)
+                continue
+            usage = _cgroup_usage(session.cgroup) if session.cgroup else _tree_usage(session.process.pid, table)
+            if usage is None:
+                continue
+            cpu_percent = None
+            if session.cpu_seconds is not None and session.sampled_at is not None and now > session.sampled_at:
+                cpu_percent = max(0.0, (usage["cpuSeconds"] - session.cpu_seconds) / (now - session.sampled_at) * 100)
+            session.cpu_seconds, session.sampled_at = usage["cpuSeconds"], now
+            session.peak_memory_mb = max(session.peak_memory_mb, usage["memoryMb"])
+            session.usage = {
+                "pid": session.process.pid,
+                "memoryMb": round(usage["memoryMb"], 1),
+                "peakMemoryMb": round(session.peak_memory_mb, 1),
+                "cpuPercent": round(cpu_percent, 1) if cpu_percent is not None else None,
+                "cpuSeconds": round(usage["cpuSeconds"], 2),
+                "processes": int(usage["processes"]),
+                "uptimeSeconds": round(now - session.started, 1),
+            }
+            self._publish(
+                session.session_id,
+                {
+                    "type": "resource-usage",
+                    "message": f"Recorder using {session.usage['memoryMb']} MB across {session.usage['processes']} process(es).",
+                    "usage": session.usage,
+                    "limits": session.limits.to_dict(),
+                    "warnings": session.warnings,
+                },
+            )
+            self._enforce_memory(session)
+
+    def _enforce_memory(self, session: _Supervised) -> None:
+        # With a cgroup the kernel enforces memory.max; otherwise stop the session gracefully
+        limit = session.limits.memory_mb
+        if session.cgroup is not None or not limit or session.stop_requested:
+            return
+        if session.usage["memoryMb"] <= limit:
+            session.strikes = 0
+            return
+        session.strikes += 1
+        if session.strikes < MEMORY_STRIKES:
+            return
+        session.stop_requested = True
+        self._publish(
+            session.session_id,
+            {
+                "type": "resource-limit",
+                "level": "warning",
+                "message": f"Recorder exceeded its {limit} MB memory ceiling; stopping the session.",
+                "usage": session.usage,
+            },
+        )
+        if session.session_dir is not None:
+            from .recorder_control import send_control_command
+
+            try:
+                send_control_command(session.session_dir, "stop", reason="memory-limit")
+                return
+            except OSError:
+                pass
+        session.process.terminate()
+
+    def _finish(self, session: _Supervised) -> None:
+        with self._lock:
+            self._sessions.pop(session.session_id, None)
+        _remove_cgroup(session.cgroup)
+        recorder_registry.mark_exited(session.session_id, session.process.returncode)
+        self._publish(
+            session.session_id,
+            {
+                "type": "resource-summary",
+                "message": f"Recorder peaked at {round(session.peak_memory_mb, 1)} MB.",
+                "usage": session.usage,
+                "limits": session.limits.to_dict(),
+            },
+        )
+
+    def _ensure_monitor(self) -> None:
+        if self._monitor and self._monitor.is_alive():
+            return
+
+        def _loop() -> None:
+            while True:
+                time.sleep(self.usage_interval)
+                try:
+                    self.sample()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning(f"[RecorderSupervisor] Usage sampling failed: {exc}")
+                with self._lock:
+                    if not self._sessions:
+                        self._monitor = None
+                        return
+
+        self._monitor = threading.Thread(target=_loop, name="recorder-supervisor", daemon=True)
+        self._monitor.start()
+
+
+recording_supervisor = RecordingSupervisor()
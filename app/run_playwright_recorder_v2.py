@@ -3,8 +3,9 @@
 Artifacts per session:
   recordings/<session>/
     - metadata.json
-    - dom/*.html              (with --capture-dom)
-    - screenshots/*.png       (with --capture-screenshots)
+    - manifest.json           (completion marker: "recording" until every artefact is flushed)
+    - dom/*.html              (with --capture-dom; per-action files are element-scoped by default)
+    - screenshots/*.png       (with --capture-screenshots; .jpg/.webp with --screenshot-format)
     - network.har             (unless --no-har)
     - trace.zip               (unless --no-trace)
 
@@ -15,14 +16,16 @@ from __future__ import annotations
 
 import argparse
 import json
+import re
 import signal
 import sys
 import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from collections import deque
+from urllib.parse import urlparse
 
 # Windows keyboard input
 try:
@@ -38,11 +41,21 @@ from playwright.sync_api import (
     Frame,
     Page,
     Playwright,
+    TimeoutError as PlaywrightTimeoutError,
     sync_playwright,
 )
 
 from app.browser_utils import SUPPORTED_BROWSERS, normalize_browser_name
 from app.event_client import publish_recorder_event
+from app.recorder_control import ControlChannel
+from app.recorder_registry import start_heartbeat
+from app.recorder_manifest import STATUS_COMPLETE, STATUS_FAILED, STATUS_RECORDING, write_json_atomic, write_manifest
+from app.recorder_screenshots import SCREENSHOT_FORMATS, ScreenshotWriter
+
+# Console message the injected script logs after each payload reaches Python (see PAGE_INJECT_SCRIPT).
+WAKE_MESSAGE = "[recorder-wake]"
+# Longest the idle loop blocks before re-checking stop/timeout conditions.
+IDLE_WAIT_SECONDS = 0.5
 
 DEFAULT_USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -52,11 +65,21 @@ DEFAULT_USER_AGENT = (
 PAGE_INJECT_SCRIPT = """
 (() => {
     try { if (window.__pyRecInstalled) { return; } window.__pyRecInstalled = true; } catch(_) {}
-    const deliver = (name, payload) => { const fn = window && window[name]; if (typeof fn === 'function') { fn(payload); return true; } return false; };
-    const capQ = []; const ctxQ = [];
-    const sendCap = p => { if (!deliver('pythonRecorderCapture', p)) capQ.push(p); };
-    const sendCtxI = p => { if (!deliver('pythonRecorderPageContext', p)) ctxQ.push(p); };
-    setInterval(() => { while (capQ.length && deliver('pythonRecorderCapture', capQ[0])) capQ.shift(); while (ctxQ.length && deliver('pythonRecorderPageContext', ctxQ[0])) ctxQ.shift(); }, 200);
+    // Once Python has taken a payload, a wake message lets the recorder loop stop waiting immediately
+    const wake = () => { try { console.debug('[recorder-wake]'); } catch(_) {} };
+    const deliver = (name, payload) => { const fn = window && window[name]; if (typeof fn === 'function') { const r = fn(payload); if (r && typeof r.then === 'function') r.then(wake, () => {}); return true; } return false; };
+    // Payloads sent before the bindings exist are retried with backoff only while any are queued,
+    // so an idle page runs no timers.
+    const capQ = []; const ctxQ = []; let retryTimer = null; let retryDelay = 50;
+    const flushQueues = () => {
+        if (retryTimer) { clearTimeout(retryTimer); retryTimer = null; }
+        while (capQ.length && deliver('pythonRecorderCapture', capQ[0])) capQ.shift();
+        while (ctxQ.length && deliver('pythonRecorderPageContext', ctxQ[0])) ctxQ.shift();
+        if (capQ.length || ctxQ.length) { retryTimer = setTimeout(flushQueues, retryDelay); retryDelay = Math.min(retryDelay * 2, 2000); } else { retryDelay = 50; }
+    };
+    const enqueue = (q, name, p) => { if (!q.length && deliver(name, p)) return; q.push(p); flushQueues(); };
+    const sendCap = p => enqueue(capQ, 'pythonRecorderCapture', p);
+    const sendCtxI = p => enqueue(ctxQ, 'pythonRecorderPageContext', p);
     const norm = n => (n && n.nodeType === Node.TEXT_NODE ? n.parentElement : (n && n.nodeType === Node.ELEMENT_NODE ? n : null));
     const targetOf = e => { try { if (e && typeof e.composedPath === 'function') { const p = e.composedPath(); if (p && p.length) { return p[0]; } } } catch(_) {} return e ? e.target : null; };
     const xp = el => { if (!el || el.nodeType !== 1) return ''; const s=[]; let n=el; while(n&&n.nodeType===1){let i=1;let b=n.previousSibling;while(b){if(b.nodeType===1&&b.nodeName===n.nodeName)i++; b=b.previousSibling;} s.unshift(`${n.nodeName.toLowerCase()}[${i}]`); n=n.parentNode&&n.parentNode.nodeType===1?n.parentNode:null;} return '/' + s.join('/'); };
@@ -297,9 +320,12 @@ PAGE_INJECT_SCRIPT = """
         element.playwright = { byRole: (role && name) ? { role, name } : null, byLabel: (labels[0]||'') || null, byText: (byTextVal || null) };
         return element;
     };
+    const makePayload = (action, target, extra) => ({ action, pageUrl: location.href, pageTitle: document.title, timestamp: Date.now(), element: snap(target), extra: extra||{} });
     const send = (action, target, extra) => {
-        const element = snap(target);
-        const payload = { action, pageUrl: location.href, pageTitle: document.title, timestamp: Date.now(), element, extra: extra||{} };
+        // Any other interaction commits a pending fill first so action order is preserved
+        if (action !== 'fill') commitFill('interaction');
+        const payload = makePayload(action, target, extra);
+        const element = payload.element;
         try {
             console.debug('[recorder] action', action, element && element.tag || '', location.href);
             // Emit a single-string JSON line for robust fallback capture
@@ -318,9 +344,32 @@ PAGE_INJECT_SCRIPT = """
         if (type === 'password') return true;
         return /password|pwd|otp|token|secret|pin/.test(idn);
     };
-    document.addEventListener('change', e => { const t=targetOf(e); const masked=isSensitive(t); const val=t&&t.value; send('change', t, { value: masked ? '<masked>' : val, valueMasked: !!masked }); }, true);
-    document.addEventListener('input', e => { const t=targetOf(e); const masked=isSensitive(t); const val=t&&t.value; send('input', t, { value: masked ? '<masked>' : val, valueMasked: !!masked }); }, true);
-    document.addEventListener('keydown', e => { const keys=['Enter','Escape','Tab','ArrowUp','ArrowDown','ArrowLeft','ArrowRight']; if (keys.includes(e.key)) send('press', targetOf(e), {key:e.key, code:e.code}); }, true);
+    // Keystroke coalescing: consecutive input events on one text field become a single
+    // 'fill' committed on blur, change, Enter, navigation or the next interaction.
+    const NON_TEXT_INPUTS = ['checkbox','radio','button','submit','reset','file','range','color','image','hidden'];
+    const isTextEntry = el => { if (!el || el.nodeType !== 1) return false; if (el.isContentEditable) return true; const tag=(el.tagName||'').toLowerCase(); if (tag === 'textarea') return true; return tag === 'input' && !NON_TEXT_INPUTS.includes((el.type||'').toLowerCase()); };
+    const fieldValue = el => el && el.isContentEditable ? (el.innerText || '') : (el ? el.value : undefined);
+    let pendingFill = null;
+    const takeFill = reason => {
+        const f = pendingFill; if (!f) return null; pendingFill = null;
+        const masked = isSensitive(f.el); const val = fieldValue(f.el);
+        return { target: f.el, extra: { value: masked ? '<masked>' : val, valueMasked: !!masked, commitReason: reason, inputEvents: f.count, firstInputAt: f.first, lastInputAt: f.last, durationMs: f.last - f.first } };
+    };
+    function commitFill(reason) { const f = takeFill(reason); if (f) send('fill', f.target, f.extra); }
+    // Lets the recorder collect a fill still being typed when it stops (bindings may already be closed)
+    window.__pyRecTakeFill = () => { const f = takeFill('stop'); return f ? makePayload('fill', f.target, f.extra) : null; };
+    document.addEventListener('input', e => {
+        const t = targetOf(e); if (!isTextEntry(t)) return;
+        if (pendingFill && pendingFill.el !== t) commitFill('switch');
+        const now = Date.now();
+        if (!pendingFill) pendingFill = { el: t, first: now, last: now, count: 0 };
+        pendingFill.count += 1; pendingFill.last = now;
+    }, true);
+    document.addEventListener('change', e => { const t=targetOf(e); if (pendingFill && pendingFill.el === t) { commitFill('change'); return; } const masked=isSensitive(t); const val=t&&t.value; send('change', t, { value: masked ? '<masked>' : val, valueMasked: !!masked }); }, true);
+    document.addEventListener('blur', e => { if (pendingFill && pendingFill.el === targetOf(e)) commitFill('blur'); }, true);
+    document.addEventListener('keydown', e => { const keys=['Enter','Escape','Tab','ArrowUp','ArrowDown','ArrowLeft','ArrowRight']; if (e.key === 'Enter') commitFill('enter'); if (keys.includes(e.key)) send('press', targetOf(e), {key:e.key, code:e.code}); }, true);
+    window.addEventListener('pagehide', () => commitFill('navigation'), true);
+    window.addEventListener('beforeunload', () => commitFill('navigation'), true);
     document.addEventListener('keyup', e => { const keys=['Enter','Escape','Tab']; if (keys.includes(e.key)) send('keyrelease', targetOf(e), {key:e.key, code:e.code}); }, true);
     // Throttled wheel capture (scroll)
     let __lastWheel = 0;
@@ -332,6 +381,7 @@ PAGE_INJECT_SCRIPT = """
         }
     }, { capture: true, passive: true });
     const sendCtx = (trigger) => {
+        commitFill('navigation');
         const payload = {
             pageUrl: location.href,
             title: document.title,
@@ -355,6 +405,91 @@ PAGE_INJECT_SCRIPT = """
 """
 
 
+# Element-scoped DOM capture: serializes a bounded subtree around the action target
+# (plus its labels and nearest heading) instead of the whole document, so capture cost
+# per action no longer scales with the page's DOM size.
+SCOPED_DOM_SCRIPT = r"""
+({ xpath, maxNodes, maxClimb, maxText }) => {
+    let target = null;
+    try { target = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue; } catch (_) {}
+    if (!target || target.nodeType !== 1) return null;
+    const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+    // Count descendants but stop as soon as the limit is exceeded
+    const countUpTo = (root, limit) => {
+        const walker = document.createTreeWalker(root, NodeFilter.SHOW_ELEMENT);
+        let n = 0;
+        while (walker.nextNode()) { if (++n > limit) break; }
+        return n;
+    };
+    let container = target;
+    for (let i = 0; i < maxClimb; i++) {
+        const parent = container.parentElement;
+        if (!parent || parent === document.body || parent === document.documentElement) break;
+        if (countUpTo(parent, maxNodes) > maxNodes) break;
+        container = parent;
+    }
+    const onPath = new Set();
+    for (let n = target; n && n !== container.parentElement; n = n.parentElement) onPath.add(n);
+    let budget = maxNodes;
+    const cloneBounded = node => {
+        if (node.nodeType === Node.TEXT_NODE) {
+            const text = node.nodeValue || '';
+            return document.createTextNode(text.length > maxText ? text.slice(0, maxText) : text);
+        }
+        if (node.nodeType !== Node.ELEMENT_NODE || SKIP.has(node.nodeName)) return null;
+        budget -= 1;
+        const copy = node.cloneNode(false);
+        if (node === target) copy.setAttribute('data-recorder-target', 'true');
+        for (const child of Array.from(node.childNodes)) {
+            if (budget <= 0 && !onPath.has(child)) continue;
+            const c = cloneBounded(child);
+            if (c) copy.appendChild(c);
+        }
+        return copy;
+    };
+    const smallClone = el => { const saved = budget; budget = 25; const c = cloneBounded(el); budget = saved; return c; };
+    const extras = [];
+    const addExtra = el => { if (el && el.nodeType === 1 && !container.contains(el) && !extras.includes(el)) extras.push(el); };
+    try { if (target.labels) Array.from(target.labels).forEach(addExtra); } catch (_) {}
+    try { const ids = (target.getAttribute('aria-labelledby') || '').split(/\s+/).filter(Boolean); ids.forEach(id => addExtra(document.getElementById(id))); } catch (_) {}
+    // Nearest preceding heading, searching a bounded number of siblings per ancestor
+    const HEADING = 'h1,h2,h3,h4,h5,h6,[role="heading"]';
+    let heading = null;
+    for (let n = target, depth = 0; n && n !== document.body && depth < 12 && !heading; n = n.parentElement, depth++) {
+        let sib = n.previousElementSibling;
+        for (let k = 0; sib && k < 40; sib = sib.previousElementSibling, k++) {
+            if (sib.matches && sib.matches(HEADING)) { heading = sib; break; }
+        }
+    }
+    const body = document.createElement('body');
+    body.setAttribute('data-recorder-scope', 'element');
+    if (heading && !container.contains(heading)) { const h = smallClone(heading); if (h) body.appendChild(h); }
+    for (const el of extras) { const c = smallClone(el); if (c) body.appendChild(c); }
+    const root = cloneBounded(container);
+    if (root) body.appendChild(root);
+    const esc = v => String(v || '').replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/</g, '&lt;');
+    return '<!DOCTYPE html><html><head><meta charset="utf-8"><title>' + esc(document.title) + '</title>'
+        + '<meta name="recorder-scope" content="element"><meta name="recorder-target" content="' + esc(xpath) + '">'
+        + '<meta name="recorder-url" content="' + esc(location.href) + '"></head>' + body.outerHTML + '</html>';
+}
+"""
+
+
+def _capture_scoped_html(target: Union[Page, Frame, None], element: Dict[str, Any], max_nodes: int) -> Optional[str]:
+    """Serialize the bounded subtree around ``element`` (located by XPath) in ``target``."""
+    xpath = (element or {}).get("xpath")
+    if target is None or not xpath:
+        return None
+    try:
+        html = target.evaluate(
+            SCOPED_DOM_SCRIPT,
+            {"xpath": xpath, "maxNodes": max(1, int(max_nodes)), "maxClimb": 4, "maxText": 500},
+        )
+    except Exception:
+        return None
+    return html if isinstance(html, str) else None
+
+
 def _iso_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -429,6 +564,12 @@ class RecorderSession:
         self._runtime_lookup: Dict[int, str] = {}
         self._page_counter = 0
 
+        # Raw keystroke-level input events merged into one fill until committed
+        self._pending_fill: Optional[Dict[str, Any]] = None
+        # Last A-NNN id handed out. Ids are reserved when an action is captured, so its DOM
+        # and screenshot files carry the id even while a fill is still pending.
+        self._action_counter = 0
+
         # Pause/resume state
         self._is_paused = False
         self._pause_count = 0
@@ -437,6 +578,10 @@ class RecorderSession:
 
         self.metadata_version = "2025.10"
         self._persist()
+        try:
+            write_manifest(self.session_dir, STATUS_RECORDING)
+        except OSError:
+            pass
 
     # ---- Page bookkeeping -------------------------------------------------
     def _derive_page_key(self, runtime_page: Optional[Page], page_url: Optional[str]) -> str:
@@ -510,10 +655,11 @@ class RecorderSession:
             self.environment["viewport"] = dict(viewport)
         return entry
 
-    def pause_recording(self) -> None:
+    def pause_recording(self, reason: str = "User pressed P to pause recording") -> None:
         """Pause the recording - user can still interact, but no events/DOM captured."""
         if self._is_paused:
             return  # Already paused
+        self.commit_pending_fill("pause")
         self._is_paused = True
         self._pause_count += 1
         self._last_pause_at = _iso_now()
@@ -530,7 +676,7 @@ class RecorderSession:
             "pageTitle": "",
             "pageId": "",
             "element": {},
-            "extra": {"reason": "User pressed P to pause recording"},
+            "extra": {"reason": reason},
             "selectorStrategies": {},
             "inputSummary": None,
             "artifacts": {}
@@ -544,7 +690,7 @@ class RecorderSession:
         print("   Press 'R' to RESUME recording")
         print("="*60 + "\n")
 
-    def resume_recording(self) -> None:
+    def resume_recording(self, reason: str = "User pressed R") -> None:
         """Resume the recording after a pause."""
         if not self._is_paused:
             return  # Not paused
@@ -563,7 +709,7 @@ class RecorderSession:
             "pageTitle": "",
             "pageId": "",
             "element": {},
-            "extra": {"pausedAt": self._last_pause_at, "resumedAfter": "User pressed R"},
+            "extra": {"pausedAt": self._last_pause_at, "resumedAfter": reason},
             "selectorStrategies": {},
             "inputSummary": None,
             "artifacts": {}
@@ -677,6 +823,7 @@ class RecorderSession:
         if self._is_paused:
             return
         
+        self.commit_pending_fill("navigation")
         data = dict(payload or {})
         data["receivedAt"] = _iso_now()
 
@@ -707,7 +854,90 @@ class RecorderSession:
         # Skip if paused
         if self._is_paused:
             return
-        
+
+        data, entry = self._prepare_action(payload, runtime_page)
+        action_type = data["action"]
+        pending = self._pending_fill
+        if pending is not None:
+            same_element = pending["key"] == self._element_key(data)
+            if action_type == "input" and same_element:
+                self._merge_input(pending["data"], data)
+                return
+            if action_type == "change" and same_element:
+                # The change event carries the committed value; it replaces, not follows, the fill
+                self._merge_input(pending["data"], data, count=False)
+                self.commit_pending_fill("change")
+                return
+            if action_type == "press" and (data.get("extra") or {}).get("key") == "Enter":
+                self.commit_pending_fill("enter")
+            elif action_type == "input":
+                self.commit_pending_fill("switch")
+            else:
+                self.commit_pending_fill("interaction")
+        if action_type == "input":
+            self._start_fill(data, entry)
+            return
+        self._append_action(data, entry)
+
+    def should_capture(self, payload: Dict[str, Any]) -> bool:
+        """False for keystrokes that will merge into the fill already being typed."""
+        pending = self._pending_fill
+        if self._is_paused or pending is None:
+            return not self._is_paused
+        action_type = (payload.get("action") or payload.get("type") or "").lower()
+        return not (action_type in ("input", "change") and pending["key"] == self._element_key(payload))
+
+    def reserve_action_id(self) -> str:
+        """Claim the next ``A-NNN`` action id; capture files are named after it."""
+        self._action_counter += 1
+        return f"A-{self._action_counter:03}"
+
+    def commit_pending_fill(self, reason: str) -> None:
+        """Persist the coalesced fill (if any) as a single action."""
+        pending, self._pending_fill = self._pending_fill, None
+        if pending is None:
+            return
+        data = pending["data"]
+        extra = data["extra"]
+        extra["commitReason"] = reason
+        extra["durationMs"] = max(0, int(extra.get("lastInputAt") or 0) - int(extra.get("firstInputAt") or 0))
+        data["inputSummary"] = self._derive_input_summary("fill", extra, data["element"])
+        self._append_action(data, pending["entry"])
+
+    @staticmethod
+    def _element_key(data: Dict[str, Any]) -> str:
+        element = data.get("element") or {}
+        locator = element.get("xpath") or element.get("cssPath") or element.get("stableSelector") or element.get("tag") or ""
+        return f"{data.get('pageUrl') or ''}|{locator}"
+
+    @staticmethod
+    def _epoch_ms(data: Dict[str, Any]) -> int:
+        raw = data.get("timestampEpochMs")
+        try:
+            return int(float(raw))
+        except (TypeError, ValueError):
+            return int(time.time() * 1000)
+
+    def _start_fill(self, data: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        at = self._epoch_ms(data)
+        data["action"] = data["type"] = "fill"
+        data["extra"].update({"inputEvents": 1, "firstInputAt": at, "lastInputAt": at})
+        self._pending_fill = {"key": self._element_key(data), "data": data, "entry": entry}
+
+    def _merge_input(self, fill: Dict[str, Any], data: Dict[str, Any], *, count: bool = True) -> None:
+        extra = fill["extra"]
+        incoming = data.get("extra") or {}
+        for field in ("value", "valueMasked"):
+            if field in incoming:
+                extra[field] = incoming[field]
+        if "value" in incoming and "value" in fill["element"]:
+            fill["element"]["value"] = incoming["value"]
+        if count:
+            extra["inputEvents"] = int(extra.get("inputEvents") or 0) + 1
+        extra["lastInputAt"] = max(int(extra.get("lastInputAt") or 0), self._epoch_ms(data))
+        fill["degraded"] = fill.get("degraded") or data.get("degraded")
+
+    def _prepare_action(self, payload: Dict[str, Any], runtime_page: Optional[Page]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         data = dict(payload or {})
         received_at = _iso_now()
         data["receivedAt"] = received_at
@@ -733,11 +963,6 @@ class RecorderSession:
         page_title = data.get("pageTitle")
         entry = self._ensure_page_entry(runtime_page, page_url, page_title)
 
-        action_id = data.get("actionId")
-        if not action_id:
-            action_id = f"A-{len(self.actions) + 1:03}"
-            data["actionId"] = action_id
-
         raw_ts = data.get("timestamp")
         timestamp_iso = _timestamp_to_iso(raw_ts) or received_at
         data["timestampEpochMs"] = raw_ts
@@ -762,11 +987,55 @@ class RecorderSession:
         if extra.get("fromConsole"):
             data["degraded"] = True
             data.setdefault("notes", []).append("Recorded via console debug fallback; selectors may be incomplete.")
+        return data, entry
 
+    def _append_action(self, data: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        if not data.get("actionId"):
+            data["actionId"] = self.reserve_action_id()
         entry["actions"].append(data)
         self.actions.append(data)
         self._persist()
 
+    def apply_screenshot_results(self, results: List[Any]) -> None:
+        """Point records at deduplicated frames and drop paths of frames that failed to write."""
+        changes = {r.planned: r for r in results if r.duplicate_of or r.error}
+        if not changes:
+            return
+
+        def _resolve(record: Dict[str, Any], field: str) -> None:
+            result = changes.get(record.get(field) or "")
+            if result is None:
+                return
+            if result.error:
+                record[field] = None
+                record["screenshotError"] = result.error
+            else:
+                record[field] = result.duplicate_of
+                record["screenshotDeduplicated"] = True
+
+        pending = [self._pending_fill["data"]] if self._pending_fill else []
+        for action in [*self.actions, *pending]:
+            _resolve(action, "screenshotPath")
+            artifacts = action.get("artifacts")
+            if isinstance(artifacts, dict):
+                _resolve(artifacts, "screenshot")
+                artifacts.pop("screenshotError", None)
+                artifacts.pop("screenshotDeduplicated", None)
+        for event in self.page_events:
+            _resolve(event, "screenshotPath")
+        for entry in self._pages_by_key.values():
+            shots = (entry.get("artifacts") or {}).get("screenshots")
+            if isinstance(shots, list):
+                resolved = []
+                for shot in shots:
+                    result = changes.get(shot)
+                    if result is None:
+                        resolved.append(shot)
+                    elif result.duplicate_of and result.duplicate_of not in resolved:
+                        resolved.append(result.duplicate_of)
+                shots[:] = resolved
+        self._persist()
+
     def _refresh_flow_name(self) -> None:
         label_path = self.session_dir / "flow_name.txt"
         if label_path.exists():
@@ -777,7 +1046,7 @@ class RecorderSession:
             except Exception:
                 pass
 
-    def _persist(self) -> None:
+    def _persist(self) -> bool:
         summary = {
             "metadataVersion": self.metadata_version,
             "flowId": self.session_dir.name,
@@ -799,11 +1068,13 @@ class RecorderSession:
         if self.ended_at:
             summary["session"]["endedAt"] = self.ended_at
         try:
-            self.metadata_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+            write_json_atomic(self.metadata_path, summary, indent=2)
         except Exception:
-            pass
+            return False
+        return True
 
     def finalize(self, har_path: Optional[Path], trace_path: Optional[Path]) -> Path:
+        self.commit_pending_fill("stop")
         self._refresh_flow_name()
         self.ended_at = _iso_now()
         if har_path and har_path.exists():
@@ -816,14 +1087,158 @@ class RecorderSession:
                 self._artifacts["trace"] = str(trace_path.relative_to(self.session_dir))
             except Exception:
                 self._artifacts["trace"] = str(trace_path)
-        self._persist()
+        if self._persist():
+            self.mark_finished(STATUS_COMPLETE)
+        else:
+            self.mark_finished(STATUS_FAILED, error="metadata.json could not be written")
         return self.metadata_path
 
+    def mark_finished(self, status: str, **details: Any) -> None:
+        """Publish the completion manifest that finalize/auto-ingest wait on."""
+        try:
+            write_manifest(
+                self.session_dir,
+                status,
+                artifacts=dict(self._artifacts),
+                actions=len(self.actions),
+                endedAt=self.ended_at or _iso_now(),
+                **details,
+            )
+        except OSError as exc:
+            sys.stderr.write(f"[recorder] Failed to write manifest: {exc}\n")
+
 
 def _ensure_playwright() -> Playwright:
     return sync_playwright().start()
 
 
+def _url_matcher(target_url: str, url_pattern: Optional[str]):
+    """Predicate for "back on the app": a regex when given, else the target's domain."""
+    if url_pattern:
+        compiled = re.compile(url_pattern)
+        return lambda url: bool(compiled.search(url or ""))
+    target_domain = urlparse(target_url).netloc
+
+    def _same_domain(url: str) -> bool:
+        domain = urlparse(url or "").netloc
+        return bool(domain) and (target_domain in domain or domain in target_domain)
+
+    return _same_domain
+
+
+def _wait_for_auth_ready(
+    page: Page,
+    target_url: str,
+    *,
+    timeout_s: float,
+    url_pattern: Optional[str] = None,
+    ready_selectors: Optional[List[str]] = None,
+    network_idle_s: float = 10.0,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """Wait until login/SSO has returned to the app and it has settled.
+
+    Stages (each driven by Playwright navigation/load events, never DOM polling):
+    ``url`` (URL matches ``url_pattern`` or the target domain), ``load``,
+    ``networkidle`` (capped at ``network_idle_s``; apps with long-polling never idle)
+    and ``selector`` (any of ``ready_selectors`` visible). If the page navigates
+    away again while settling, the wait restarts from the URL stage. Returns
+    telemetry describing how long each stage took and why the wait ended.
+    """
+    started = time.monotonic()
+    deadline = started + max(0.0, timeout_s)
+    matches = _url_matcher(target_url, url_pattern)
+    stages: Dict[str, float] = {}
+    navigations = {"count": 0}
+
+    def _on_nav(frame: Frame) -> None:
+        if frame == page.main_frame:
+            navigations["count"] += 1
+
+    def _until(wait) -> bool:
+        # Slice long waits so Ctrl+C (stop_event) is still honoured promptly
+        while not (stop_event and stop_event.is_set()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                wait(min(remaining, 1.0) * 1000)
+                return True
+            except PlaywrightTimeoutError:
+                continue
+        return False
+
+    def _timed(name: str, wait) -> bool:
+        stage_start = time.monotonic()
+        ok = _until(wait)
+        stages[name] = round(stages.get(name, 0.0) + time.monotonic() - stage_start, 2)
+        return ok
+
+    def _network_idle(timeout_ms: float, idle_deadline: float) -> None:
+        idle_left = idle_deadline - time.monotonic()
+        if idle_left <= 0:
+            return  # busy apps never go idle; don't hold recording hostage
+        try:
+            page.wait_for_load_state("networkidle", timeout=min(timeout_ms, idle_left * 1000))
+        except PlaywrightTimeoutError:
+            if time.monotonic() < idle_deadline:
+                raise
+
+    selector_locator = None
+    for selector in ready_selectors or []:
+        loc = page.locator(selector)
+        selector_locator = loc if selector_locator is None else selector_locator.or_(loc)
+
+    stage, reason = "url", "timeout"
+    try:
+        page.on("framenavigated", _on_nav)
+    except Exception:
+        pass
+    try:
+        while True:
+            stage = "url"
+            if not _timed("url", lambda ms: page.wait_for_url(matches, wait_until="commit", timeout=ms)):
+                break
+            stage = "load"
+            if not _timed("load", lambda ms: page.wait_for_load_state("load", timeout=ms)):
+                break
+            stage = "networkidle"
+            idle_deadline = time.monotonic() + network_idle_s
+            if not _timed("networkidle", lambda ms: _network_idle(ms, idle_deadline)):
+                break
+            if selector_locator is not None:
+                stage = "selector"
+                if not _timed("selector", lambda ms: selector_locator.first.wait_for(state="visible", timeout=ms)):
+                    break
+            if matches(page.url):
+                reason = "ready"
+                break
+            # Bounced back to the identity provider (e.g. MFA step); wait for the next return
+    except Exception as exc:  # noqa: BLE001 - page closed or navigation torn down
+        reason = f"error: {exc}"
+    finally:
+        try:
+            page.remove_listener("framenavigated", _on_nav)
+        except Exception:
+            pass
+    if reason == "timeout" and stop_event and stop_event.is_set():
+        reason = "stopped"
+    try:
+        final_url = page.url
+    except Exception:
+        final_url = ""
+    return {
+        "ready": reason == "ready",
+        "reason": reason,
+        "stage": stage,
+        "elapsedSeconds": round(time.monotonic() - started, 2),
+        "timeoutSeconds": timeout_s,
+        "stages": stages,
+        "navigations": navigations["count"],
+        "finalUrl": final_url,
+    }
+
+
 def _wait_bindings_ready(p: Optional[Page], timeout_ms: int = 5000) -> None:
     """Best-effort wait that our injected recorder bindings are ready on the page.
 
@@ -844,6 +1259,26 @@ def _wait_bindings_ready(p: Optional[Page], timeout_ms: int = 5000) -> None:
         pass
 
 
+def _take_pending_fills(ctx: Optional[BrowserContext]) -> List[Tuple[Page, Dict[str, Any]]]:
+    """Return coalesced fills the pages have not committed yet (e.g. typing when the recorder stops)."""
+    if not ctx:
+        return []
+    fills: List[Tuple[Page, Dict[str, Any]]] = []
+    try:
+        pages = list(getattr(ctx, "pages", []))
+    except Exception:
+        pages = []
+    for p in pages:
+        try:
+            if p and not p.is_closed():
+                payload = p.evaluate("() => { try { return window.__pyRecTakeFill ? window.__pyRecTakeFill() : null; } catch (_) { return null; } }")
+                if isinstance(payload, dict):
+                    fills.append((p, payload))
+        except Exception:
+            pass
+    return fills
+
+
 def _silence_bindings_on_pages(ctx: Optional[BrowserContext]) -> None:
     """Replace exposed bindings with no-ops to stop cross-process calls during shutdown."""
     if not ctx:
@@ -933,6 +1368,32 @@ def main() -> None:
     parser.add_argument("--no-har", action="store_true")
     parser.add_argument("--capture-dom", action="store_true")
     parser.add_argument("--capture-screenshots", action="store_true")
+    parser.add_argument("--screenshot-format", choices=SCREENSHOT_FORMATS, default="png")
+    parser.add_argument("--screenshot-quality", type=int, default=None, help="JPEG/WebP quality (1-100)")
+    parser.add_argument(
+        "--screenshot-dedup",
+        action="store_true",
+        help="Skip frames visually identical to a recent one (perceptual hash; exact match without Pillow)",
+    )
+    parser.add_argument(
+        "--screenshot-queue",
+        type=int,
+        default=32,
+        help="Frames buffered for the background writer before new ones are dropped",
+    )
+    parser.add_argument(
+        "--dom-scope",
+        choices=("element", "page"),
+        default="element",
+        help="Per-action DOM snapshot scope: bounded subtree around the target, or the full document",
+    )
+    parser.add_argument(
+        "--dom-full-interval",
+        type=float,
+        default=30.0,
+        help="With --dom-scope element, also take a full-page action snapshot at most this often (seconds; 0 disables)",
+    )
+    parser.add_argument("--dom-max-nodes", type=int, default=400, help="Element budget for scoped DOM snapshots")
     parser.add_argument("--ignore-https-errors", action="store_true")
     parser.add_argument("--user-agent", default=DEFAULT_USER_AGENT)
     parser.add_argument("--proxy")
@@ -940,6 +1401,18 @@ def main() -> None:
     parser.add_argument("--bypass-csp", action="store_true")
     parser.add_argument("--flow-name", default=None)
     parser.add_argument("--auth-state", default=None, help="Path to saved authentication state JSON file")
+    parser.add_argument("--auth-timeout", type=float, default=120.0, help="Seconds to wait for login/SSO to finish")
+    parser.add_argument(
+        "--auth-url-pattern",
+        default=None,
+        help="Regex the URL must match once authenticated (default: same domain as --url)",
+    )
+    parser.add_argument(
+        "--auth-ready-selector",
+        action="append",
+        default=None,
+        help="Selector that is visible once the app is ready; repeat to accept any of several",
+    )
 
     args = parser.parse_args()
     try:
@@ -984,11 +1457,15 @@ def main() -> None:
             signal.signal(signal.SIGBREAK, lambda *_: stop_event.set())
     except (AttributeError, ValueError):
         pass
+    # Lets the process registry's reaper tell a live recorder from a hung one
+    heartbeat_stop = threading.Event()
+    start_heartbeat(heartbeat_stop)
 
     har_path: Optional[Path] = None
     trace_path: Optional[Path] = None
     metadata_written = False
     session: Optional[RecorderSession] = None
+    screenshot_writer: Optional[ScreenshotWriter] = None
 
     try:
         if not args.no_har:
@@ -1037,6 +1514,9 @@ def main() -> None:
                 "slowMo": args.slow_mo,
                 "captureDom": args.capture_dom,
                 "captureScreenshots": args.capture_screenshots,
+                "screenshotFormat": args.screenshot_format,
+                "screenshotDedup": args.screenshot_dedup,
+                "domScope": args.dom_scope,
                 "recordHar": not args.no_har,
                 "recordTrace": not args.no_trace,
                 "url": args.url,
@@ -1049,6 +1529,15 @@ def main() -> None:
             },
         )
 
+        if args.capture_screenshots:
+            screenshot_writer = ScreenshotWriter(
+                args.screenshot_format,
+                args.screenshot_quality,
+                dedup=args.screenshot_dedup,
+                max_queue=args.screenshot_queue,
+                base_dir=session_dir,
+            )
+
         # Queues to avoid Playwright API calls inside binding callbacks (deadlock risk)
         pending_actions = deque()
         pending_ctx = deque()
@@ -1126,6 +1615,8 @@ def main() -> None:
         def _on_console_with_fallback(msg: ConsoleMessage) -> None:
             try:
                 text = msg.text
+                if text == WAKE_MESSAGE:
+                    return
                 sys.stderr.write(f"[recorder][console] {msg.type}: {text}\n")
                 # Fallback: only consider our debug logs and only if no recent binding events
                 if (
@@ -1310,46 +1801,32 @@ def main() -> None:
         print("\nThe recorder is waiting for:")
         print("  1. Complete any authentication/login manually")
         print("  2. Wait until the page returns to the target URL")
-        print("  3. Wait until page content is fully loaded")
+        print("  3. Wait until the page has loaded and the network is idle")
+        if args.auth_ready_selector:
+            print(f"  4. Wait until one of these is visible: {', '.join(args.auth_ready_selector)}")
         print("\nMonitoring page... (this happens automatically)")
         print("="*70 + "\n")
         
-        # Monitor URL and content to detect when ready
-        from urllib.parse import urlparse
-        target_domain = urlparse(args.url).netloc
-        ready_to_record = False
-        
-        for attempt in range(120):  # Wait up to 2 minutes
-            try:
-                current_url = page.url
-                current_domain = urlparse(current_url).netloc
-                
-                # Check if we're back on the target domain
-                if target_domain in current_domain or current_domain in target_domain:
-                    # Check if page has actual content (not blank/loading)
-                    try:
-                        has_content = page.evaluate("""() => {
-                            const body = document.body;
-                            if (!body) return false;
-                            const text = body.innerText || body.textContent || '';
-                            // Has meaningful content if more than 100 characters
-                            return text.trim().length > 100;
-                        }""")
-                        
-                        if has_content:
-                            ready_to_record = True
-                            print(f"\n[✓] Page ready! URL: {current_url}")
-                            print("[✓] Content detected - RECORDING NOW\n")
-                            break
-                    except Exception:
-                        pass
-                
-                time.sleep(1)
-            except Exception:
-                time.sleep(1)
-        
-        if not ready_to_record:
-            print("\n[!] Timeout waiting for page to load - starting recording anyway\n")
+        auth = _wait_for_auth_ready(
+            page,
+            args.url,
+            timeout_s=args.auth_timeout,
+            url_pattern=args.auth_url_pattern,
+            ready_selectors=args.auth_ready_selector or [],
+            stop_event=stop_event,
+        )
+        session.options["authWait"] = auth
+        stages = ", ".join(f"{name}={secs}s" for name, secs in auth["stages"].items())
+        if auth["ready"]:
+            print(f"\n[✓] Page ready after {auth['elapsedSeconds']}s ({stages}). URL: {auth['finalUrl']}")
+            print("[✓] RECORDING NOW\n")
+            publish_recorder_event(session_name, "Authentication complete; recording started", **auth)
+        else:
+            print(
+                f"\n[!] Auth wait ended ({auth['reason']} during '{auth['stage']}' after {auth['elapsedSeconds']}s; "
+                f"{stages}) - starting recording anyway\n"
+            )
+            publish_recorder_event(session_name, "Authentication wait timed out; recording anyway", level="warning", **auth)
 
         # Print pause/resume instructions
         print("\n" + "="*70)
@@ -1394,26 +1871,124 @@ def main() -> None:
                 except Exception:
                     return None
 
-        def _safe_screenshot(p: Optional[Page], path: Path, clip: Optional[Dict[str, float]] = None) -> Optional[str]:
-            if not p or p.is_closed():
+        def _queue_screenshot(p: Optional[Page], stem: Path, clip: Optional[Dict[str, float]] = None) -> Optional[str]:
+            """Grab screenshot bytes and hand them to the background writer; returns the planned path."""
+            if not p or p.is_closed() or screenshot_writer is None:
                 return None
+            shot_kwargs = screenshot_writer.capture_kwargs()
             try:
                 if clip:
-                    p.screenshot(path=str(path), clip=clip)
+                    data = p.screenshot(clip=clip, **shot_kwargs)
                 else:
-                    p.screenshot(path=str(path), full_page=True)
-                return str(path)
+                    data = p.screenshot(full_page=True, **shot_kwargs)
             except Exception:
                 try:
-                    p.screenshot(path=str(path), full_page=True)
-                    return str(path)
+                    data = p.screenshot(full_page=True, **shot_kwargs)
                 except Exception:
                     return None
+            return screenshot_writer.submit(stem, data)
+
+        def _snapshot_page(evt: Dict[str, Any]) -> None:
+            """Attach a full-page DOM snapshot and screenshot of the active page to ``evt``."""
+            nonlocal last_full_dom_at
+            # Give layout a brief moment to settle to avoid blank screenshots
+            try:
+                time.sleep(0.15)
+            except Exception:
+                pass
+            ap = active_page if (active_page and not active_page.is_closed()) else (page if (page and not page.is_closed()) else None)
+            # DOM
+            if args.capture_dom:
+                html = _safe_get_outer_html(ap)
+                if html is not None:
+                    idxp = len(session.page_events) + 1
+                    dp = session.dom_dir / f"P-{idxp:03}.html"
+                    dp.write_text(str(html), encoding="utf-8")
+                    evt["domSnapshotPath"] = str(dp.relative_to(session.session_dir))
+                    last_full_dom_at = time.time()
+                else:
+                    evt["domSnapshotError"] = "no-html"
+            # Screenshot
+            if args.capture_screenshots:
+                idxp = len(session.page_events) + 1
+                spath = _queue_screenshot(ap, session.screenshot_dir / f"P-{idxp:03}")
+                if spath:
+                    evt["screenshotPath"] = spath
+                else:
+                    evt["screenshotError"] = "shot-failed"
+
+        def _handle_control(command: Dict[str, Any]) -> None:
+            """Apply one control-channel command and acknowledge it."""
+            nonlocal graceful_stop
+            name = command.get("command")
+            params = command.get("params") or {}
+            status, details = "ok", {}
+            if name == "pause":
+                status = "ok" if not session._is_paused else "already-paused"
+                session.pause_recording(reason="Paused via control channel")
+            elif name == "resume":
+                status = "ok" if session._is_paused else "not-paused"
+                session.resume_recording(reason="Resumed via control channel")
+            elif name == "snapshot":
+                if session._is_paused:
+                    status = "ignored-paused"
+                else:
+                    ap = active_page if (active_page and not active_page.is_closed()) else page
+                    evt: Dict[str, Any] = {"trigger": "snapshot", "pageUrl": getattr(ap, "url", "")}
+                    _snapshot_page(evt)
+                    session.add_page_event(evt, runtime_page=ap)
+                    details = {k: evt[k] for k in ("domSnapshotPath", "screenshotPath") if evt.get(k)}
+            elif name == "stop":
+                graceful_stop = {"finalSnapshot": bool(params.get("finalSnapshot"))}
+                status = "stopping"
+                stop_event.set()
+            else:
+                status = "unknown-command"
+            ack = control.ack(command, status, **details)
+            publish_recorder_event(session_name, f"Control command '{name}': {status}", command=name, commandId=command.get("id"), ack=ack)
+
+        def _has_pending() -> bool:
+            with q_lock:
+                return bool(pending_actions or pending_ctx)
+
+        def _wait_for_capture(timeout_s: float) -> None:
+            """Block until a page reports a delivered payload or ``timeout_s`` passes.
+
+            Waiting inside Playwright (rather than time.sleep) keeps its dispatcher running,
+            so binding callbacks fire while we wait and their wake message ends the wait.
+            """
+            if timeout_s <= 0 or stop_event.is_set() or _has_pending():
+                return
+            try:
+                context.wait_for_event(
+                    "console",
+                    predicate=lambda msg: _has_pending() or msg.text == WAKE_MESSAGE,
+                    timeout=timeout_s * 1000,
+                )
+            except PlaywrightTimeoutError:
+                pass
+            except Exception:
+                # Context closing or already closed: fall back to an interruptible plain wait
+                stop_event.wait(timeout_s)
+
+        control = ControlChannel(session_dir)
+        # Set by a control-channel "stop"; graceful stops skip the final emergency snapshot
+        graceful_stop: Optional[Dict[str, Any]] = None
 
         # Wait loop
         start = time.time()
+        # Last full-document snapshot; element-scoped mode samples a full one every --dom-full-interval
+        last_full_dom_at = start
         try:
             while not stop_event.is_set():
+                for command in control.poll():
+                    try:
+                        _handle_control(command)
+                    except Exception as control_exc:  # noqa: BLE001
+                        control.ack(command, "error", error=str(control_exc))
+                        sys.stderr.write(f"[recorder] control command error: {control_exc}\n")
+                if stop_event.is_set():
+                    break
                 # Drain queues
                 try:
                     # Process page context events first (may create P-### artifacts)
@@ -1427,31 +2002,7 @@ def main() -> None:
                         # Decide whether to capture artifacts on dom milestone
                         should_snap = evt.get("trigger") in {"domcontentloaded", "load"}
                         if should_snap and (args.capture_dom or args.capture_screenshots):
-                            # Give layout a brief moment to settle to avoid blank screenshots
-                            try:
-                                time.sleep(0.15)
-                            except Exception:
-                                pass
-                            ap = active_page if (active_page and not active_page.is_closed()) else (page if (page and not page.is_closed()) else None)
-                            # DOM
-                            if args.capture_dom:
-                                html = _safe_get_outer_html(ap)
-                                if html is not None:
-                                    idxp = len(session.page_events) + 1
-                                    dp = session.dom_dir / f"P-{idxp:03}.html"
-                                    dp.write_text(str(html), encoding="utf-8")
-                                    evt["domSnapshotPath"] = str(dp.relative_to(session.session_dir))
-                                else:
-                                    evt["domSnapshotError"] = "no-html"
-                            # Screenshot
-                            if args.capture_screenshots:
-                                idxp = len(session.page_events) + 1
-                                sp = session.screenshot_dir / f"P-{idxp:03}.png"
-                                spath = _safe_screenshot(ap, sp)
-                                if spath:
-                                    evt["screenshotPath"] = str(Path(spath).relative_to(session.session_dir))
-                                else:
-                                    evt["screenshotError"] = "shot-failed"
+                            _snapshot_page(evt)
                         session.add_page_event(evt, runtime_page=page_ref)
 
                     # Process actions
@@ -1463,32 +2014,48 @@ def main() -> None:
                         # Pull internal references and strip them from the record before persisting
                         frame_ref = act.pop("__frame", None)
                         page_ref = act.pop("__page", None)
-                        if args.capture_dom or args.capture_screenshots:
+                        if (args.capture_dom or args.capture_screenshots) and session.should_capture(act):
                             ap = active_page if (active_page and not active_page.is_closed()) else (page if (page and not page.is_closed()) else None)
-                            idxa = len(session.actions) + 1
+                            # The committed action keeps this id, so A-NNN files match action A-NNN
+                            action_id = session.reserve_action_id()
+                            act["actionId"] = action_id
                             # DOM
                             if args.capture_dom:
                                 html = None
-                                # Prefer frame DOM if available
+                                scope = "page"
+                                live_frame = None
                                 try:
                                     if frame_ref is not None and not frame_ref.is_detached():
-                                        try:
-                                            html = frame_ref.content()
-                                        except Exception:
-                                            html = None
+                                        live_frame = frame_ref
                                 except Exception:
-                                    html = None
+                                    live_frame = None
+                                full_due = args.dom_scope == "page" or (
+                                    args.dom_full_interval > 0 and time.time() - last_full_dom_at >= args.dom_full_interval
+                                )
+                                if not full_due:
+                                    html = _capture_scoped_html(live_frame or ap, act.get("element") or {}, args.dom_max_nodes)
+                                    scope = "element"
+                                # Full document: prefer frame DOM if available
+                                if html is None and live_frame is not None:
+                                    try:
+                                        html = live_frame.content()
+                                        scope = "frame"
+                                    except Exception:
+                                        html = None
                                 if html is None:
                                     html = _safe_get_outer_html(ap)
+                                    scope = "page"
                                 if html is not None:
-                                    da = session.dom_dir / f"A-{idxa:03}.html"
+                                    da = session.dom_dir / f"{action_id}.html"
                                     da.write_text(str(html), encoding="utf-8")
                                     act["domSnapshotPath"] = str(da.relative_to(session.session_dir))
+                                    act["domSnapshotScope"] = scope
+                                    if scope != "element":
+                                        last_full_dom_at = time.time()
                                 else:
                                     act["domSnapshotError"] = "no-html"
                             # Screenshot
                             if args.capture_screenshots:
-                                sa = session.screenshot_dir / f"A-{idxa:03}.png"
                                 clip = None
                                 try:
                                     rect = ((act.get("element") or {}).get("rect") or None)
@@ -1501,9 +2068,9 @@ def main() -> None:
                                             clip = {"x": x, "y": y, "width": w, "height": h}
                                 except Exception:
                                     clip = None
-                                spath = _safe_screenshot(ap, sa, clip)
+                                spath = _queue_screenshot(ap, session.screenshot_dir / action_id, clip)
                                 if spath:
-                                    act["screenshotPath"] = str(Path(spath).relative_to(session.session_dir))
+                                    act["screenshotPath"] = spath
                                 else:
                                     act["screenshotError"] = "shot-failed"
                         # Add useful context
@@ -1519,10 +2086,15 @@ def main() -> None:
                         except Exception:
                             pass
                         session.add_action(act, runtime_page=page_ref)
+                    if screenshot_writer is not None:
+                        session.apply_screenshot_results(screenshot_writer.results())
                 except Exception as drain_exc:
                     sys.stderr.write(f"[recorder] drain error: {drain_exc}\n")
 
-                time.sleep(0.2)
+                wait_s = IDLE_WAIT_SECONDS
+                if args.timeout:
+                    wait_s = min(wait_s, max(0.0, start + args.timeout - time.time()))
+                _wait_for_capture(wait_s)
                 if args.timeout and time.time() - start >= args.timeout:
                     print(f"[recorder] Auto-stopping after {args.timeout} seconds.")
                     stop_event.set(); break
@@ -1530,7 +2102,15 @@ def main() -> None:
             print("\n[recorder] Stopping (Ctrl+C detected).")
             stop_event.set()
 
-        # Stop JS-to-Python calls before we drain to reduce socket errors during teardown
+        # Collect fills still being typed, then stop JS-to-Python calls before we drain
+        # to reduce socket errors during teardown
+        try:
+            for fill_page, fill_payload in _take_pending_fills(context):
+                fill_payload["__page"] = fill_page
+                with q_lock:
+                    pending_actions.append(fill_payload)
+        except Exception:
+            pass
         try:
             _silence_bindings_on_pages(context)
         except Exception:
@@ -1588,7 +2168,8 @@ def main() -> None:
 
         # Final best-effort snapshot so the last UI state is present even if no page event fired
         try:
-            if session and (args.capture_dom or args.capture_screenshots):
+            wants_final = graceful_stop is None or graceful_stop.get("finalSnapshot")
+            if session and wants_final and (args.capture_dom or args.capture_screenshots):
                 ap = active_page if (active_page and not active_page.is_closed()) else (page if (page and not page.is_closed()) else None)
                 if ap:
                     finalize_evt: Dict[str, Any] = {"trigger": "finalize", "pageUrl": getattr(ap, "url", ""), "receivedAt": _iso_now()}
@@ -1606,10 +2187,9 @@ def main() -> None:
                     # Screenshot
                     if args.capture_screenshots:
                         idxp = len(session.page_events) + 1
-                        sp = session.screenshot_dir / f"P-{idxp:03}.png"
-                        spath = _safe_screenshot(ap, sp)
+                        spath = _queue_screenshot(ap, session.screenshot_dir / f"P-{idxp:03}")
                         if spath:
-                            finalize_evt["screenshotPath"] = str(Path(spath).relative_to(session.session_dir))
+                            finalize_evt["screenshotPath"] = spath
                         else:
                             finalize_evt["screenshotError"] = "shot-failed"
                     try:
@@ -1665,6 +2245,20 @@ def main() -> None:
             playwright.stop()
         except Exception:
             pass
+        if session and screenshot_writer is not None:
+            try:
+                session.apply_screenshot_results(screenshot_writer.close())
+                stats = screenshot_writer.stats
+                print(
+                    f"[recorder] Screenshots: {stats['written']} written, {stats['duplicates']} duplicate(s) skipped, "
+                    f"{stats['dropped']} dropped, {stats['failed']} failed"
+                )
+                if stats["dropped"]:
+                    session._warnings.append(
+                        f"{stats['dropped']} screenshot(s) dropped because the writer queue was full."
+                    )
+            except Exception:
+                pass
         if session:
             try:
                 meta_path = session.finalize(har_path=har_path, trace_path=trace_path)
@@ -1685,15 +2279,16 @@ def main() -> None:
                     actions=len(session.actions),
                     metadata_path=str(meta_path),
                 )
-            except Exception:
+            except Exception as exc:  # noqa: BLE001
+                session.mark_finished(STATUS_FAILED, error=str(exc))
                 publish_recorder_event(
                     session_name,
                     "Recorder finalization failed",
                     level="error",
                 )
-                pass
         else:
             publish_recorder_event(session_name, "Recorder session aborted", level="warning")
+        heartbeat_stop.set()
 
 
 if __name__ == "__main__":
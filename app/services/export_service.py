@@ -0,0 +1,152 @@
+"""Disk-backed XLSX exports for generated test cases.
+
+Generated suites are written with xlsxwriter's ``constant_memory`` mode, which
+flushes each row to a temp file as soon as the next row starts. Peak memory
+therefore does not grow with the number of rows. The workbook is published
+under ``EXPORT_DIR`` with an opaque id and served by ``GET /api/exports/{id}``
+as a streamed file download instead of base64 inside the JSON response.
+Exports expire after ``EXPORT_TTL_SECONDS`` and are purged whenever a new
+export is written.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from uuid import uuid4
+
+import pandas as pd
+
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR", "exports")).resolve()
+EXPORT_TTL_SECONDS = float(os.getenv("EXPORT_TTL_SECONDS", "3600"))
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_EXPORT_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass
+class ExportHandle:
+    export_id: str
+    path: Path
+    filename: str
+    size: int
+    created_at: float
+
+
+def _cell_value(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        try:
+            value = value.item()  # numpy scalar -> Python scalar
+        except (TypeError, ValueError):
+            pass
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if value is pd.NaT:
+        return None
+    return str(value)
+
+
+def write_dataframe_xlsx(df: pd.DataFrame, path: Union[str, Path], sheet_name: str = "TestCases") -> Path:
+    """Write ``df`` to ``path`` row by row in xlsxwriter's constant-memory mode."""
+    import xlsxwriter  # type: ignore
+
+    path = Path(path)
+    workbook = xlsxwriter.Workbook(
+        str(path),
+        {"constant_memory": True, "strings_to_numbers": False, "strings_to_formulas": False, "strings_to_urls": False},
+    )
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header = workbook.add_format({"bold": True})
+        for col, name in enumerate(df.columns):
+            worksheet.write_string(0, col, str(name), header)
+        for row_idx, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            for col, value in enumerate(row):
+                value = _cell_value(value)
+                if value is None:
+                    continue
+                if isinstance(value, str):
+                    worksheet.write_string(row_idx, col, value)
+                else:
+                    worksheet.write(row_idx, col, value)
+    finally:
+        workbook.close()
+    return path
+
+
+def _meta_path(export_id: str) -> Path:
+    return EXPORT_DIR / f"{export_id}.json"
+
+
+def purge_expired_exports(now: Optional[float] = None) -> int:
+    """Delete exports older than the TTL; returns how many were removed."""
+    if not EXPORT_DIR.is_dir():
+        return 0
+    cutoff = (now if now is not None else time.time()) - EXPORT_TTL_SECONDS
+    removed = 0
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            os.unlink(entry.path)
+        except OSError:
+            continue
+        if entry.name.endswith(".xlsx"):
+            removed += 1
+    return removed
+
+
+def export_dataframe(df: pd.DataFrame, filename: str = "test-cases.xlsx", sheet_name: str = "TestCases") -> ExportHandle:
+    """Write ``df`` to a new export and return its handle."""
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    purge_expired_exports()
+    export_id = uuid4().hex
+    path = EXPORT_DIR / f"{export_id}.xlsx"
+    part = EXPORT_DIR / f".{export_id}.xlsx.part"
+    try:
+        write_dataframe_xlsx(df, part, sheet_name=sheet_name)
+        os.replace(part, path)
+    except BaseException:
+        try:
+            part.unlink()
+        except OSError:
+            pass
+        raise
+    created_at = time.time()
+    _meta_path(export_id).write_text(json.dumps({"filename": filename, "createdAt": created_at}), encoding="utf-8")
+    return ExportHandle(export_id, path, filename, path.stat().st_size, created_at)
+
+
+def get_export(export_id: str) -> Optional[ExportHandle]:
+    """Handle for a live export, or None if the id is unknown, malformed or expired."""
+    if not _EXPORT_ID.match(export_id or ""):
+        return None
+    path = EXPORT_DIR / f"{export_id}.xlsx"
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if stat.st_mtime < time.time() - EXPORT_TTL_SECONDS:
+        return None
+    meta: Dict[str, Any] = {}
+    try:
+        meta = json.loads(_meta_path(export_id).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    return ExportHandle(
+        export_id,
+        path,
+        str(meta.get("filename") or "test-cases.xlsx"),
+        stat.st_size,
+        float(meta.get("createdAt") or stat.st_mtime),
+    )
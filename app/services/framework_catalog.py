@@ -0,0 +1,155 @@
+"""Cached inventory of test-manager workbooks and datasheets in a framework repo.
+
+``find_test_manager_path`` and ``/config/list_datasheets`` used to glob the whole
+framework tree on every request, including ``node_modules``. A
+:class:`FrameworkCatalog` keeps the directory tree (minus dependency and build
+folders) in memory. A refresh stats each known directory and only re-lists those
+whose mtime changed, because adding, removing or renaming an entry is what
+updates a directory's mtime. Refreshes are throttled to one per
+``FRAMEWORK_CATALOG_REFRESH`` seconds. Writers that add files (uploads, a newly
+created testmanager.xlsx) call :meth:`FrameworkCatalog.mark_stale` so the next
+lookup sees them immediately.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Seconds a refreshed catalog is trusted before directory mtimes are checked again.
+REFRESH_INTERVAL = float(os.getenv("FRAMEWORK_CATALOG_REFRESH", "2"))
+
+TEST_MANAGER_FILENAME = "testmanager.xlsx"
+DATA_DIRNAME = "data"
+DATASHEET_SUFFIXES = {".xlsx", ".xls", ".csv"}
+# Directories that never hold framework configuration and are expensive to walk.
+SKIP_DIRS = {
+    "node_modules",
+    ".git",
+    ".hg",
+    ".svn",
+    "__pycache__",
+    ".venv",
+    "venv",
+    "test-results",
+    "playwright-report",
+    "blob-report",
+    "dist",
+    "build",
+    "coverage",
+    ".next",
+    ".cache",
+}
+
+
+@dataclass
+class _DirEntry:
+    mtime_ns: int
+    subdirs: Tuple[str, ...]
+    files: Tuple[str, ...]
+
+
+def _is_tracked_file(name: str) -> bool:
+    return name == TEST_MANAGER_FILENAME or os.path.splitext(name)[1].lower() in DATASHEET_SUFFIXES
+
+
+class FrameworkCatalog:
+    """Test-manager locations and datasheet inventory for one framework root."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, _DirEntry] = {}
+        self._checked_at = 0.0
+
+    def mark_stale(self) -> None:
+        with self._lock:
+            self._checked_at = 0.0
+
+    def _list_dir(self, full: str, mtime_ns: int) -> _DirEntry:
+        subdirs: List[str] = []
+        files: List[str] = []
+        try:
+            with os.scandir(full) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                subdirs.append(entry.name)
+                        elif entry.is_file() and _is_tracked_file(entry.name):
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return _DirEntry(mtime_ns, tuple(sorted(subdirs)), tuple(sorted(files)))
+
+    def _refresh_locked(self) -> None:
+        now = time.monotonic()
+        if self._dirs and now - self._checked_at < REFRESH_INTERVAL:
+            return
+        seen: Dict[str, _DirEntry] = {}
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            full = os.path.join(self.root, rel) if rel else str(self.root)
+            try:
+                mtime_ns = os.stat(full).st_mtime_ns
+            except OSError:
+                continue
+            node = self._dirs.get(rel)
+            if node is None or node.mtime_ns != mtime_ns:
+                # stat before listing: a change racing the listing leaves an old mtime and is re-listed next time
+                node = self._list_dir(full, mtime_ns)
+            seen[rel] = node
+            stack.extend(os.path.join(rel, name) if rel else name for name in node.subdirs)
+        self._dirs = seen
+        self._checked_at = now
+
+    def _files(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            self._refresh_locked()
+            return [(rel, name) for rel, node in self._dirs.items() for name in node.files]
+
+    def test_manager_paths(self) -> List[Path]:
+        """Every testmanager.xlsx under the root, most recently modified first."""
+        candidates = []
+        for rel, name in self._files():
+            if name != TEST_MANAGER_FILENAME:
+                continue
+            path = self.root / rel / name
+            try:
+                candidates.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        return [path for _, path in candidates]
+
+    def datasheets(self) -> List[str]:
+        """Datasheet files under ``data/`` as sorted POSIX paths relative to the root."""
+        sheets = []
+        for rel, name in self._files():
+            parts = Path(rel).parts
+            if not parts or parts[0] != DATA_DIRNAME:
+                continue
+            if os.path.splitext(name)[1].lower() in DATASHEET_SUFFIXES:
+                sheets.append(parts + (name,))
+        return ["/".join(parts) for parts in sorted(sheets)]
+
+
+_CATALOGS: Dict[str, FrameworkCatalog] = {}
+_CATALOGS_LOCK = threading.Lock()
+
+
+def get_framework_catalog(root: Path) -> FrameworkCatalog:
+    """Shared catalog for ``root`` (one instance per resolved path)."""
+    key = os.path.normcase(str(Path(root).resolve()))
+    with _CATALOGS_LOCK:
+        catalog = _CATALOGS.get(key)
+        if catalog is None:
+            catalog = _CATALOGS[key] = FrameworkCatalog(Path(root).resolve())
+        return catalog
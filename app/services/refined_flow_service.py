@@ -3,12 +3,26 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from ..recorder_auto_ingest import auto_refine_and_ingest
+from .. import job_store
+from ..recorder_auto_ingest import auto_refine_and_ingest, recorder_steps_from_metadata
+from ..recorder_manifest import STATUS_FAILED, STATUS_RECORDING, wait_for_completion
+
+# Longest finalize waits for a still-running recorder to publish its completion manifest.
+COMPLETION_TIMEOUT = float(os.getenv("RECORDER_COMPLETION_TIMEOUT", "15"))
+# Background finalize jobs that may run at once (see submit_finalize_job).
+FINALIZE_WORKERS = int(os.getenv("RECORDER_FINALIZE_WORKERS", "2"))
+# Also write the enriched scenario CSV/XLSX/JSON during finalize.
+FINALIZE_ENRICHED_ARTIFACTS = os.getenv("RECORDER_FINALIZE_ENRICHED", "0").lower() in {"1", "true", "yes"}
+
+FinalizeEventCallback = Callable[[Dict[str, Any]], None]
 
 
 @dataclass
@@ -22,6 +36,9 @@ class RecorderSessionResult:
     auto_ingest_status: str
     auto_ingest_result: Optional[Dict[str, Any]]
     auto_ingest_error: Optional[str]
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    duration_seconds: Optional[float] = None
+    enriched_artifacts: Optional[Dict[str, str]] = None
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -34,23 +51,93 @@ class RecorderSessionResult:
                 "result": self.auto_ingest_result,
                 "error": self.auto_ingest_error,
             },
+            "stages": self.stages,
+            "durationSeconds": self.duration_seconds,
+            "enrichedArtifacts": self.enriched_artifacts,
         }
 
 
-def load_recorder_metadata(session_dir: Path, attempts: int = 15, delay: float = 0.5) -> Optional[Dict[str, Any]]:
-    """Best-effort load of Playwright recorder metadata.json."""
+class FinalizeProgress:
+    """Per-stage status and timings for one finalize run.
 
-    session_path = session_dir
-    metadata_path = session_path / "metadata.json"
-    for _ in range(max(attempts, 1)):
-        if metadata_path.exists():
+    Every change is mirrored to the job's ``progress`` (when ``job_id`` is set) and
+    reported as a ``finalize-stage`` event through ``on_event``. Stages may run on
+    different threads.
+    """
+
+    def __init__(self, job_id: Optional[str] = None, on_event: Optional[FinalizeEventCallback] = None) -> None:
+        self.job_id = job_id
+        self.on_event = on_event
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return round(time.perf_counter() - self._started, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = [dict(stage) for stage in self._stages.values()]
+        done = sum(1 for stage in stages if stage["status"] in ("completed", "failed", "skipped"))
+        percent = round(100.0 * done / len(stages), 1) if stages else 0.0
+        return {
+            "stage": "finalize",
+            "percent": percent,
+            "stages": stages,
+            "completed": done,
+            "total": len(stages),
+            "elapsedSeconds": self.elapsed,
+        }
+
+    def _update(self, name: str, **fields: Any) -> None:
+        with self._lock:
+            stage = self._stages.setdefault(name, {"stage": name})
+            stage.update(fields)
+            event = dict(stage)
+        if self.job_id:
             try:
-                return json.loads(metadata_path.read_text(encoding="utf-8"))
-            except json.JSONDecodeError:
-                time.sleep(delay)
-                continue
-        time.sleep(delay)
-    return None
+                job_store.update_job_progress(self.job_id, self.snapshot())
+            except Exception:  # noqa: BLE001 - progress is best-effort
+                pass
+        if self.on_event:
+            try:
+                self.on_event({"type": "finalize-stage", "message": f"Finalize {name}: {event['status']}", **event})
+            except Exception:  # noqa: BLE001
+                pass
+
+    def run(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        self._update(name, status="running")
+        started = time.perf_counter()
+        try:
+            value = fn(*args, **kwargs)
+        except Exception as exc:
+            self._update(name, status="failed", seconds=round(time.perf_counter() - started, 3), error=str(exc))
+            raise
+        self._update(name, status="completed", seconds=round(time.perf_counter() - started, 3))
+        return value
+
+    def skip(self, name: str, reason: str) -> None:
+        self._update(name, status="skipped", reason=reason)
+
+    def annotate(self, name: str, **fields: Any) -> None:
+        self._update(name, **fields)
+
+
+def load_recorder_metadata(session_dir: Path, timeout: float = 0.0) -> Optional[Dict[str, Any]]:
+    """Load Playwright recorder metadata.json.
+
+    The recorder publishes metadata with an atomic rename, so a single read is
+    enough. With ``timeout``, first wait for the session's completion manifest.
+    """
+
+    if timeout > 0:
+        wait_for_completion(session_dir, timeout)
+    try:
+        data = json.loads((session_dir / "metadata.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
 
 
 def scan_session_directory(session_dir: Path) -> Dict[str, Any]:
@@ -84,59 +171,112 @@ def scan_session_directory(session_dir: Path) -> Dict[str, Any]:
     return summary
 
 
-def finalize_recorder_session(session_dir: Path, metadata: Optional[Dict[str, Any]] = None) -> RecorderSessionResult:
-    """Prepare recorder session artefacts and optionally run auto refine + ingest."""
+def _write_enriched_artifacts(metadata: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    from ..recorder_enricher import enrich_recorder_flow, persist_enriched_artifacts
 
-    listing = scan_session_directory(session_dir)
+    steps = recorder_steps_from_metadata(metadata)
+    if not steps:
+        return None
+    flow_name = metadata.get("flowName") or metadata.get("flow_name") or "Recorder Flow"
+    table_rows, sidecar = enrich_recorder_flow(flow_name, steps)
+    return persist_enriched_artifacts(flow_name, table_rows, sidecar)
+
+
+def finalize_recorder_session(
+    session_dir: Path,
+    metadata: Optional[Dict[str, Any]] = None,
+    *,
+    job_id: Optional[str] = None,
+    on_event: Optional[FinalizeEventCallback] = None,
+    enriched_artifacts: Optional[bool] = None,
+) -> RecorderSessionResult:
+    """Prepare recorder session artefacts and optionally run auto refine + ingest.
+
+    Runs as stages (wait, load, scan, refine-ingest, enriched-artifacts) with
+    timings reported through :class:`FinalizeProgress`. Once metadata is loaded,
+    the directory scan, refine + vector ingest and enriched artefact writing run
+    in parallel.
+    """
+
+    progress = FinalizeProgress(job_id, on_event)
     warnings: list[str] = []
+    write_enriched = FINALIZE_ENRICHED_ARTIFACTS if enriched_artifacts is None else enriched_artifacts
 
     if metadata is None:
-        metadata = load_recorder_metadata(session_dir)
+        manifest = progress.run("wait", wait_for_completion, session_dir, COMPLETION_TIMEOUT)
+        if manifest and manifest.get("status") == STATUS_RECORDING:
+            warnings.append("Recorder did not publish its completion manifest; using the latest metadata snapshot.")
+        elif manifest and manifest.get("status") == STATUS_FAILED:
+            warnings.append(f"Recorder finalization failed: {manifest.get('error') or 'unknown error'}")
+        metadata = progress.run("load", load_recorder_metadata, session_dir)
 
     auto_status = "skipped"
     auto_result: Optional[Dict[str, Any]] = None
     auto_error: Optional[str] = None
+    enriched: Optional[Dict[str, str]] = None
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="finalize-stage") as pool:
+        scan_future = pool.submit(progress.run, "scan", scan_session_directory, session_dir)
+        refine_future: Optional[Future] = None
+        enrich_future: Optional[Future] = None
+        if metadata:
+            refine_future = pool.submit(progress.run, "refine-ingest", auto_refine_and_ingest, str(session_dir), metadata)
+            if write_enriched:
+                enrich_future = pool.submit(progress.run, "enriched-artifacts", _write_enriched_artifacts, metadata)
+            else:
+                progress.skip("enriched-artifacts", "disabled")
+        listing = scan_future.result()
 
-    if not metadata:
-        if listing["exists"]:
-            warnings.append(
-                "Recorder metadata.json missing; available artefacts: " + ", ".join(listing.get("top_level", []) or [])
+        if not metadata:
+            if listing["exists"]:
+                warnings.append(
+                    "Recorder metadata.json missing; available artefacts: " + ", ".join(listing.get("top_level", []) or [])
+                )
+            else:
+                warnings.append("Recorder session directory not found.")
+            return RecorderSessionResult(
+                session_dir=session_dir,
+                listing=listing,
+                metadata=None,
+                warnings=warnings,
+                auto_ingest_status=auto_status,
+                auto_ingest_result=auto_result,
+                auto_ingest_error=auto_error,
+                stages=progress.snapshot()["stages"],
+                duration_seconds=progress.elapsed,
             )
-        else:
-            warnings.append("Recorder session directory not found.")
-        return RecorderSessionResult(
-            session_dir=session_dir,
-            listing=listing,
-            metadata=None,
-            warnings=warnings,
-            auto_ingest_status=auto_status,
-            auto_ingest_result=auto_result,
-            auto_ingest_error=auto_error,
-        )
-
-    options = metadata.get("options") or {}
-    artifacts = metadata.get("artifacts") or {}
-    missing_parts: list[str] = []
-
-    if options.get("captureDom") and not listing.get("dom_files"):
-        missing_parts.append("DOM snapshots")
-    if options.get("captureScreenshots") and not listing.get("screenshot_files"):
-        missing_parts.append("screenshots")
-    if options.get("recordTrace") and not artifacts.get("trace"):
-        missing_parts.append("trace.zip")
-    if options.get("recordHar") and not artifacts.get("har"):
-        missing_parts.append("network.har")
-
-    if missing_parts:
-        warnings.append("Missing artefacts: " + ", ".join(missing_parts))
 
-    try:
-        auto_result = auto_refine_and_ingest(str(session_dir), metadata)
-        auto_status = "success"
-    except Exception as exc:  # noqa: BLE001
-        auto_status = "error"
-        auto_error = str(exc)
-        warnings.append(f"Auto refine ingest failed: {exc}")
+        options = metadata.get("options") or {}
+        artifacts = metadata.get("artifacts") or {}
+        missing_parts: list[str] = []
+
+        if options.get("captureDom") and not listing.get("dom_files"):
+            missing_parts.append("DOM snapshots")
+        if options.get("captureScreenshots") and not listing.get("screenshot_files"):
+            missing_parts.append("screenshots")
+        if options.get("recordTrace") and not artifacts.get("trace"):
+            missing_parts.append("trace.zip")
+        if options.get("recordHar") and not artifacts.get("har"):
+            missing_parts.append("network.har")
+
+        if missing_parts:
+            warnings.append("Missing artefacts: " + ", ".join(missing_parts))
+
+        try:
+            auto_result = refine_future.result()
+            auto_status = "success"
+            if isinstance(auto_result, dict) and auto_result.get("timings"):
+                progress.annotate("refine-ingest", breakdown=auto_result["timings"])
+        except Exception as exc:  # noqa: BLE001
+            auto_status = "error"
+            auto_error = str(exc)
+            warnings.append(f"Auto refine ingest failed: {exc}")
+
+        if enrich_future is not None:
+            try:
+                enriched = enrich_future.result()
+            except Exception as exc:  # noqa: BLE001
+                warnings.append(f"Enriched artefacts failed: {exc}")
 
     return RecorderSessionResult(
         session_dir=session_dir,
@@ -146,4 +286,38 @@ def finalize_recorder_session(session_dir: Path, metadata: Optional[Dict[str, An
         auto_ingest_status=auto_status,
         auto_ingest_result=auto_result,
         auto_ingest_error=auto_error,
+        stages=progress.snapshot()["stages"],
+        duration_seconds=progress.elapsed,
+        enriched_artifacts=enriched,
     )
+
+
+_FINALIZE_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, FINALIZE_WORKERS), thread_name_prefix="finalize-job")
+
+
+def submit_finalize_job(
+    session_dir: Path,
+    *,
+    on_event: Optional[FinalizeEventCallback] = None,
+    payload: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Queue a ``recorder.finalize`` job on the bounded finalize pool; returns its job id.
+
+    Stage progress is stored on the job (``GET /api/jobs/{id}``) and the result
+    (without the raw metadata) once it completes.
+    """
+    job_id = job_store.create_job("recorder.finalize", {"sessionDir": str(session_dir), **(payload or {})})
+
+    def _run() -> None:
+        job_store.update_job(job_id, "running")
+        try:
+            result = finalize_recorder_session(session_dir, job_id=job_id, on_event=on_event)
+        except Exception as exc:  # noqa: BLE001
+            job_store.update_job(job_id, "failed", error=str(exc))
+            return
+        summary = result.to_dict()
+        summary.pop("metadata", None)
+        job_store.update_job(job_id, "completed", result=summary)
+
+    _FINALIZE_EXECUTOR.submit(_run)
+    return job_id
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from io import BytesIO
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -10,6 +10,7 @@ import pandas as pd
 
 from ..test_case_generator import TestCaseGenerator, map_llm_to_template
 from ..vector_db import VectorDBClient
+from .export_service import write_dataframe_xlsx
 
 
 class TestCaseGenerationError(RuntimeError):
@@ -61,10 +62,12 @@ def load_template_bytes(template_path: Path) -> pd.DataFrame:
 
 
 def dataframe_to_excel_bytes(df: pd.DataFrame) -> bytes:
-    """Serialize a DataFrame to XLSX bytes."""
+    """Serialize a DataFrame to XLSX bytes.
 
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="TestCases")
-    buffer.seek(0)
-    return buffer.read()
+    Prefer ``export_service.export_dataframe`` for API responses; this keeps the
+    whole file in memory.
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_dataframe_xlsx(df, Path(tmp) / "export.xlsx")
+        return path.read_bytes()
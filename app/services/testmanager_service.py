@@ -0,0 +1,699 @@
+"""Cached, write-through access to a framework's ``testmanager.xlsx``.
+
+Each workbook is loaded once per process and kept in memory together with an
+index of its rows (TestCaseID, normalised ID tokens and row number). The cache is
+validated against the file's mtime/size and, when those change, its SHA-1 - so a
+plain ``touch`` does not force a reload but an edit in Excel or another worker does.
+
+Edits are applied to the in-memory workbook inside :meth:`TestManagerWorkbook.batch`
+and flushed with a single save when the outermost batch exits. The batch holds a
+cross-process file lock, and the cache is revalidated after taking it, so
+concurrent updates from API workers and Celery tasks no longer overwrite each
+other. Saves go through a temp file and ``os.replace``.
+
+Trial runs only need the ReferenceIDs of one scenario; :func:`scenario_references`
+answers that from a small catalog built with openpyxl's streaming read-only mode
+and cached by file hash, without loading the full workbook.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+
+try:  # pragma: no cover - platform specific
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+try:  # pragma: no cover - platform specific
+    import msvcrt
+except ImportError:  # pragma: no cover
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for another process holding the testmanager.xlsx lock.
+LOCK_TIMEOUT = float(os.getenv("TESTMANAGER_LOCK_TIMEOUT", "30"))
+
+STANDARD_HEADERS = [
+    "TestCaseID",
+    "TestCaseDescription",
+    "Execute",
+    "DatasheetName",
+    "ReferenceID",
+    "IDName",
+]
+# Column roles and the header names accepted for each (substring match on normalised headers).
+COLUMN_CANDIDATES: Dict[str, Tuple[str, ...]] = {
+    "TestCaseID": ("TestCaseID", "ID", "Identifier"),
+    "TestCaseDescription": ("TestCaseDescription", "Scenario", "Description"),
+    "Execute": ("Execute", "Run", "Enabled"),
+    "DatasheetName": ("DatasheetName", "DataSheet", "Data Sheet"),
+    "ReferenceID": ("ReferenceID", "Reference Id", "Reference"),
+    "IDName": ("IDName", "IdentifierName", "RowIdentifier"),
+}
+
+
+def _normalise_keyword(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (text or "").strip().lower())
+
+
+def _scenario_tokens(text: str) -> List[str]:
+    return [token for token in re.findall(r"[a-z0-9]+", _normalise_keyword(text)) if len(token) >= 3]
+
+
+def _cell_text(value: Any) -> str:
+    return str(value or "").strip()
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+    """Exclusive cross-process lock for ``path``.
+
+    The lock file lives in the temp directory (keyed by the resolved path) so it
+    never shows up in the framework repository.
+    """
+    key = hashlib.sha1(str(Path(path).resolve()).lower().encode("utf-8")).hexdigest()[:16]
+    lock_path = Path(tempfile.gettempdir()) / f"testmanager-{key}.lock"
+    handle = open(lock_path, "a+b")
+    deadline = time.monotonic() + max(0.0, timeout)
+    locked = False
+    try:
+        while not locked:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                elif msvcrt is not None:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                locked = True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for the lock on {path}")
+                time.sleep(0.05)
+        yield
+    finally:
+        if locked:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+        handle.close()
+
+
+def create_test_manager(path: Path) -> None:
+    """Write a fresh testmanager.xlsx with the standard ExecutionPlan headers."""
+    from openpyxl import Workbook  # type: ignore
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "ExecutionPlan"
+    for idx, header in enumerate(STANDARD_HEADERS, start=1):
+        ws.cell(row=1, column=idx, value=header)
+    wb.save(path)
+
+
+def _header_map(sheet: Any) -> Dict[str, int]:
+    header_map: Dict[str, int] = {}
+    try:
+        header_cells = list(sheet[1]) if sheet.max_row >= 1 else []
+    except Exception:
+        return header_map
+    for idx, cell in enumerate(header_cells, start=1):
+        if cell.value is None:
+            continue
+        header_map[_normalise_keyword(str(cell.value))] = idx
+    return header_map
+
+
+def _find_column(header_map: Dict[str, int], *candidates: str) -> Optional[int]:
+    for candidate in candidates:
+        key = _normalise_keyword(candidate)
+        for header_key, col_idx in header_map.items():
+            if key == header_key or key in header_key:
+                return col_idx
+    return None
+
+
+def _select_sheet(wb: Any) -> Any:
+    """Prefer 'ExecutionPlan', then the sheet that best looks like an execution plan, then the active sheet."""
+    if "ExecutionPlan" in wb.sheetnames:
+        return wb["ExecutionPlan"]
+    best_sheet = None
+    best_score = -1
+    for sheet in wb.worksheets:
+        header_map = _header_map(sheet)
+        score = sum(
+            1
+            for role in ("TestCaseDescription", "Execute", "DatasheetName")
+            if _find_column(header_map, *COLUMN_CANDIDATES[role])
+        )
+        if score > best_score:
+            best_score = score
+            best_sheet = sheet
+    if best_sheet is not None and best_score >= 2:  # require at least desc+execute
+        return best_sheet
+    return wb.active
+
+
+def _trigrams(norm: str) -> Set[str]:
+    return {norm[i : i + 3] for i in range(len(norm) - 2)}
+
+
+@dataclass
+class ScenarioCandidate:
+    """A testmanager row ranked against a free-text query by :meth:`ScenarioIndex.search`."""
+
+    row: int
+    test_case_id: str
+    description: str
+    score: float
+
+
+class ScenarioIndex:
+    """Token and trigram index over testmanager TestCaseIDs and descriptions.
+
+    :meth:`match_id` applies the update rules (exact ID, ID substring, >= 2 shared
+    ID tokens) through postings lookups instead of scanning rows, and
+    :meth:`search` ranks rows against free text (ID and description) for callers
+    such as ``/agentic/keyword-inspect``.
+    """
+
+    FIELDS = ("id", "description")
+
+    def __init__(self) -> None:
+        self._text: Dict[str, Dict[int, str]] = {field: {} for field in self.FIELDS}
+        self._norms: Dict[str, Dict[int, str]] = {field: {} for field in self.FIELDS}
+        self._tokens: Dict[str, Dict[int, Set[str]]] = {field: {} for field in self.FIELDS}
+        self._grams: Dict[str, Dict[int, Set[str]]] = {field: {} for field in self.FIELDS}
+        self._by_token: Dict[str, Dict[str, Set[int]]] = {field: {} for field in self.FIELDS}
+        self._by_gram: Dict[str, Dict[str, Set[int]]] = {field: {} for field in self.FIELDS}
+        self._by_id: Dict[str, List[int]] = {}
+        self._by_id_norm: Dict[str, List[int]] = {}
+        self._max_id_norm = 0  # upper bound on indexed ID lengths (not lowered on removal)
+
+    def __len__(self) -> int:
+        return len(self._text["id"])
+
+    def test_case_id(self, row: int) -> str:
+        return self._text["id"].get(row, "")
+
+    def rows_for_id(self, case_id: str) -> List[int]:
+        """Rows whose TestCaseID equals ``case_id`` case-insensitively, in sheet order."""
+        return list(self._by_id.get((case_id or "").strip().lower(), ()))
+
+    def set(self, row: int, field: str, text: str) -> None:
+        self.discard(row, field)
+        text = (text or "").strip()
+        if not text:
+            return
+        norm = _normalise_keyword(text)
+        tokens = set(_scenario_tokens(text))
+        grams = _trigrams(norm)
+        self._text[field][row] = text
+        self._norms[field][row] = norm
+        self._tokens[field][row] = tokens
+        self._grams[field][row] = grams
+        for token in tokens:
+            self._by_token[field].setdefault(token, set()).add(row)
+        for gram in grams:
+            self._by_gram[field].setdefault(gram, set()).add(row)
+        if field == "id":
+            self._max_id_norm = max(self._max_id_norm, len(norm))
+            for key, table in ((text.lower(), self._by_id), (norm, self._by_id_norm)):
+                rows = table.setdefault(key, [])
+                rows.append(row)
+                rows.sort()
+
+    def discard(self, row: int, field: str) -> None:
+        text = self._text[field].pop(row, None)
+        if text is None:
+            return
+        norm = self._norms[field].pop(row)
+        for postings, keys in (
+            (self._by_token[field], self._tokens[field].pop(row)),
+            (self._by_gram[field], self._grams[field].pop(row)),
+        ):
+            for key in keys:
+                bucket = postings.get(key)
+                if bucket is not None:
+                    bucket.discard(row)
+                    if not bucket:
+                        postings.pop(key, None)
+        if field == "id":
+            for key, table in ((text.lower(), self._by_id), (norm, self._by_id_norm)):
+                rows = table.get(key, [])
+                if row in rows:
+                    rows.remove(row)
+                if not rows:
+                    table.pop(key, None)
+
+    def match_id(self, scenario: str) -> Optional[int]:
+        """Row an update for ``scenario`` applies to, or None.
+
+        Same outcome as the historical top-to-bottom scan: the first exact
+        (case-insensitive) ID, else the first row whose normalised ID contains or
+        is contained in the normalised scenario, else the first row sharing the
+        most (at least two) ID tokens.
+        """
+        scenario_stripped = (scenario or "").strip()
+        if not scenario_stripped:
+            return None
+        rows = self._by_id.get(scenario_stripped.lower())
+        if rows:
+            return rows[0]
+
+        scenario_norm = _normalise_keyword(scenario)
+        if scenario_norm:
+            hits: List[int] = []
+            # IDs contained in the scenario: look up every substring of the scenario
+            length = len(scenario_norm)
+            for start in range(length):
+                for end in range(start + 1, min(length, start + self._max_id_norm) + 1):
+                    rows = self._by_id_norm.get(scenario_norm[start:end])
+                    if rows:
+                        hits.append(rows[0])
+            # Scenario contained in an ID: rows holding all of its trigrams, then verify
+            grams = _trigrams(scenario_norm)
+            if grams:
+                postings = sorted((self._by_gram["id"].get(gram, set()) for gram in grams), key=len)
+                candidates = set.intersection(*postings) if postings[0] else set()
+            else:
+                candidates = set(self._norms["id"])
+            hits.extend(row for row in candidates if scenario_norm in self._norms["id"][row])
+            if hits:
+                return min(hits)
+
+        scores: Dict[int, int] = {}
+        for token in set(_scenario_tokens(scenario)):
+            for row in self._by_token["id"].get(token, ()):
+                scores[row] = scores.get(row, 0) + 1
+        if scores:
+            best_row = min(scores, key=lambda row: (-scores[row], row))
+            if scores[best_row] >= 2:
+                return best_row
+        return None
+
+    def search(self, query: str, limit: int = 10) -> List[ScenarioCandidate]:
+        """Rows ranked by similarity to ``query`` over TestCaseID and description.
+
+        The score (0-1) averages the share of query tokens found in the row and
+        the trigram Dice coefficient of the best-matching field; an exact ID scores 1.
+        """
+        query_norm = _normalise_keyword(query)
+        query_tokens = set(_scenario_tokens(query))
+        query_grams = _trigrams(query_norm)
+        if not query_norm.strip():
+            return []
+        token_hits: Dict[int, Set[str]] = {}
+        gram_hits: Dict[Tuple[str, int], int] = {}
+        for field in self.FIELDS:
+            for token in query_tokens:
+                for row in self._by_token[field].get(token, ()):
+                    token_hits.setdefault(row, set()).add(token)
+            for gram in query_grams:
+                for row in self._by_gram[field].get(gram, ()):
+                    gram_hits[(field, row)] = gram_hits.get((field, row), 0) + 1
+        exact = set(self._by_id.get((query or "").strip().lower(), ()))
+        rows = set(token_hits) | {row for _, row in gram_hits} | exact
+
+        ranked: List[ScenarioCandidate] = []
+        for row in rows:
+            if row in exact:
+                score = 1.0
+            else:
+                token_score = len(token_hits.get(row, ())) / len(query_tokens) if query_tokens else 0.0
+                dice = max(
+                    (
+                        2 * gram_hits.get((field, row), 0) / (len(query_grams) + len(self._grams[field].get(row, ())))
+                        for field in self.FIELDS
+                        if row in self._grams[field]
+                    ),
+                    default=0.0,
+                )
+                score = (token_score + dice) / 2 if query_tokens else dice
+            if score <= 0:
+                continue
+            ranked.append(
+                ScenarioCandidate(
+                    row=row,
+                    test_case_id=self._text["id"].get(row, ""),
+                    description=self._text["description"].get(row, ""),
+                    score=round(score, 4),
+                )
+            )
+        ranked.sort(key=lambda candidate: (-candidate.score, candidate.row))
+        return ranked[: max(0, limit)]
+
+
+class TestManagerWorkbook:
+    """In-memory testmanager.xlsx with a TestCaseID index; see the module docstring."""
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._wb: Any = None
+        self._ws: Any = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._hash: Optional[str] = None
+        self._depth = 0
+        self._dirty = False
+        self.columns: Dict[str, Optional[int]] = {}
+        self._values: Dict[int, Dict[str, str]] = {}
+        self._max_row = 1
+        self.index = ScenarioIndex()
+
+    # ---- cache -----------------------------------------------------------
+    def _load(self) -> None:
+        from openpyxl import load_workbook  # type: ignore
+
+        stat = _stat_key(self.path)
+        digest = _file_hash(self.path)
+        wb = load_workbook(self.path)
+        ws = _select_sheet(wb)
+        header_map = _header_map(ws)
+        self._wb, self._ws = wb, ws
+        self._stat, self._hash = stat, digest
+        self._dirty = False
+        self.columns = {role: _find_column(header_map, *names) for role, names in COLUMN_CANDIDATES.items()}
+        self._values = {}
+        self.index = ScenarioIndex()
+        self._max_row = max(1, ws.max_row)
+        for row_idx, row in enumerate(ws.iter_rows(min_row=2, max_row=self._max_row, values_only=True), start=2):
+            values = {
+                role: _cell_text(row[col - 1]) if col and col <= len(row) else ""
+                for role, col in self.columns.items()
+            }
+            self._values[row_idx] = values
+            self.index.set(row_idx, "id", values["TestCaseID"])
+            self.index.set(row_idx, "description", values["TestCaseDescription"])
+
+    def _ensure_fresh(self) -> None:
+        stat = _stat_key(self.path)
+        if stat is None:
+            raise FileNotFoundError(str(self.path))
+        if self._wb is not None and not self._dirty:
+            if stat == self._stat:
+                return
+            if _file_hash(self.path) == self._hash:
+                self._stat = stat
+                return
+        self._load()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._wb = None
+            self._stat = self._hash = None
+
+    # ---- edits -----------------------------------------------------------
+    def _set_cell(self, row_idx: int, role: str, value: Any) -> bool:
+        col = self.columns.get(role)
+        if not col:
+            return False
+        values = self._values.setdefault(row_idx, {name: "" for name in COLUMN_CANDIDATES})
+        if values.get(role, "") == _cell_text(value):
+            return False
+        self._ws.cell(row=row_idx, column=col).value = value
+        values[role] = _cell_text(value)
+        if role == "TestCaseID":
+            self.index.set(row_idx, "id", values[role])
+        elif role == "TestCaseDescription":
+            self.index.set(row_idx, "description", values[role])
+        self._dirty = True
+        return True
+
+    # ---- public API ------------------------------------------------------
+    @contextmanager
+    def batch(self) -> Iterator["TestManagerWorkbook"]:
+        """Apply edits under the file lock and save once when the outermost batch exits."""
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+            with file_lock(self.path):
+                self._ensure_fresh()
+                self._depth = 1
+                try:
+                    yield self
+                except BaseException:
+                    if self._dirty:
+                        self.invalidate()
+                    raise
+                else:
+                    if self._dirty:
+                        self._flush()
+                finally:
+                    self._depth = 0
+
+    def _flush(self) -> None:
+        tmp = self.path.with_name(f"~{uuid4().hex[:8]}.{self.path.name}")
+        try:
+            self._wb.save(tmp)
+            os.replace(tmp, self.path)
+        except Exception as exc:
+            logger.warning("[TestManager] Failed to save %s: %s", self.path, exc)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            self.invalidate()
+            return
+        self._dirty = False
+        self._stat = _stat_key(self.path)
+        self._hash = _file_hash(self.path)
+
+    def rows(self) -> List[Dict[str, str]]:
+        with self._lock:
+            self._ensure_fresh()
+            empty = {role: "" for role in COLUMN_CANDIDATES}
+            return [dict(self._values.get(row_idx, empty)) for row_idx in range(2, self._max_row + 1)]
+
+    def find_row(self, scenario: str) -> Optional[int]:
+        with self._lock:
+            self._ensure_fresh()
+            return self.index.match_id(scenario)
+
+    def search(self, query: str, limit: int = 10) -> List[ScenarioCandidate]:
+        """Rows ranked against ``query``; see :meth:`ScenarioIndex.search`."""
+        with self._lock:
+            self._ensure_fresh()
+            return self.index.search(query, limit)
+
+    def update_entry(
+        self,
+        scenario: str,
+        execute_value: Optional[str] = "Yes",
+        create_if_missing: bool = True,
+        datasheet: Optional[str] = None,
+        reference_id: Optional[str] = None,
+        id_name: Optional[str] = None,
+        description_override: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Update (or append) the row for ``scenario``; see ``config_service.update_test_manager_entry``."""
+        with self.batch():
+            desc_col = self.columns.get("TestCaseDescription")
+            execute_col = self.columns.get("Execute")
+            if not desc_col or not execute_col:
+                return None
+            applied = {
+                "datasheet_applied": datasheet if self.columns.get("DatasheetName") else None,
+                "reference_applied": reference_id if self.columns.get("ReferenceID") else None,
+                "idname_applied": id_name if self.columns.get("IDName") else None,
+            }
+            matched_row = self.index.match_id(scenario)
+            matched_description = self.index.test_case_id(matched_row) if matched_row is not None else None
+
+            if matched_row is not None:
+                previous_value = self._values[matched_row]["Execute"]
+                changed = False
+                if execute_value is not None:
+                    changed |= self._set_cell(matched_row, "Execute", execute_value)
+                if description_override:
+                    changed |= self._set_cell(matched_row, "TestCaseDescription", description_override)
+                if datasheet is not None:
+                    changed |= self._set_cell(matched_row, "DatasheetName", datasheet)
+                if reference_id is not None:
+                    changed |= self._set_cell(matched_row, "ReferenceID", reference_id)
+                if id_name is not None:
+                    changed |= self._set_cell(matched_row, "IDName", id_name)
+                return {
+                    "mode": "updated" if changed else "unchanged",
+                    "description": matched_description or scenario,
+                    "previous": previous_value,
+                    "execute": execute_value,
+                    "matched_row": matched_row,
+                    "matched_description": matched_description,
+                    **applied,
+                }
+
+            if not create_if_missing:
+                return None
+            new_row = self._max_row + 1
+            scenario_text = scenario.strip()
+            self._max_row = new_row
+            self._set_cell(new_row, "TestCaseDescription", description_override or scenario_text)
+            self._set_cell(new_row, "Execute", execute_value)
+            self._set_cell(new_row, "TestCaseID", scenario_text)
+            if datasheet is not None:
+                self._set_cell(new_row, "DatasheetName", datasheet)
+            if reference_id is not None:
+                self._set_cell(new_row, "ReferenceID", reference_id)
+            if id_name is not None:
+                self._set_cell(new_row, "IDName", id_name)
+            return {
+                "mode": "created",
+                "description": scenario_text,
+                "previous": "",
+                "execute": execute_value,
+                "matched_row": new_row,
+                "matched_description": scenario_text,
+                **applied,
+            }
+
+    def rename(self, old_id: str, new_id: str) -> Optional[int]:
+        """Rename the first row whose TestCaseID equals ``old_id`` exactly; returns its row or None.
+
+        Raises ValueError when the sheet has no TestCaseID column.
+        """
+        with self.batch():
+            if not self.columns.get("TestCaseID"):
+                raise ValueError("TestCaseID column not found in testmanager.xlsx")
+            for row_idx in self.index.rows_for_id(old_id):
+                if self.index.test_case_id(row_idx) == old_id:
+                    self._set_cell(row_idx, "TestCaseID", new_id)
+                    return row_idx
+            return None
+
+
+_WORKBOOKS: Dict[str, TestManagerWorkbook] = {}
+_WORKBOOKS_LOCK = threading.Lock()
+
+
+def get_test_manager(path: Path) -> TestManagerWorkbook:
+    """Shared cached workbook for ``path`` (one instance per resolved path)."""
+    key = os.path.normcase(str(Path(path).resolve()))
+    with _WORKBOOKS_LOCK:
+        workbook = _WORKBOOKS.get(key)
+        if workbook is None:
+            workbook = _WORKBOOKS[key] = TestManagerWorkbook(Path(path))
+        return workbook
+
+
+# ---- read-only ReferenceID catalog ------------------------------------------
+
+@dataclass(frozen=True)
+class ScenarioReferences:
+    """ReferenceIDs and IDName recorded for one TestCaseID."""
+
+    reference_ids: Tuple[str, ...]
+    id_name: Optional[str]
+    datasheet: Optional[str]
+
+
+_CATALOG_COLUMNS = ("TestCaseID", "ReferenceID", "IDName", "DatasheetName")
+_CATALOGS: Dict[str, Tuple[Optional[Tuple[int, int]], str, Dict[str, ScenarioReferences]]] = {}
+_CATALOGS_LOCK = threading.Lock()
+
+
+def split_reference_ids(raw: str) -> List[str]:
+    """Split a ReferenceID cell on commas, semicolons and whitespace."""
+    return [part.strip() for part in re.split(r"[,;\s]+", raw or "") if part.strip()]
+
+
+def _parse_reference_catalog(path: Path) -> Dict[str, ScenarioReferences]:
+    from openpyxl import load_workbook  # type: ignore
+
+    # read_only streams rows from the sheet XML; data_only returns cached values instead of formulas
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb["ExecutionPlan"] if "ExecutionPlan" in wb.sheetnames else wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        header_map = {
+            _normalise_keyword(str(value)): idx for idx, value in enumerate(header, start=1) if value is not None
+        }
+        columns = {role: _find_column(header_map, *COLUMN_CANDIDATES[role]) for role in _CATALOG_COLUMNS}
+        if not columns["TestCaseID"]:
+            return {}
+
+        def _value(row: Tuple[Any, ...], role: str) -> str:
+            col = columns[role]
+            return _cell_text(row[col - 1]) if col and col <= len(row) else ""
+
+        catalog: Dict[str, ScenarioReferences] = {}
+        for row in rows:
+            case_id = _value(row, "TestCaseID")
+            if not case_id or case_id.lower() in catalog:
+                continue  # first row for an ID wins, as with the write path
+            catalog[case_id.lower()] = ScenarioReferences(
+                reference_ids=tuple(split_reference_ids(_value(row, "ReferenceID"))),
+                id_name=_value(row, "IDName") or None,
+                datasheet=_value(row, "DatasheetName") or None,
+            )
+        return catalog
+    finally:
+        wb.close()
+
+
+def reference_catalog(path: Path) -> Dict[str, ScenarioReferences]:
+    """TestCaseID (lower-cased) -> references, parsed once per file content."""
+    key = os.path.normcase(str(Path(path).resolve()))
+    stat = _stat_key(Path(path))
+    if stat is None:
+        return {}
+    with _CATALOGS_LOCK:
+        cached = _CATALOGS.get(key)
+    if cached is not None and cached[0] == stat:
+        return cached[2]
+    digest = _file_hash(Path(path))
+    if cached is not None and cached[1] == digest:
+        catalog = cached[2]
+    else:
+        catalog = _parse_reference_catalog(Path(path))
+    with _CATALOGS_LOCK:
+        _CATALOGS[key] = (stat, digest, catalog)
+    return catalog
+
+
+def scenario_references(path: Path, scenario: str) -> Optional[ScenarioReferences]:
+    """References for the row whose TestCaseID equals ``scenario`` (case-insensitive)."""
+    if not (scenario or "").strip():
+        return None
+    return reference_catalog(path).get(scenario.strip().lower())
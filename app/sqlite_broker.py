@@ -0,0 +1,262 @@
+"""Durable kombu transport backed by a local SQLite file.
+
+Used by the ``sqlite://`` Celery broker (see :mod:`app.celery_app`) so ingest and
+recorder jobs can run in a separate worker process and survive restarts without
+Redis or RabbitMQ.
+
+Messages live in the ``celery_messages`` table until the worker acknowledges
+them. Fetching a message does not delete it: the row is leased for
+``visibility_timeout`` seconds, and ``ack`` deletes it. The consuming channel
+renews the leases of its unacknowledged messages in the background, so a long
+task is never handed out twice. When a worker dies without acking, the lease
+lapses and the message is delivered again with ``redelivered`` set. A clean
+shutdown or ``reject(requeue=True)`` releases the lease at once.
+
+Bindings are kept per process, as with kombu's filesystem transport. Fanout
+exchanges (Celery remote control/broadcast) are therefore not supported.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from queue import Empty
+from typing import Any, Dict, Iterable, Set
+
+from kombu.transport import TRANSPORT_ALIASES, virtual
+
+DEFAULT_DATABASE = os.path.join(os.path.dirname(__file__), "celery-broker.db")
+DEFAULT_VISIBILITY_TIMEOUT = 300.0
+
+
+def _connect(database: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(database, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_broker_db(database: str) -> None:
+    conn = _connect(database)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS celery_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                queue TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                reserved_until REAL,
+                deliveries INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_celery_messages_queue ON celery_messages (queue, reserved_until, id)"
+        )
+    finally:
+        conn.close()
+
+
+class QoS(virtual.QoS):
+    """Acks delete the leased row; requeue and shutdown release the lease instead of re-publishing."""
+
+    def ack(self, delivery_tag: int) -> None:
+        self.channel._delete_messages([delivery_tag])
+        super().ack(delivery_tag)
+
+    def reject(self, delivery_tag: int, requeue: bool = False) -> None:
+        if requeue:
+            self.channel._release_messages([delivery_tag])
+        else:
+            self.channel._delete_messages([delivery_tag])
+        self._quick_ack(delivery_tag)
+
+    def restore_unacked(self):
+        self._flush()
+        tags = list(self._delivered)
+        self._delivered.clear()
+        try:
+            self.channel._release_messages(tags)
+        except Exception as exc:  # noqa: BLE001 - leases lapse on their own
+            return [(exc, tags)]
+        return []
+
+    def unacked_tags(self) -> Set[int]:
+        try:
+            return set(self._delivered) - set(self._dirty)
+        except RuntimeError:  # mutated by the consumer thread mid-copy; next renewal catches up
+            return set()
+
+
+class Channel(virtual.Channel):
+    QoS = QoS
+    supports_fanout = False
+
+    def __init__(self, connection, **kwargs):
+        super().__init__(connection, **kwargs)
+        options = self.connection.client.transport_options
+        self.database = options.get("database") or DEFAULT_DATABASE
+        self.visibility_timeout = float(options.get("visibility_timeout") or DEFAULT_VISIBILITY_TIMEOUT)
+        self._no_ack_queues: Set[str] = set()
+        init_broker_db(self.database)
+        self._stop_renewal = threading.Event()
+        self._renewal = threading.Thread(target=self._renew_leases, name="sqlite-broker-lease", daemon=True)
+        self._renewal.start()
+
+    # -- storage primitives -------------------------------------------------
+
+    def _new_queue(self, queue: str, **kwargs: Any) -> None:
+        pass
+
+    def _put(self, queue: str, message: Dict[str, Any], **kwargs: Any) -> None:
+        conn = _connect(self.database)
+        try:
+            conn.execute(
+                "INSERT INTO celery_messages (queue, payload, created_at) VALUES (?, ?, ?)",
+                (queue, json.dumps(message), time.time()),
+            )
+        finally:
+            conn.close()
+
+    def _get(self, queue: str, timeout: float | None = None) -> Dict[str, Any]:
+        now = time.time()
+        conn = _connect(self.database)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload, deliveries FROM celery_messages "
+                "WHERE queue = ? AND (reserved_until IS NULL OR reserved_until <= ?) ORDER BY id LIMIT 1",
+                (queue, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                raise Empty()
+            if queue in self._no_ack_queues:
+                conn.execute("DELETE FROM celery_messages WHERE id = ?", (row["id"],))
+            else:
+                conn.execute(
+                    "UPDATE celery_messages SET reserved_until = ?, deliveries = deliveries + 1 WHERE id = ?",
+                    (now + self.visibility_timeout, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        payload = json.loads(row["payload"])
+        # The row id is the delivery tag, so acks and rejects address exactly this row
+        payload["properties"]["delivery_tag"] = row["id"]
+        if row["deliveries"]:
+            payload["redelivered"] = True
+            payload["properties"].setdefault("delivery_info", {})["redelivered"] = True
+        return payload
+
+    def _size(self, queue: str) -> int:
+        conn = _connect(self.database)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM celery_messages WHERE queue = ?", (queue,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def _purge(self, queue: str) -> int:
+        conn = _connect(self.database)
+        try:
+            cursor = conn.execute(
+                "DELETE FROM celery_messages WHERE queue = ? AND (reserved_until IS NULL OR reserved_until <= ?)",
+                (queue, time.time()),
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def _delete(self, queue: str, *args: Any, **kwargs: Any) -> None:
+        conn = _connect(self.database)
+        try:
+            conn.execute("DELETE FROM celery_messages WHERE queue = ?", (queue,))
+        finally:
+            conn.close()
+
+    def _delete_messages(self, tags: Iterable[int]) -> None:
+        self._update_rows("DELETE FROM celery_messages WHERE id IN ({ids})", (), tags)
+
+    def _release_messages(self, tags: Iterable[int]) -> None:
+        self._update_rows("UPDATE celery_messages SET reserved_until = NULL WHERE id IN ({ids})", (), tags)
+
+    def _update_rows(self, statement: str, params: tuple, tags: Iterable[int]) -> None:
+        tags = [int(tag) for tag in tags]
+        if not tags:
+            return
+        conn = _connect(self.database)
+        try:
+            conn.execute(statement.format(ids=", ".join("?" for _ in tags)), (*params, *tags))
+        finally:
+            conn.close()
+
+    # -- consumption --------------------------------------------------------
+
+    def basic_consume(self, queue, no_ack, *args, **kwargs):
+        if no_ack:
+            self._no_ack_queues.add(queue)
+        return super().basic_consume(queue, no_ack, *args, **kwargs)
+
+    def basic_get(self, queue, no_ack=False, **kwargs):
+        if not no_ack:
+            return super().basic_get(queue, no_ack=False, **kwargs)
+        # A no-ack read still leases the row first, then deletes it straight away
+        message = super().basic_get(queue, no_ack=False, **kwargs)
+        if message is not None:
+            self.qos.ack(message.delivery_tag)
+        return message
+
+    def _renew_leases(self) -> None:
+        interval = max(1.0, self.visibility_timeout / 3)
+        while not self._stop_renewal.wait(interval):
+            tags = self.qos.unacked_tags() if self._qos is not None else set()
+            if not tags:
+                continue
+            try:
+                self._update_rows(
+                    "UPDATE celery_messages SET reserved_until = ? WHERE id IN ({ids})",
+                    (time.time() + self.visibility_timeout,),
+                    tags,
+                )
+            except sqlite3.Error:
+                continue
+
+    def close(self) -> None:
+        self._stop_renewal.set()
+        super().close()
+
+
+class Transport(virtual.Transport):
+    """SQLite transport: ``sqlite://`` with ``database`` and ``visibility_timeout`` transport options."""
+
+    implements = virtual.Transport.implements.extend(
+        asynchronous=False,
+        exchange_type=frozenset(["direct", "topic"]),
+    )
+
+    Channel = Channel
+    # Bindings are shared by every connection in the process.
+    global_state = virtual.BrokerState()
+    default_port = 0
+    driver_type = "sqlite"
+    driver_name = "sqlite3"
+    connection_errors = virtual.Transport.connection_errors + (sqlite3.OperationalError,)
+    channel_errors = virtual.Transport.channel_errors + (sqlite3.DatabaseError,)
+
+    def __init__(self, client, **kwargs):
+        super().__init__(client, **kwargs)
+        self.state = self.global_state
+
+    def driver_version(self) -> str:
+        return sqlite3.sqlite_version
+
+
+TRANSPORT_ALIASES.setdefault("sqlite", "app.sqlite_broker:Transport")
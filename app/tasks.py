@@ -7,25 +7,28 @@ import subprocess
 import sys
 import threading
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
 from celery import Task
 
 from .celery_app import celery_app
-from . import job_store
+from . import job_store, recorder_registry
 from .api.events import recorder_events
 from .ingest import ingest_document, ingest_jira, ingest_web_site
+from .recorder_control import stop_recorder_process
+from .recorder_supervisor import RecorderCapacityError, recording_supervisor
 from .vector_db import VectorDBClient
 
 RECORDINGS_DIR = Path(os.getenv("RECORDER_OUTPUT_DIR", "recordings")).resolve()
+# How long a recorder may take to drain and finalize after a control-channel stop
+GRACEFUL_STOP_TIMEOUT = float(os.getenv("RECORDER_GRACEFUL_STOP_TIMEOUT", "30"))
 
 
+# Popen handles for recorders launched by this process. Everything else (pid, job,
+# session dir, stop requests) lives in recorder_registry so other processes see it.
 _RECORDER_LOCK = threading.RLock()
 _RECORDER_PROCESSES: Dict[str, subprocess.Popen[str]] = {}
-_RECORDER_SESSION_JOBS: Dict[str, str] = {}
-_RECORDER_SESSION_DIRS: Dict[str, Path] = {}
-_RECORDER_STOP_REQUESTS: Set[str] = set()
 
 
 def _env_flag(name: str, default: str = "0") -> bool:
@@ -56,41 +59,52 @@ def _ensure_unique_session_dir(output_root: Path, session_id: str) -> Path:
     return session_dir
 
 
-def _store_recorder_session(session_id: str, job_id: str, session_dir: Path, process: subprocess.Popen[str]) -> None:
+def _store_recorder_session(
+    session_id: str,
+    job_id: Optional[str],
+    session_dir: Path,
+    process: subprocess.Popen[str],
+) -> None:
     with _RECORDER_LOCK:
-        _RECORDER_SESSION_JOBS[session_id] = job_id
-        _RECORDER_SESSION_DIRS[session_id] = session_dir
         _RECORDER_PROCESSES[session_id] = process
+    recorder_registry.register_process(
+        session_id,
+        getattr(process, "pid", None),
+        launcher="celery",
+        session_dir=session_dir,
+        job_id=job_id,
+    )
 
 
-def _release_recorder_session(session_id: str) -> None:
+def _release_recorder_session(session_id: str, returncode: Optional[int] = None) -> None:
     with _RECORDER_LOCK:
-        _RECORDER_SESSION_JOBS.pop(session_id, None)
-        _RECORDER_SESSION_DIRS.pop(session_id, None)
         _RECORDER_PROCESSES.pop(session_id, None)
-        _RECORDER_STOP_REQUESTS.discard(session_id)
+    recorder_registry.mark_exited(session_id, returncode)
 
 
 def _mark_stop_requested(session_id: str) -> None:
-    with _RECORDER_LOCK:
-        _RECORDER_STOP_REQUESTS.add(session_id)
+    recorder_registry.mark_stop_requested(session_id)
 
 
 def _consume_stop_request(session_id: str) -> bool:
-    with _RECORDER_LOCK:
-        if session_id in _RECORDER_STOP_REQUESTS:
-            _RECORDER_STOP_REQUESTS.remove(session_id)
-            return True
-        return False
+    return recorder_registry.consume_stop_request(session_id)
 
 
-def _get_recorder_runtime(session_id: str) -> Tuple[Optional[subprocess.Popen[str]], Optional[str], Optional[Path]]:
+def _get_recorder_runtime(session_id: str) -> Tuple[Optional[Any], Optional[str], Optional[Path]]:
+    """Process handle, launch job id and session dir for ``session_id``.
+
+    Prefers the ``Popen`` held by this process; recorders launched elsewhere (another
+    worker, or before a restart) get a ``ProcessHandle`` from the registry.
+    """
     with _RECORDER_LOCK:
-        return (
-            _RECORDER_PROCESSES.get(session_id),
-            _RECORDER_SESSION_JOBS.get(session_id),
-            _RECORDER_SESSION_DIRS.get(session_id),
-        )
+        process: Optional[Any] = _RECORDER_PROCESSES.get(session_id)
+    record = recorder_registry.get_process(session_id)
+    if record is None:
+        return process, None, None
+    if process is None and recorder_registry.is_running(record):
+        process = recorder_registry.process_handle(record)
+    session_dir = Path(record["session_dir"]) if record.get("session_dir") else None
+    return process, record.get("job_id"), session_dir
 
 
 def _build_recorder_command(
@@ -164,24 +178,44 @@ def _run_recorder_subprocess(
         repo_root = Path(__file__).resolve().parent.parent
     except Exception:
         repo_root = Path.cwd()
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        cwd=str(repo_root),
-    )
+    popen_kwargs: Dict[str, Any] = {
+        "stdout": subprocess.PIPE,
+        "stderr": subprocess.PIPE,
+        "text": True,
+        "cwd": str(repo_root),
+    }
     if session_id:
-        if job_id:
-            _store_recorder_session(session_id, job_id, session_dir, process)
-        else:
-            with _RECORDER_LOCK:
-                _RECORDER_PROCESSES[session_id] = process
-                _RECORDER_SESSION_DIRS.setdefault(session_id, session_dir)
+        # Admission control, resource ceilings and registry entry
+        process = recording_supervisor.launch(
+            session_id, cmd, launcher="celery", session_dir=session_dir, job_id=job_id, **popen_kwargs
+        )
+        with _RECORDER_LOCK:
+            _RECORDER_PROCESSES[session_id] = process
+    else:
+        process = subprocess.Popen(cmd, **popen_kwargs)
     stdout, stderr = process.communicate()
+    if session_id:
+        recorder_registry.mark_exited(session_id, process.returncode)
     return process.returncode, (stdout or "").strip(), (stderr or "").strip()
 
 
+def _follow_recorder_process(session_id: str, process: recorder_registry.ProcessHandle) -> Tuple[int, str, str]:
+    """Wait for a recorder started by an earlier delivery of the launch task (its output is not ours to read)."""
+    with _RECORDER_LOCK:
+        _RECORDER_PROCESSES[session_id] = process  # type: ignore[assignment]
+    returncode = process.wait()
+    recorder_registry.mark_exited(session_id, returncode)
+    return returncode, "", ""
+
+
+def _report_progress(job_id: str, stage: str, percent: Optional[float] = None, **details: Any) -> None:
+    """Best-effort progress snapshot; streamed to /api/jobs/{job_id}/events subscribers."""
+    try:
+        job_store.update_job_progress(job_id, {"stage": stage, "percent": percent, **details})
+    except Exception:  # noqa: BLE001 - progress must never fail the task
+        pass
+
+
 class JobTask(Task):
     abstract = True
 
@@ -200,40 +234,62 @@ class JobTask(Task):
 @celery_app.task(base=JobTask, bind=True)
 def launch_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     job_store.update_job(job_id, "running")
+    _report_progress(job_id, "launching", 0.0)
     session_id = payload["sessionId"]
     output_root = _prepare_output_root()
     options = payload.get("options") or {}
 
-    recorder_events.publish_from_thread(
-        session_id,
-        {
-            "type": "launch-requested",
-            "message": f"Recorder session '{session_id}' launch queued.",
-            "options": options,
-        },
-    )
+    # A redelivered launch (the worker died mid-recording) follows the recorder that is
+    # still running for this session instead of starting a second browser.
+    existing = recorder_registry.get_process(session_id)
+    adopted = recorder_registry.process_handle(existing) if recorder_registry.is_running(existing) else None
+    if adopted is not None:
+        cmd: List[str] = []
+        session_dir = Path(existing["session_dir"]) if existing.get("session_dir") else output_root / session_id
+        recorder_events.publish_from_thread(
+            session_id,
+            {
+                "type": "launch-resumed",
+                "message": f"Recorder session '{session_id}' is already running; following it.",
+                "sessionDir": str(session_dir),
+            },
+        )
+    else:
+        recorder_events.publish_from_thread(
+            session_id,
+            {
+                "type": "launch-requested",
+                "message": f"Recorder session '{session_id}' launch queued.",
+                "options": options,
+            },
+        )
 
-    cmd, session_dir = _build_recorder_command(session_id, payload, options, output_root)
-    recorder_events.publish_from_thread(
-        session_id,
-        {
-            "type": "launch-started",
-            "message": "Recorder process starting.",
-            "sessionDir": str(session_dir),
-            "command": cmd,
-        },
-    )
+        cmd, session_dir = _build_recorder_command(session_id, payload, options, output_root)
+        recorder_events.publish_from_thread(
+            session_id,
+            {
+                "type": "launch-started",
+                "message": "Recorder process starting.",
+                "sessionDir": str(session_dir),
+                "command": cmd,
+            },
+        )
 
     stdout = ""
     stderr = ""
     stop_requested = False
+    # Recording lasts until the user stops it, so this stage has no percentage
+    _report_progress(job_id, "recording", sessionId=session_id)
     try:
-        returncode, stdout, stderr = _run_recorder_subprocess(
-            cmd,
-            session_dir,
-            session_id=session_id,
-            job_id=job_id,
-        )
+        if adopted is not None:
+            returncode, stdout, stderr = _follow_recorder_process(session_id, adopted)
+        else:
+            returncode, stdout, stderr = _run_recorder_subprocess(
+                cmd,
+                session_dir,
+                session_id=session_id,
+                job_id=job_id,
+            )
         stop_requested = _consume_stop_request(session_id)
         summary_payload = {
             "sessionDir": str(session_dir),
@@ -247,7 +303,11 @@ def launch_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) ->
         # Auto-finalize and ingest on completion (or after stop)
         try:
             from .services.refined_flow_service import finalize_recorder_session as _finalize
-            result_obj = _finalize(session_dir)
+            result_obj = _finalize(
+                session_dir,
+                job_id=job_id,
+                on_event=lambda event: recorder_events.publish_from_thread(session_id, event),
+            )
             auto_finalize_result = result_obj.to_dict()
             recorder_events.publish_from_thread(
                 session_id,
@@ -301,6 +361,17 @@ def launch_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) ->
             "status": "completed",
             "autoFinalize": auto_finalize_result,
         }
+    except RecorderCapacityError as exc:
+        recorder_events.publish_from_thread(
+            session_id,
+            {
+                "type": "launch-rejected",
+                "message": str(exc),
+                "level": "error",
+                "sessionDir": str(session_dir),
+            },
+        )
+        raise
     except subprocess.CalledProcessError as exc:
         recorder_events.publish_from_thread(
             session_id,
@@ -321,6 +392,7 @@ def launch_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) ->
 def stop_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     job_store.update_job(job_id, "running")
     session_id = payload["sessionId"]
+    _report_progress(job_id, "stopping", 0.0, sessionId=session_id)
     recorder_events.publish_from_thread(
         session_id,
         {"type": "stop-requested", "message": f"Stop requested for session '{session_id}'."},
@@ -350,17 +422,13 @@ def stop_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) -> Di
         return {"sessionId": session_id, "status": "already-finished"}
 
     try:
-        process.terminate()
-        try:
-            process.wait(timeout=10)
-        except subprocess.TimeoutExpired:
-            process.kill()
-            process.wait(timeout=5)
+        graceful = stop_recorder_process(session_dir, process, exit_timeout=GRACEFUL_STOP_TIMEOUT)
         recorder_events.publish_from_thread(
             session_id,
             {
                 "type": "stop-completed",
-                "message": "Recorder process terminated.",
+                "message": "Recorder stopped gracefully." if graceful else "Recorder process terminated.",
+                "graceful": graceful,
                 "sessionDir": str(session_dir) if session_dir else None,
             },
         )
@@ -369,7 +437,11 @@ def stop_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) -> Di
         try:
             if session_dir and session_dir.exists():
                 from .services.refined_flow_service import finalize_recorder_session as _finalize
-                result_obj = _finalize(session_dir)
+                result_obj = _finalize(
+                    session_dir,
+                    job_id=job_id,
+                    on_event=lambda event: recorder_events.publish_from_thread(session_id, event),
+                )
                 auto_finalize_result = result_obj.to_dict()
                 recorder_events.publish_from_thread(
                     session_id,
@@ -397,6 +469,7 @@ def stop_recorder_session_task(self, job_id: str, payload: Dict[str, Any]) -> Di
 @celery_app.task(base=JobTask, bind=True)
 def ingest_jira_task(self, job_id: str, jql: str) -> Dict[str, Any]:
     job_store.update_job(job_id, "running")
+    _report_progress(job_id, "ingesting")
     results = ingest_jira(jql)
     return {"ingested": len(results)}
 
@@ -404,6 +477,7 @@ def ingest_jira_task(self, job_id: str, jql: str) -> Dict[str, Any]:
 @celery_app.task(base=JobTask, bind=True)
 def ingest_website_task(self, job_id: str, url: str, max_depth: int) -> Dict[str, Any]:
     job_store.update_job(job_id, "running")
+    _report_progress(job_id, "crawling")
     results = ingest_web_site(url, max_depth)
     return {"ingested": len(results)}
 
@@ -412,7 +486,11 @@ def ingest_website_task(self, job_id: str, url: str, max_depth: int) -> Dict[str
 def ingest_documents_task(self, job_id: str, paths: List[str]) -> Dict[str, Any]:
     job_store.update_job(job_id, "running")
     count = 0
+    total = len(paths)
     for file_path in paths:
+        _report_progress(
+            job_id, "ingesting", round(100.0 * count / total, 1), current=Path(file_path).name, done=count, total=total
+        )
         ingest_document(file_path)
         count += 1
     return {"ingested": count}
@@ -421,6 +499,7 @@ def ingest_documents_task(self, job_id: str, paths: List[str]) -> Dict[str, Any]
 @celery_app.task(base=JobTask, bind=True)
 def vector_delete_by_id_task(self, job_id: str, doc_id: str) -> Dict[str, Any]:
     job_store.update_job(job_id, "running")
+    _report_progress(job_id, "deleting")
     client = VectorDBClient()
     client.delete_document(doc_id)
     return {"deleted": doc_id}
@@ -429,6 +508,7 @@ def vector_delete_by_id_task(self, job_id: str, doc_id: str) -> Dict[str, Any]:
 @celery_app.task(base=JobTask, bind=True)
 def vector_delete_by_source_task(self, job_id: str, source: str) -> Dict[str, Any]:
     job_store.update_job(job_id, "running")
+    _report_progress(job_id, "deleting")
     client = VectorDBClient()
     client.delete_by_source(source)
     return {"deletedSource": source}
@@ -1,12 +1,22 @@
+import hashlib
 import io
+import os
+import threading
 import zipfile
 import xml.etree.ElementTree as ET
-from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 from openpyxl import load_workbook
 
 
+# Distinct parsed templates kept, and the total bytes their DataFrames may hold.
+# 0 disables the respective bound.
+TEMPLATE_CACHE_MAX_ENTRIES = int(os.getenv("TEMPLATE_CACHE_MAX_ENTRIES", "32"))
+TEMPLATE_CACHE_MAX_BYTES = int(os.getenv("TEMPLATE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
 XL_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
 _SANITIZE_TAGS = (
     f"{XL_NS}autoFilter",
@@ -85,31 +95,123 @@ def _read_excel_with_openpyxl(data: bytes) -> pd.DataFrame:
     return pd.DataFrame(data_rows, columns=header)
 
 
-def load_excel_template(uploaded_file, dtype: Optional[type] = None) -> pd.DataFrame:
-    """
-    Load an uploaded Excel template into a DataFrame while stripping Excel artefacts
-    that can introduce invalid regular expressions (e.g., custom filters).
+def _parse_template(raw_bytes: bytes, cleaned_bytes: bytes, dtype: Optional[type]) -> pd.DataFrame:
+    read_kwargs = {"dtype": dtype} if dtype else {}
+    try:
+        return _read_excel_from_bytes(cleaned_bytes, **read_kwargs)
+    except Exception:
+        try:
+            return _read_excel_from_bytes(raw_bytes, **read_kwargs)
+        except Exception:
+            return _read_excel_with_openpyxl(cleaned_bytes)
+
+
+@dataclass
+class CachedTemplate:
+    digest: str
+    size: int
+    _frame: pd.DataFrame
+
+    def frame(self) -> pd.DataFrame:
+        """A private copy of the parsed template; callers may mutate it."""
+        return self._frame.copy()
+
+
+class TemplateCache:
+    """LRU of parsed templates keyed by the SHA-256 of the uploaded bytes.
+
+    Re-uploading the same workbook skips the zip rewrite and ``read_excel``; both
+    only run once per distinct template (and dtype). Entries are evicted least
+    recently used first once either bound is exceeded; a template larger than
+    ``max_bytes`` on its own is returned but not kept.
     """
+
+    def __init__(self, max_entries: int = TEMPLATE_CACHE_MAX_ENTRIES, max_bytes: int = TEMPLATE_CACHE_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], CachedTemplate]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def load(self, raw_bytes: bytes, dtype: Optional[type] = None) -> CachedTemplate:
+        digest = hashlib.sha256(raw_bytes).hexdigest()
+        key = (digest, getattr(dtype, "__name__", str(dtype)) if dtype else "")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+            self._misses += 1
+
+        # Parse outside the lock; two concurrent misses on one template both parse and the last store wins.
+        cleaned_bytes = _sanitize_excel_bytes(raw_bytes)
+        df = _parse_template(raw_bytes, cleaned_bytes, dtype)
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        entry = CachedTemplate(digest, size, df)
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key: Tuple[str, str], entry: CachedTemplate) -> None:
+        if self.max_bytes and entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._entries and (
+                (self.max_entries and len(self._entries) > self.max_entries)
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+template_cache = TemplateCache()
+
+
+def _read_upload_bytes(uploaded_file) -> bytes:
     if uploaded_file is None:
         raise ValueError("No template file provided.")
-
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        return bytes(uploaded_file)
     # Streamlit's UploadedFile exposes getvalue(); fall back to read/seek for other-like objects.
     if hasattr(uploaded_file, "getvalue"):
-        raw_bytes = uploaded_file.getvalue()
-    else:
-        raw_bytes = uploaded_file.read()
-        if hasattr(uploaded_file, "seek"):
-            uploaded_file.seek(0)
+        return uploaded_file.getvalue()
+    raw_bytes = uploaded_file.read()
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    return raw_bytes
 
-    cleaned_bytes = _sanitize_excel_bytes(raw_bytes)
-    read_kwargs = {"dtype": dtype} if dtype else {}
 
-    try:
-        df = _read_excel_from_bytes(cleaned_bytes, **read_kwargs)
-    except Exception:
-        try:
-            df = _read_excel_from_bytes(raw_bytes, **read_kwargs)
-        except Exception:
-            df = _read_excel_with_openpyxl(cleaned_bytes)
+def load_excel_template(uploaded_file, dtype: Optional[type] = None) -> pd.DataFrame:
+    """
+    Load an uploaded Excel template into a DataFrame while stripping Excel artefacts
+    that can introduce invalid regular expressions (e.g., custom filters).
+
+    Accepts raw bytes or a file-like object. Sanitizing and parsing are cached per
+    distinct template content (see :class:`TemplateCache`).
+    """
+    return template_cache.load(_read_upload_bytes(uploaded_file), dtype).frame()
 
-    return df
@@ -3,7 +3,9 @@ import json
 import re
 import ast
 import copy
+import functools
 import logging
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
@@ -2950,55 +2952,126 @@ class TestCaseGenerator:
 
     #     return test_cases
     
+def _join_numbered(items: List[str]) -> str:
+    return "\n".join(f"{idx}. {str(value)}" for idx, value in enumerate(items, start=1) if str(value).strip())
+
+
+def _format_case_data(data_dict: dict) -> str:
+    if not data_dict:
+        return ""
+    lines = []
+    for key, value in data_dict.items():
+        formatted_value = value
+        if isinstance(value, (dict, list)):
+            formatted_value = json.dumps(value, ensure_ascii=False)
+        lines.append(f"{key}: {formatted_value}")
+    return "\n".join(lines)
+
+
+def _flatten_step_strings(case: dict) -> List[str]:
+    details = case.get("step_details") or []
+    if isinstance(details, list) and details and isinstance(details[0], dict):
+        strings = []
+        for d in details:
+            action = d.get("action", "")
+            navigation = d.get("navigation", "")
+            combined = " - ".join([p for p in [action, navigation] if p]).strip(" -") or navigation or action
+            if d.get("data"):
+                combined = f"{combined} | Data: {d['data']}" if combined else f"Data: {d['data']}"
+            if d.get("expected"):
+                combined = f"{combined} | Expected: {d['expected']}" if combined else f"Expected: {d['expected']}"
+            if combined:
+                strings.append(combined)
+        return strings
+    # Fallback: use plain steps if present
+    steps = case.get("steps") or []
+    return [str(s) for s in steps] if isinstance(steps, list) else [str(steps)]
+
+
+# Case field rendered into a generic template column, keyed by the name _generic_template_field returns.
+_GENERIC_FIELD_VALUES = {
+    "id": lambda case: case.get("id", ""),
+    "title": lambda case: case.get("title", ""),
+    "type": lambda case: case.get("type", ""),
+    "preconditions": lambda case: _join_numbered(case.get("preconditions", []) or []),
+    "steps": lambda case: _join_numbered(_flatten_step_strings(case)),
+    "expected": lambda case: case.get("expected", ""),
+    "data": lambda case: _format_case_data(case.get("data", {}) or {}),
+    "priority": lambda case: case.get("priority", ""),
+    "tags": lambda case: ", ".join(case.get("tags", []) or []),
+    "assumptions": lambda case: "\n".join(case.get("assumptions", []) or []),
+}
+
+DETAILED_FLOW_COLUMNS = ("sl", "action", "navigation steps", "key data element examples", "expected results")
+
+
+def _generic_template_field(norm: str) -> str:
+    """Case field for a normalized template column name ("" leaves the column blank)."""
+    if "id" in norm and "grid" not in norm:
+        return "id"
+    if any(k in norm for k in ["title", "scenario", "objective"]):
+        return "title"
+    if "type" in norm or "case type" in norm:
+        return "type"
+    if any(k in norm for k in ["precondition", "prerequisite"]):
+        return "preconditions"
+    if "step" in norm:
+        return "steps"
+    if any(k in norm for k in ["expected", "result"]):
+        return "expected"
+    if "data" in norm:
+        return "data"
+    if "priority" in norm:
+        return "priority"
+    if "tag" in norm:
+        return "tags"
+    if any(k in norm for k in ["assumption", "note"]):
+        return "assumptions"
+    return ""
+
+
+@dataclass(frozen=True)
+class TemplateMappingPlan:
+    """How each template column is filled, compiled once per column layout.
+
+    ``fields`` holds the case field per column for generic templates;
+    ``detailed_columns`` the (sl, action, navigation, data, expected) column
+    labels when the template is the detailed-flow sheet.
+    """
+
+    columns: Tuple
+    fields: Tuple[str, ...]
+    detailed_columns: Optional[Tuple] = None
+
+
+@functools.lru_cache(maxsize=256)
+def compile_template_plan(columns: Tuple) -> TemplateMappingPlan:
+    normalized_columns = [str(c).strip().lower() for c in columns]
+    if set(DETAILED_FLOW_COLUMNS).issubset(normalized_columns):
+        column_map = {norm: original for norm, original in zip(normalized_columns, columns)}
+        return TemplateMappingPlan(columns, (), tuple(column_map[name] for name in DETAILED_FLOW_COLUMNS))
+    return TemplateMappingPlan(columns, tuple(_generic_template_field(norm) for norm in normalized_columns))
+
+
+def _frame_from_columns(columns: Tuple, values: List[list]) -> pd.DataFrame:
+    # Built positionally so duplicate template labels keep their own column.
+    df = pd.DataFrame(dict(enumerate(values)))
+    df.columns = list(columns)
+    return df
+
+
 def map_llm_to_template(llm_output, template_df):
     """Map LLM output into the structure of the uploaded Excel template.
     - If the template looks like the detailed-flow sheet (SL/Action/Navigation Steps/Key Data Element Examples/Expected Results),
       delegate to the detailed mapper to emit one row per manual step.
     - Otherwise, populate generic columns (ID/Title/Type/Preconditions/Steps/Data/Expected/Priority/Tags/Assumptions) as available.
+
+    Column matching is compiled once per template layout (:func:`compile_template_plan`);
+    each case field is then rendered once per case and assembled column-wise.
     """
     # Columns from the uploaded template
-    columns = list(template_df.columns) if hasattr(template_df, "columns") else []
-    normalized_columns = [str(c).strip().lower() for c in columns]
-
-    # Detailed-flow template detection
-    required = {"sl", "action", "navigation steps", "key data element examples", "expected results"}
-    if required.issubset(set(normalized_columns)):
-        return _map_to_detailed_flow_template(llm_output, template_df, columns, normalized_columns)
+    columns = tuple(template_df.columns) if hasattr(template_df, "columns") else ()
 
-    def join_numbered(items: List[str]) -> str:
-        return "\n".join(f"{idx}. {str(value)}" for idx, value in enumerate(items, start=1) if str(value).strip())
-
-    def format_dict(data_dict: dict) -> str:
-        if not data_dict:
-            return ""
-        lines = []
-        for key, value in data_dict.items():
-            formatted_value = value
-            if isinstance(value, (dict, list)):
-                formatted_value = json.dumps(value, ensure_ascii=False)
-            lines.append(f"{key}: {formatted_value}")
-        return "\n".join(lines)
-
-    def flatten_step_strings(case: dict) -> List[str]:
-        details = case.get("step_details") or []
-        if isinstance(details, list) and details and isinstance(details[0], dict):
-            strings = []
-            for d in details:
-                action = d.get("action", "")
-                navigation = d.get("navigation", "")
-                combined = " - ".join([p for p in [action, navigation] if p]).strip(" -") or navigation or action
-                if d.get("data"):
-                    combined = f"{combined} | Data: {d['data']}" if combined else f"Data: {d['data']}"
-                if d.get("expected"):
-                    combined = f"{combined} | Expected: {d['expected']}" if combined else f"Expected: {d['expected']}"
-                if combined:
-                    strings.append(combined)
-            return strings
-        # Fallback: use plain steps if present
-        steps = case.get("steps") or []
-        return [str(s) for s in steps] if isinstance(steps, list) else [str(steps)]
-
-    rows: List[dict] = []
     if not columns:
         # No template columns; fall back to a default structure
         default_rows = [
@@ -3006,9 +3079,9 @@ def map_llm_to_template(llm_output, template_df):
                 "ID": case.get("id", ""),
                 "Title": case.get("title", ""),
                 "Type": case.get("type", ""),
-                "Preconditions": join_numbered(case.get("preconditions", [])),
-                "Steps": join_numbered(flatten_step_strings(case)),
-                "Data": format_dict(case.get("data", {})),
+                "Preconditions": _join_numbered(case.get("preconditions", [])),
+                "Steps": _join_numbered(_flatten_step_strings(case)),
+                "Data": _format_case_data(case.get("data", {})),
                 "Expected": case.get("expected", ""),
                 "Priority": case.get("priority", ""),
                 "Tags": ", ".join(case.get("tags", []) or []),
@@ -3016,38 +3089,24 @@ def map_llm_to_template(llm_output, template_df):
             }
             for case in llm_output
         ]
-        columns = list(default_rows[0].keys()) if default_rows else []
-        return pd.DataFrame(default_rows, columns=columns)
-
-    # Generic mapping into provided template columns
-    for case in llm_output:
-        row = {}
-        for col, norm in zip(columns, normalized_columns):
-            if "id" in norm and "grid" not in norm:
-                row[col] = case.get("id", "")
-            elif any(k in norm for k in ["title", "scenario", "objective"]):
-                row[col] = case.get("title", "")
-            elif "type" in norm or "case type" in norm:
-                row[col] = case.get("type", "")
-            elif any(k in norm for k in ["precondition", "prerequisite"]):
-                row[col] = join_numbered(case.get("preconditions", []) or [])
-            elif "step" in norm:
-                row[col] = join_numbered(flatten_step_strings(case))
-            elif any(k in norm for k in ["expected", "result"]):
-                row[col] = case.get("expected", "")
-            elif "data" in norm:
-                row[col] = format_dict(case.get("data", {}) or {})
-            elif "priority" in norm:
-                row[col] = case.get("priority", "")
-            elif "tag" in norm:
-                row[col] = ", ".join(case.get("tags", []) or [])
-            elif any(k in norm for k in ["assumption", "note"]):
-                row[col] = "\n".join(case.get("assumptions", []) or [])
-            else:
-                row[col] = ""
-        rows.append(row)
-
-    return pd.DataFrame(rows, columns=columns)
+        default_columns = list(default_rows[0].keys()) if default_rows else []
+        return pd.DataFrame(default_rows, columns=default_columns)
+
+    plan = compile_template_plan(columns)
+    if plan.detailed_columns is not None:
+        return _map_to_detailed_flow_template(llm_output, template_df, plan)
+
+    # Generic mapping: render every referenced field once per case, then assemble by column
+    cases = list(llm_output)
+    if not cases:
+        return pd.DataFrame([], columns=list(columns))
+    rendered = {
+        field: [_GENERIC_FIELD_VALUES[field](case) for case in cases]
+        for field in set(plan.fields)
+        if field
+    }
+    blank = [""] * len(cases)
+    return _frame_from_columns(columns, [rendered[field] if field else blank for field in plan.fields])
 
 
 def _derive_manual_action(detail: dict, default_action: str, previous_action: str) -> str:
@@ -3066,65 +3125,75 @@ def _derive_manual_action(detail: dict, default_action: str, previous_action: st
     return previous_action or default_action
 
 
-def _map_to_detailed_flow_template(llm_output, template_df, columns, normalized_columns):
-    df_columns = list(columns)
-    column_map = {norm: original for norm, original in zip(normalized_columns, df_columns)}
+_EXPECTED_KEYWORDS = (
+    "expected", "displayed", "visible", "shown", "saved", "success",
+    "error", "warning", "message", "confirmation", "appears",
+    "opens", "launched", "result", "validated"
+)
 
-    sl_col = column_map["sl"]
-    action_col = column_map["action"]
-    nav_col = column_map["navigation steps"]
-    data_col = column_map["key data element examples"]
-    expected_col = column_map["expected results"]
 
-    expected_keywords = [
-        "expected", "displayed", "visible", "shown", "saved", "success",
-        "error", "warning", "message", "confirmation", "appears",
-        "opens", "launched", "result", "validated"
+def _has_expected_text(text: str) -> bool:
+    lower = text.lower()
+    return any(keyword in lower for keyword in _EXPECTED_KEYWORDS) or "should" in lower or lower.startswith("expected")
+
+
+def _manual_step_details(case: dict) -> List[dict]:
+    raw_details = case.get("step_details")
+    if raw_details and isinstance(raw_details, list) and isinstance(raw_details[0], dict):
+        details_iterable = raw_details
+    else:
+        raw_steps = case.get("steps", [])
+        if isinstance(raw_steps, str):
+            raw_steps = [s.strip() for s in raw_steps.split("\n") if s.strip()]
+        details_iterable = [{"action": "", "navigation": str(step), "data": "", "expected": ""} for step in raw_steps]
+    return [
+        detail for detail in details_iterable
+        if detail and (detail.get("navigation") or detail.get("data") or detail.get("expected") or detail.get("action"))
     ]
 
-    rows = []
+
+def _map_to_detailed_flow_template(llm_output, template_df, plan: TemplateMappingPlan):
+    """Emit the detailed-flow sheet: a title row, one row per manual step, then End of Task.
+
+    A step that repeats the previous action is folded into the row above it
+    (its texts appended with an ``<SL>. `` prefix) and title rows take the next
+    SL number. Both happen while the rows are produced, straight into column
+    lists, rather than in follow-up passes over per-row dicts.
+    """
+    sl_values: List = []
+    actions: List[str] = []
+    navigations: List[str] = []
+    data_values: List[str] = []
+    expectations: List[str] = []
+    # SL of the last emitted row; title rows continue from it
+    current_sl = 0
     sl_counter = 1
-    last_action_written = None
 
-    def normalise_expected(text: str) -> str:
-        text = text.strip()
-        if not text:
-            return ""
-        return text
+    def emit(sl, action: str, navigation: str = "", data: str = "", expected: str = "") -> None:
+        nonlocal current_sl
+        sl_values.append(sl)
+        actions.append(action)
+        navigations.append(navigation)
+        data_values.append(data)
+        expectations.append(expected)
+        current_sl = sl
 
-    def has_expected_text(text: str) -> bool:
-        lower = text.lower()
-        return any(keyword in lower for keyword in expected_keywords) or "should" in lower or lower.startswith("expected")
+    def append_to_last(column: List[str], prefix: int, text: str) -> None:
+        value = f"{prefix}. {text}"
+        existing = column[-1].strip()
+        column[-1] = f"{existing}\n{value}" if existing else value
 
     for case in llm_output:
-        raw_details = case.get("step_details")
-        if raw_details and isinstance(raw_details, list) and raw_details and isinstance(raw_details[0], dict):
-            details_iterable = raw_details
-        else:
-            raw_steps = case.get("steps", [])
-            if isinstance(raw_steps, str):
-                raw_steps = [s.strip() for s in raw_steps.split("\n") if s.strip()]
-            details_iterable = [{"action": "", "navigation": str(step), "data": "", "expected": ""} for step in raw_steps]
-
-        details_iterable = [
-            detail for detail in details_iterable
-            if detail and (detail.get("navigation") or detail.get("data") or detail.get("expected") or detail.get("action"))
-        ]
+        details_iterable = _manual_step_details(case)
         if not details_iterable:
             continue
 
         case_title = str(case.get("title") or "").strip() or "Scenario"
-        rows.append({
-            sl_col: "",
-            action_col: case_title,
-            nav_col: "",
-            data_col: "",
-            expected_col: "",
-        })
+        emit(current_sl + 1, case_title)
 
         default_action = case_title
         previous_action = ""
-        case_expected = normalise_expected(case.get("expected", ""))
+        case_expected = str(case.get("expected") or "").strip()
         last_action_written = None
 
         # Do not insert a Title row; start directly with actionable steps
@@ -3133,110 +3202,46 @@ def _map_to_detailed_flow_template(llm_output, template_df, columns, normalized_
             action_value = _derive_manual_action(detail, default_action, previous_action)
             navigation_value = str(detail.get("navigation", "")).strip()
             data_value = str(detail.get("data", "")).strip()
-            expected_value = normalise_expected(str(detail.get("expected", "")).strip())
-
-            if not navigation_value and has_expected_text(expected_value):
-                navigation_value = ""
+            expected_value = str(detail.get("expected", "")).strip()
 
-            if not expected_value and has_expected_text(navigation_value):
+            if not expected_value and _has_expected_text(navigation_value):
                 expected_value = navigation_value
                 navigation_value = ""
 
-            display_action = action_value
             if last_action_written is not None and action_value == last_action_written:
-                display_action = ""
+                # Same action as the row above: merge this step into it
+                if navigation_value:
+                    append_to_last(navigations, sl_counter, navigation_value)
+                if data_value:
+                    append_to_last(data_values, sl_counter, data_value)
+                if expected_value:
+                    append_to_last(expectations, sl_counter, expected_value)
             else:
                 last_action_written = action_value
-
-            rows.append({
-                sl_col: sl_counter,
-                action_col: display_action,
-                nav_col: navigation_value,
-                data_col: data_value,
-                expected_col: expected_value,
-            })
+                emit(sl_counter, action_value, navigation_value, data_value, expected_value)
 
             previous_action = action_value
             sl_counter += 1
 
         if case_expected:
-            rows.append({
-                sl_col: sl_counter,
-                action_col: previous_action or default_action,
-                nav_col: "",
-                data_col: "",
-                expected_col: case_expected,
-            })
+            emit(sl_counter, previous_action or default_action, expected=case_expected)
             sl_counter += 1
 
         # Append only 'End of Task' as the final line (no trailing Title)
-        rows.append({
-            sl_col: sl_counter,
-            action_col: "End of Task",
-            nav_col: "",
-            data_col: "",
-            expected_col: "",
-        })
+        emit(sl_counter, "End of Task")
         sl_counter += 1
 
-    if not rows:
+    if not sl_values:
         return template_df.copy()
 
-    def _append_field(accumulator: dict, column: str, new_value: str):
-        if not column:
-            return
-        value = str(new_value or "").strip()
-        if not value:
-            return
-        existing = str(accumulator.get(column) or "").strip()
-        if existing:
-            accumulator[column] = f"{existing}\n{value}"
-        else:
-            accumulator[column] = value
-
-    merged_rows: List[dict] = []
-    for row in rows:
-        action_value = str(row.get(action_col) or "").strip()
-        if action_value:
-            merged_rows.append(row)
-            continue
-        if not merged_rows:
-            merged_rows.append(row)
-            continue
-        target = merged_rows[-1]
-        prefix = str(row.get(sl_col) or "").strip()
-        nav_text = str(row.get(nav_col) or "").strip()
-        data_text = str(row.get(data_col) or "").strip()
-        expected_text = str(row.get(expected_col) or "").strip()
-
-        def _with_prefix(text: str) -> str:
-            stripped = text.strip()
-            if not stripped:
-                return stripped
-            return f"{prefix}. {stripped}" if prefix else stripped
-
-        if nav_text:
-            _append_field(target, nav_col, _with_prefix(nav_text))
-        if data_text:
-            _append_field(target, data_col, _with_prefix(data_text))
-        if expected_text:
-            _append_field(target, expected_col, _with_prefix(expected_text))
-
-    # Normalize SL column to keep sequential numbering after merges
-    current_sl = 0
-    for row in merged_rows:
-        if isinstance(row.get(sl_col), int):
-            current_sl = row[sl_col]
-        elif str(row.get(sl_col) or "").isdigit():
-            current_sl = int(row[sl_col])
-        else:
-            current_sl += 1
-            row[sl_col] = current_sl
-
-    return pd.DataFrame(merged_rows, columns=df_columns)
+    by_label = dict(zip(plan.detailed_columns, (sl_values, actions, navigations, data_values, expectations)))
+    missing = [float("nan")] * len(sl_values)
+    return _frame_from_columns(plan.columns, [by_label.get(column, missing) for column in plan.columns])
 
 
 def export_to_excel(mapped_df, output_path="generated_test_cases.xlsx"):
-    """Save the mapped DataFrame to an Excel file."""
-    mapped_df.to_excel(output_path, index=False)
+    """Save the mapped DataFrame to an Excel file (streamed, constant memory)."""
+    from .services.export_service import write_dataframe_xlsx
+
+    write_dataframe_xlsx(mapped_df, output_path, sheet_name="Sheet1")
     return output_path
@@ -0,0 +1,114 @@
+"""Trial-run duration history backed by SQLite.
+
+Each finished trial run records how long a spec took for a given ReferenceID.
+The sharding helpers in :mod:`app.parallel_data_resolver` use these estimates to
+balance data rows across parallel workers.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "hashstore.db")
+
+# Number of most recent runs averaged into an estimate.
+ESTIMATE_WINDOW = 5
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_trial_history() -> None:
+    conn = _connect()
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trial_durations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                spec TEXT NOT NULL,
+                reference_id TEXT NOT NULL,
+                duration REAL NOT NULL,
+                success INTEGER NOT NULL,
+                recorded_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_trial_durations_ref ON trial_durations (reference_id, spec)"
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _utc_iso() -> str:
+    return datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
+
+
+def record_trial_duration(spec: str, reference_id: str, duration: float, success: bool) -> None:
+    """Store one run's wall-clock duration (seconds) for ``spec`` and ``reference_id``."""
+    if duration is None or duration < 0:
+        return
+    init_trial_history()
+    conn = _connect()
+    try:
+        conn.execute(
+            """
+            INSERT INTO trial_durations (spec, reference_id, duration, success, recorded_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (spec or "", reference_id or "", float(duration), 1 if success else 0, _utc_iso()),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _recent_mean(conn: sqlite3.Connection, where: str, params: tuple) -> Optional[float]:
+    row = conn.execute(
+        f"""
+        SELECT AVG(duration) AS avg_duration FROM (
+            SELECT duration FROM trial_durations
+            WHERE {where}
+            ORDER BY id DESC
+            LIMIT ?
+        )
+        """,
+        (*params, ESTIMATE_WINDOW),
+    ).fetchone()
+    if not row or row["avg_duration"] is None:
+        return None
+    return float(row["avg_duration"])
+
+
+def estimate_durations(reference_ids: Iterable[str], spec: Optional[str] = None) -> Dict[str, float]:
+    """Return estimated seconds per ReferenceID; IDs with no history are omitted.
+
+    Runs of the same spec are preferred; otherwise the ReferenceID's history across
+    all specs is used, since the data row usually dominates the runtime.
+    """
+    ids = [r for r in dict.fromkeys(reference_ids) if r]
+    if not ids:
+        return {}
+    init_trial_history()
+    estimates: Dict[str, float] = {}
+    conn = _connect()
+    try:
+        for ref in ids:
+            value = None
+            if spec:
+                value = _recent_mean(conn, "reference_id = ? AND spec = ?", (ref, spec))
+            if value is None:
+                value = _recent_mean(conn, "reference_id = ?", (ref,))
+            if value is not None:
+                estimates[ref] = value
+    finally:
+        conn.close()
+    return estimates
+
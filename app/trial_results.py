@@ -0,0 +1,272 @@
+"""Structured Playwright result collection for trial runs.
+
+Trial runs ask Playwright for both the ``line`` reporter (streamed to stdout for
+humans) and the ``json`` reporter (written to a temp file via
+``PLAYWRIGHT_JSON_OUTPUT_NAME``). :class:`ResultCollector` keeps running totals
+from the line reporter as output arrives, then normalizes the JSON report into
+per-test :class:`TestResultRecord` rows once the run exits. Records are stored in
+SQLite so they can be queried after the run.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "hashstore.db")
+
+# Summary words printed by the line/list reporters, e.g. "  3 passed (4.1s)".
+_SUMMARY_WORDS = ("passed", "failed", "flaky", "skipped", "interrupted", "did not run")
+# Playwright's per-test outcome -> our normalized status.
+_OUTCOME_STATUS = {"expected": "passed", "unexpected": "failed", "flaky": "flaky", "skipped": "skipped"}
+
+
+@dataclass
+class TestResultRecord:
+    """One Playwright test's final outcome."""
+
+    __test__ = False  # not a pytest test class
+
+    title: str
+    file: str
+    line: int
+    project: str
+    status: str
+    duration_ms: int
+    retries: int
+    attachments: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def with_json_report(cmd: List[str], env: Dict[str, str]) -> Tuple[List[str], Dict[str, str], str]:
+    """Return ``cmd``/``env`` adjusted to also emit a JSON report, and the report path.
+
+    The ``--reporter=line`` argument becomes ``--reporter=line,json`` and the JSON
+    output is redirected to a temp file so stdout stays human-readable.
+    """
+    fd, report_path = tempfile.mkstemp(prefix="pw-report-", suffix=".json")
+    os.close(fd)
+    os.unlink(report_path)  # Playwright creates it; an empty file would look like a bad report
+    updated: List[str] = []
+    for arg in cmd:
+        if arg.startswith("--reporter=") and "json" not in arg:
+            arg = arg + ",json"
+        updated.append(arg)
+    if not any(a.startswith("--reporter=") for a in updated):
+        updated.append("--reporter=line,json")
+    new_env = dict(env)
+    new_env["PLAYWRIGHT_JSON_OUTPUT_NAME"] = report_path
+    new_env["PLAYWRIGHT_JSON_OUTPUT_FILE"] = report_path
+    return updated, new_env, report_path
+
+
+def _first_error(result: Dict[str, Any]) -> Optional[str]:
+    errors = result.get("errors") or ([result["error"]] if result.get("error") else [])
+    for err in errors:
+        message = (err or {}).get("message") or (err or {}).get("value")
+        if message:
+            return str(message)[:2000]
+    return None
+
+
+def _iter_specs(suite: Dict[str, Any], parents: Tuple[str, ...]) -> Iterable[Tuple[Tuple[str, ...], Dict[str, Any]]]:
+    title = suite.get("title") or ""
+    # File-level suites are titled with the file path; keep only describe() titles
+    path = parents + ((title,) if title and title != suite.get("file") else ())
+    for spec in suite.get("specs") or []:
+        yield path, spec
+    for child in suite.get("suites") or []:
+        yield from _iter_specs(child, path)
+
+
+def parse_json_report(report: Dict[str, Any]) -> List[TestResultRecord]:
+    """Flatten a Playwright JSON report into one record per test (per project)."""
+    records: List[TestResultRecord] = []
+    for top in report.get("suites") or []:
+        for path, spec in _iter_specs(top, ()):
+            for test in spec.get("tests") or []:
+                results = test.get("results") or []
+                final = results[-1] if results else {}
+                status = _OUTCOME_STATUS.get(test.get("status") or "")
+                if status is None:
+                    status = "passed" if final.get("status") == "passed" else (final.get("status") or "unknown")
+                attachments = [
+                    {k: a.get(k) for k in ("name", "contentType", "path") if a.get(k) is not None}
+                    for r in results
+                    for a in (r.get("attachments") or [])
+                ]
+                records.append(
+                    TestResultRecord(
+                        title=" › ".join(path + (spec.get("title") or "",)),
+                        file=spec.get("file") or top.get("file") or "",
+                        line=int(spec.get("line") or 0),
+                        project=test.get("projectName") or "",
+                        status=status,
+                        duration_ms=int(sum(int(r.get("duration") or 0) for r in results)),
+                        retries=max(0, len(results) - 1),
+                        attachments=attachments,
+                        error=next((e for e in (_first_error(r) for r in reversed(results)) if e), None),
+                    )
+                )
+    return records
+
+
+class ResultCollector:
+    """Accumulates a run's outcome from streamed reporter output and the JSON report."""
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+        self.records: List[TestResultRecord] = []
+
+    def feed_line(self, line: str) -> None:
+        """Consume one stdout line; only cheap prefix checks, no regex."""
+        stripped = line.strip()
+        if not stripped or not stripped[0].isdigit():
+            return
+        count, _, rest = stripped.partition(" ")
+        if not count.isdigit():
+            return
+        for word in _SUMMARY_WORDS:
+            if rest.startswith(word):
+                self.counts[word.replace(" ", "_")] = int(count)
+                return
+
+    def feed_text(self, text: str) -> None:
+        for line in text.splitlines():
+            self.feed_line(line)
+
+    def load_json_report(self, path: str | os.PathLike[str]) -> bool:
+        """Parse the JSON report at ``path`` (if Playwright wrote one) and remove it."""
+        report_file = Path(path)
+        try:
+            if not report_file.exists() or report_file.stat().st_size == 0:
+                return False
+            data = json.loads(report_file.read_text(encoding="utf-8", errors="replace"))
+        except (OSError, ValueError):
+            return False
+        finally:
+            try:
+                report_file.unlink(missing_ok=True)
+            except OSError:
+                pass
+        self.records = parse_json_report(data)
+        counts: Dict[str, int] = {}
+        for rec in self.records:
+            counts[rec.status] = counts.get(rec.status, 0) + 1
+        self.counts = counts
+        return True
+
+    @property
+    def only_skipped(self) -> bool:
+        """True when tests were found but none actually executed."""
+        executed = sum(self.counts.get(k, 0) for k in ("passed", "failed", "flaky"))
+        return self.counts.get("skipped", 0) > 0 and executed == 0
+
+    def success(self, returncode: int) -> bool:
+        return returncode == 0 and not self.only_skipped
+
+    def summary(self) -> Dict[str, Any]:
+        return {"counts": dict(self.counts), "tests": len(self.records)}
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_result_store() -> None:
+    conn = _connect()
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trial_test_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                spec TEXT,
+                reference_id TEXT,
+                title TEXT NOT NULL,
+                file TEXT,
+                line INTEGER,
+                project TEXT,
+                status TEXT NOT NULL,
+                duration_ms INTEGER,
+                retries INTEGER,
+                attachments TEXT,
+                error TEXT,
+                recorded_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_trial_results_run ON trial_test_results (run_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_trial_results_spec ON trial_test_results (spec, status)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def store_results(run_id: str, records: List[TestResultRecord], *, spec: str = "", reference_id: str = "") -> None:
+    if not records:
+        return
+    init_result_store()
+    now = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
+    conn = _connect()
+    try:
+        conn.executemany(
+            """
+            INSERT INTO trial_test_results
+                (run_id, spec, reference_id, title, file, line, project, status, duration_ms, retries, attachments, error, recorded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    run_id, spec, reference_id, r.title, r.file, r.line, r.project, r.status,
+                    r.duration_ms, r.retries, json.dumps(r.attachments), r.error, now,
+                )
+                for r in records
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def query_results(
+    *,
+    run_id: Optional[str] = None,
+    spec: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """Return stored test results, newest first, filtered by run, spec and/or status."""
+    init_result_store()
+    clauses: List[str] = []
+    params: List[Any] = []
+    for column, value in (("run_id", run_id), ("spec", spec), ("status", status)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM trial_test_results {where} ORDER BY id DESC LIMIT ?",
+            (*params, max(1, int(limit))),
+        ).fetchall()
+    finally:
+        conn.close()
+    results = []
+    for row in rows:
+        item = dict(row)
+        item["attachments"] = json.loads(item["attachments"]) if item.get("attachments") else []
+        results.append(item)
+    return results
@@ -0,0 +1,266 @@
+"""Process-wide scheduler bounding the number of concurrent Playwright browsers.
+
+Every trial-run path (agentic streaming, ``/trial/run``, ``/trial/stream`` and the
+synchronous executor helpers) requests browser slots here before launching
+``npx playwright test``. Requests beyond the budget wait in a priority queue
+(FIFO within the same priority) and can observe their queue position, which the
+streaming routers forward to clients. Each run is recorded with its wait and run
+times so operators can see where capacity goes.
+
+Usage from synchronous code::
+
+    with trial_scheduler.slot("spec.ts", source="executor") as ticket:
+        ...
+
+and from async code::
+
+    ticket = trial_scheduler.submit("ref-1", source="agentic")
+    async for position in ticket.positions():
+        ...  # still queued at ``position`` (1 = next)
+    try:
+        ...
+    finally:
+        ticket.release(returncode=rc)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+DEFAULT_MAX_BROWSERS = int(os.getenv("TRIAL_MAX_BROWSERS", "3"))
+HISTORY_LIMIT = 200
+
+
+@dataclass
+class TrialRunRecord:
+    """Resource accounting for a single scheduled run."""
+
+    run_id: str
+    label: str
+    source: str
+    browsers: int
+    priority: int
+    status: str
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    pid: Optional[int] = None
+    returncode: Optional[int] = None
+
+    @property
+    def wait_seconds(self) -> float:
+        end = self.started_at or self.finished_at or time.time()
+        return max(0.0, end - self.submitted_at)
+
+    @property
+    def run_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return max(0.0, (self.finished_at or time.time()) - self.started_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["wait_seconds"] = round(self.wait_seconds, 3)
+        data["run_seconds"] = round(self.run_seconds, 3)
+        data["browser_seconds"] = round(self.run_seconds * self.browsers, 3)
+        return data
+
+
+class TrialTicket:
+    """Handle for a queued or running request; obtained from :meth:`TrialScheduler.submit`."""
+
+    def __init__(self, scheduler: "TrialScheduler", record: TrialRunRecord) -> None:
+        self._scheduler = scheduler
+        self.record = record
+        self._granted = threading.Event()
+        self._watchers: List[Callable[[], None]] = []
+
+    @property
+    def granted(self) -> bool:
+        return self._granted.is_set()
+
+    @property
+    def position(self) -> int:
+        """1-based queue position, or 0 once the run holds its browsers."""
+        return self._scheduler._position(self)
+
+    def attach_pid(self, pid: Optional[int]) -> None:
+        self.record.pid = pid
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block the calling thread until browsers are granted."""
+        return self._granted.wait(timeout)
+
+    async def positions(self) -> AsyncIterator[int]:
+        """Yield the queue position whenever it changes; return once granted."""
+        loop = asyncio.get_running_loop()
+        last: Optional[int] = None
+        while True:
+            changed = asyncio.Event()
+            self._watch(lambda: loop.call_soon_threadsafe(changed.set))
+            if self.granted:
+                return
+            position = self.position
+            if position != last:
+                last = position
+                yield position
+            await changed.wait()
+
+    def release(self, returncode: Optional[int] = None) -> None:
+        """Return the browsers to the pool (or leave the queue if not yet granted)."""
+        self._scheduler._release(self, returncode)
+
+    def _watch(self, callback: Callable[[], None]) -> None:
+        with self._scheduler._lock:
+            self._watchers.append(callback)
+
+    def _notify(self) -> None:
+        with self._scheduler._lock:
+            watchers, self._watchers = self._watchers, []
+        for callback in watchers:
+            try:
+                callback()
+            except RuntimeError:
+                # Loop closed (client went away); nothing to wake.
+                pass
+
+
+class TrialScheduler:
+    """Grants browser slots against a fixed budget in priority/FIFO order."""
+
+    def __init__(self, max_browsers: int = DEFAULT_MAX_BROWSERS) -> None:
+        self._lock = threading.RLock()
+        self._max_browsers = max(1, int(max_browsers))
+        self._in_use = 0
+        self._seq = itertools.count()
+        self._queue: List[tuple] = []  # heap of (-priority, seq, ticket)
+        self._active: Dict[str, TrialTicket] = {}
+        self._history: Deque[TrialRunRecord] = deque(maxlen=HISTORY_LIMIT)
+
+    @property
+    def max_browsers(self) -> int:
+        return self._max_browsers
+
+    def configure(self, max_browsers: int) -> None:
+        """Change the browser budget at runtime; queued runs are re-evaluated."""
+        with self._lock:
+            self._max_browsers = max(1, int(max_browsers))
+        self._dispatch()
+
+    def submit(self, label: str, *, browsers: int = 1, priority: int = 0, source: str = "") -> TrialTicket:
+        """Queue a request for ``browsers`` slots. Higher ``priority`` is served first."""
+        record = TrialRunRecord(
+            run_id=uuid4().hex,
+            label=label,
+            source=source,
+            # A request larger than the whole budget could never start; cap it.
+            browsers=max(1, min(int(browsers), self._max_browsers)),
+            priority=int(priority),
+            status="queued",
+            submitted_at=time.time(),
+        )
+        ticket = TrialTicket(self, record)
+        with self._lock:
+            heapq.heappush(self._queue, (-record.priority, next(self._seq), ticket))
+        self._dispatch()
+        return ticket
+
+    @contextmanager
+    def slot(self, label: str, *, browsers: int = 1, priority: int = 0, source: str = "") -> Iterator[TrialTicket]:
+        """Blocking context manager for synchronous callers."""
+        ticket = self.submit(label, browsers=browsers, priority=priority, source=source)
+        try:
+            ticket.wait()
+            yield ticket
+        finally:
+            ticket.release()
+
+    @asynccontextmanager
+    async def lease(self, label: str, *, browsers: int = 1, priority: int = 0, source: str = "") -> AsyncIterator[TrialTicket]:
+        """Async context manager that waits for a slot without blocking the loop."""
+        ticket = self.submit(label, browsers=browsers, priority=priority, source=source)
+        try:
+            async for _ in ticket.positions():
+                pass
+            yield ticket
+        finally:
+            ticket.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = [entry[2] for entry in sorted(self._queue)]
+            active = list(self._active.values())
+            history = list(self._history)
+            data = {
+                "maxBrowsers": self._max_browsers,
+                "inUse": self._in_use,
+                "queued": [dict(t.record.to_dict(), position=i + 1) for i, t in enumerate(queued)],
+                "active": [t.record.to_dict() for t in active],
+                "recent": [r.to_dict() for r in reversed(history)],
+            }
+        finished = [r for r in history if r.started_at is not None]
+        data["totals"] = {
+            "completed": len(finished),
+            "browserSeconds": round(sum(r.run_seconds * r.browsers for r in finished), 3),
+            "avgWaitSeconds": round(sum(r.wait_seconds for r in finished) / len(finished), 3) if finished else 0.0,
+        }
+        return data
+
+    def _position(self, ticket: TrialTicket) -> int:
+        with self._lock:
+            if ticket.granted:
+                return 0
+            ordered = sorted(self._queue)
+            for index, entry in enumerate(ordered):
+                if entry[2] is ticket:
+                    return index + 1
+        return 0
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            # Strict ordering: the head blocks smaller requests behind it so large
+            # parallel runs are not starved by a stream of single-browser runs.
+            while self._queue:
+                ticket = self._queue[0][2]
+                if self._in_use + ticket.record.browsers > self._max_browsers:
+                    break
+                heapq.heappop(self._queue)
+                self._in_use += ticket.record.browsers
+                ticket.record.status = "running"
+                ticket.record.started_at = time.time()
+                self._active[ticket.record.run_id] = ticket
+                ticket._granted.set()
+            waiting = [entry[2] for entry in self._queue] + list(self._active.values())
+        for ticket in waiting:
+            ticket._notify()
+
+    def _release(self, ticket: TrialTicket, returncode: Optional[int]) -> None:
+        with self._lock:
+            record = ticket.record
+            if record.finished_at is not None:
+                return
+            record.finished_at = time.time()
+            if returncode is not None:
+                record.returncode = returncode
+            if self._active.pop(record.run_id, None) is not None:
+                self._in_use -= record.browsers
+                record.status = "completed" if record.returncode in (None, 0) else "failed"
+            else:
+                self._queue = [entry for entry in self._queue if entry[2] is not ticket]
+                heapq.heapify(self._queue)
+                record.status = "cancelled"
+            self._history.append(record)
+        self._dispatch()
+
+
+trial_scheduler = TrialScheduler()
@@ -3,9 +3,15 @@ import logging
 import os
 import re
 import tempfile
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Dict, Optional, Tuple, List
+from typing import Callable, Dict, Iterator, Optional, Tuple, List
+
+try:
+    from .warm_browser import warm_browser_pool
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from warm_browser import warm_browser_pool  # type: ignore
 
 logger = logging.getLogger(__name__)
 
@@ -127,6 +133,31 @@ def trial_env_overrides(repo_root: Path, case_id: Optional[str] = None, spec_pat
     return overrides
 
 
+def acquire_warm_runner_env(repo_root: Path, headed: bool) -> Tuple[Dict[str, str], Optional[Callable[[], None]]]:
+    """
+    Return env overrides pointing a trial run at the warm browser server for ``repo_root``.
+
+    The second element releases the server lease and must be called when the run ends.
+    Returns ({}, None) when warm mode (TRIAL_WARM_BROWSER) is off or the server cannot
+    start, so the run cold-launches its own browser as before.
+    """
+    lease = warm_browser_pool.acquire(repo_root, headed)
+    if not lease:
+        return {}, None
+    return dict(lease.env), lease.release
+
+
+@contextmanager
+def warm_runner_env(repo_root: Path, headed: bool) -> Iterator[Dict[str, str]]:
+    """Context-managed :func:`acquire_warm_runner_env`; the lease is held for the block."""
+    env, release = acquire_warm_runner_env(repo_root, headed)
+    try:
+        yield env
+    finally:
+        if release:
+            release()
+
+
 def _replace_fill_call(source: str, pattern: str, replacement_value: str) -> Tuple[str, bool]:
     import re
 
@@ -0,0 +1,342 @@
+"""Asyncio-native trial-run engine.
+
+Launches one or more Playwright child processes with ``asyncio`` subprocesses
+and multiplexes their output into a single async stream of event dicts. No
+reader threads or executor slots are used, so concurrent trial streams do not
+compete with other ``run_in_executor`` users.
+
+Loops without subprocess support (the ``SelectorEventLoop`` uvicorn uses on
+Windows with ``--reload`` or ``--workers``) fall back to ``subprocess.Popen``
+with a reader thread per run; the event stream is the same either way.
+
+Events yielded by :func:`stream_trial_runs` (``referenceId`` is omitted for
+unlabeled runs):
+
+    {"phase": "queued", "position": n, "referenceId": label}   # waiting for a browser slot
+    {"phase": "running", "pid": pid, "referenceId": label}
+    {"phase": "chunk", "data": "line1\\nline2", "lines": 2, "referenceId": label}
+    {"phase": "done-single", "success": bool, "returncode": int, "duration": secs,
+     "runId": id, "results": {"counts": {...}, "tests": n}, "referenceId": label}
+    {"phase": "done", "success": bool, "runs": n}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .trial_results import ResultCollector, store_results
+from .trial_scheduler import TrialScheduler, trial_scheduler
+from .trial_spec_adapter import acquire_warm_runner_env
+
+logger = logging.getLogger(__name__)
+
+# Max lines folded into a single chunk event, and how long to wait for more
+# output before flushing a partial batch.
+DEFAULT_BATCH_LINES = int(os.getenv("TRIAL_STREAM_BATCH_LINES", "50"))
+DEFAULT_BATCH_INTERVAL = float(os.getenv("TRIAL_STREAM_BATCH_INTERVAL", "0.05"))
+# Grace period between terminate() and kill() when a stream is cancelled.
+TERMINATE_TIMEOUT = 5.0
+# StreamReader line limit; Playwright can print very long single lines (stack traces, JSON).
+_READ_LIMIT = 1024 * 1024
+
+
+@dataclass
+class TrialRunSpec:
+    """A single child process to launch as part of a trial stream.
+
+    ``report_path`` is the Playwright JSON report location (see
+    ``trial_results.with_json_report``); when set, per-test results are parsed and
+    stored under the run's scheduler id, filed under ``spec_name``. ``warm_root``
+    opts the run into the warm browser server for that framework root (when
+    TRIAL_WARM_BROWSER is enabled), matching ``headed``.
+    """
+
+    label: str
+    cmd: List[str]
+    cwd: str
+    env: Dict[str, str] = field(default_factory=dict)
+    report_path: Optional[str] = None
+    spec_name: str = ""
+    warm_root: Optional[str] = None
+    headed: bool = True
+
+
+def _with_label(event: Dict[str, Any], label: str) -> Dict[str, Any]:
+    if label:
+        event["referenceId"] = label
+    return event
+
+
+async def _pump_output(
+    label: str,
+    proc: "asyncio.subprocess.Process | _ThreadedProcess",
+    queue: asyncio.Queue,
+    collector: ResultCollector,
+) -> None:
+    """Forward child stdout lines to ``queue`` (and the result collector) until EOF."""
+    if proc.stdout is None:
+        return
+    try:
+        while True:
+            try:
+                raw = await proc.stdout.readline()
+            except ValueError:
+                # Line exceeded the reader limit; take what is buffered instead.
+                raw = await proc.stdout.read(_READ_LIMIT)
+            if not raw:
+                break
+            text = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            collector.feed_line(text)
+            queue.put_nowait(("line", label, text))
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        queue.put_nowait(("line", label, f"[reader-error] {label}: {exc}"))
+
+
+def _release_abandoned_lease(acquiring: "asyncio.Future") -> None:
+    if acquiring.cancelled() or acquiring.exception() is not None:
+        return
+    _, release = acquiring.result()
+    if release:
+        release()
+
+
+class _ThreadedProcess:
+    """``subprocess.Popen`` behind the subset of ``asyncio.subprocess.Process`` used here.
+
+    A reader thread feeds stdout into an ``asyncio.StreamReader`` and a waiter
+    thread resolves :meth:`wait`, both through ``loop.call_soon_threadsafe``.
+    """
+
+    def __init__(self, popen: subprocess.Popen, loop: asyncio.AbstractEventLoop) -> None:
+        self._popen = popen
+        self._loop = loop
+        self.pid = popen.pid
+        self.stdout = asyncio.StreamReader(limit=_READ_LIMIT)
+        self._exited: asyncio.Future = loop.create_future()
+        threading.Thread(target=self._read, name=f"trial-reader-{popen.pid}", daemon=True).start()
+        threading.Thread(target=self._wait, name=f"trial-waiter-{popen.pid}", daemon=True).start()
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self._popen.returncode
+
+    def _call(self, callback, *args) -> bool:
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+            return True
+        except RuntimeError:  # loop closed; nobody is listening any more
+            return False
+
+    def _read(self) -> None:
+        stream = self._popen.stdout
+        try:
+            while True:
+                chunk = stream.read1(65536) if stream else b""
+                if not chunk or not self._call(self.stdout.feed_data, chunk):
+                    break
+        except (OSError, ValueError):
+            pass
+        self._call(self.stdout.feed_eof)
+
+    def _wait(self) -> None:
+        rc = self._popen.wait()
+        self._call(lambda: self._exited.done() or self._exited.set_result(rc))
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._exited)
+
+    def terminate(self) -> None:
+        self._popen.terminate()
+
+    def kill(self) -> None:
+        self._popen.kill()
+
+
+async def _launch(spec: TrialRunSpec, env: Optional[Dict[str, str]]):
+    """Start ``spec.cmd`` as an asyncio subprocess, or thread-backed where the loop cannot."""
+    try:
+        return await asyncio.create_subprocess_exec(
+            *spec.cmd,
+            cwd=spec.cwd,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=_READ_LIMIT,
+        )
+    except NotImplementedError:
+        pass
+    logger.info("[TrialStream] Event loop lacks subprocess support; using a reader thread")
+    popen = subprocess.Popen(spec.cmd, cwd=spec.cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return _ThreadedProcess(popen, asyncio.get_running_loop())
+
+
+async def _run_one(
+    spec: TrialRunSpec,
+    queue: asyncio.Queue,
+    scheduler: TrialScheduler,
+    priority: int,
+    source: str,
+) -> None:
+    """Wait for a browser slot, run ``spec`` and report its output and exit code."""
+    ticket = scheduler.submit(spec.label or "run", browsers=1, priority=priority, source=source)
+    rc = -1
+    started: Optional[float] = None
+    collector = ResultCollector()
+    proc: Optional["asyncio.subprocess.Process | _ThreadedProcess"] = None
+    release_warm = None
+    try:
+        async for position in ticket.positions():
+            queue.put_nowait(("queued", spec.label, position))
+        env = spec.env
+        if spec.warm_root:
+            # Only a cold start of the server blocks; reuse returns immediately
+            acquiring = asyncio.ensure_future(asyncio.to_thread(acquire_warm_runner_env, Path(spec.warm_root), spec.headed))
+            try:
+                warm_env, release_warm = await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # The thread cannot be interrupted; give back whatever lease it ends up with
+                acquiring.add_done_callback(_release_abandoned_lease)
+                raise
+            if warm_env:
+                env = {**(spec.env or os.environ), **warm_env}
+        try:
+            proc = await _launch(spec, env or None)
+        except Exception as exc:
+            logger.error(f"[TrialStream] Failed to launch {spec.label or 'run'}: {exc}")
+            queue.put_nowait(("line", spec.label, f"[launch-error] {exc}"))
+            return
+        logger.info(f"[TrialStream] Launched {spec.label or 'run'} (pid={proc.pid}): {' '.join(spec.cmd)}")
+        started = time.monotonic()
+        ticket.attach_pid(proc.pid)
+        queue.put_nowait(("started", spec.label, proc.pid))
+        await _pump_output(spec.label, proc, queue, collector)
+        rc = await proc.wait()
+    finally:
+        if proc is not None and proc.returncode is None:
+            await _terminate(spec.label, proc)
+        if release_warm:
+            release_warm()
+        ticket.release(returncode=rc)
+        duration = round(time.monotonic() - started, 3) if started is not None else 0.0
+        if spec.report_path and collector.load_json_report(spec.report_path):
+            try:
+                store_results(ticket.record.run_id, collector.records, spec=spec.spec_name, reference_id=spec.label)
+            except Exception as exc:
+                logger.warning(f"[TrialStream] Failed to store results for {spec.label or 'run'}: {exc}")
+        queue.put_nowait(("exit", spec.label, {
+            "success": collector.success(rc),
+            "returncode": rc,
+            "duration": duration,
+            "runId": ticket.record.run_id,
+            "results": collector.summary(),
+        }))
+
+
+async def _collect_batch(queue: asyncio.Queue, batch_lines: int, batch_interval: float) -> List[Tuple[str, str, Any]]:
+    """Wait for one queue item, then gather more until the batch is full or the interval lapses."""
+    batch = [await queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + batch_interval
+    while len(batch) < batch_lines:
+        try:
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+async def _terminate(label: str, proc: "asyncio.subprocess.Process | _ThreadedProcess") -> None:
+    if proc.returncode is not None:
+        return
+    logger.info(f"[TrialStream] Terminating {label or 'run'} (pid={proc.pid})")
+    try:
+        proc.terminate()
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(proc.wait(), TERMINATE_TIMEOUT)
+    except asyncio.TimeoutError:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            return
+        await proc.wait()
+
+
+async def stream_trial_runs(
+    runs: List[TrialRunSpec],
+    *,
+    batch_lines: Optional[int] = None,
+    batch_interval: Optional[float] = None,
+    scheduler: Optional[TrialScheduler] = None,
+    priority: int = 0,
+    source: str = "stream",
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run ``runs`` concurrently and yield their multiplexed output as events.
+
+    Each run takes one browser slot from ``scheduler`` (the process-wide
+    ``trial_scheduler`` by default) and reports ``queued`` events with its position
+    while it waits. Consecutive lines from the same run are folded into one
+    ``chunk`` event (at most ``batch_lines`` lines, flushed after ``batch_interval``
+    seconds). If the consumer stops iterating (e.g. the SSE client disconnects),
+    every child still running is terminated and queued runs leave the queue.
+    """
+    batch_lines = max(1, batch_lines or DEFAULT_BATCH_LINES)
+    batch_interval = DEFAULT_BATCH_INTERVAL if batch_interval is None else max(0.0, batch_interval)
+    scheduler = scheduler or trial_scheduler
+    queue: asyncio.Queue = asyncio.Queue()
+    results: Dict[str, bool] = {}
+    tasks = [asyncio.create_task(_run_one(spec, queue, scheduler, priority, source)) for spec in runs]
+    pending = len(tasks)
+
+    try:
+        while pending:
+            batch = await _collect_batch(queue, batch_lines, batch_interval)
+            lines: List[str] = []
+            current = ""
+            for kind, label, value in batch:
+                if kind == "line" and lines and label == current:
+                    lines.append(value)
+                    continue
+                if lines:
+                    yield _with_label({"phase": "chunk", "data": "\n".join(lines), "lines": len(lines)}, current)
+                    lines = []
+                if kind == "line":
+                    current = label
+                    lines.append(value)
+                elif kind == "queued":
+                    yield _with_label({"phase": "queued", "position": value}, label)
+                elif kind == "started":
+                    yield _with_label({"phase": "running", "pid": value}, label)
+                else:
+                    pending -= 1
+                    results[label] = value["success"]
+                    yield _with_label({"phase": "done-single", **value}, label)
+            if lines:
+                yield _with_label({"phase": "chunk", "data": "\n".join(lines), "lines": len(lines)}, current)
+
+        overall = bool(results) and all(results.values())
+        yield {"phase": "done", "success": overall, "runs": len(runs)}
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,329 @@
+"""Optional warm Playwright browser server for trial runs.
+
+Cold ``npx playwright test`` runs launch a fresh browser every time, which
+dominates short specs. When ``TRIAL_WARM_BROWSER`` is enabled, a long-lived
+``playwright launch-server`` process is kept per framework root and headed mode,
+and trial runs connect to it through ``PW_TEST_CONNECT_WS_ENDPOINT`` (see
+``trial_spec_adapter.warm_runner_env``).
+
+Servers are health-checked before reuse, recycled after ``MAX_REUSE`` leases and
+shut down after ``IDLE_TIMEOUT`` seconds without use. Any failure falls back to a
+normal cold launch: callers simply get no endpoint.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+WARM_BROWSER_ENABLED = os.getenv("TRIAL_WARM_BROWSER", "").strip().lower() in ("1", "true", "yes", "on")
+WARM_BROWSER_NAME = os.getenv("TRIAL_WARM_BROWSER_NAME", "chromium")
+IDLE_TIMEOUT = float(os.getenv("TRIAL_WARM_BROWSER_IDLE", "300"))
+MAX_REUSE = int(os.getenv("TRIAL_WARM_BROWSER_MAX_REUSE", "50"))
+START_TIMEOUT = float(os.getenv("TRIAL_WARM_BROWSER_START_TIMEOUT", "30"))
+HEALTH_INTERVAL = 5.0
+
+_WS_RE = re.compile(r"wss?://\S+")
+
+
+def _launch_server_command(project_root: Path, browser: str, config_path: str) -> List[str]:
+    args = ["launch-server", "--browser", browser, "--config", config_path]
+    npx_path = shutil.which("npx") or shutil.which("npx.cmd")
+    if npx_path:
+        return [npx_path, "playwright", *args]
+    for name in ("playwright.cmd", "playwright"):
+        candidate = project_root / "node_modules" / ".bin" / name
+        if candidate.exists():
+            return [str(candidate), *args]
+    raise FileNotFoundError("Playwright CLI not found; cannot start warm browser server")
+
+
+class WarmBrowserServer:
+    """One ``playwright launch-server`` process and its usage counters."""
+
+    def __init__(self, project_root: Path, headed: bool, browser: str = WARM_BROWSER_NAME) -> None:
+        self.project_root = project_root
+        self.headed = headed
+        self.browser = browser
+        self.endpoint: Optional[str] = None
+        self.uses = 0
+        self.active = 0
+        self.started_at: Optional[float] = None
+        self.last_used = time.monotonic()
+        self._last_health = 0.0
+        self._proc: Optional[subprocess.Popen] = None
+        self._config_path: Optional[str] = None
+
+    def start(self) -> str:
+        fd, self._config_path = tempfile.mkstemp(prefix="pw-warm-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            # Random wsPath so other local users cannot attach to the server by guessing the port
+            json.dump({"headless": not self.headed, "port": 0, "wsPath": f"/{uuid4().hex}"}, fh)
+        cmd = _launch_server_command(self.project_root, self.browser, self._config_path)
+        popen_kwargs: Dict[str, object] = {}
+        if os.name == "nt":
+            popen_kwargs["creationflags"] = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+        else:
+            # npx spawns node as a child; a session lets stop() signal the whole tree
+            popen_kwargs["start_new_session"] = True
+        self._proc = subprocess.Popen(
+            cmd,
+            cwd=str(self.project_root),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            **popen_kwargs,
+        )
+        lines: "queue.Queue[Optional[str]]" = queue.Queue()
+
+        def _drain(stream) -> None:
+            # Keep reading for the server's lifetime so a full pipe never blocks it
+            for line in iter(stream.readline, ""):
+                lines.put(line)
+            lines.put(None)
+
+        threading.Thread(target=_drain, args=(self._proc.stdout,), daemon=True).start()
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                line = lines.get(timeout=max(0.1, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if line is None:
+                break
+            match = _WS_RE.search(line)
+            if match:
+                self.endpoint = match.group(0)
+                self.started_at = time.monotonic()
+                self._last_health = self.started_at
+                logger.info(f"[WarmBrowser] {self.browser} server ready at {self.endpoint} (pid={self._proc.pid})")
+                return self.endpoint
+        self.stop()
+        raise RuntimeError("warm browser server did not report a ws endpoint")
+
+    def healthy(self) -> bool:
+        """Process alive and its port accepting connections (checked at most every few seconds)."""
+        if not self._proc or self._proc.poll() is not None or not self.endpoint:
+            return False
+        now = time.monotonic()
+        if now - self._last_health < HEALTH_INTERVAL:
+            return True
+        parsed = urlparse(self.endpoint)
+        try:
+            with socket.create_connection((parsed.hostname or "127.0.0.1", parsed.port or 80), timeout=1.0):
+                pass
+        except OSError:
+            return False
+        self._last_health = now
+        return True
+
+    def stop(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc and proc.poll() is None:
+            logger.info(f"[WarmBrowser] Stopping server pid={proc.pid} after {self.uses} use(s)")
+            try:
+                if os.name == "nt":
+                    subprocess.run(["taskkill", "/PID", str(proc.pid), "/T", "/F"], capture_output=True)
+                else:
+                    os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait(timeout=10)
+            except Exception:
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+        if self._config_path:
+            try:
+                os.unlink(self._config_path)
+            except OSError:
+                pass
+            self._config_path = None
+        self.endpoint = None
+
+
+@dataclass
+class WarmLease:
+    """A trial run's claim on a warm server; call :meth:`release` when the run ends."""
+
+    pool: "WarmBrowserPool"
+    key: Tuple[str, bool]
+    endpoint: str
+
+    @property
+    def env(self) -> Dict[str, str]:
+        return {"PW_TEST_CONNECT_WS_ENDPOINT": self.endpoint}
+
+    def release(self) -> None:
+        self.pool._release(self.key)
+
+
+class WarmBrowserPool:
+    """Keeps at most one warm server per (framework root, headed) pair."""
+
+    def __init__(self, *, enabled: bool = WARM_BROWSER_ENABLED, idle_timeout: float = IDLE_TIMEOUT, max_reuse: int = MAX_REUSE) -> None:
+        self.enabled = enabled
+        self.idle_timeout = idle_timeout
+        self.max_reuse = max(1, max_reuse)
+        self._servers: Dict[Tuple[str, bool], WarmBrowserServer] = {}
+        # Keys whose server is being started or health-checked, resolved with the server (or None)
+        self._starting: Dict[Tuple[str, bool], "Future[Optional[WarmBrowserServer]]"] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+
+    def _new_server(self, root: Path, headed: bool) -> WarmBrowserServer:
+        return WarmBrowserServer(root, headed)
+
+    def acquire(self, project_root: Path, headed: bool) -> Optional[WarmLease]:
+        """Return a lease on a healthy warm server, or ``None`` to fall back to a cold run.
+
+        Starting, health-probing and stopping a server happen outside ``_lock``; one
+        caller per key does that work while the others wait on its future.
+        """
+        if not self.enabled:
+            return None
+        root = Path(project_root).resolve()
+        key = (str(root), bool(headed))
+        while True:
+            with self._lock:
+                pending = self._starting.get(key)
+                if pending is None:
+                    server = self._servers.get(key)
+                    if server and server.active > 0:
+                        # A busy server may exceed the reuse cap briefly; recycle once it is idle
+                        return self._lease(key, server)
+                    pending = self._starting[key] = Future()
+                    break
+            # Another caller is starting or checking this key's server; retry once it settles
+            try:
+                settled = pending.result(timeout=START_TIMEOUT + 15)
+            except FutureTimeoutError:
+                logger.warning("[WarmBrowser] Timed out waiting for another caller's server start; using a cold launch")
+                return None
+            if settled is None:
+                return None
+        return self._prepare(key, root, bool(headed), server, pending)
+
+    def _prepare(
+        self,
+        key: Tuple[str, bool],
+        root: Path,
+        headed: bool,
+        current: Optional[WarmBrowserServer],
+        pending: "Future[Optional[WarmBrowserServer]]",
+    ) -> Optional[WarmLease]:
+        """Reuse ``current`` if it is fit, otherwise replace it; runs without the pool lock."""
+        server: Optional[WarmBrowserServer] = current
+        try:
+            if server is not None and (server.uses >= self.max_reuse or not server.healthy()):
+                with self._lock:
+                    self._servers.pop(key, None)
+                server.stop()
+                server = None
+            if server is None:
+                server = self._new_server(root, headed)
+                server.start()
+        except Exception as exc:
+            logger.warning(f"[WarmBrowser] Falling back to cold launch: {exc}")
+            with self._lock:
+                self._starting.pop(key, None)
+            pending.set_result(None)
+            return None
+        with self._lock:
+            self._servers[key] = server
+            self._starting.pop(key, None)
+            lease = self._lease(key, server)
+            self._ensure_reaper()
+        pending.set_result(server)
+        return lease
+
+    def _lease(self, key: Tuple[str, bool], server: WarmBrowserServer) -> WarmLease:
+        server.uses += 1
+        server.active += 1
+        server.last_used = time.monotonic()
+        return WarmLease(self, key, server.endpoint or "")
+
+    def _release(self, key: Tuple[str, bool]) -> None:
+        with self._lock:
+            server = self._servers.get(key)
+            if server:
+                server.active = max(0, server.active - 1)
+                server.last_used = time.monotonic()
+
+    def reap_idle(self) -> int:
+        """Stop servers idle longer than ``idle_timeout``; returns how many were stopped."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key
+                for key, server in self._servers.items()
+                if key not in self._starting and server.active == 0 and now - server.last_used >= self.idle_timeout
+            ]
+            stopping = [self._servers.pop(key) for key in idle]
+        for server in stopping:
+            server.stop()
+        return len(stopping)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            stopping = list(self._servers.values())
+            self._servers.clear()
+        for server in stopping:
+            server.stop()
+        self._wake.set()
+
+    def status(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [
+                {
+                    "root": key[0],
+                    "headed": key[1],
+                    "endpoint": server.endpoint,
+                    "uses": server.uses,
+                    "active": server.active,
+                    "idleSeconds": round(time.monotonic() - server.last_used, 1),
+                }
+                for key, server in self._servers.items()
+            ]
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._wake.clear()
+
+        def _loop() -> None:
+            interval = max(1.0, min(self.idle_timeout / 4, 30.0))
+            while not self._wake.wait(interval):
+                self.reap_idle()
+                with self._lock:
+                    if not self._servers:
+                        return
+
+        self._reaper = threading.Thread(target=_loop, name="warm-browser-reaper", daemon=True)
+        self._reaper.start()
+
+
+warm_browser_pool = WarmBrowserPool()
+# Servers run in their own session, so they would outlive the API process otherwise
+atexit.register(warm_browser_pool.shutdown)
@@ -1,4 +1,4 @@
-import { apiClient } from "./client";
+import { API_BASE_URL, apiClient } from "./client";
 
 export interface JobDetail {
   jobId: string;
@@ -7,10 +7,30 @@ export interface JobDetail {
   payload?: Record<string, unknown> | null;
   result?: Record<string, unknown> | null;
   error?: string | null;
+  progress?: Record<string, unknown> | null;
   createdAt: string;
   updatedAt: string;
 }
 
+/** Live update pushed by /api/jobs/{jobId}/events. */
+export interface JobEvent {
+  jobId: string;
+  type: string;
+  status: string;
+  stage?: string | null;
+  percent?: number | null;
+  progress?: Record<string, unknown> | null;
+  error?: string | null;
+  createdAt: string;
+  updatedAt: string;
+}
+
+export const TERMINAL_JOB_STATUSES = new Set(["completed", "failed"]);
+
+export function jobEventsUrl(jobId: string): string {
+  return `${API_BASE_URL}/api/jobs/${encodeURIComponent(jobId)}/events`;
+}
+
 export async function getJob(jobId: string): Promise<JobDetail> {
   const { data } = await apiClient.get<JobDetail>(
     `/api/jobs/${encodeURIComponent(jobId)}`,
@@ -1,4 +1,4 @@
-import { apiClient } from "./client";
+import { API_BASE_URL, apiClient } from "./client";
 
 export interface TestCaseRecord {
   [key: string]: unknown;
@@ -6,13 +6,23 @@ export interface TestCaseRecord {
 
 export interface TestCaseResponse {
   records: TestCaseRecord[];
-  excel?: string;
+  /** Base64 XLSX, only when requested with inlineExcel. */
+  excel?: string | null;
+  exportId?: string | null;
+  excelUrl?: string | null;
+  excelBytes?: number | null;
 }
 
 export interface TestCaseRequestPayload {
   story: string;
   llmOnly?: boolean;
   asExcel?: boolean;
+  inlineExcel?: boolean;
+}
+
+/** Absolute download URL for a generated XLSX export, if the response has one. */
+export function excelDownloadUrl(response?: TestCaseResponse | null): string | null {
+  return response?.excelUrl ? `${API_BASE_URL}${response.excelUrl}` : null;
 }
 
 export async function generateTestCases(
@@ -1,20 +1,65 @@
-import { useQuery } from "@tanstack/react-query";
+import { useEffect, useState } from "react";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 
-import type { JobDetail } from "../api/jobs";
-import { getJob } from "../api/jobs";
+import type { JobDetail, JobEvent } from "../api/jobs";
+import { TERMINAL_JOB_STATUSES, getJob, jobEventsUrl } from "../api/jobs";
 
+function isTerminal(status?: string | null): boolean {
+  return TERMINAL_JOB_STATUSES.has(String(status ?? "").toLowerCase());
+}
+
+/**
+ * Follow a job. Updates are pushed over server-sent events; polling every
+ * `pollInterval` ms is only used while no event stream is connected.
+ */
 export function useJobStatus(jobId: string | null, pollInterval = 2000) {
+  const queryClient = useQueryClient();
+  const [streaming, setStreaming] = useState(false);
+
+  useEffect(() => {
+    if (!jobId || typeof EventSource === "undefined") {
+      return undefined;
+    }
+    const queryKey = ["job-status", jobId];
+    const source = new EventSource(jobEventsUrl(jobId));
+    source.onopen = () => setStreaming(true);
+    source.onerror = () => setStreaming(false);
+    source.onmessage = (message) => {
+      const event = JSON.parse(message.data) as JobEvent;
+      queryClient.setQueryData<JobDetail>(queryKey, (previous) =>
+        previous
+          ? {
+              ...previous,
+              status: event.status,
+              progress: event.progress,
+              error: event.error,
+              updatedAt: event.updatedAt,
+            }
+          : previous,
+      );
+      if (isTerminal(event.status)) {
+        // The stream ends here; fetch the result once
+        source.close();
+        setStreaming(false);
+        void queryClient.invalidateQueries({ queryKey });
+      }
+    };
+    return () => {
+      source.close();
+      setStreaming(false);
+    };
+  }, [jobId, queryClient]);
+
   return useQuery<JobDetail, Error>({
     queryKey: ["job-status", jobId],
     queryFn: () => getJob(jobId as string),
     enabled: Boolean(jobId),
-    refetchInterval: (data) => {
-      if (!data || !data.status) {
-        return pollInterval;
+    refetchInterval: (query) => {
+      const data = query.state.data;
+      if (data && isTerminal(data.status)) {
+        return false;
       }
-      const status = String(data.status).toLowerCase();
-      const terminal = new Set(["completed", "failed"]);
-      return terminal.has(status) ? false : pollInterval;
+      return streaming ? false : pollInterval;
     },
   });
 }
@@ -2,7 +2,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { startRecorder, stopRecorder, getRecorderStatus, finalizeRecorderBySession, buildArtifactUrl } from '../api/recorder';
-import { generateTestCases, generateTestCasesWithTemplate } from '../api/testCases';
+import { excelDownloadUrl, generateTestCases, generateTestCasesWithTemplate } from '../api/testCases';
 import { buildWebSocketUrl, API_BASE_URL } from '../api/client';
 import { previewAgentic, generatePayload, payloadAgenticStream, uploadDatasheet, listDatasheets, persistFiles, trialRunAgenticStream, keywordInspect, renameTestCaseId } from '../api/agentic';
 import { ingestJira, ingestWebsite, ingestDocuments, deleteVectorDoc, deleteVectorSource, queryVectorAll, type VectorDocument } from '../api/ingest';
@@ -2713,9 +2713,9 @@ ${refinedFlowSteps.map((step: any, idx: number) => {
                   )}
                   
                   <div className="flex gap-6 justify-center">
-                    {testCaseResults?.excel && (
+                    {excelDownloadUrl(testCaseResults) && (
                       <motion.a
-                        href={`data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,${testCaseResults.excel}`}
+                        href={excelDownloadUrl(testCaseResults) ?? undefined}
                         download={`test-cases-${sessionName || activeSessionId}.xlsx`}
                         whileHover={{ scale: 1.05 }}
                         whileTap={{ scale: 0.95 }}
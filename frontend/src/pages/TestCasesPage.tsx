@@ -23,19 +23,9 @@ import {
 } from "@chakra-ui/react";
 import { useMutation } from "@tanstack/react-query";
 
-import { generateTestCases, generateTestCasesWithTemplate } from "../api/testCases";
+import { excelDownloadUrl, generateTestCases, generateTestCasesWithTemplate } from "../api/testCases";
 import type { TestCaseRecord, TestCaseRequestPayload, TestCaseResponse } from "../api/testCases";
 
-function base64ToBlob(b64: string, mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet") {
-  const binary = atob(b64);
-  const len = binary.length;
-  const buffer = new Uint8Array(len);
-  for (let i = 0; i < len; i += 1) {
-    buffer[i] = binary.charCodeAt(i);
-  }
-  return new Blob([buffer], { type: mime });
-}
-
 export function TestCasesPage() {
   const [story, setStory] = useState("");
   const [llmOnly, setLlmOnly] = useState(false);
@@ -87,16 +77,14 @@ export function TestCasesPage() {
   };
 
   const handleDownload = () => {
-    if (!result?.excel) {
+    const url = excelDownloadUrl(result);
+    if (!url) {
       return;
     }
-    const blob = base64ToBlob(result.excel);
-    const url = URL.createObjectURL(blob);
     const link = document.createElement("a");
     link.href = url;
     link.download = "test-cases.xlsx";
     link.click();
-    URL.revokeObjectURL(url);
   };
 
   const columns = useMemo(() => {
@@ -164,7 +152,7 @@ export function TestCasesPage() {
         <Box bg="white" borderRadius="lg" p={6} boxShadow="sm">
           <HStack justify="space-between" mb={4} align="start">
             <Heading size="md">Generated Records</Heading>
-            <Button onClick={handleDownload} isDisabled={!result.excel}>
+            <Button onClick={handleDownload} isDisabled={!excelDownloadUrl(result)}>
               Download Excel
             </Button>
           </HStack>
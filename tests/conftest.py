@@ -8,3 +8,20 @@ for path in [str(ROOT), str(APP_SRC)]:
     if path not in sys.path:
         sys.path.insert(0, path)
 
+
+
+def _isolate_app_databases() -> None:
+    """Point the SQLite stores at a scratch file before app.api.main initialises them on import."""
+    import atexit
+    import shutil
+    import tempfile
+
+    from app import job_store, recorder_registry, trial_history, trial_results
+
+    scratch = Path(tempfile.mkdtemp(prefix="app-tests-"))
+    atexit.register(shutil.rmtree, scratch, ignore_errors=True)
+    for module in (job_store, recorder_registry, trial_history, trial_results):
+        module.DB_PATH = str(scratch / "hashstore.db")
+
+
+_isolate_app_databases()
@@ -2,8 +2,10 @@ import json
 from pathlib import Path
 
 import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
 
+from app import job_store
 from app.api.main import app
 from app.services import refined_flow_service
 from app.services.test_case_service import TestCaseGenerationError
@@ -12,6 +14,13 @@ from app.services.test_case_service import TestCaseGenerationError
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def isolated_job_store(tmp_path: Path, monkeypatch):
+    """Keep jobs created through the API out of the tracked app/hashstore.db."""
+    monkeypatch.setattr(job_store, "DB_PATH", str(tmp_path / "jobs.db"))
+    job_store.init_job_store()
+
+
 def test_finalize_recorder_endpoint_not_found(tmp_path: Path) -> None:
     payload = {"sessionDir": str(tmp_path / "missing")}
     response = client.post("/api/refined-flows/finalize", json=payload)
@@ -58,7 +67,11 @@ def test_finalize_recorder_endpoint_success(tmp_path: Path, monkeypatch) -> None
     assert message["type"] == "finalized"
 
 
-def test_generate_test_cases_endpoint_success(monkeypatch) -> None:
+def test_generate_test_cases_endpoint_success(monkeypatch, tmp_path: Path) -> None:
+    from app.services import export_service
+
+    monkeypatch.setattr(export_service, "EXPORT_DIR", tmp_path)
+
     def fake_generate(_story: str, llm_only: bool = False, template_df=None):
         return {
             "records": [{"id": 1, "title": "Example"}],
@@ -77,7 +90,20 @@ def test_generate_test_cases_endpoint_success(monkeypatch) -> None:
     assert response.status_code == 200
     data = response.json()
     assert data["records"][0]["title"] == "Example"
-    assert data["excel"] is not None
+    assert data["excel"] is None
+    assert data["excelUrl"] == f"/api/exports/{data['exportId']}"
+
+    download = client.get(data["excelUrl"])
+    assert download.status_code == 200
+    assert download.content[:2] == b"PK"
+    assert len(download.content) == data["excelBytes"]
+
+    inline = client.post(
+        "/api/test-cases/generate",
+        json={"story": "Create volunteering team", "asExcel": True, "inlineExcel": True},
+    ).json()
+    assert inline["excel"] is not None
+    assert client.get("/api/exports/not-an-id").status_code == 404
 
 
 def test_generate_test_cases_endpoint_validation(monkeypatch) -> None:
@@ -140,6 +166,45 @@ def test_job_lookup_not_found():
     assert response.status_code == 404
 
 
+def test_job_listing_endpoint(monkeypatch):
+    monkeypatch.setattr("app.tasks.ingest_jira", lambda jql: [1])
+    job_id = client.post("/api/ingest/jira", json={"jql": "project=LIST"}).json()["jobId"]
+
+    listing = client.get("/api/jobs", params={"type": "ingest.jira", "status": "completed", "limit": 1})
+    assert listing.status_code == 200
+    assert listing.json()["jobs"][0]["jobId"] == job_id
+    assert client.get("/api/jobs/summary").json()["counts"]["completed"] >= 1
+    assert client.get("/api/jobs", params={"cursor": "bad"}).status_code == 400
+
+
+def test_job_event_stream_ends_when_job_finishes():
+    import threading
+    import time
+
+    from app.api.events import job_events
+
+    job_id = job_store.create_job("ingest.documents", {"paths": []})
+
+    def work():
+        deadline = time.monotonic() + 10
+        while job_id not in job_events._listeners and time.monotonic() < deadline:
+            time.sleep(0.01)
+        job_store.update_job(job_id, "running")
+        job_store.update_job_progress(job_id, {"stage": "ingesting", "percent": 50.0})
+        job_store.update_job(job_id, "completed", result={"ingested": 2})
+
+    worker = threading.Thread(target=work)
+    worker.start()
+    with client.stream("GET", f"/api/jobs/{job_id}/events") as response:
+        assert response.status_code == 200
+        events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+    worker.join()
+
+    assert events[-1]["status"] == "completed"
+    assert [event["updatedAt"] for event in events] == sorted({event["updatedAt"] for event in events})
+    assert client.get("/api/jobs/missing/events").status_code == 404
+
+
 def test_download_recorder_artifact(tmp_path: Path, monkeypatch):
     from app.api.main import RECORDINGS_DIR
 
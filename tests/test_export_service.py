@@ -0,0 +1,25 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from app.services import export_service
+
+
+def test_export_round_trips_and_expires(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(export_service, "EXPORT_DIR", tmp_path)
+    df = pd.DataFrame({"Step": [np.int64(1), 2], "Expected": ["=not a formula", np.nan]})
+
+    handle = export_service.export_dataframe(df, filename="suite.xlsx")
+
+    rows = list(load_workbook(handle.path).active.iter_rows(values_only=True))
+    assert rows == [("Step", "Expected"), (1, "=not a formula"), (2, None)]
+    assert export_service.get_export(handle.export_id).filename == "suite.xlsx"
+
+    old = time.time() - export_service.EXPORT_TTL_SECONDS - 10
+    os.utime(handle.path, (old, old))
+    assert export_service.get_export(handle.export_id) is None
+    assert export_service.purge_expired_exports() == 1
+    assert not handle.path.exists()
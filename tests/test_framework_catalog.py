@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+
+from app.services import framework_catalog
+from app.services.config_service import find_test_manager_path
+from app.services.framework_catalog import FrameworkCatalog
+
+
+def test_catalog_finds_files_and_skips_dependency_dirs(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(framework_catalog, "REFRESH_INTERVAL", 0.0)
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "testmanager.xlsx").write_bytes(b"x")
+    (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+    (tmp_path / "node_modules" / "pkg" / "testmanager.xlsx").write_bytes(b"x")
+    (tmp_path / "data" / "sub").mkdir(parents=True)
+    (tmp_path / "data" / "Supplier.xlsx").write_bytes(b"x")
+    (tmp_path / "data" / "sub" / "Rows.csv").write_bytes(b"x")
+    (tmp_path / "data" / "notes.txt").write_bytes(b"x")
+
+    catalog = FrameworkCatalog(tmp_path)
+
+    assert catalog.test_manager_paths() == [tmp_path / "config" / "testmanager.xlsx"]
+    assert catalog.datasheets() == ["data/Supplier.xlsx", "data/sub/Rows.csv"]
+    assert find_test_manager_path(tmp_path) == tmp_path / "config" / "testmanager.xlsx"
+
+
+def test_refresh_only_relists_changed_directories(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(framework_catalog, "REFRESH_INTERVAL", 0.0)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "tests").mkdir()
+    catalog = FrameworkCatalog(tmp_path)
+    assert catalog.datasheets() == []
+
+    listed = []
+    original = catalog._list_dir
+    monkeypatch.setattr(catalog, "_list_dir", lambda full, mtime: listed.append(full) or original(full, mtime))
+    (tmp_path / "data" / "New.xlsx").write_bytes(b"x")
+    stat = os.stat(tmp_path / "data")
+    os.utime(tmp_path / "data", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert catalog.datasheets() == ["data/New.xlsx"]
+    assert listed == [str(tmp_path / "data")]
@@ -0,0 +1,60 @@
+import asyncio
+
+from app import job_store
+from app.api.events import JobEventBroker
+
+
+def _isolated_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_store, "DB_PATH", str(tmp_path / "jobs.db"))
+    job_store.init_job_store()
+
+
+def test_in_process_updates_reach_job_and_global_subscribers(tmp_path, monkeypatch):
+    _isolated_store(tmp_path, monkeypatch)
+    broker = JobEventBroker(poll_interval=0)
+    job_store.add_job_listener(broker.publish_from_thread)
+
+    async def scenario():
+        job_id = job_store.create_job("ingest.documents")
+        other_id = job_store.create_job("ingest.jira")
+        mine = await broker.connect(job_id)
+        everything = await broker.connect()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, job_store.update_job, job_id, "running")
+        await loop.run_in_executor(None, job_store.update_job_progress, job_id, {"stage": "ingesting", "percent": 50.0})
+        await loop.run_in_executor(None, job_store.update_job, other_id, "completed")
+        await asyncio.sleep(0.05)
+        await broker.disconnect(job_id, mine)
+        await broker.disconnect(None, everything)
+        return job_id, [mine.get_nowait() for _ in range(mine.qsize())], [
+            everything.get_nowait() for _ in range(everything.qsize())
+        ]
+
+    try:
+        job_id, mine, everything = asyncio.run(scenario())
+    finally:
+        job_store.remove_job_listener(broker.publish_from_thread)
+
+    assert [(e["status"], e["stage"], e["percent"]) for e in mine] == [("running", None, None), ("running", "ingesting", 50.0)]
+    assert {e["jobId"] for e in mine} == {job_id}
+    assert len(everything) == 3
+
+
+def test_updates_from_other_processes_are_polled_once(tmp_path, monkeypatch):
+    _isolated_store(tmp_path, monkeypatch)
+    broker = JobEventBroker(poll_interval=0.02)  # not registered as a listener: simulates another process
+
+    async def scenario():
+        job_id = job_store.create_job("recorder.launch")
+        queue = await broker.connect(job_id)
+        await asyncio.sleep(0.01)
+        job_store.update_job_progress(job_id, {"stage": "recording", "percent": None})
+        job_store.update_job(job_id, "completed")
+        await asyncio.sleep(0.15)  # several poll ticks re-read the overlap window
+        await broker.disconnect(job_id, queue)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    events = asyncio.run(scenario())
+    # The poller sees row states, not every write; each state arrives once and in order
+    assert events and events[-1]["status"] == "completed" and events[-1]["stage"] == "recording"
+    assert [e["updatedAt"] for e in events] == sorted({e["updatedAt"] for e in events})
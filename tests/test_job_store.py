@@ -1,3 +1,5 @@
+import pytest
+
 from app import job_store
 
 
@@ -22,3 +24,76 @@ def test_update_job_status():
     assert job
     assert job["status"] == "completed"
     assert job["result"]["ok"] is True
+
+
+def _isolated_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_store, "DB_PATH", str(tmp_path / "jobs.db"))
+    job_store.init_job_store()
+
+
+def test_list_jobs_filters_and_pages_newest_first(tmp_path, monkeypatch):
+    _isolated_store(tmp_path, monkeypatch)
+    ids = [job_store.create_job("ingest.jira" if i % 2 else "recorder.launch") for i in range(7)]
+    for job_id in ids[:3]:
+        job_store.update_job(job_id, "running")
+
+    page, cursor = job_store.list_jobs(limit=4)
+    rest, last = job_store.list_jobs(limit=4, cursor=cursor)
+    assert last is None
+    assert len(page) == 4 and len(rest) == 3
+    assert {job["id"] for job in page + rest} == set(ids)
+    assert [job["updated_at"] for job in page + rest] == sorted((job["updated_at"] for job in page + rest), reverse=True)
+
+    running, _ = job_store.list_jobs(status="running", job_type=["ingest.jira"])
+    assert [job["id"] for job in running] == [ids[1]]
+    assert job_store.count_jobs() == {"running": 3, "queued": 4}
+
+    with pytest.raises(ValueError):
+        job_store.list_jobs(cursor="garbage")
+
+
+def test_compact_jobs_archives_only_old_finished_jobs(tmp_path, monkeypatch):
+    _isolated_store(tmp_path, monkeypatch)
+    old_done = job_store.create_job("ingest.jira")
+    old_running = job_store.create_job("ingest.jira")
+    fresh_done = job_store.create_job("ingest.jira")
+    job_store.update_job(old_done, "completed", result={"ok": True})
+    job_store.update_job(old_running, "running")
+    job_store.update_job(fresh_done, "failed", error="boom")
+    conn = job_store._connect()
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET updated_at = '2000-01-01T00:00:00+00:00' WHERE id IN (?, ?)", (old_done, old_running)
+        )
+    conn.close()
+
+    assert job_store.compact_jobs(30, archive=True, batch_size=1) == {"archived": 1, "deleted": 0}
+    assert job_store.get_job(old_done) is None
+    assert job_store.get_job(old_running) and job_store.get_job(fresh_done)
+    conn = job_store._connect()
+    archived = conn.execute("SELECT id, result FROM jobs_archive").fetchall()
+    conn.close()
+    assert [(row["id"], row["result"]) for row in archived] == [(old_done, '{"ok": true}')]
+
+    job_store.update_job(old_running, "failed")
+    assert job_store.compact_jobs(0) == {"archived": 0, "deleted": 0}
+
+
+def test_recorder_events_read_back_in_order_and_prune(tmp_path, monkeypatch):
+    _isolated_store(tmp_path, monkeypatch)
+    job_store.add_recorder_event("s1", {"type": "launch-requested", "sessionDir": tmp_path})
+    start = job_store.last_recorder_event_id()
+    job_store.add_recorder_event("s2", {"type": "launch-started"})
+    job_store.add_recorder_event("s1", {"type": "launch-completed"})
+
+    events = job_store.recorder_events_since(start)
+    assert [(e["sessionId"], e["event"]["type"]) for e in events] == [("s2", "launch-started"), ("s1", "launch-completed")]
+    assert job_store.recorder_events_since(0, limit=1)[0]["event"]["sessionDir"] == str(tmp_path)
+
+    conn = job_store._connect()
+    with conn:
+        conn.execute("UPDATE recorder_events SET created_at = '2000-01-01T00:00:00+00:00' WHERE id <= ?", (start,))
+    conn.close()
+    assert job_store.prune_recorder_events(24) == 1
+    assert job_store.prune_recorder_events(0) == 0
+    assert len(job_store.recorder_events_since(0)) == 2
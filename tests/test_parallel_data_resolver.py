@@ -0,0 +1,35 @@
+from app import trial_history
+from app.parallel_data_resolver import plan_reference_shards, resolve_parallel_reference_ids
+
+
+def test_round_robin_without_history():
+    shards = plan_reference_shards(["1", "2", "3", "4", "5"], 2)
+    assert shards == [["1", "3", "5"], ["2", "4"]]
+
+
+def test_bin_packs_by_estimated_duration():
+    estimates = {"slow": 100.0, "a": 30.0, "b": 30.0, "c": 30.0, "d": 10.0}
+    shards = plan_reference_shards(["a", "b", "slow", "c", "d"], 2, estimates)
+    loads = sorted(sum(estimates[r] for r in shard) for shard in shards)
+    assert loads == [100.0, 100.0]
+    assert ["slow"] in shards
+
+
+def test_unknown_ids_use_mean_estimate_and_workers_are_capped():
+    shards = plan_reference_shards(["x", "y"], 5, {"x": 10.0})
+    assert len(shards) == 2
+    assert sorted(r for shard in shards for r in shard) == ["x", "y"]
+
+
+def test_legacy_worker_assignment_unchanged():
+    assert resolve_parallel_reference_ids("10005,10003", 1, 2) == "10003"
+
+
+def test_history_estimates(tmp_path, monkeypatch):
+    monkeypatch.setattr(trial_history, "DB_PATH", str(tmp_path / "history.db"))
+    trial_history.record_trial_duration("tests/a.spec.ts", "R1", 10.0, True)
+    trial_history.record_trial_duration("tests/a.spec.ts", "R1", 20.0, True)
+    trial_history.record_trial_duration("tests/b.spec.ts", "R2", 5.0, False)
+
+    estimates = trial_history.estimate_durations(["R1", "R2", "R3"], spec="tests/a.spec.ts")
+    assert estimates == {"R1": 15.0, "R2": 5.0}
@@ -0,0 +1,62 @@
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from app.run_playwright_recorder_v2 import _wait_for_auth_ready
+
+
+class FakePage:
+    """Replays a scripted URL sequence; each wait_for_url call advances one step."""
+
+    def __init__(self, urls, idle=True):
+        self._urls = list(urls)
+        self.url = self._urls.pop(0)
+        self.main_frame = object()
+        self._idle = idle
+
+    def on(self, *_):
+        pass
+
+    def remove_listener(self, *_):
+        pass
+
+    def wait_for_url(self, predicate, wait_until, timeout):
+        while not predicate(self.url):
+            if not self._urls:
+                time.sleep(timeout / 1000)
+                raise PlaywrightTimeoutError("url")
+            self.url = self._urls.pop(0)
+
+    def wait_for_load_state(self, state, timeout):
+        if state == "networkidle" and not self._idle:
+            time.sleep(timeout / 1000)
+            raise PlaywrightTimeoutError("idle")
+
+
+def test_ready_after_sso_round_trip():
+    page = FakePage(["https://login.idp.test/sso", "https://app.example.com/home"])
+    result = _wait_for_auth_ready(page, "https://app.example.com/home", timeout_s=5)
+    assert result["ready"] is True and result["reason"] == "ready"
+    assert result["finalUrl"] == "https://app.example.com/home"
+    assert set(result["stages"]) == {"url", "load", "networkidle"}
+
+
+def test_busy_network_does_not_block_recording():
+    page = FakePage(["https://app.example.com/"], idle=False)
+    result = _wait_for_auth_ready(page, "https://app.example.com/", timeout_s=5, network_idle_s=0.2)
+    assert result["ready"] is True
+    assert result["stages"]["networkidle"] < 2
+
+
+def test_timeout_reports_stage():
+    page = FakePage(["https://login.idp.test/sso"])
+    result = _wait_for_auth_ready(page, "https://app.example.com/", timeout_s=0.3)
+    assert result["ready"] is False
+    assert result["reason"] == "timeout" and result["stage"] == "url"
+    assert result["elapsedSeconds"] >= 0.3
+
+
+def test_url_pattern_overrides_domain_match():
+    page = FakePage(["https://app.example.com/login", "https://app.example.com/dashboard"])
+    result = _wait_for_auth_ready(page, "https://app.example.com/", timeout_s=5, url_pattern=r"/dashboard")
+    assert result["ready"] is True and result["finalUrl"].endswith("/dashboard")
@@ -0,0 +1,77 @@
+import json
+
+from app.run_playwright_recorder_v2 import RecorderSession
+
+
+def _input(value, ts, xpath="/html[1]/body[1]/input[1]"):
+    return {
+        "action": "input",
+        "pageUrl": "https://example.com/form",
+        "timestamp": ts,
+        "element": {"tag": "input", "xpath": xpath},
+        "extra": {"value": value},
+    }
+
+
+def _session(tmp_path):
+    return RecorderSession(tmp_path, capture_dom=False, capture_screenshots=False, options={})
+
+
+def test_keystrokes_merge_into_one_fill_committed_on_change(tmp_path):
+    session = _session(tmp_path)
+    for i, ts in enumerate(range(1_700_000_000_000, 1_700_000_000_500, 100), start=1):
+        session.add_action(_input("hello"[:i], ts))
+    assert session.actions == []
+    assert session.should_capture(_input("hello!", 1_700_000_000_600)) is False
+
+    change = _input("hello", 1_700_000_000_600)
+    change["action"] = "change"
+    session.add_action(change)
+
+    assert len(session.actions) == 1
+    fill = session.actions[0]
+    assert fill["action"] == "fill" and fill["actionId"] == "A-001"
+    assert fill["extra"]["value"] == "hello"
+    assert fill["extra"]["inputEvents"] == 5
+    assert fill["extra"]["commitReason"] == "change"
+    assert fill["extra"]["durationMs"] == 600
+    persisted = json.loads((tmp_path / "metadata.json").read_text(encoding="utf-8"))
+    assert [a["action"] for a in persisted["actions"]] == ["fill"]
+
+
+def test_fill_commits_before_next_interaction_and_on_finalize(tmp_path):
+    session = _session(tmp_path)
+    session.add_action(_input("a", 1_700_000_000_000))
+    session.add_action(_input("ab", 1_700_000_000_100))
+    session.add_action(_input("x", 1_700_000_000_200, xpath="/html[1]/body[1]/input[2]"))
+    press = {"action": "press", "pageUrl": "https://example.com/form", "timestamp": 1_700_000_000_300,
+             "element": {"tag": "input", "xpath": "/html[1]/body[1]/input[2]"}, "extra": {"key": "Enter"}}
+    session.add_action(press)
+    session.add_action(_input("late", 1_700_000_000_400))
+    session.finalize(None, None)
+
+    summary = [(a["action"], a["extra"].get("value") or a["extra"].get("key"), a["extra"].get("commitReason")) for a in session.actions]
+    assert summary == [
+        ("fill", "ab", "switch"),
+        ("fill", "x", "enter"),
+        ("press", "Enter", None),
+        ("fill", "late", "stop"),
+    ]
+    assert [a["actionId"] for a in session.actions] == ["A-001", "A-002", "A-003", "A-004"]
+
+
+def test_capture_files_are_named_after_the_committed_action(tmp_path):
+    session = _session(tmp_path)
+    click = {"action": "click", "pageUrl": "https://example.com/form", "timestamp": 1_700_000_000_300,
+             "element": {"tag": "button", "xpath": "/html[1]/body[1]/button[1]"}, "extra": {}}
+    keystrokes = [_input("a", 1_700_000_000_000), _input("ab", 1_700_000_000_100), _input("abc", 1_700_000_000_200)]
+    for payload in (*keystrokes, click):
+        # Mirrors the recorder drain loop: the id and capture file are reserved before the action is added
+        if session.should_capture(payload):
+            payload["actionId"] = session.reserve_action_id()
+            payload["domSnapshotPath"] = f"dom/{payload['actionId']}.html"
+        session.add_action(payload)
+
+    assert [(a["action"], a["actionId"]) for a in session.actions] == [("fill", "A-001"), ("click", "A-002")]
+    for action in session.actions:
+        assert action["artifacts"]["domSnapshot"] == f"dom/{action['actionId']}.html"
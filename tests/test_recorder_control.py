@@ -0,0 +1,48 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app.recorder_control import ControlChannel, request_graceful_stop, send_control_command
+
+
+def test_commands_round_trip_in_order_with_acks(tmp_path):
+    channel = ControlChannel(tmp_path)
+    send_control_command(tmp_path, "pause")
+    send_control_command(tmp_path, "snapshot", label="checkout")
+
+    commands = channel.poll()
+    assert [c["command"] for c in commands] == ["pause", "snapshot"]
+    assert commands[1]["params"] == {"label": "checkout"}
+    assert channel.poll() == []
+
+    def recorder():
+        while not (pending := channel.poll()):
+            time.sleep(0.01)
+        channel.ack(pending[0], "ok", screenshotPath="screenshots/P-002.png")
+
+    worker = threading.Thread(target=recorder)
+    worker.start()
+    result = send_control_command(tmp_path, "resume", wait=5)
+    worker.join(5)
+    assert result["acknowledged"] is True
+    assert result["ack"]["status"] == "ok" and result["ack"]["command"] == "resume"
+
+
+def test_unknown_command_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        send_control_command(tmp_path, "reboot")
+
+
+def test_graceful_stop_requires_listening_recorder(tmp_path):
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        # No control directory: recorder is not listening, caller must fall back to signals
+        assert request_graceful_stop(tmp_path, proc, ack_timeout=0.2) is False
+        ControlChannel(tmp_path)
+        assert request_graceful_stop(tmp_path, proc, ack_timeout=0.2) is False  # no ack
+    finally:
+        proc.kill()
+        proc.wait()
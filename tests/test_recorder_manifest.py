@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app import recorder_manifest
+from app.recorder_manifest import (
+    STATUS_COMPLETE,
+    STATUS_RECORDING,
+    read_manifest,
+    wait_for_completion,
+    write_json_atomic,
+    write_manifest,
+)
+from app.run_playwright_recorder_v2 import RecorderSession
+
+
+def test_wait_returns_immediately_without_manifest(tmp_path):
+    started = time.monotonic()
+    assert wait_for_completion(tmp_path, timeout=5) is None
+    assert time.monotonic() - started < 0.5
+
+
+def test_wait_wakes_when_manifest_completes(tmp_path):
+    write_manifest(tmp_path, STATUS_RECORDING)
+    write_json_atomic(tmp_path / "metadata.json", {"actions": []})
+    timer = threading.Timer(0.2, lambda: write_manifest(tmp_path, STATUS_COMPLETE, actions=0))
+    timer.start()
+    try:
+        started = time.monotonic()
+        manifest = wait_for_completion(tmp_path, timeout=10)
+    finally:
+        timer.cancel()
+    assert manifest["status"] == STATUS_COMPLETE
+    assert manifest["artifacts"]["metadata"]["path"] == "metadata.json"
+    assert time.monotonic() - started < 3
+
+
+def test_wait_stops_when_recorder_process_is_gone(tmp_path):
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    write_json_atomic(tmp_path / "manifest.json", {"status": STATUS_RECORDING, "pid": proc.pid})
+    started = time.monotonic()
+    manifest = wait_for_completion(tmp_path, timeout=10)
+    assert manifest["status"] == STATUS_RECORDING
+    assert time.monotonic() - started < 3
+
+
+def test_recorder_session_publishes_manifest_on_finalize(tmp_path):
+    session = RecorderSession(tmp_path, capture_dom=False, capture_screenshots=False, options={})
+    assert read_manifest(tmp_path)["status"] == STATUS_RECORDING
+    session.finalize(None, None)
+    manifest = read_manifest(tmp_path)
+    assert manifest["status"] == STATUS_COMPLETE
+    assert manifest["actions"] == 0
+    assert "metadata" in manifest["artifacts"]
+    assert not [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_atomic_write_retries_replace_blocked_by_reader(tmp_path, monkeypatch):
+    real_replace = os.replace
+    calls = []
+
+    def flaky_replace(src, dst):
+        calls.append(dst)
+        if len(calls) < 3:
+            raise PermissionError(13, "The process cannot access the file", str(dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(recorder_manifest.os, "replace", flaky_replace)
+    target = tmp_path / "metadata.json"
+    write_json_atomic(target, {"ok": True})
+    assert len(calls) == 3
+    assert json.loads(target.read_text(encoding="utf-8")) == {"ok": True}
+
+    def locked(src, dst):
+        raise PermissionError(13, "The process cannot access the file", str(dst))
+
+    monkeypatch.setattr(recorder_manifest, "_REPLACE_BACKOFF", 0.001)
+    monkeypatch.setattr(recorder_manifest.os, "replace", locked)
+    with pytest.raises(PermissionError):
+        write_json_atomic(target, {"ok": False})
+    assert json.loads(target.read_text(encoding="utf-8")) == {"ok": True}
+    assert [p.name for p in tmp_path.iterdir()] == ["metadata.json"]
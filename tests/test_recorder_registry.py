@@ -0,0 +1,98 @@
+import subprocess
+import sys
+
+import pytest
+
+from app import recorder_registry
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder_registry, "DB_PATH", str(tmp_path / "registry.db"))
+    recorder_registry.init_recorder_registry()
+    return recorder_registry
+
+
+@pytest.fixture
+def sleeper():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc
+    if proc.poll() is None:
+        proc.kill()
+        proc.wait()
+
+
+def _set_owner(registry, session_id, pid):
+    conn = registry._connect()
+    try:
+        conn.execute("UPDATE recorder_processes SET owner_pid = ?, owner_start = NULL WHERE session_id = ?", (pid, session_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_register_track_and_close_session(registry, sleeper, tmp_path):
+    registry.register_process("s1", sleeper.pid, launcher="celery", session_dir=tmp_path, job_id="job-1")
+    record = registry.get_process("s1")
+    assert record["status"] == registry.STATUS_RUNNING and record["job_id"] == "job-1"
+    assert registry.is_running(record)
+    assert registry.consume_stop_request("s1") is False
+
+    registry.mark_stop_requested("s1")
+    assert registry.get_process("s1")["status"] == registry.STATUS_STOPPING
+    assert registry.consume_stop_request("s1") is True
+    assert registry.consume_stop_request("s1") is False
+
+    registry.mark_exited("s1", 0)
+    record = registry.get_process("s1")
+    assert record["status"] == registry.STATUS_EXITED and record["returncode"] == 0
+    assert not registry.is_running(record)
+    assert [r["session_id"] for r in registry.list_processes(registry.ACTIVE_STATUSES)] == []
+
+
+def test_reaper_marks_dead_and_stops_orphaned_recorders(registry, sleeper, tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REAP_ORPHANS", True)
+    registry.register_process("gone", _dead_pid(), launcher="recorder-sync")
+    registry.register_process("orphan", sleeper.pid, launcher="recorder-sync", session_dir=tmp_path)
+    _set_owner(registry, "orphan", _dead_pid())
+
+    actions = {a["sessionId"]: a for a in registry.reap_recorders(stop_timeout=1)}
+
+    assert actions["gone"]["action"] == registry.STATUS_LOST
+    assert actions["orphan"]["action"] == registry.STATUS_REAPED
+    assert actions["orphan"]["graceful"] is False
+    assert sleeper.wait(timeout=5) is not None
+    assert registry.get_process("orphan")["status"] == registry.STATUS_REAPED
+    assert registry.get_process("gone")["status"] == registry.STATUS_LOST
+
+
+def test_api_restart_keeps_live_recorders(registry, sleeper, tmp_path):
+    # The launching API process is gone (restart/reload), but the recorder is alive and heartbeating
+    registry.register_process("live", sleeper.pid, launcher="recorder-sync", session_dir=tmp_path)
+    _set_owner(registry, "live", _dead_pid())
+    registry.heartbeat(sleeper.pid)
+
+    assert registry.reap_recorders(stop_timeout=1) == []
+    assert sleeper.poll() is None
+    assert registry.is_running(registry.get_process("live"))
+
+    # A stale heartbeat is still reaped regardless of ownership
+    now = registry.get_process("live")["heartbeat_at"] + registry.HEARTBEAT_TIMEOUT + 1
+    actions = registry.reap_recorders(stop_timeout=1, now=now)
+    assert [a["action"] for a in actions] == [registry.STATUS_REAPED]
+    assert sleeper.wait(timeout=5) is not None
+
+
+def test_process_handle_stops_foreign_pid(sleeper):
+    handle = recorder_registry.ProcessHandle(sleeper.pid, recorder_registry.process_start_marker(sleeper.pid))
+    assert handle.poll() is None
+    with pytest.raises(subprocess.TimeoutExpired):
+        handle.wait(timeout=0.1)
+    handle.terminate()
+    assert handle.wait(timeout=5) is not None
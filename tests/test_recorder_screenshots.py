@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from app.recorder_screenshots import ScreenshotWriter
+from app.run_playwright_recorder_v2 import RecorderSession
+
+
+def test_writer_writes_in_background_and_skips_duplicates(tmp_path):
+    writer = ScreenshotWriter("png", dedup=True, base_dir=tmp_path)
+    first = writer.submit(tmp_path / "screenshots" / "A-001", b"frame-1")
+    second = writer.submit(tmp_path / "screenshots" / "A-002", b"frame-1")
+    third = writer.submit(tmp_path / "screenshots" / "A-003", b"frame-2")
+    results = {r.planned: r for r in writer.close()}
+
+    assert first == "screenshots/A-001.png"
+    assert (tmp_path / first).read_bytes() == b"frame-1"
+    assert not (tmp_path / second).exists()
+    assert results[second].duplicate_of == first
+    assert (tmp_path / third).exists()
+    assert writer.stats == {"written": 2, "duplicates": 1, "dropped": 0, "failed": 0}
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    writer = ScreenshotWriter("jpeg", quality=60, max_queue=1, base_dir=tmp_path)
+    assert writer.capture_kwargs() == {"type": "jpeg", "quality": 60}
+    started, gate = threading.Event(), threading.Event()
+    original = writer._process
+
+    def slow_disk(*args):
+        started.set()
+        gate.wait(5)
+        return original(*args)
+
+    monkeypatch.setattr(writer, "_process", slow_disk)
+
+    writer.submit(tmp_path / "A-001", b"a")
+    assert started.wait(5)  # worker is stuck on the first frame
+    assert writer.submit(tmp_path / "A-002", b"b") == "A-002.jpg"
+    assert writer.submit(tmp_path / "A-003", b"c") is None
+    gate.set()
+    writer.close()
+    assert writer.stats["dropped"] == 1 and writer.stats["written"] == 2
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        ScreenshotWriter("gif")
+
+
+def test_session_points_duplicates_at_original_frame(tmp_path):
+    session = RecorderSession(tmp_path, capture_dom=False, capture_screenshots=True, options={})
+    writer = ScreenshotWriter("png", dedup=True, base_dir=tmp_path)
+    for idx in (1, 2):
+        planned = writer.submit(session.screenshot_dir / f"A-{idx:03}", b"same")
+        session.add_action({"action": "click", "pageUrl": "https://example.com", "screenshotPath": planned,
+                            "element": {"xpath": f"/html[1]/body[1]/button[{idx}]"}})
+    session.apply_screenshot_results(writer.close())
+
+    shots = [(a["screenshotPath"], a["artifacts"]["screenshot"]) for a in session.actions]
+    assert shots == [("screenshots/A-001.png",) * 2, ("screenshots/A-001.png",) * 2]
+    assert session.actions[1]["screenshotDeduplicated"] is True
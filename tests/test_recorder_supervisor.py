@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+
+from app import recorder_registry, recorder_supervisor
+from app.recorder_supervisor import RecorderCapacityError, RecordingSupervisor, ResourceLimits
+
+SLEEP_CMD = [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+@pytest.fixture
+def supervisor(tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder_registry, "DB_PATH", str(tmp_path / "registry.db"))
+    events = []
+    sup = RecordingSupervisor(
+        max_sessions=1,
+        limits=ResourceLimits(memory_mb=1),
+        usage_interval=60,
+        cgroup_root="",
+        publish=lambda session_id, message: events.append((session_id, message)),
+    )
+    sup.events = events
+    yield sup
+    for session in list(sup._sessions.values()):
+        if session.process.poll() is None:
+            session.process.kill()
+            session.process.wait()
+
+
+def test_launch_enforces_session_budget(supervisor, tmp_path):
+    process = supervisor.launch("s1", SLEEP_CMD, launcher="recorder-sync", session_dir=tmp_path)
+    assert recorder_registry.get_process("s1")["pid"] == process.pid
+    with pytest.raises(RecorderCapacityError):
+        supervisor.launch("s2", SLEEP_CMD, launcher="recorder-sync")
+    capacity = supervisor.capacity()
+    assert capacity["active"] == 1 and capacity["available"] == 0
+    assert [s["sessionId"] for s in capacity["sessions"]] == ["s1"]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="usage sampling reads /proc")
+def test_usage_events_and_soft_memory_ceiling(supervisor, tmp_path):
+    process = supervisor.launch("s1", SLEEP_CMD, launcher="recorder-sync", session_dir=tmp_path)
+    for _ in range(3):
+        supervisor.sample()
+
+    usage = [m for _, m in supervisor.events if m["type"] == "resource-usage"]
+    assert len(usage) == 3
+    assert usage[-1]["usage"]["memoryMb"] > 1 and usage[-1]["usage"]["processes"] >= 1
+    assert usage[-1]["usage"]["cpuPercent"] is not None
+    assert [m["type"] for _, m in supervisor.events].count("resource-limit") == 1
+    assert list((tmp_path / "control").glob("*.json"))  # graceful stop requested
+
+    process.kill()
+    process.wait()
+    supervisor.sample()
+    assert supervisor.events[-1][1]["type"] == "resource-summary"
+    assert recorder_registry.get_process("s1")["status"] == recorder_registry.STATUS_EXITED
+    assert supervisor.capacity()["available"] == 1
+
+
+def test_unsupported_limits_are_reported(supervisor, tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder_supervisor, "_proc_sampling_available", lambda: False)
+    supervisor.limits = ResourceLimits(memory_mb=512, cpu_percent=50)
+    warnings = supervisor.limit_warnings()
+    assert len(warnings) == 2
+    assert "memory ceiling is not enforced" in warnings[0]
+    assert supervisor.capacity()["warnings"] == warnings
+
+    supervisor.launch("s1", SLEEP_CMD, launcher="recorder-sync", session_dir=tmp_path)
+    limit_events = [m for _, m in supervisor.events if m["type"] == "resource-limit"]
+    assert limit_events and limit_events[0]["warnings"] == warnings
+
+
+@pytest.mark.skipif(not hasattr(os, "getpriority"), reason="POSIX scheduling priority")
+def test_nice_applied_after_spawn_without_preexec(supervisor, tmp_path, monkeypatch):
+    supervisor.limits = ResourceLimits(nice=5)
+    captured = {}
+    real_popen = recorder_supervisor.subprocess.Popen
+
+    def popen(cmd, **kwargs):
+        captured.update(kwargs)
+        return real_popen(cmd, **kwargs)
+
+    monkeypatch.setattr(recorder_supervisor.subprocess, "Popen", popen)
+    process = supervisor.launch("s1", SLEEP_CMD, launcher="recorder-sync", session_dir=tmp_path)
+    assert "preexec_fn" not in captured
+    expected = min(19, os.getpriority(os.PRIO_PROCESS, 0) + 5)
+    assert os.getpriority(os.PRIO_PROCESS, process.pid) == expected
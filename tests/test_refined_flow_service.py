@@ -45,3 +45,31 @@ def test_finalize_session_with_metadata(tmp_path: Path, monkeypatch) -> None:
     assert result.auto_ingest_result == fake_result
     assert any("Missing artefacts" in warning for warning in result.warnings)
 
+
+
+def test_finalize_reports_stage_progress(tmp_path: Path, monkeypatch) -> None:
+    from app import job_store
+
+    monkeypatch.setattr(job_store, "DB_PATH", str(tmp_path / "jobs.db"))
+    job_store.init_job_store()
+    session_dir = tmp_path / "session"
+    session_dir.mkdir()
+    (session_dir / "metadata.json").write_text(json.dumps({"options": {}, "artifacts": {}}))
+    monkeypatch.setattr(
+        refined_flow_service,
+        "auto_refine_and_ingest",
+        lambda _session, _metadata: {"timings": {"refine": 0.1, "ingest": 0.2}},
+    )
+    job_id = job_store.create_job("unit.test.finalize")
+    events = []
+
+    result = finalize_recorder_session(session_dir, job_id=job_id, on_event=events.append, enriched_artifacts=False)
+
+    stages = {stage["stage"]: stage for stage in result.stages}
+    assert stages["wait"]["status"] == "completed"
+    assert stages["scan"]["status"] == "completed"
+    assert stages["refine-ingest"]["breakdown"] == {"refine": 0.1, "ingest": 0.2}
+    assert stages["enriched-artifacts"]["status"] == "skipped"
+    assert all(event["type"] == "finalize-stage" for event in events)
+    progress = job_store.get_job(job_id)["progress"]
+    assert progress["completed"] == progress["total"] == len(result.stages)
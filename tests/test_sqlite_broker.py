@@ -0,0 +1,90 @@
+import time
+
+from kombu import Connection
+
+from app import sqlite_broker  # noqa: F401 - registers the sqlite:// transport
+
+
+def _connection(tmp_path, visibility_timeout=60.0):
+    return Connection(
+        "sqlite://",
+        transport_options={"database": str(tmp_path / "broker.db"), "visibility_timeout": visibility_timeout},
+    )
+
+
+def _rows(tmp_path):
+    conn = sqlite_broker._connect(str(tmp_path / "broker.db"))
+    try:
+        return conn.execute("SELECT queue, reserved_until IS NOT NULL AS leased FROM celery_messages ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_messages_survive_until_acked(tmp_path):
+    with _connection(tmp_path) as conn:
+        queue = conn.SimpleQueue("jobs")
+        queue.put({"n": 1})
+        queue.put({"n": 2})
+        first = queue.get(timeout=1)
+        assert first.payload == {"n": 1}
+        assert [tuple(row) for row in _rows(tmp_path)] == [("jobs", 1), ("jobs", 0)]
+        first.ack()
+        assert len(_rows(tmp_path)) == 1
+        queue.close()
+
+    # A new process sees the message that was never consumed
+    with _connection(tmp_path) as conn:
+        queue = conn.SimpleQueue("jobs")
+        second = queue.get(timeout=1)
+        assert second.payload == {"n": 2} and not second.delivery_info.get("redelivered")
+        second.ack()
+        queue.close()
+    assert _rows(tmp_path) == []
+
+
+def test_lapsed_lease_is_redelivered_and_requeue_releases(tmp_path):
+    with _connection(tmp_path, visibility_timeout=0.2) as conn:
+        queue = conn.SimpleQueue("jobs")
+        queue.put({"n": 1})
+        queue.get(timeout=1)  # consumed, never acked: the "worker" crashed
+        # Simulate the crash: drop the channel without releasing the lease
+        queue.channel._stop_renewal.set()
+        queue.channel.do_restore = False
+
+    time.sleep(0.3)
+    with _connection(tmp_path) as conn:
+        queue = conn.SimpleQueue("jobs")
+        again = queue.get(timeout=1)
+        assert again.payload == {"n": 1}
+        assert again.delivery_info["redelivered"] is True
+        assert sqlite_broker._connect(str(tmp_path / "broker.db")).execute(
+            "SELECT deliveries FROM celery_messages"
+        ).fetchone()[0] == 2
+        again.requeue()
+        assert [tuple(row) for row in _rows(tmp_path)] == [("jobs", 0)]
+        queue.get(timeout=1).ack()
+        queue.close()
+    assert _rows(tmp_path) == []
+
+
+def test_clean_shutdown_releases_unacked_messages(tmp_path):
+    with _connection(tmp_path) as conn:
+        queue = conn.SimpleQueue("jobs")
+        queue.put({"n": 1})
+        queue.get(timeout=1)
+        queue.close()
+    assert [tuple(row) for row in _rows(tmp_path)] == [("jobs", 0)]
+
+
+def test_leases_are_renewed_while_unacked(tmp_path):
+    with _connection(tmp_path, visibility_timeout=3.0) as conn:
+        queue = conn.SimpleQueue("jobs")
+        queue.put({"n": 1})
+        message = queue.get(timeout=1)
+        db = sqlite_broker._connect(str(tmp_path / "broker.db"))
+        leased_until = db.execute("SELECT reserved_until FROM celery_messages").fetchone()[0]
+        time.sleep(1.3)  # renewal runs every visibility_timeout / 3
+        assert db.execute("SELECT reserved_until FROM celery_messages").fetchone()[0] > leased_until
+        db.close()
+        message.ack()
+        queue.close()
@@ -1,7 +1,13 @@
+import asyncio
 import subprocess
+import sys
+import textwrap
 from pathlib import Path
 
-from app import job_store, tasks
+from app import job_store, recorder_registry, tasks
+from app.api.events import RecorderEventBroker
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
 
 
 def setup_module(module):
@@ -36,6 +42,40 @@ def test_enqueue_recorder_launch(tmp_path: Path, monkeypatch):
     assert any(msg[0] == session_id for msg in events)
 
 
+def test_redelivered_launch_follows_running_recorder(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(tasks, "RECORDINGS_DIR", tmp_path / "recordings")
+    events: list[dict] = []
+
+    class DummyEvents:
+        def publish_from_thread(self, _session_id: str, message: dict) -> None:
+            events.append(message)
+
+    def _second_browser(*_args, **_kwargs):
+        raise AssertionError("a redelivered launch must not start another recorder")
+
+    monkeypatch.setattr(tasks, "recorder_events", DummyEvents())
+    monkeypatch.setattr(tasks, "_run_recorder_subprocess", _second_browser)
+
+    # The recorder started by the first delivery outlived the worker that launched it
+    session_id = "redelivered-session"
+    session_dir = tmp_path / "recordings" / session_id
+    session_dir.mkdir(parents=True)
+    recorder = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.3)"])
+    recorder_registry.register_process(session_id, recorder.pid, launcher="celery", session_dir=session_dir)
+    try:
+        job_id, _ = tasks.enqueue_recorder_launch({"url": "https://example.com", "sessionId": session_id})
+    finally:
+        recorder.kill()
+        recorder.wait()
+
+    job = job_store.get_job(job_id)
+    assert job["status"] == "completed"
+    assert job["result"]["sessionDir"] == str(session_dir)
+    assert [e["type"] for e in events][:1] == ["launch-resumed"]
+    assert not any(e["type"] == "launch-started" for e in events)
+    assert recorder_registry.get_process(session_id)["status"] == recorder_registry.STATUS_EXITED
+
+
 def test_stop_recorder_session_handles_running_process(monkeypatch, tmp_path: Path):
     session_id = "demo-session"
     launch_job_id = job_store.create_job("recorder.launch", {"sessionId": session_id})
@@ -116,3 +156,60 @@ def test_vector_delete_tasks(monkeypatch):
     job_id = tasks.enqueue_vector_delete_by_source("jira")
     job = job_store.get_job(job_id)
     assert job["status"] == "completed"
+
+
+def test_launch_events_from_a_worker_process_reach_api_subscribers(tmp_path: Path, monkeypatch):
+    db_path = str(tmp_path / "jobs.db")
+    monkeypatch.setattr(job_store, "DB_PATH", db_path)
+    job_store.init_job_store()
+    # Runs the task the way a separate Celery worker does: no subscriber, so no captured loop
+    worker_script = textwrap.dedent(
+        """
+        import sys
+        from pathlib import Path
+        from app import job_store, recorder_registry, tasks
+        from app.services import refined_flow_service
+
+        def _skip_finalize(*_args, **_kwargs):
+            raise RuntimeError("finalize skipped in test")
+
+        job_store.DB_PATH = recorder_registry.DB_PATH = sys.argv[1]
+        tasks.RECORDINGS_DIR = Path(sys.argv[2])
+        tasks._run_recorder_subprocess = lambda cmd, session_dir, session_id=None, job_id=None: (0, "", "")
+        refined_flow_service.finalize_recorder_session = _skip_finalize
+        job_id = job_store.create_job("recorder.launch", {})
+        tasks.launch_recorder_session_task(job_id, {"url": "https://example.com", "sessionId": sys.argv[3]})
+        """
+    )
+    broker = RecorderEventBroker(poll_interval=0.05)
+    session_id = "worker-session"
+
+    async def scenario():
+        queue = await broker.connect(session_id)
+        other = await broker.connect("other-session")
+        await asyncio.sleep(0.1)  # the poller has taken its starting cursor
+        worker = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: subprocess.run(
+                [sys.executable, "-c", worker_script, db_path, str(tmp_path / "recordings"), session_id],
+                cwd=str(REPO_ROOT),
+                capture_output=True,
+                text=True,
+                timeout=120,
+            ),
+        )
+        await asyncio.sleep(0.3)
+        await broker.disconnect(session_id, queue)
+        await broker.disconnect("other-session", other)
+        return worker, [queue.get_nowait() for _ in range(queue.qsize())], other.qsize()
+
+    worker, events, other_count = asyncio.run(scenario())
+
+    assert worker.returncode == 0, worker.stderr
+    assert [e["type"] for e in events] == [
+        "launch-requested",
+        "launch-started",
+        "auto-finalize-error",
+        "launch-completed",
+    ]
+    assert other_count == 0
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from app.test_case_generator import compile_template_plan, map_llm_to_template
+
+
+def test_generic_plan_is_compiled_once_per_layout() -> None:
+    columns = ("Test ID", "Scenario", "Test Steps", "Expected Result", "Grid", "Notes")
+    compile_template_plan.cache_clear()
+    cases = [
+        {"id": "TC1", "title": "Create supplier", "steps": ["Open", "Save"], "expected": "Saved", "assumptions": ["seeded"]},
+        {"id": "TC2", "title": "Delete supplier", "steps": "Delete", "expected": "Gone"},
+    ]
+
+    mapped = map_llm_to_template(cases, pd.DataFrame(columns=list(columns)))
+    map_llm_to_template(cases[:1], pd.DataFrame(columns=list(columns)))
+
+    assert compile_template_plan(columns).fields == ("id", "title", "steps", "expected", "", "assumptions")
+    assert compile_template_plan.cache_info().misses == 1
+    assert mapped.to_dict("records") == [
+        {"Test ID": "TC1", "Scenario": "Create supplier", "Test Steps": "1. Open\n2. Save",
+         "Expected Result": "Saved", "Grid": "", "Notes": "seeded"},
+        {"Test ID": "TC2", "Scenario": "Delete supplier", "Test Steps": "1. Delete",
+         "Expected Result": "Gone", "Grid": "", "Notes": ""},
+    ]
+
+
+def test_detailed_flow_merges_repeated_actions_and_numbers_titles() -> None:
+    template = pd.DataFrame(columns=["SL", "Action", "Navigation Steps", "Key Data Element Examples", "Expected Results"])
+    cases = [
+        {
+            "title": "Create supplier",
+            "expected": "Supplier created",
+            "step_details": [
+                {"action": "Navigate", "navigation": "Open Suppliers"},
+                {"action": "Enter", "navigation": "Enter name", "data": "ACME"},
+                {"action": "Enter", "navigation": "Enter tax id", "data": "123"},
+                {"action": "Enter", "navigation": "Confirmation message displayed"},
+            ],
+        }
+    ]
+
+    mapped = map_llm_to_template(cases, template)
+
+    assert mapped["SL"].tolist() == [1, 1, 2, 5, 6]
+    assert mapped["Action"].tolist() == ["Create supplier", "Navigate", "Enter", "Enter", "End of Task"]
+    assert mapped.loc[2, "Navigation Steps"] == "Enter name\n3. Enter tax id"
+    assert mapped.loc[2, "Key Data Element Examples"] == "ACME\n3. 123"
+    assert mapped.loc[2, "Expected Results"] == "4. Confirmation message displayed"
+    assert mapped.loc[3, "Expected Results"] == "Supplier created"
@@ -0,0 +1,64 @@
+from io import BytesIO
+
+from openpyxl import Workbook
+
+from app import template_utils
+from app.template_utils import TemplateCache, load_excel_template
+
+
+def _template_bytes(*headers: str) -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(headers))
+    ws.append(["1", "Login", "Open the app"])
+    ws.auto_filter.ref = "A1:C2"
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def test_template_cache_parses_each_distinct_template_once(monkeypatch) -> None:
+    cache = TemplateCache(max_entries=4, max_bytes=0)
+    parses = []
+    original = template_utils._parse_template
+    monkeypatch.setattr(template_utils, "_parse_template", lambda *a: parses.append(a) or original(*a))
+
+    raw = _template_bytes("SL", "Action", "Navigation Steps")
+    first = cache.load(raw)
+    second = cache.load(bytes(raw))
+
+    assert len(parses) == 1 and second is first
+    assert list(first.frame().columns) == ["SL", "Action", "Navigation Steps"]
+    assert b"autoFilter" not in parses[0][1]
+    frame = first.frame()
+    frame.loc[0, "Action"] = "changed"
+    assert first.frame().loc[0, "Action"] == "Login"
+    assert cache.stats() == {"entries": 1, "bytes": first.size, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_template_cache_evicts_least_recently_used() -> None:
+    cache = TemplateCache(max_entries=2, max_bytes=0)
+    a, b, c = (_template_bytes(name, "Action", "Steps") for name in ("A", "B", "C"))
+
+    cache.load(a)
+    cache.load(b)
+    cache.load(a)
+    cache.load(c)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    cache.load(a)
+    assert cache.stats()["hits"] == 2
+    cache.load(b)
+    assert cache.stats()["misses"] == 4
+
+    tiny = TemplateCache(max_entries=0, max_bytes=1)
+    assert list(tiny.load(a).frame().columns) == ["A", "Action", "Steps"]
+    assert tiny.stats()["entries"] == 0
+
+
+def test_load_excel_template_accepts_bytes_and_file_objects() -> None:
+    raw = _template_bytes("ID", "Title", "Steps")
+    from_bytes = load_excel_template(raw)
+    from_file = load_excel_template(BytesIO(raw))
+    assert list(from_bytes.columns) == list(from_file.columns) == ["ID", "Title", "Steps"]
@@ -0,0 +1,162 @@
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+from app.services.config_service import update_test_manager_entries, update_test_manager_entry
+from app.services.testmanager_service import get_test_manager
+
+
+def _write_manager(root: Path, ids) -> Path:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "ExecutionPlan"
+    ws.append(["TestCaseID", "TestCaseDescription", "Execute", "DatasheetName", "ReferenceID", "IDName"])
+    for case_id in ids:
+        ws.append([case_id, f"{case_id} description", "No", None, None, None])
+    path = root / "testmanager.xlsx"
+    wb.save(path)
+    return path
+
+
+def _execute_column(path: Path):
+    ws = load_workbook(path)["ExecutionPlan"]
+    return {row[0]: row[2] for row in ws.iter_rows(min_row=2, values_only=True)}
+
+
+def test_update_matches_exact_then_fuzzy_and_creates(tmp_path: Path) -> None:
+    path = _write_manager(tmp_path, ["create_supplier", "approve_purchase_order_flow"])
+
+    exact = update_test_manager_entry(tmp_path, "CREATE_SUPPLIER", datasheet="Supplier.xlsx")
+    fuzzy = update_test_manager_entry(tmp_path, "purchase order approve")
+    created = update_test_manager_entry(tmp_path, "new_scenario")
+
+    assert exact["mode"] == "updated" and exact["matched_row"] == 2
+    assert fuzzy["matched_row"] == 3
+    assert created["mode"] == "created" and created["matched_row"] == 4
+    assert _execute_column(path) == {
+        "create_supplier": "Yes",
+        "approve_purchase_order_flow": "Yes",
+        "new_scenario": "Yes",
+    }
+    assert update_test_manager_entry(tmp_path, "create_supplier")["mode"] == "unchanged"
+
+
+def test_bulk_update_and_rename_share_the_cached_index(tmp_path: Path) -> None:
+    path = _write_manager(tmp_path, [f"case_{i}" for i in range(200)])
+
+    results = update_test_manager_entries(
+        tmp_path, [{"scenario": f"case_{i}", "execute_value": "Yes"} for i in range(0, 200, 2)]
+    )
+
+    assert all(result["mode"] == "updated" for result in results)
+    values = _execute_column(path)
+    assert values["case_0"] == "Yes" and values["case_1"] == "No"
+
+    manager = get_test_manager(path)
+    assert manager.rename("case_1", "renamed_case") == 3
+    assert manager.find_row("renamed_case") == 3
+    assert manager.rename("missing", "other") is None
+    assert manager.rows()[1]["TestCaseID"] == "renamed_case"
+
+
+def test_external_edit_invalidates_cache(tmp_path: Path) -> None:
+    path = _write_manager(tmp_path, ["alpha_case"])
+    manager = get_test_manager(path)
+    assert [row["TestCaseID"] for row in manager.rows()] == ["alpha_case"]
+
+    _write_manager(tmp_path, ["alpha_case", "beta_case"])
+
+    assert [row["TestCaseID"] for row in manager.rows()] == ["alpha_case", "beta_case"]
+
+
+def test_corrupt_workbook_is_reported_as_missing(tmp_path: Path) -> None:
+    (tmp_path / "testmanager.xlsx").write_bytes(b"not a workbook")
+    assert update_test_manager_entry(tmp_path, "create_supplier") is None
+
+
+def test_scenario_references_streams_and_caches_by_hash(tmp_path: Path, monkeypatch) -> None:
+    from app.services import testmanager_service
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "ExecutionPlan"
+    ws.append(["TestCaseID", "TestCaseDescription", "Execute", "DatasheetName", "ReferenceID", "IDName"])
+    ws.append(["Create_Supplier", "desc", "Yes", "Supplier.xlsx", "1001, 1002;1003", "SupplierID"])
+    ws.append(["create_supplier", "duplicate", "Yes", None, "9999", None])
+    path = tmp_path / "testmanager.xlsx"
+    wb.save(path)
+
+    refs = testmanager_service.scenario_references(path, " create_supplier ")
+    assert refs.reference_ids == ("1001", "1002", "1003")
+    assert refs.id_name == "SupplierID" and refs.datasheet == "Supplier.xlsx"
+    assert testmanager_service.scenario_references(path, "unknown") is None
+
+    parses = []
+    original = testmanager_service._parse_reference_catalog
+    monkeypatch.setattr(
+        testmanager_service, "_parse_reference_catalog", lambda p: parses.append(p) or original(p)
+    )
+    path.touch()  # new mtime, same content: served from the hash-validated cache
+    testmanager_service.scenario_references(path, "create_supplier")
+    assert parses == []
+
+
+def _scan_match(ids, scenario):
+    """Reference implementation: the original row-by-row scan of update_test_manager_entry."""
+    from app.services.testmanager_service import _normalise_keyword, _scenario_tokens
+
+    stripped = scenario.strip()
+    for row, case_id in ids:
+        if case_id and stripped and case_id.lower() == stripped.lower():
+            return row
+    norm, tokens = _normalise_keyword(scenario), set(_scenario_tokens(scenario))
+    best_row, best_score = None, 0
+    for row, case_id in ids:
+        if not case_id:
+            continue
+        id_norm = _normalise_keyword(case_id)
+        if norm and id_norm and (norm in id_norm or id_norm in norm):
+            return row
+        score = len(tokens & set(_scenario_tokens(case_id)))
+        if tokens and score > best_score:
+            best_row, best_score = row, score
+    return best_row if best_score >= 2 else None
+
+
+def test_scenario_index_matches_the_row_scan() -> None:
+    import random
+
+    from app.services.testmanager_service import ScenarioIndex
+
+    rng = random.Random(7)
+    words = ["create", "supplier", "invoice", "approve", "order", "po", "team", "project", "user", "Login"]
+    ids = [(row, "_".join(rng.sample(words, rng.randint(1, 3)))) for row in range(2, 300)]
+    ids.append((300, ""))
+    index = ScenarioIndex()
+    for row, case_id in ids:
+        index.set(row, "id", case_id)
+
+    queries = [" ".join(rng.sample(words, rng.randint(1, 4))) for _ in range(200)]
+    queries += ["CREATE_SUPPLIER", "supp", "x", "", "approve invoice now"]
+    for query in queries:
+        assert index.match_id(query) == _scan_match(ids, query), query
+
+
+def test_scenario_index_ranks_descriptions_and_typos() -> None:
+    from app.services.testmanager_service import ScenarioIndex
+
+    index = ScenarioIndex()
+    rows = {
+        2: ("TC_001", "Create a new supplier with bank details"),
+        3: ("TC_002", "Approve purchase order"),
+        4: ("create_supplier", "Supplier onboarding"),
+    }
+    for row, (case_id, description) in rows.items():
+        index.set(row, "id", case_id)
+        index.set(row, "description", description)
+
+    ranked = index.search("create suplier", limit=3)
+    assert [candidate.row for candidate in ranked[:2]] == [4, 2]
+    assert index.search("tc_002")[0].score == 1.0
+    index.set(3, "description", "Reject purchase order")
+    assert index.search("approve purchase")[0].description == "Reject purchase order"
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import sys
+
+from app import trial_results
+from app.trial_results import ResultCollector, parse_json_report, with_json_report
+from app.trial_scheduler import TrialScheduler
+from app.trial_stream import TrialRunSpec, stream_trial_runs
+
+REPORT = {
+    "suites": [
+        {
+            "title": "tests/login.spec.ts",
+            "file": "tests/login.spec.ts",
+            "specs": [],
+            "suites": [
+                {
+                    "title": "Login",
+                    "file": "tests/login.spec.ts",
+                    "specs": [
+                        {
+                            "title": "signs in",
+                            "file": "tests/login.spec.ts",
+                            "line": 12,
+                            "tests": [
+                                {
+                                    "projectName": "chromium",
+                                    "status": "flaky",
+                                    "results": [
+                                        {"status": "failed", "duration": 900, "errors": [{"message": "timeout"}]},
+                                        {
+                                            "status": "passed",
+                                            "duration": 400,
+                                            "attachments": [{"name": "screenshot", "contentType": "image/png", "path": "a.png"}],
+                                        },
+                                    ],
+                                }
+                            ],
+                        },
+                        {
+                            "title": "skipped one",
+                            "file": "tests/login.spec.ts",
+                            "line": 30,
+                            "tests": [{"projectName": "chromium", "status": "skipped", "results": [{"status": "skipped", "duration": 0}]}],
+                        },
+                    ],
+                }
+            ],
+        }
+    ]
+}
+
+
+def test_parse_json_report_normalizes_tests():
+    records = parse_json_report(REPORT)
+    assert [r.status for r in records] == ["flaky", "skipped"]
+    flaky = records[0]
+    assert flaky.title == "Login › signs in"
+    assert flaky.retries == 1 and flaky.duration_ms == 1300
+    assert flaky.attachments == [{"name": "screenshot", "contentType": "image/png", "path": "a.png"}]
+    assert flaky.error == "timeout"
+
+
+def test_line_summary_fallback_detects_skip_only_runs():
+    collector = ResultCollector()
+    collector.feed_text("Running 2 tests using 1 worker\n  1) [chromium] › a.spec.ts\n  2 skipped\n")
+    assert collector.only_skipped
+    assert collector.success(0) is False
+
+    collector = ResultCollector()
+    collector.feed_text("  1 skipped\n  3 passed (4.2s)\n")
+    assert collector.success(0) is True
+    assert collector.counts == {"skipped": 1, "passed": 3}
+
+
+def test_with_json_report_extends_reporter():
+    cmd, env, path = with_json_report(["npx", "playwright", "test", "a.spec.ts", "--reporter=line"], {"A": "1"})
+    assert "--reporter=line,json" in cmd
+    assert env["PLAYWRIGHT_JSON_OUTPUT_NAME"] == path and env["A"] == "1"
+
+
+def test_stream_stores_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(trial_results, "DB_PATH", str(tmp_path / "results.db"))
+    report_path = tmp_path / "report.json"
+    code = (
+        "import json, os, sys; "
+        f"open(os.environ['REPORT'], 'w').write({json.dumps(json.dumps(REPORT))}); "
+        "print('  1 flaky'); print('  1 skipped')"
+    )
+    spec = TrialRunSpec(
+        label="R1",
+        cmd=[sys.executable, "-c", code],
+        cwd=".",
+        env={"REPORT": str(report_path)},
+        report_path=str(report_path),
+        spec_name="tests/login.spec.ts",
+    )
+
+    async def run():
+        return [e async for e in stream_trial_runs([spec], scheduler=TrialScheduler(1))]
+
+    events = asyncio.run(run())
+    single = next(e for e in events if e["phase"] == "done-single")
+    assert single["success"] is True
+    assert single["results"] == {"counts": {"flaky": 1, "skipped": 1}, "tests": 2}
+    assert not report_path.exists()
+
+    stored = trial_results.query_results(run_id=single["runId"])
+    assert {r["status"] for r in stored} == {"flaky", "skipped"}
+    assert trial_results.query_results(spec="tests/login.spec.ts", status="flaky")[0]["reference_id"] == "R1"
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+from app.trial_scheduler import TrialScheduler
+
+
+def test_budget_limits_concurrent_runs_in_fifo_order():
+    scheduler = TrialScheduler(max_browsers=2)
+    first = scheduler.submit("a")
+    second = scheduler.submit("b")
+    third = scheduler.submit("c")
+    fourth = scheduler.submit("d")
+
+    assert first.granted and second.granted
+    assert not third.granted and third.position == 1
+    assert fourth.position == 2
+
+    first.release(returncode=0)
+    assert third.granted and third.position == 0
+    assert fourth.position == 1
+    assert scheduler.snapshot()["inUse"] == 2
+
+
+def test_priority_and_cancellation():
+    scheduler = TrialScheduler(max_browsers=1)
+    running = scheduler.submit("running")
+    low = scheduler.submit("low")
+    high = scheduler.submit("high", priority=5)
+    assert high.position == 1 and low.position == 2
+
+    high.release()  # leaves the queue without ever running
+    assert high.record.status == "cancelled"
+    running.release(returncode=1)
+    assert low.granted
+    assert running.record.status == "failed"
+
+
+def test_oversized_request_is_capped_to_budget():
+    scheduler = TrialScheduler(max_browsers=2)
+    ticket = scheduler.submit("wide", browsers=5)
+    assert ticket.granted and ticket.record.browsers == 2
+
+
+def test_async_positions_follow_queue():
+    async def scenario():
+        scheduler = TrialScheduler(max_browsers=1)
+        holder = scheduler.submit("holder")
+        waiter = scheduler.submit("waiter")
+        seen = []
+
+        async def follow():
+            async for position in waiter.positions():
+                seen.append(position)
+
+        task = asyncio.create_task(follow())
+        await asyncio.sleep(0.05)
+        # Release from another thread, as the synchronous executor would
+        threading.Thread(target=holder.release).start()
+        await asyncio.wait_for(task, 2)
+        return seen, waiter.granted
+
+    seen, granted = asyncio.run(scenario())
+    assert seen == [1]
+    assert granted
+
+
+def test_snapshot_accounts_finished_runs():
+    scheduler = TrialScheduler(max_browsers=1)
+    with scheduler.slot("spec.ts", source="executor") as ticket:
+        ticket.attach_pid(1234)
+    snap = scheduler.snapshot()
+    assert snap["inUse"] == 0
+    assert snap["recent"][0]["pid"] == 1234
+    assert snap["recent"][0]["source"] == "executor"
+    assert snap["totals"]["completed"] == 1
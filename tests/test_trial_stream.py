@@ -0,0 +1,130 @@
+import asyncio
+import sys
+import threading
+import time
+
+from app import trial_stream
+from app.trial_scheduler import TrialScheduler
+from app.trial_stream import TrialRunSpec, stream_trial_runs
+
+
+def _py(label: str, code: str) -> TrialRunSpec:
+    return TrialRunSpec(label=label, cmd=[sys.executable, "-c", code], cwd=".")
+
+
+async def _collect(runs, **kwargs):
+    return [evt async for evt in stream_trial_runs(runs, **kwargs)]
+
+
+def test_multiplexes_runs_and_batches_lines():
+    runs = [
+        _py("A", "print('\\n'.join(f'a{i}' for i in range(20)))"),
+        _py("B", "import sys; print('b0'); sys.exit(3)"),
+    ]
+    events = asyncio.run(_collect(runs, batch_lines=50, batch_interval=0.2))
+
+    lines_a = [
+        line
+        for evt in events
+        if evt["phase"] == "chunk" and evt.get("referenceId") == "A"
+        for line in evt["data"].split("\n")
+    ]
+    assert lines_a == [f"a{i}" for i in range(20)]
+    # 20 lines should arrive in far fewer frames than lines
+    assert sum(1 for e in events if e["phase"] == "chunk" and e.get("referenceId") == "A") < 20
+
+    singles = {e["referenceId"]: e for e in events if e["phase"] == "done-single"}
+    assert singles["A"]["success"] is True
+    assert singles["B"]["success"] is False and singles["B"]["returncode"] == 3
+    assert events[-1] == {"phase": "done", "success": False, "runs": 2}
+
+
+def test_unlabeled_run_and_launch_failure():
+    events = asyncio.run(_collect([_py("", "print('hi')")]))
+    assert events[0]["phase"] == "running" and "referenceId" not in events[0]
+    assert events[-1]["success"] is True
+
+    events = asyncio.run(_collect([TrialRunSpec(label="x", cmd=["/nonexistent/playwright"], cwd=".")]))
+    assert any(e["phase"] == "done-single" and e["success"] is False for e in events)
+    assert events[-1]["success"] is False
+
+
+def test_closing_stream_terminates_children():
+    async def scenario():
+        gen = stream_trial_runs([_py("slow", "import time; print('up', flush=True); time.sleep(60)")])
+        started = time.monotonic()
+        async for evt in gen:
+            if evt["phase"] == "chunk":
+                break
+        await gen.aclose()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 10
+
+
+def test_falls_back_to_threads_without_loop_subprocess_support(monkeypatch):
+    async def unsupported(*args, **kwargs):
+        raise NotImplementedError
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", unsupported)
+    runs = [_py("A", "print('\\n'.join(f'a{i}' for i in range(5)))"), _py("B", "import sys; sys.exit(2)")]
+    events = asyncio.run(_collect(runs))
+
+    lines_a = [line for e in events if e["phase"] == "chunk" and e.get("referenceId") == "A" for line in e["data"].split("\n")]
+    assert lines_a == [f"a{i}" for i in range(5)]
+    singles = {e["referenceId"]: e for e in events if e["phase"] == "done-single"}
+    assert singles["A"]["success"] is True
+    assert singles["B"]["returncode"] == 2
+    assert not any("[launch-error]" in e.get("data", "") for e in events)
+
+    async def cancel_slow():
+        gen = stream_trial_runs([_py("slow", "import time; print('up', flush=True); time.sleep(60)")])
+        async for evt in gen:
+            if evt["phase"] == "chunk":
+                break
+        started = time.monotonic()
+        await gen.aclose()
+        return time.monotonic() - started
+
+    assert asyncio.run(cancel_slow()) < 10
+
+
+def test_runs_beyond_budget_are_queued():
+    scheduler = TrialScheduler(max_browsers=1)
+    runs = [_py("first", "print('1')"), _py("second", "print('2')")]
+    events = asyncio.run(_collect(runs, scheduler=scheduler))
+
+    queued = [e for e in events if e["phase"] == "queued"]
+    assert queued == [{"phase": "queued", "position": 1, "referenceId": "second"}]
+    phases = [(e["phase"], e.get("referenceId")) for e in events]
+    assert phases.index(("done-single", "first")) < phases.index(("running", "second"))
+    assert events[-1]["success"] is True
+    assert scheduler.snapshot()["totals"]["completed"] == 2
+
+
+def test_cancelled_warm_acquire_releases_late_lease(monkeypatch):
+    gate = threading.Event()
+    released = threading.Event()
+
+    def slow_acquire(root, headed):
+        gate.wait(5)
+        return {"PW_TEST_CONNECT_WS_ENDPOINT": "ws://127.0.0.1:1/x"}, released.set
+
+    monkeypatch.setattr(trial_stream, "acquire_warm_runner_env", slow_acquire)
+    spec = TrialRunSpec(label="warm", cmd=[sys.executable, "-c", "print(1)"], cwd=".", warm_root=".")
+
+    async def scenario():
+        gen = stream_trial_runs([spec])
+        task = asyncio.ensure_future(gen.__anext__())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await gen.aclose()
+        gate.set()
+        for _ in range(50):
+            if released.is_set():
+                break
+            await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert released.is_set()
@@ -0,0 +1,120 @@
+import sys
+import threading
+import time
+
+from app import warm_browser
+from app.trial_spec_adapter import warm_runner_env
+from app.warm_browser import WarmBrowserPool, WarmBrowserServer
+
+
+class FakeServer:
+    started = 0
+
+    def __init__(self, root, headed):
+        self.root, self.headed = root, headed
+        self.uses = self.active = 0
+        self.last_used = 0.0
+        self.endpoint = None
+        self.alive = True
+
+    def start(self):
+        FakeServer.started += 1
+        self.endpoint = f"ws://127.0.0.1:9/{FakeServer.started}"
+        return self.endpoint
+
+    def healthy(self):
+        return self.alive
+
+    def stop(self):
+        self.alive = False
+        self.endpoint = None
+
+
+def _pool(**kwargs):
+    pool = WarmBrowserPool(enabled=True, **kwargs)
+    pool._new_server = lambda root, headed: FakeServer(root, headed)
+    pool._ensure_reaper = lambda: None
+    return pool
+
+
+def test_disabled_pool_falls_back_to_cold(tmp_path):
+    assert WarmBrowserPool(enabled=False).acquire(tmp_path, True) is None
+
+
+def test_reuse_then_recycle_after_cap(tmp_path):
+    pool = _pool(max_reuse=2)
+    first = pool.acquire(tmp_path, True)
+    first.release()
+    second = pool.acquire(tmp_path, True)
+    assert second.endpoint == first.endpoint
+    assert second.env == {"PW_TEST_CONNECT_WS_ENDPOINT": first.endpoint}
+    second.release()
+    third = pool.acquire(tmp_path, True)
+    assert third.endpoint != first.endpoint
+    # headed and headless runs get separate servers
+    assert pool.acquire(tmp_path, False).endpoint != third.endpoint
+
+
+def test_unhealthy_server_replaced_and_idle_reaped(tmp_path):
+    pool = _pool(idle_timeout=0)
+    lease = pool.acquire(tmp_path, True)
+    lease.release()
+    pool._servers[(str(tmp_path.resolve()), True)].alive = False
+    replacement = pool.acquire(tmp_path, True)
+    assert replacement.endpoint != lease.endpoint
+    assert pool.reap_idle() == 0  # still leased
+    replacement.release()
+    assert pool.reap_idle() == 1
+    assert pool.status() == []
+
+
+def test_cold_start_runs_outside_the_pool_lock(tmp_path):
+    gate = threading.Event()
+
+    class SlowServer(FakeServer):
+        def start(self):
+            gate.wait(5)
+            return super().start()
+
+    pool = _pool()
+    pool._new_server = lambda root, headed: SlowServer(root, headed)
+    leases = []
+    workers = [threading.Thread(target=lambda: leases.append(pool.acquire(tmp_path, True))) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.1)
+    # status() and release of other keys must not wait for the start in progress
+    started = time.monotonic()
+    assert pool.status() == []
+    assert time.monotonic() - started < 1
+    before = FakeServer.started
+    gate.set()
+    for worker in workers:
+        worker.join(5)
+    assert FakeServer.started == before + 1
+    assert len({lease.endpoint for lease in leases}) == 1
+    assert pool.status()[0]["active"] == 3
+
+
+def test_waiter_falls_back_to_cold_when_start_stalls(tmp_path, monkeypatch):
+    monkeypatch.setattr(warm_browser, "START_TIMEOUT", -14.9)
+    pool = _pool()
+    key = (str(tmp_path.resolve()), True)
+    pool._starting[key] = warm_browser.Future()  # another caller's start that never settles
+    assert pool.acquire(tmp_path, True) is None
+
+
+def test_real_server_process_lifecycle(tmp_path, monkeypatch):
+    script = "import time; print('Listening on ws://127.0.0.1:1/abc', flush=True); time.sleep(60)"
+    monkeypatch.setattr(warm_browser, "_launch_server_command", lambda root, browser, cfg: [sys.executable, "-c", script])
+    server = WarmBrowserServer(tmp_path, headed=False)
+    assert server.start() == "ws://127.0.0.1:1/abc"
+    proc = server._proc
+    server.stop()
+    assert proc.poll() is not None
+
+
+def test_adapter_env_empty_when_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(warm_browser.warm_browser_pool, "enabled", False)
+    with warm_runner_env(tmp_path, True) as env:
+        assert env == {}
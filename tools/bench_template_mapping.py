@@ -0,0 +1,66 @@
+"""Benchmark map_llm_to_template on large synthetic suites.
+
+Usage: python tools/bench_template_mapping.py [cases] [repeats]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.test_case_generator import map_llm_to_template  # noqa: E402
+
+TEMPLATES = {
+    "generic": ["Test ID", "Scenario", "Case Type", "Preconditions", "Test Steps", "Expected Result",
+                "Test Data", "Priority", "Tags", "Notes", "Comments"],
+    "detailed-flow": ["SL", "Action", "Navigation Steps", "Key Data Element Examples", "Expected Results"],
+}
+STEPS = ["Navigate to Suppliers", "Enter supplier name", "Select supplier type", "Click Save",
+         "Verify confirmation message is displayed", "Enter tax registration"]
+ACTIONS = ["", "", "Navigate", "Enter", "Click"]
+
+
+def synthetic_cases(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"TC{idx:05d}",
+            "title": f"Create supplier variant {idx}",
+            "type": "Functional",
+            "preconditions": ["User is logged in", "Supplier module enabled"],
+            "step_details": [
+                {"action": rng.choice(ACTIONS), "navigation": rng.choice(STEPS),
+                 "data": rng.choice(["", "Supplier=ACME"]), "expected": rng.choice(["", "Saved"])}
+                for _ in range(rng.randint(4, 12))
+            ],
+            "expected": "Supplier is created",
+            "data": {"Supplier": "ACME", "Site": {"code": "S1"}},
+            "priority": "High",
+            "tags": ["supplier", "regression"],
+            "assumptions": ["Test data is seeded"],
+        }
+        for idx in range(count)
+    ]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    cases = synthetic_cases(count)
+    for name, columns in TEMPLATES.items():
+        template_df = pd.DataFrame(columns=columns)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            mapped = map_llm_to_template(cases, template_df)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{name:14s} {count} cases -> {len(mapped)} rows: best {best * 1000:.1f} ms "
+              f"({best / count * 1e6:.1f} us/case)")
+
+
+if __name__ == "__main__":
+    main()